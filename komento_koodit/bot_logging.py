@@ -0,0 +1,169 @@
+"""Jonopohjainen lokitus: kutsuja vain lisää tietueen jonoon.
+
+Lähetyskääre, on_message, haut ja postaajat tulostivat ``print``-kutsuilla
+suoraan stdoutiin (start_bot.batissa ohjattuna tiedostoon), eli jokainen
+rivi oli synkronista I/O:ta tapahtumasilmukassa. ``setup`` asettaa
+juuriloggerille ``QueueHandler``in; varsinainen kirjoitus konsoliin ja
+kiertävään tiedostoon tapahtuu ``QueueListener``-taustasäikeessä, joten
+lokikutsu maksaa mikrosekunteja eikä koskaan jää odottamaan levyä.
+
+Tiedostoon (``LOG_DIR``/bot.log, kierto ``LOG_MAX_BYTES`` /
+``LOG_BACKUP_COUNT``) kirjoitetaan JSON-rivejä: aika, taso, logger,
+viesti sekä kutsujan ``extra``-kentät, esim.
+
+    logger.info("komento valmis", extra={"command": "viikkarit", "ms": 12.3})
+
+Konsoliin tulee sama ihmisluettavana (``LOG_FMT``), extra-kentät
+``avain=arvo``-muodossa. Mittaus: scripts/bench_logging.py.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+
+LOG_FMT = "%(asctime)s %(levelname)-8s %(name)s %(message)s"
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+
+# LogRecordin vakioattribuutit; kaikki muu on kutsujan extra-kenttiä.
+_STANDARD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _setting(name: str, default: Any) -> Any:
+    if settings is not None and getattr(settings, name, None) not in (None, ""):
+        return getattr(settings, name)
+    return os.environ.get(name, default)
+
+
+def extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {k: v for k, v in record.__dict__.items() if k not in _STANDARD_ATTRS and not k.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    """Yksi JSON-olio per rivi (tiedostoloki)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        out.update(extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """LOG_FMT + extra-kentät avain=arvo-pareina."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = extra_fields(record)
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Kuten QueueHandler, mutta ei muotoile kutsujan säikeessä.
+
+    Oletus-``prepare`` ajaa muotoilijan (aikaleima, poikkeuksen jäljitys)
+    kutsujan säikeessä; tässä vain viesti kiinnitetään merkkijonoksi, jotta
+    argumenttien myöhemmät muutokset eivät näy lokissa.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Jäljitys muotoillaan nyt: traceback-oliot eivät elä säikeestä toiseen luotettavasti.
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup(level: Optional[str] = None, log_dir: Optional[str] = None, console: bool = True) -> logging.handlers.QueueListener:
+    """Ota jonolokitus käyttöön (kerran per prosessi); palauttaa kuuntelijan."""
+
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+        level_name = str(level or _setting("LOG_LEVEL", "INFO")).upper()
+        log_dir = log_dir or str(_setting("LOG_DIR", "logs"))
+        if not os.path.isabs(log_dir):
+            log_dir = os.path.join(ROOT, log_dir)
+
+        handlers = []
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, "bot.log"),
+                maxBytes=int(_setting("LOG_MAX_BYTES", 5 * 1024 * 1024)),
+                backupCount=int(_setting("LOG_BACKUP_COUNT", 5)),
+                encoding="utf-8",
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        except Exception as e:
+            print(f"Lokitiedostoa ei voitu avata ({log_dir}): {e}")
+        if console:
+            stream = logging.StreamHandler(sys.stdout)
+            stream.setFormatter(ConsoleFormatter(LOG_FMT))
+            handlers.append(stream)
+
+        # Muotoilut eivät käytä tiedostonimeä, riviä tai prosessitietoja: ohitetaan
+        # niiden keruu tietueen luonnissa (logging-HOWTO:n optimointiohje).
+        logging._srcfile = None  # type: ignore[attr-defined]
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        root = logging.getLogger()
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        root.addHandler(_QueueHandler(q))
+        root.setLevel(getattr(logging, level_name, logging.INFO))
+
+        _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown)
+        return _listener
+
+
+def shutdown() -> None:
+    """Tyhjennä jono ja pysäytä kirjoitussäie (atexit)."""
+
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+        for h in listener.handlers:
+            try:
+                h.flush()
+                h.close()
+            except Exception:
+                pass
@@ -16,6 +16,12 @@ try:
 except Exception:
     data_store = None
 
+try:
+    from .single_flight import coalesce
+except Exception:  # ajettu suoraan skriptinä
+    def coalesce(*_args, **_kwargs):
+        return lambda func: func
+
 USER_AGENT = {'User-Agent': 'Mozilla/5.0 (metrixbot-capacity)'}
 
 logger = logging.getLogger(__name__)
@@ -978,9 +984,17 @@ def _extract_registered_and_limit(text: str, source_url: str = ''):
     return (None, None)
 
 
+def _capacity_found(res) -> bool:
+    # Virhetuloksia (http-virhe, poikkeus) ei jätetä välimuistiin.
+    return isinstance(res, dict) and any(res.get(k) is not None for k in ('registered', 'limit', 'remaining'))
+
+
+@coalesce('capacity', cache_if=_capacity_found)
 def check_competition_capacity(url: str, timeout=15):
     """Fetch the competition page and attempt to determine remaining capacity.
     Returns a dict with keys: registered, limit, remaining (all ints or None).
+
+    Samanaikaiset kutsut samalle URL:lle jakavat yhden haun (single_flight).
     """
     try:
         r = requests.get(url, headers=USER_AGENT, timeout=timeout)
@@ -0,0 +1,290 @@
+"""Seuran pelaajien tulostaulu (!seura rating / kierrokset / vire).
+
+Pitää välimuistissa jokaisen tunnetun seurapelaajan ratingin,
+kierrosmäärän ja viimeaikaisen vireen. Jäsenet kerätään:
+  - player_store-tiedostosta (käyttäjien tallentamat MetrixID:t)
+  - club_successes-havainnoista (!tulokset-ajojen seuratunnistus)
+  - metrix_ratings-kategoriasta (!metrix-hauissa nähdyt seurapelaajat)
+
+Taustatyö päivittää vain vanhentuneet merkinnät rajatulla rinnakkaisuudella
+(``max_workers`` pelaajaa kerrallaan, kunkin pelaajan pyynnöt peräkkäin
+yhdellä kirjautumisella), joten !seura-komento voi vastata suoraan välimuistista ilman yhtään
+HTTP-kutsua.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+try:
+    from .data_store import load_category, save_category
+except Exception:  # pragma: no cover - optional
+    load_category = None  # type: ignore[assignment]
+    save_category = None  # type: ignore[assignment]
+
+try:
+    from . import metrix_stats
+except Exception:  # pragma: no cover
+    metrix_stats = None  # type: ignore[assignment]
+
+try:
+    from . import metrix_analytics
+except Exception:  # pragma: no cover
+    metrix_analytics = None  # type: ignore[assignment]
+
+try:
+    from .player_store import list_metrix_ids
+except Exception:  # pragma: no cover
+    list_metrix_ids = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_CATEGORY = "club_leaderboard"
+CLUB_SUCCESS_CATEGORY = "club_successes"
+
+CLUB_NAME = getattr(settings, "CLUB_NAME", "Lakeus Disc Golf") if settings is not None else "Lakeus Disc Golf"
+DEFAULT_WORKERS = int(getattr(settings, "CLUB_LEADERBOARD_WORKERS", 3)) if settings is not None else 3
+DEFAULT_MAX_AGE_HOURS = int(getattr(settings, "CLUB_LEADERBOARD_MAX_AGE_HOURS", 12)) if settings is not None else 12
+
+# Tallennetaan välitulokset näin monen päivitetyn pelaajan välein, jotta
+# keskeytynyt ajo ei hukkaa jo haettuja tietoja.
+SAVE_EVERY = 10
+
+# Komennon alakomento → (kentän nimi, otsikko)
+METRICS: Dict[str, Tuple[str, str]] = {
+    "rating": ("rating", "Rating"),
+    "kierrokset": ("total_rounds", "Kierrokset"),
+    "vire": ("form", "Vire (30 pv)"),
+}
+
+_REFRESH_LOCK = threading.Lock()
+_CACHE_LOCK = threading.Lock()
+
+
+def _is_club_member(clubs: Any) -> bool:
+    target = CLUB_NAME.strip().lower()
+    for c in clubs or []:
+        try:
+            if target in str(c).lower():
+                return True
+        except Exception:
+            continue
+    return False
+
+
+def load_leaderboard() -> Dict[str, Dict[str, Any]]:
+    """Lataa tulostaulun välimuisti muodossa {metrix_id: merkintä}."""
+
+    if load_category is None:
+        return {}
+    try:
+        data = load_category(LEADERBOARD_CATEGORY)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_leaderboard(data: Dict[str, Dict[str, Any]]) -> None:
+    if save_category is None:
+        return
+    try:
+        save_category(LEADERBOARD_CATEGORY, data)
+    except Exception:
+        pass
+
+
+def collect_member_ids() -> Dict[str, str]:
+    """Kerää tunnetut MetrixID:t ja niiden lähde ("pelaaja", "havainto", "metrix")."""
+
+    members: Dict[str, str] = {}
+
+    if list_metrix_ids is not None:
+        try:
+            for mid in list_metrix_ids().keys():
+                members.setdefault(str(mid), "pelaaja")
+        except Exception:
+            pass
+
+    if load_category is not None:
+        try:
+            successes = load_category(CLUB_SUCCESS_CATEGORY)
+            if isinstance(successes, dict):
+                for mid in successes.keys():
+                    if str(mid).strip():
+                        members.setdefault(str(mid).strip(), "havainto")
+        except Exception:
+            pass
+
+        if metrix_analytics is not None:
+            try:
+                seen = load_category(metrix_analytics.RATINGS_CATEGORY)
+                if isinstance(seen, dict):
+                    for mid, entry in seen.items():
+                        if isinstance(entry, dict) and _is_club_member(entry.get("clubs")):
+                            members.setdefault(str(mid), "metrix")
+            except Exception:
+                pass
+
+    return members
+
+
+def _is_stale(entry: Optional[Dict[str, Any]], max_age: timedelta) -> bool:
+    if not entry:
+        return True
+    try:
+        updated = datetime.fromisoformat(str(entry.get("updated")))
+    except Exception:
+        return True
+    return datetime.now() - updated > max_age
+
+
+def _build_entry(metrix_id: str, source: str, session: Any = None) -> Optional[Dict[str, Any]]:
+    """Hae yhden pelaajan statsit ja muodosta tulostaulun merkintä.
+
+    Pyynnöt tehdään peräkkäin tässä säikeessä, jotta samanaikaisia hakuja on
+    enintään poolin koko; ``session`` on kopio jaetusta kirjautumisesta.
+    """
+
+    if metrix_stats is None:
+        return None
+    stats = metrix_stats.fetch_player_stats(metrix_id, session=session, concurrent=False)
+    if stats is None:
+        return None
+
+    form: Optional[float] = None
+    trend: Optional[float] = None
+    if metrix_analytics is not None:
+        try:
+            analytics = metrix_analytics.analyze_curve(stats.rating_curve)
+        except Exception:
+            analytics = None
+        if analytics is not None:
+            form = analytics.delta_30d
+            trend = analytics.slope_per_30d
+    if form is None and stats.rating_change is not None:
+        form = float(stats.rating_change)
+
+    return {
+        "name": stats.name,
+        "rating": stats.rating,
+        "rating_change": stats.rating_change,
+        "total_rounds": stats.total_rounds,
+        "competitions": stats.competitions_count,
+        "form": round(form, 1) if form is not None else None,
+        "trend": round(trend, 2) if trend is not None else None,
+        "clubs": list(stats.clubs or []),
+        "member": _is_club_member(stats.clubs),
+        "source": source,
+        "updated": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def refresh_leaderboard(
+    max_workers: Optional[int] = None,
+    max_age_hours: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, int]:
+    """Päivitä vanhentuneet tulostaulun merkinnät rinnakkain.
+
+    Vain merkinnät, joita ei ole tai jotka ovat vanhempia kuin
+    ``max_age_hours``, haetaan uudelleen (vanhimmat ensin). Samanaikaisia
+    hakuja on enintään ``max_workers``. Jos päivitys on jo käynnissä,
+    palataan heti.
+
+    Palauttaa yhteenvedon {"members", "stale", "updated", "failed"}.
+    """
+
+    summary = {"members": 0, "stale": 0, "updated": 0, "failed": 0}
+    if not _REFRESH_LOCK.acquire(blocking=False):
+        return summary
+
+    try:
+        workers = max(1, int(max_workers or DEFAULT_WORKERS))
+        max_age = timedelta(hours=max_age_hours if max_age_hours is not None else DEFAULT_MAX_AGE_HOURS)
+
+        members = collect_member_ids()
+        data = load_leaderboard()
+        summary["members"] = len(members)
+
+        stale = [mid for mid in members if _is_stale(data.get(mid), max_age)]
+        stale.sort(key=lambda mid: str((data.get(mid) or {}).get("updated") or ""))
+        if limit is not None:
+            stale = stale[: max(0, int(limit))]
+        summary["stale"] = len(stale)
+        if not stale:
+            return summary
+
+        # Kirjaudutaan kerran; jokainen haku saa oman kopion sessiosta.
+        base_session = metrix_stats._create_session() if metrix_stats is not None else None
+        if base_session is None:
+            summary["failed"] = len(stale)
+            return summary
+
+        started = time.time()
+        done_since_save = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seura-refresh") as executor:
+            futures = {
+                executor.submit(_build_entry, mid, members[mid], metrix_stats._clone_session(base_session)): mid
+                for mid in stale
+            }
+            for fut in as_completed(futures):
+                mid = futures[fut]
+                try:
+                    entry = fut.result()
+                except Exception:
+                    entry = None
+                if entry is None:
+                    summary["failed"] += 1
+                    continue
+                with _CACHE_LOCK:
+                    data[mid] = entry
+                summary["updated"] += 1
+                done_since_save += 1
+                if done_since_save >= SAVE_EVERY:
+                    _save_leaderboard(data)
+                    done_since_save = 0
+
+        _save_leaderboard(data)
+        logger.info(
+            "Seuran tulostaulu päivitetty: %d/%d (%d epäonnistui) %.1f s",
+            summary["updated"], summary["stale"], summary["failed"], time.time() - started,
+        )
+        return summary
+    finally:
+        _REFRESH_LOCK.release()
+
+
+def is_refreshing() -> bool:
+    return _REFRESH_LOCK.locked()
+
+
+def ranking(metric: str = "rating", top_n: int = 10) -> List[Dict[str, Any]]:
+    """Palauta seurapelaajat järjestettynä välimuistista (ei HTTP-kutsuja).
+
+    Jokaiseen palautettuun merkintään lisätään avain "metrix_id".
+    """
+
+    field_name = METRICS.get(metric, METRICS["rating"])[0]
+    rows: List[Dict[str, Any]] = []
+    for mid, entry in load_leaderboard().items():
+        if not isinstance(entry, dict) or not entry.get("member"):
+            continue
+        value = entry.get(field_name)
+        if not isinstance(value, (int, float)):
+            continue
+        row = dict(entry)
+        row["metrix_id"] = mid
+        rows.append(row)
+
+    rows.sort(key=lambda r: float(r.get(field_name) or 0), reverse=True)
+    return rows[: max(1, int(top_n))]
+
@@ -0,0 +1,423 @@
+"""Komentorekisteri: komentojen määrittely, laiska lataus ja välikerrokset.
+
+Jokainen komento kuvataan ``Command``-tietueena (nimi, aliakset, moduuli
+ja käsittelijä, ylläpitäjärajaus, cooldown, välimuistipolitiikka).
+``dispatch`` hakee komennon sanakirjasta ja ajaa sen välikerrosketjun
+läpi:
+
+    ajanotto -> virheraportointi -> ylläpitäjärajaus -> cooldown
+        -> vastausvälimuisti -> käsittelijä
+
+Ajanotto on ainoa paikka, jossa komentojen kesto mitataan (``metrics``).
+Uuden komennon lisääminen on yksi rivi ``COMMANDS``-listaan; välikerroksen
+lisääminen on yksi funktio ``MIDDLEWARE``-listaan.
+
+Komentomoduulit ladataan vasta ensimmäisellä käyttökerralla
+(tapahtumasilmukan ulkopuolella, jotta gatewayn heartbeat ei jumitu), ja
+``prewarm`` lataa loput taustasäikeessä ``on_ready``-tapahtuman jälkeen.
+Latausajat näkyvät ``!admin status``-tulosteessa ja
+``scripts/measure_command_imports.py``-skriptissä.
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from . import metrics, response_cache
+from .response_cache import CachePolicy
+
+try:
+    from . import scrape_executor
+except Exception:  # pragma: no cover
+    scrape_executor = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Command:
+    name: str
+    # Käsittelijä: moduulin funktion nimi (module + handler) tai suoraan
+    # korutiinifunktio ``func(ctx)`` (sisäänrakennetut komennot).
+    module: Optional[str] = None
+    handler: Optional[str] = None
+    func: Optional[Callable[["Context"], Awaitable[Any]]] = None
+    aliases: Tuple[str, ...] = ()
+    admin_only: bool = False
+    # Alakomennot (parts[1]), jotka vaativat ylläpitäjän, esim. !seura päivitä.
+    admin_args: Tuple[str, ...] = ()
+    # Sekunteja saman käyttäjän peräkkäisten kutsujen välillä (ylläpitäjät ohittavat).
+    cooldown: float = 0.0
+    # Vastausvälimuisti (None = ei välimuistia), ks. response_cache.
+    cache: Optional[CachePolicy] = None
+    # Lisäargumentit kuuntelijan tilasta, esim. !kiekko-valinnat.
+    extra_args: Optional[Callable[[Any], tuple]] = None
+    missing_reply: Optional[str] = None
+
+
+@dataclass
+class Context:
+    message: Any
+    parts: List[str]
+    command: Command
+    listener: Any = None
+    invoked_as: str = ""
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def channel(self) -> Any:
+        return self.message.channel
+
+    @property
+    def user_id(self) -> Optional[str]:
+        uid = getattr(getattr(self.message, "author", None), "id", None)
+        return str(uid) if uid is not None else None
+
+
+Handler = Callable[[Context], Awaitable[Any]]
+Middleware = Callable[[Context, Handler], Awaitable[Any]]
+
+
+# Kategoriat, joista !etsi- ja !kisa-haut lukevat.
+_SEARCH_CATEGORIES = (
+    "PDGA",
+    "VIIKKOKISA",
+    "DOUBLES",
+    "known_weekly_competitions",
+    "known_pdga_competitions",
+    "known_doubles_competitions",
+    "CAPACITY_SCAN_RESULTS",
+)
+
+COMMANDS: List[Command] = [
+    Command("admin", "commands_admin", "handle_admin", admin_only=True),
+    Command("pdga", "commands_pdga", "handle_pdga", cooldown=5, cache=CachePolicy(3600)),
+    Command("metrix", "commands_metrix", "handle_metrix", cooldown=5),
+    Command(
+        "viikkarit", "commands_viikkarit", "handle_viikkarit",
+        cache=CachePolicy(300, depends_on=("VIIKKOKISA", "VIIKKARIT_SEUTU", "VIIKKARIT_SUOMI")),
+    ),
+    Command("tulokset", "commands_tulokset", "handle_tulokset", cooldown=5),
+    Command("rek", "commands_rek", "handle_rek"),
+    Command("etsi", "commands_etsi", "handle_etsi", cooldown=3, cache=CachePolicy(600, depends_on=_SEARCH_CATEGORIES)),
+    Command("kisa", "commands_etsi", "handle_kisa", cooldown=3),
+    Command(
+        "kiekko", "commands_disc", "handle_kiekko", cooldown=3,
+        extra_args=lambda listener: (listener.pending_disc_choices,),
+    ),
+    Command("ohje", "commands_help", "handle_help", aliases=("help",), missing_reply="Ohje ei ole käytettävissä."),
+    Command(
+        "seura", "commands_tulokset", "handle_seura",
+        admin_args=("päivitä", "paivita"),
+        cache=CachePolicy(1800, depends_on=("club_successes", "club_leaderboard"), skip_args=("päivitä", "paivita")),
+    ),
+    Command(
+        "paikat", "commands_spots", "handle_spots", cooldown=30,
+        cache=CachePolicy(300, depends_on=("CAPACITY_ALERTS", "CAPACITY_SCAN_RESULTS")),
+    ),
+]
+
+# Yleisimmät komennot ladataan ensin.
+PREWARM_ORDER = (
+    "commands_help",
+    "commands_viikkarit",
+    "commands_tulokset",
+    "commands_etsi",
+    "commands_spots",
+    "commands_pdga",
+    "commands_metrix",
+    "commands_disc",
+    "commands_rek",
+    "commands_admin",
+)
+
+_lock = threading.Lock()
+# nimi tai alias -> Command
+_registry: Dict[str, Command] = {}
+_modules: Dict[str, Any] = {}
+# moduuli -> (latausaika sekunteina, ladattu mistä: 'komento' / 'esilataus')
+_timings: Dict[str, Tuple[float, str]] = {}
+_errors: Dict[str, str] = {}
+_prewarm_started = False
+# (komento, käyttäjä) -> edellisen kutsun aika (monotonic)
+_last_call: Dict[Tuple[str, str], float] = {}
+
+
+def register(command: Command) -> Command:
+    with _lock:
+        for key in (command.name,) + tuple(command.aliases):
+            _registry[key.lower()] = command
+    return command
+
+
+def lookup(name: str) -> Optional[Command]:
+    return _registry.get((name or "").lower())
+
+
+def commands() -> List[Command]:
+    seen: Dict[str, Command] = {}
+    for cmd in list(_registry.values()):
+        seen.setdefault(cmd.name, cmd)
+    return list(seen.values())
+
+
+for _cmd in COMMANDS:
+    register(_cmd)
+
+
+# --- laiska lataus -------------------------------------------------------------
+
+
+def module_name(command: str) -> Optional[str]:
+    cmd = lookup(command)
+    return cmd.module if cmd else None
+
+
+def is_loaded(module: str) -> bool:
+    return module in _modules
+
+
+def load_module(module: str, source: str = "komento") -> Any:
+    """Importtaa komentomoduuli (kerran) ja kirjaa latausaika.
+
+    Epäonnistunut lataus ei jää välimuistiin: seuraava käyttökerta yrittää
+    uudelleen. Virhe nostetaan kutsujalle.
+    """
+
+    mod = _modules.get(module)
+    if mod is not None:
+        return mod
+    start = time.perf_counter()
+    try:
+        mod = importlib.import_module(f"{__package__}.{module}")
+    except Exception as e:
+        with _lock:
+            _errors[module] = f"{type(e).__name__}: {e}"
+        raise
+    elapsed = time.perf_counter() - start
+    with _lock:
+        if module not in _modules:
+            _modules[module] = mod
+            _timings[module] = (elapsed, source)
+        _errors.pop(module, None)
+    return _modules[module]
+
+
+async def resolve(command: Command) -> Optional[Callable[..., Any]]:
+    """Palauta komennon moduulifunktio tai None (puuttuva moduuli tai funktio).
+    Ensimmäinen lataus ajetaan säiepoolissa."""
+
+    if command.module is None or command.handler is None:
+        return None
+    mod = _modules.get(command.module)
+    if mod is None:
+        try:
+            loop = asyncio.get_running_loop()
+            mod = await loop.run_in_executor(None, load_module, command.module)
+        except Exception as e:
+            logger.error("moduulin %s lataus epäonnistui: %s", command.module, e)
+            return None
+    return getattr(mod, command.handler, None)
+
+
+async def get_handler(name: str) -> Optional[Callable[..., Any]]:
+    cmd = lookup(name)
+    return await resolve(cmd) if cmd is not None else None
+
+
+def get_attr(module: str, attr: str) -> Optional[Any]:
+    """Hae attribuutti jo ladatusta moduulista (tai lataa se synkronisesti)."""
+
+    try:
+        return getattr(load_module(module), attr, None)
+    except Exception:
+        return None
+
+
+def prewarm(modules: Optional[Tuple[str, ...]] = None) -> None:
+    """Lataa komentomoduulit taustasäikeessä (kerran per prosessi)."""
+
+    global _prewarm_started
+    with _lock:
+        if _prewarm_started:
+            return
+        _prewarm_started = True
+
+    def _run() -> None:
+        start = time.perf_counter()
+        loaded = 0
+        for module in modules or PREWARM_ORDER:
+            if module in _modules:
+                continue
+            try:
+                load_module(module, source="esilataus")
+                loaded += 1
+            except Exception as e:
+                logger.error("esilataus: %s epäonnistui: %s", module, e)
+        logger.info("esiladattu %d moduulia", loaded, extra={"ms": round((time.perf_counter() - start) * 1000)})
+
+    threading.Thread(target=_run, name="command-prewarm", daemon=True).start()
+
+
+def import_timings() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        out: Dict[str, Dict[str, Any]] = {
+            m: {"seconds": t, "source": src} for m, (t, src) in _timings.items()
+        }
+        for m, err in _errors.items():
+            out.setdefault(m, {})["error"] = err
+        return out
+
+
+def format_import_timings() -> str:
+    """Lyhyt taulukko latausajoista ``!admin status``-tulosteeseen."""
+
+    timings = import_timings()
+    pending = [m for m in PREWARM_ORDER if m not in timings]
+    lines = ["Komentomoduulit (latausaika):"]
+    for m, info in sorted(timings.items(), key=lambda kv: -kv[1].get("seconds", 0.0)):
+        if "error" in info:
+            lines.append(f"  {m}: VIRHE {info['error']}")
+        else:
+            lines.append(f"  {m}: {info['seconds'] * 1000:.0f} ms ({info['source']})")
+    if pending:
+        lines.append("  lataamatta: " + ", ".join(pending))
+    return "\n".join(lines)
+
+
+# --- välikerrokset -----------------------------------------------------------
+
+
+def is_admin(author: Any) -> bool:
+    try:
+        return bool(getattr(getattr(author, "guild_permissions", None), "administrator", False))
+    except Exception:
+        return False
+
+
+async def timing_middleware(ctx: Context, call_next: Handler) -> Any:
+    """Komennon kesto ja virheet; ainoa paikka, jossa latenssi mitataan (metrics)."""
+
+    error: Optional[BaseException] = None
+    try:
+        return await call_next(ctx)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        elapsed = time.perf_counter() - ctx.started
+        metrics.record_command(ctx.command.name, elapsed, error)
+        logger.info(
+            "!%s %s", ctx.command.name, "ok" if error is None else "virhe",
+            extra={"command": ctx.command.name, "ms": round(elapsed * 1000, 1), "ok": error is None, "user": ctx.user_id},
+        )
+
+
+async def error_middleware(ctx: Context, call_next: Handler) -> Any:
+    """Yhteinen virheraportointi kaikille komennoille.
+
+    Hakupoolin ruuhka ja aikakatkaisu saavat kohteliaan vastauksen, muut
+    virheet lyhyen virheilmoituksen. Virhe nostetaan edelleen, jotta
+    ajanotto kirjaa sen.
+    """
+
+    try:
+        return await call_next(ctx)
+    except Exception as ex:
+        if scrape_executor is not None and isinstance(ex, scrape_executor.ScrapeError):
+            reply = ex.reply
+            logger.warning("!%s: %s", ctx.command.name, type(ex).__name__, extra={"command": ctx.command.name})
+        else:
+            reply = f"Virhe suoritettaessa {ctx.command.name}-komentoa: {ex}"
+            logger.exception("!%s epäonnistui", ctx.command.name, extra={"command": ctx.command.name})
+        try:
+            await ctx.channel.send(reply)
+        except Exception:
+            logger.exception("virhevastauksen lähetys epäonnistui: %s", ex)
+        raise
+
+
+async def admin_middleware(ctx: Context, call_next: Handler) -> Any:
+    cmd = ctx.command
+    sub = str(ctx.parts[1]).strip().lower() if len(ctx.parts) >= 2 else ""
+    if cmd.admin_only and not is_admin(getattr(ctx.message, "author", None)):
+        await ctx.channel.send(f"{cmd.name.capitalize()}-komennon käyttö vaatii ylläpitäjäoikeudet.")
+        return None
+    if sub and sub in cmd.admin_args and not is_admin(getattr(ctx.message, "author", None)):
+        await ctx.channel.send(f"!{cmd.name} {sub} vaatii ylläpitäjäoikeudet.")
+        return None
+    return await call_next(ctx)
+
+
+async def cooldown_middleware(ctx: Context, call_next: Handler) -> Any:
+    cooldown = ctx.command.cooldown
+    user = ctx.user_id
+    if cooldown > 0 and user is not None and not is_admin(getattr(ctx.message, "author", None)):
+        key = (ctx.command.name, user)
+        now = time.monotonic()
+        with _lock:
+            last = _last_call.get(key)
+            if last is not None and now - last < cooldown:
+                wait = cooldown - (now - last)
+            else:
+                wait = 0.0
+                _last_call[key] = now
+                # Vanhat merkinnät pois, ettei sanakirja kasva rajatta.
+                if len(_last_call) > 1000:
+                    for k in [k for k, t in _last_call.items() if now - t > 3600]:
+                        del _last_call[k]
+        if wait > 0:
+            await ctx.channel.send(f"Odota {max(1, round(wait))} s ennen seuraavaa !{ctx.command.name}-komentoa.")
+            return None
+    return await call_next(ctx)
+
+
+async def invoke(ctx: Context) -> Any:
+    """Ketjun viimeinen lenkki: aja komennon käsittelijä."""
+
+    cmd = ctx.command
+    if cmd.func is not None:
+        return await cmd.func(ctx)
+    handler = await resolve(cmd)
+    if handler is None:
+        await ctx.channel.send(cmd.missing_reply or f"Virhe: {cmd.name}-komentoa ei voi suorittaa (moduuli puuttuu).")
+        return None
+    extra = cmd.extra_args(ctx.listener) if cmd.extra_args is not None else ()
+    return await handler(ctx.message, ctx.parts, *extra)
+
+
+MIDDLEWARE: List[Middleware] = [
+    timing_middleware,
+    error_middleware,
+    admin_middleware,
+    cooldown_middleware,
+    response_cache.cache_middleware,
+]
+
+
+def _chain(middleware: List[Middleware], endpoint: Handler) -> Handler:
+    handler = endpoint
+    for mw in reversed(middleware):
+        handler = (lambda m, nxt: (lambda ctx: m(ctx, nxt)))(mw, handler)
+    return handler
+
+
+async def dispatch(message: Any, parts: List[str], name: str, listener: Any = None) -> bool:
+    """Aja komento välikerrosten läpi. Palauttaa False tuntemattomalle komennolle."""
+
+    cmd = lookup(name)
+    if cmd is None:
+        return False
+    ctx = Context(message=message, parts=parts, command=cmd, listener=listener, invoked_as=name)
+    try:
+        await _chain(MIDDLEWARE, invoke)(ctx)
+    except Exception:
+        # Virheestä on jo vastattu ja se on kirjattu (error/timing_middleware).
+        pass
+    return True
+
@@ -17,6 +17,33 @@ try:
 except Exception:  # pragma: no cover
     settings = None  # type: ignore[assignment]
 
+try:
+    from . import scheduler as job_scheduler
+except Exception:  # pragma: no cover
+    job_scheduler = None  # type: ignore[assignment]
+
+try:
+    from . import scrape_executor
+except Exception:  # pragma: no cover
+    scrape_executor = None  # type: ignore[assignment]
+
+try:
+    from . import single_flight
+except Exception:  # pragma: no cover
+    single_flight = None  # type: ignore[assignment]
+
+try:
+    from . import command_registry
+except Exception:  # pragma: no cover
+    command_registry = None  # type: ignore[assignment]
+
+try:
+    from . import metrics
+except Exception:  # pragma: no cover
+    metrics = None  # type: ignore[assignment]
+
+from . import embed_layout
+
 async def _require_admin(message: Any) -> bool:
     """Palauta True jos lähettäjällä on ylläpitäjäoikeudet, muuten vastaa virheellä."""
     author = getattr(message, "author", None)
@@ -94,6 +121,10 @@ async def handle_admin(message: Any, parts: Any) -> None:
       !admin status
         - Näytä keskeiset asetukset (päivittäisen raportin kellonaika, kapasiteettitarkistusväli, kanavat).
 
+      !admin stats [dump]
+        - Komentojen kestot (p50/p95/p99), virheet, hakujen jonotus- ja HTTP-ajat sekä
+          välimuistien osumat; ``dump`` kirjoittaa mittarit myös tiedostoon.
+
       !admin aika HH:MM
       !admin time HH:MM
         - Muuta päivittäisen kilpailuraportin kellonaikaa (24h-kello).
@@ -114,6 +145,7 @@ async def handle_admin(message: Any, parts: Any) -> None:
         help_text = (
             "Admin-komennon käyttö:\n"
             "!admin status - näytä nykyiset asetukset\n"
+            "!admin stats [dump] - komentojen kestot, virheet ja välimuistit\n"
             "!admin aika HH:MM - muuta päivittäisen raportin kellonaikaa\n"
             "!admin thread <pdga|viikkarit|rek|discs|capacity> <kanava_id> - muuta kohdekanavaa"
         )
@@ -167,6 +199,20 @@ async def handle_admin(message: Any, parts: Any) -> None:
             f"- PDGA-kiekkojen uutuudet: {discs_thread}\n"
             f"- Kapasiteetti-ilmoitukset: {capacity_thread}"
         )
+        # Ajastimen työtaulukko (edellinen ajo, kesto, tila, seuraava ajo)
+        if job_scheduler is not None:
+            try:
+                msg += "\n\nAjastetut työt:\n```\n" + job_scheduler.format_status() + "\n```"
+            except Exception:
+                pass
+        if scrape_executor is not None:
+            msg += "\n" + scrape_executor.format_status()
+        if single_flight is not None:
+            sf = single_flight.get_group().stats()
+            msg += f"\nYhdistetyt haut: {sf['shared']} jaettua, {sf['hits']} välimuistista, {sf['misses']} haettua"
+        if command_registry is not None:
+            msg += "\n" + command_registry.response_cache.format_stats()
+            msg += "\n```\n" + command_registry.format_import_timings() + "\n```"
 
         # Lähetä asetukset embedded-viestinä, jos mahdollista.
         try:
@@ -180,6 +226,21 @@ async def handle_admin(message: Any, parts: Any) -> None:
             await channel.send(msg)
         return
 
+    # --- !admin stats [dump] ---
+    if sub in ("stats", "tilastot"):
+        if metrics is None:
+            await channel.send("Mittarit eivät ole käytettävissä.")
+            return
+        data = metrics.snapshot_data()
+        report = metrics.format_report(data)
+        # Koodilohkot pitävät sarakkeet tasattuina; pilkotaan 2000 merkin rajaan.
+        for part in embed_layout.split_text(report, limit=embed_layout.CONTENT_LIMIT - 8):
+            await channel.send("```\n" + part + "\n```")
+        if len(parts) >= 3 and str(parts[2]).lower() == "dump":
+            path = metrics.dump(data=data)
+            await channel.send(f"Mittarit kirjoitettu: {path}" if path else "Mittaritiedoston kirjoitus epäonnistui.")
+        return
+
     # --- !admin aika HH:MM / time HH:MM ---
     if sub in ("aika", "time"):
         if len(parts) < 3:
@@ -210,6 +271,12 @@ async def handle_admin(message: Any, parts: Any) -> None:
                 setattr(orchestrator, "LAST_DIGEST_DATE", None)
             except Exception:
                 pass
+            # Laske ajastimen seuraava digestiajo uudesta kellonajasta.
+            try:
+                if job_scheduler is not None:
+                    job_scheduler.get_scheduler().reschedule("daily_digest")
+            except Exception:
+                pass
             # Päivitä myös ympäristömuuttujat, jotta seuraava käynnistys käyttää samaa aikaa
             os.environ["DAILY_DIGEST_HOUR"] = str(hour)
             os.environ["DAILY_DIGEST_MINUTE"] = f"{minute:02d}"
@@ -291,4 +358,4 @@ async def handle_admin(message: Any, parts: Any) -> None:
         return
 
     # Tuntematon alakomento
-    await channel.send("Tuntematon admin-alakomento. Käytä: status, aika, thread.")
+    await channel.send("Tuntematon admin-alakomento. Käytä: status, stats, aika, thread.")
@@ -1,6 +1,4 @@
-import asyncio
 import re
-import csv
 import logging
 from typing import Any, Dict, List, Tuple
 
@@ -17,102 +15,68 @@ except Exception:  # pragma: no cover - optional dependency
     discord = None  # type: ignore[assignment]
 
 from .date_utils import normalize_date_string
+from . import scrape_executor
+
+try:
+    from . import disc_catalog
+except Exception:  # pragma: no cover - optional
+    disc_catalog = None  # type: ignore[assignment]
+
+try:
+    from . import disc_index
+except Exception:  # pragma: no cover - optional
+    disc_index = None  # type: ignore[assignment]
+
+try:
+    from . import disc_assets
+except Exception:  # pragma: no cover - optional
+    disc_assets = None  # type: ignore[assignment]
+
+try:
+    from . import disc_similarity
+except Exception:  # pragma: no cover - optional
+    disc_similarity = None  # type: ignore[assignment]
 
 
 logger = logging.getLogger(__name__)
 
 
 PDGA_DISC_URL = "https://www.pdga.com/technical-standards/equipment-certification/all"
-PDGA_DISCS_CSV_URL = "https://www.pdga.com/technical-standards/equipment-certification/discs/export"
 PDGA_DISCS_DETAIL_BASE = "https://www.pdga.com/technical-standards/equipment-certification/discs"
 
 
 def _search_pdga_disc(name: str) -> List[Dict[str, Any]]:
     """Search PDGA lists for a disc name.
 
-    Prefers the discs CSV export (with technical specs). Falls back to the
-    older HTML equipment list if CSV fetch fails. Returns a list of dicts with
-    keys like: manufacturer, product/model, cert_type/class, date, and various
-    spec fields (max_weight_g, diameter_cm, height_cm, rim_depth_cm,
-    rim_thickness_cm, inside_rim_diameter_cm, rim_depth_diameter_ratio_pct,
-    flexibility_kg, disc_class, cert_number, approved_date, etc.).
+    Prefers the local disc catalog (disc_catalog, built from the PDGA discs
+    CSV export with technical specs). Falls back to the older HTML equipment
+    list if the catalog is unavailable or has no match. Returns a list of
+    dicts with keys like: manufacturer, product/model, cert_type/class, date,
+    and various spec fields (max_weight_g, diameter_cm, height_cm,
+    rim_depth_cm, rim_thickness_cm, inside_rim_diameter_cm,
+    rim_depth_diameter_ratio_pct, flexibility_kg, disc_class, cert_number,
+    approved_date, etc.).
     """
     name = (name or "").strip()
     if not name:
         return []
 
-    q = name.lower()
-
-    # First try the CSV export which contains all technical specifications.
-    try:
-        resp_csv = requests.get(PDGA_DISCS_CSV_URL, timeout=20)
-        if getattr(resp_csv, "status_code", 0) == 200 and resp_csv.text:
-            text = resp_csv.text
-            rows = list(csv.DictReader(text.splitlines()))
-
-            # Buckets for better ranking: exact > normalised-exact > prefix > substring
-            exact: List[Dict[str, Any]] = []
-            exact_norm: List[Dict[str, Any]] = []
-            prefix: List[Dict[str, Any]] = []
-            partial: List[Dict[str, Any]] = []
-
-            # Normalise query by removing non-alphanumerics (so "fd" matches "FD (New)")
-            q_norm = re.sub(r"[^a-z0-9]+", "", q)
-
-            for row in rows:
-                model = (row.get("Disc Model") or "").strip()
-                manu = (row.get("Manufacturer / Distributor") or "").strip()
-                if not model:
-                    continue
-                rec: Dict[str, Any] = {
-                    "manufacturer": manu,
-                    "product": model,
-                    "model": model,
-                    "cert_type": (row.get("Class") or "").strip(),
-                    "disc_class": (row.get("Class") or "").strip(),
-                    "date": (row.get("Approved Date") or "").strip(),
-                    "approved_date": (row.get("Approved Date") or "").strip(),
-                    "max_weight_g": (row.get("Max Weight (gr)") or "").strip(),
-                    "diameter_cm": (row.get("Diameter (cm)") or "").strip(),
-                    "height_cm": (row.get("Height (cm)") or "").strip(),
-                    "rim_depth_cm": (row.get("Rim Depth (cm)") or "").strip(),
-                    "inside_rim_diameter_cm": (row.get("Inside Rim Diameter (cm)") or "").strip(),
-                    "rim_thickness_cm": (row.get("Rim Thickness (cm)") or "").strip(),
-                    "rim_depth_diameter_ratio_pct": (row.get("Rim Depth / Diameter Ratio (%)") or "").strip(),
-                    "rim_configuration": (row.get("Rim Configuration") or "").strip(),
-                    "flexibility_kg": (row.get("Flexibility (kg)") or "").strip(),
-                    "max_weight_vint_g": (row.get("Max Weight Vint (gr)") or "").strip(),
-                    "last_year_production": (row.get("Last Year Production") or "").strip(),
-                    "cert_number": (row.get("Certification Number") or "").strip(),
-                    # Try to find any flight-number-like column name (robust to CSV variations)
-                    "flight_numbers": "",
-                }
-                # populate flight_numbers by scanning row keys for anything containing 'flight'
-                try:
-                    for k, v in row.items():
-                        if k and "flight" in k.lower() and v:
-                            rec["flight_numbers"] = (v or "").strip()
-                            break
-                except Exception:
-                    pass
-                lm = model.lower()
-                lm_norm = re.sub(r"[^a-z0-9]+", "", lm)
-
-                if lm == q:
-                    exact.append(rec)
-                elif lm_norm == q_norm and q_norm:
-                    exact_norm.append(rec)
-                elif lm.startswith(q):
-                    prefix.append(rec)
-                elif q in lm:
-                    partial.append(rec)
-
-            ordered = exact or exact_norm or prefix or partial
-            if ordered:
-                return ordered
-    except Exception:
-        # If CSV fetch fails, fall back to HTML scraping below.
-        logger.exception("Error while fetching PDGA discs CSV")
+    # Indexed lookup from the local catalog; the CSV is downloaded only once
+    # (first use) and afterwards refreshed by the PDGA discs worker.
+    if disc_catalog is not None:
+        try:
+            if disc_catalog.ensure_catalog():
+                ordered = disc_catalog.search(name)
+                if ordered:
+                    return ordered
+                # Typo-tolerant suggestions ("destoyer" -> Destroyer); these
+                # carry a "match_score" key and are offered as choices.
+                if disc_index is not None:
+                    suggestions = disc_index.suggest(name)
+                    if suggestions:
+                        return suggestions
+        except Exception:
+            logger.exception("Error while searching local PDGA disc catalog")
 
     # Legacy fallback: HTML equipment list search
     try:
@@ -172,57 +136,69 @@ def _search_pdga_disc(name: str) -> List[Dict[str, Any]]:
     return results
 
 
-def _fetch_pdga_disc_image_url(model: str) -> str | None:
-    """Best-effort fetch of a disc image URL from the PDGA product page.
+def _fetch_pdga_disc_page_status(model: str, timeout: int = 10) -> Tuple[str | None, bool]:
+    """Fetch the PDGA detail page HTML for a disc model (slug from the name).
 
-    Uses the model name to build a slug and hits the detail page, then looks
-    for an og:image meta tag or a reasonable <img> src. Returns None on any
-    error or if nothing suitable is found.
+    Returns (html, missing): html is None unless the page was fetched, and
+    missing is True only for a definitive "not found" (404/410 or no usable
+    slug). Timeouts, connection errors and 5xx responses give (None, False).
     """
     model = (model or "").strip()
     if not model:
-        return None
+        return None, True
 
     slug = re.sub(r"[^a-z0-9]+", "-", model.lower()).strip("-")
     if not slug:
-        return None
+        return None, True
 
     url = f"{PDGA_DISCS_DETAIL_BASE}/{slug}"
     try:
-        resp = requests.get(url, timeout=10)
+        resp = requests.get(url, timeout=timeout)
     except Exception:
-        return None
+        return None, False
+
+    status = getattr(resp, "status_code", 0)
+    if status in (404, 410):
+        return None, True
+    if status != 200 or not resp.text:
+        return None, False
+    return resp.text, False
+
+
+def _fetch_pdga_disc_page(model: str, timeout: int = 10) -> str | None:
+    """Fetch the PDGA detail page HTML; None on any error or non-200 response."""
+    return _fetch_pdga_disc_page_status(model, timeout=timeout)[0]
 
-    if getattr(resp, "status_code", 0) != 200 or not resp.text:
-        return None
 
-    html = resp.text
+def _absolute_pdga_url(src: str) -> str:
+    if src.startswith("//"):
+        return "https:" + src
+    if src.startswith("/"):
+        return "https://www.pdga.com" + src
+    return src
 
+
+def _parse_pdga_disc_image_url(html: str, soup: Any = None) -> str | None:
+    """Find an og:image meta tag or a reasonable <img> src from a detail page."""
     # Prefer BeautifulSoup if available
     if BeautifulSoup is not None:
         try:
-            soup = BeautifulSoup(html, "html.parser")
+            if soup is None:
+                soup = BeautifulSoup(html, "html.parser")
 
             # 1) Try OpenGraph image
             og = soup.find("meta", attrs={"property": "og:image"})
             if og and og.get("content") is not None:
                 src = str(og.get("content") or "").strip()
                 if src:
-                    if src.startswith("//"):
-                        src = "https:" + src
-                    elif src.startswith("/"):
-                        src = "https://www.pdga.com" + src
-                    return src
+                    return _absolute_pdga_url(src)
 
             # 2) Fallback to first <img> with a plausible src
             for img in soup.find_all("img"):
                 src = str(img.get("src") or "").strip()
                 if not src:
                     continue
-                if src.startswith("//"):
-                    src = "https:" + src
-                elif src.startswith("/"):
-                    src = "https://www.pdga.com" + src
+                src = _absolute_pdga_url(src)
                 if src.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
                     return src
         except Exception:
@@ -232,58 +208,27 @@ def _fetch_pdga_disc_image_url(model: str) -> str | None:
     try:
         m = re.search(r'<meta[^>]+property=["\']og:image["\'][^>]+content=["\']([^"\']+)["\']', html, re.IGNORECASE)
         if m:
-            src = str(m.group(1) or "").strip()
-            if src.startswith("//"):
-                src = "https:" + src
-            elif src.startswith("/"):
-                src = "https://www.pdga.com" + src
-            return src
+            return _absolute_pdga_url(str(m.group(1) or "").strip())
     except Exception:
         pass
 
     try:
         m = re.search(r'<img[^>]+src=["\']([^"\']+)["\']', html, re.IGNORECASE)
         if m:
-            src = str(m.group(1) or "").strip()
-            if src.startswith("//"):
-                src = "https:" + src
-            elif src.startswith("/"):
-                src = "https://www.pdga.com" + src
-            return src
+            return _absolute_pdga_url(str(m.group(1) or "").strip())
     except Exception:
         pass
 
     return None
 
 
-def _fetch_pdga_flight_numbers(model: str) -> str | None:
-    """Best-effort fetch of flight numbers from the PDGA product page.
-
-    Tries to scrape the detail page for text like "Flight numbers: 12, 5, -1, 3".
-    Returns a short string or None.
-    """
-    model = (model or "").strip()
-    if not model:
-        return None
-
-    slug = re.sub(r"[^a-z0-9]+", "-", model.lower()).strip("-")
-    if not slug:
-        return None
-
-    url = f"{PDGA_DISCS_DETAIL_BASE}/{slug}"
-    try:
-        resp = requests.get(url, timeout=10)
-    except Exception:
-        return None
-
-    if getattr(resp, "status_code", 0) != 200 or not resp.text:
-        return None
-
-    html = resp.text
+def _parse_pdga_flight_numbers(html: str, soup: Any = None) -> str | None:
+    """Scrape text like "Flight numbers: 12, 5, -1, 3" from a detail page."""
     # Prefer BeautifulSoup
     if BeautifulSoup is not None:
         try:
-            soup = BeautifulSoup(html, "html.parser")
+            if soup is None:
+                soup = BeautifulSoup(html, "html.parser")
             # Look for any label/text containing "Flight" and grab nearby text
             text = soup.get_text(separator="\n")
             m = re.search(r"Flight\s*numbers?\s*[:\-]?\s*([0-9\-,.\s]+)", text, re.I)
@@ -303,6 +248,55 @@ def _fetch_pdga_flight_numbers(model: str) -> str | None:
     return None
 
 
+def _fetch_pdga_disc_assets(model: str, timeout: int = 10) -> Tuple[bool | None, str | None, str | None]:
+    """Fetch the detail page once and parse both image URL and flight numbers.
+
+    Returns (page_found, image_url, flight_numbers); page_found is None when
+    the fetch failed (timeout, network error, 5xx) rather than the page
+    being missing.
+    """
+    html, missing = _fetch_pdga_disc_page_status(model, timeout=timeout)
+    if not html:
+        return (False if missing else None), None, None
+    soup = None
+    if BeautifulSoup is not None:
+        try:
+            soup = BeautifulSoup(html, "html.parser")
+        except Exception:
+            soup = None
+    return True, _parse_pdga_disc_image_url(html, soup), _parse_pdga_flight_numbers(html, soup)
+
+
+def _fetch_pdga_disc_image_url(model: str) -> str | None:
+    """Best-effort fetch of a disc image URL from the PDGA product page.
+
+    Uses the model name to build a slug and hits the detail page, then looks
+    for an og:image meta tag or a reasonable <img> src. Returns None on any
+    error or if nothing suitable is found.
+    """
+    html = _fetch_pdga_disc_page(model)
+    if not html:
+        return None
+    return _parse_pdga_disc_image_url(html)
+
+
+def _fetch_pdga_flight_numbers(model: str) -> str | None:
+    """Best-effort fetch of flight numbers from the PDGA product page.
+
+    Tries to scrape the detail page for text like "Flight numbers: 12, 5, -1, 3".
+    Returns a short string or None.
+    """
+    html = _fetch_pdga_disc_page(model)
+    if not html:
+        return None
+    return _parse_pdga_flight_numbers(html)
+
+
+def _cached_disc_assets(rec: Dict[str, Any]) -> Dict[str, Any]:
+    disc_assets.record_query(rec)
+    return disc_assets.get_assets(rec)
+
+
 async def send_disc_card(channel: Any, best: Dict[str, Any], query_fallback: str = "") -> None:
     """Build and send a detailed disc card embed (or text fallback)."""
     model = (best.get("model") or best.get("product") or "").strip() or query_fallback
@@ -356,16 +350,22 @@ async def send_disc_card(channel: Any, best: Dict[str, Any], query_fallback: str
     if last_year:
         desc_lines.append(f"**Viimeinen tuotantovuosi:** {last_year}")
 
-    # Flight numbers: try from result first, otherwise fetch from PDGA detail page
-    flight_nums = (best.get("flight_numbers") or "").strip()
-    if not flight_nums:
-        try:
-            loop = asyncio.get_running_loop()
-            fetched = await loop.run_in_executor(None, lambda: _fetch_pdga_flight_numbers(model))
-            if fetched:
-                flight_nums = fetched
-        except Exception:
-            flight_nums = flight_nums
+    # Image + flight numbers from the disc asset cache (one PDGA detail page
+    # fetch on a cold miss, none when cached or warmed in the background).
+    assets: Dict[str, Any] = {}
+    lookup = dict(best)
+    lookup.setdefault("model", model)
+    try:
+        if disc_assets is not None:
+            assets = await scrape_executor.run("kiekko", lambda: _cached_disc_assets(lookup))
+        else:
+            found, image, flights = await scrape_executor.run("kiekko", lambda: _fetch_pdga_disc_assets(model))
+            assets = {"image_url": image, "flight_numbers": flights}
+    except Exception:
+        assets = {}
+
+    # Flight numbers: try from result first, otherwise from the PDGA detail page
+    flight_nums = (best.get("flight_numbers") or "").strip() or (assets.get("flight_numbers") or "").strip()
 
     if flight_nums:
         desc_lines.append(f"**Lentonumerot:** {flight_nums}")
@@ -375,13 +375,7 @@ async def send_disc_card(channel: Any, best: Dict[str, Any], query_fallback: str
 
     desc = "\n".join(desc_lines)
 
-    # Try to fetch image URL too
-    image_url: str | None = None
-    try:
-        loop = asyncio.get_running_loop()
-        image_url = await loop.run_in_executor(None, lambda: _fetch_pdga_disc_image_url(model))
-    except Exception:
-        image_url = None
+    image_url: str | None = assets.get("image_url") or None
 
     try:
         Embed_cls = getattr(discord, "Embed", None) if discord is not None else None
@@ -404,6 +398,87 @@ async def send_disc_card(channel: Any, best: Dict[str, Any], query_fallback: str
             pass
 
 
+def _format_similar_line(i: int, distance: float, rec: Dict[str, Any]) -> str:
+    model_opt = (rec.get("model") or rec.get("product") or "").strip() or "(tuntematon)"
+    manu_opt = (rec.get("manufacturer") or "").strip()
+    line = f"{i}) **{model_opt}**"
+    if manu_opt:
+        line += f" — {manu_opt}"
+    line += f" — {disc_similarity.similarity_percent(distance)} %"
+    specs = []
+    for field, _label, unit in disc_similarity.SPEC_FIELDS[:4]:
+        val = (rec.get(field) or "").strip()
+        if val:
+            specs.append(f"{val} {unit}")
+    if specs:
+        line += "\n   " + " / ".join(specs)
+    return line
+
+
+async def handle_kiekko_vastaava(message: Any, query: str) -> None:
+    """!kiekko vastaava <malli>: mitoiltaan lähimmät kiekot."""
+    if not query:
+        try:
+            await message.channel.send("Käyttö: !kiekko vastaava <malli>  (esim. !kiekko vastaava destroyer)")
+        except Exception:
+            pass
+        return
+
+    if disc_similarity is None or disc_similarity.np is None:
+        try:
+            await message.channel.send("Vastaavien kiekkojen haku ei ole käytössä (NumPy puuttuu).")
+        except Exception:
+            pass
+        return
+
+    def _do_lookup() -> Tuple[Dict[str, Any] | None, Any]:
+        res = _search_pdga_disc(query)
+        best = next((r for r in res if r.get("cert_number") or r.get("diameter_cm")), None)
+        if best is None:
+            return None, []
+        return best, disc_similarity.nearest_discs(best)
+
+    try:
+        best, similar = await scrape_executor.run("kiekko", _do_lookup, user=getattr(message.author, "id", None))
+    except scrape_executor.ScrapeError:
+        raise
+    except Exception:
+        logger.exception("Error while computing similar discs")
+        best, similar = None, []
+
+    if best is None:
+        try:
+            await message.channel.send(f"Kiekkoa ei löytynyt haulla: {query}")
+        except Exception:
+            pass
+        return
+
+    model = (best.get("model") or best.get("product") or "").strip()
+    if not similar:
+        try:
+            await message.channel.send(f"Kiekolle {model} ei löytynyt tarpeeksi mittatietoja vertailuun.")
+        except Exception:
+            pass
+        return
+
+    own_specs = []
+    for field, label, unit in disc_similarity.SPEC_FIELDS:
+        val = (best.get(field) or "").strip()
+        if val:
+            own_specs.append(f"{label} {val} {unit}")
+    lines = [", ".join(own_specs), ""] if own_specs else []
+    lines += [_format_similar_line(i, d, rec) for i, (d, rec) in enumerate(similar, start=1)]
+    title = f"Mitoiltaan lähimmät kiekot: {model}"
+    try:
+        Embed_cls = getattr(discord, "Embed", None) if discord is not None else None
+        if Embed_cls:
+            await message.channel.send(embed=Embed_cls(title=title, description="\n".join(lines)))
+        else:
+            await message.channel.send("\n".join([title] + lines))
+    except Exception:
+        pass
+
+
 async def handle_kiekko(message: Any, parts: Any, pending_disc_choices: Dict[Tuple[str, str], List[Dict[str, Any]]]) -> None:
     """Handle the !kiekko command.
 
@@ -432,18 +507,20 @@ async def handle_kiekko(message: Any, parts: Any, pending_disc_choices: Dict[Tup
             pass
         return
 
+    if parts[1].lower() == "vastaava":
+        await handle_kiekko_vastaava(message, " ".join(parts[2:]).strip())
+        return
+
     try:
         if hasattr(message.channel, "trigger_typing"):
             await message.channel.trigger_typing()
     except Exception:
         pass
 
-    loop = asyncio.get_running_loop()
-
     def _do_search() -> List[Dict[str, Any]]:
         return _search_pdga_disc(query)
 
-    res = await loop.run_in_executor(None, _do_search)
+    res = await scrape_executor.run("kiekko", _do_search, user=getattr(message.author, "id", None))
 
     if not res:
         try:
@@ -452,8 +529,14 @@ async def handle_kiekko(message: Any, parts: Any, pending_disc_choices: Dict[Tup
             pass
         return
 
+    # Fuzzy suggestions: a single clear match is shown directly, otherwise
+    # the user picks from the list like with short queries.
+    fuzzy = "match_score" in res[0]
+    if fuzzy and (len(res) == 1 or res[0]["match_score"] - res[1]["match_score"] >= 0.25):
+        res = res[:1]
+
     # If there are many matches for a short query, ask user to pick
-    if len(res) > 1 and len(query) <= 4:
+    if len(res) > 1 and (len(query) <= 4 or fuzzy):
         # limit to 9 numbered options
         options = res[:9]
         lines: List[str] = []
@@ -480,13 +563,22 @@ async def handle_kiekko(message: Any, parts: Any, pending_disc_choices: Dict[Tup
             footer_line = f"Vastaa numerolla (1–{len(options)}) valitaksesi parhaan vaihtoehdon."
             desc_lines = lines + ["", footer_line]
             if Embed_cls:
+                title = (
+                    f'Tarkoititko jotain näistä? Haku "{query}":'
+                    if fuzzy
+                    else f'Löytyi useita kiekkoja haulla "{query}":'
+                )
                 embed = Embed_cls(
-                    title=f'Löytyi useita kiekkoja haulla "{query}":',
+                    title=title,
                     description="\n".join(desc_lines),
                 )
                 await message.channel.send(embed=embed)
             else:
-                header = f'Löytyi useita kiekkoja haulla "{query}":'
+                header = (
+                    f'Tarkoititko jotain näistä? Haku "{query}":'
+                    if fuzzy
+                    else f'Löytyi useita kiekkoja haulla "{query}":'
+                )
                 await message.channel.send("\n".join([header] + desc_lines))
 
             # store pending options for this user/channel
@@ -12,6 +12,7 @@ except Exception:  # pragma: no cover
 
 from .date_utils import normalize_date_string
 from .metrix_utils import fetch_metrix_canonical_date
+from . import scrape_executor
 
 
 async def handle_etsi(message: Any, parts: Any) -> None:
@@ -109,7 +110,6 @@ async def handle_etsi(message: Any, parts: Any) -> None:
                 class_defs_map = {}
 
             results = []
-            loop = __import__('asyncio').get_running_loop()
 
             async def _live_check(url: str):
                 try:
@@ -120,7 +120,7 @@ async def handle_etsi(message: Any, parts: Any) -> None:
                             return capacity_mod.check_competition_capacity(url, timeout=12)
                         except Exception:
                             return None
-                    return await loop.run_in_executor(None, _run)
+                    return await scrape_executor.run('etsi', _run, timeout=20)
                 except Exception:
                     return None
 
@@ -488,11 +488,6 @@ async def _get_capacity_display_local(url: str) -> str:
     if capacity_mod is None or not hasattr(capacity_mod, "check_competition_capacity"):
         return ""
 
-    try:
-        loop = __import__('asyncio').get_running_loop()
-    except Exception:
-        return ""
-
     def _run():
         try:
             if capacity_mod is None or not hasattr(capacity_mod, 'check_competition_capacity'):
@@ -501,7 +496,10 @@ async def _get_capacity_display_local(url: str) -> str:
         except Exception:
             return None
 
-    cap = await loop.run_in_executor(None, _run)
+    try:
+        cap = await scrape_executor.run('etsi', _run, timeout=20)
+    except scrape_executor.ScrapeError:
+        return ""
     if not isinstance(cap, dict):
         return ""
 
@@ -718,13 +716,12 @@ async def handle_kisa(message: Any, parts: Any) -> None:
                             capacity_mod_local = None
                         if url and capacity_mod_local is not None and hasattr(capacity_mod_local, 'check_competition_capacity'):
                             try:
-                                loop = __import__('asyncio').get_running_loop()
                                 def _run_live():
                                     try:
                                         return capacity_mod_local.check_competition_capacity(url, timeout=10)
                                     except Exception:
                                         return None
-                                live = await loop.run_in_executor(None, _run_live)
+                                live = await scrape_executor.run('kisa', _run_live, timeout=20)
                                 if isinstance(live, dict):
                                     try:
                                         reg_live = int(live.get('registered')) if live.get('registered') is not None else None
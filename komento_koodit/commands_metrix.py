@@ -1,6 +1,9 @@
 import asyncio
+import concurrent.futures
 import re
-from typing import Any, Optional
+from typing import Any, List, Optional, Tuple
+
+from . import scrape_executor
 
 try:
     import discord  # type: ignore[import]
@@ -13,6 +16,11 @@ except Exception:  # pragma: no cover
     fetch_player_stats = None  # type: ignore[assignment]
     PlayerStats = None  # type: ignore[assignment]
 
+try:
+    from . import metrix_analytics
+except Exception:  # pragma: no cover
+    metrix_analytics = None  # type: ignore[assignment]
+
 try:
     from .player_store import get_metrix_for_user, set_metrix_for_user
 except Exception:  # pragma: no cover
@@ -20,130 +28,24 @@ except Exception:  # pragma: no cover
     set_metrix_for_user = None  # type: ignore[assignment]
 
 
+# Esikatseluviestin viimeinen rivi, kun hitaammat sivut ovat vielä haussa.
+PENDING_LINE = "_Haetaan vielä kisa- ja rating-tietoja…_"
+INCOMPLETE_LINE = "_Haku keskeytyi; kisa- ja rating-tiedot jäivät hakematta._"
+
+
 def _extract_metrix_id(raw: str) -> str:
     text = (raw or "").strip()
     m = re.search(r"(\d{3,})", text)
     return m.group(1) if m else ""
 
 
-async def handle_metrix(message: Any, parts: Any) -> None:
-    """!metrix  hae Metrix-rating ja kierroshistoria.
+def _format_stats(stats: Any, analytics: Any = None) -> str:
+    """Muotoile !metrix-vastauksen kuvausteksti PlayerStats-oliosta.
 
-    Käyttö:
-      - !metrix 12345         → hakee annetulla Metrix-ID:llä ja tallentaa sen käyttäjälle
-      - !metrix https://...   → poimii ID:n annetusta Metrix-linkistä
-      - !metrix               → käyttää aiemmin talletettua Metrix-ID:tä (pelaaja.json)
+    Osittaisesta oliosta (vain pelaajasivu) puuttuvat rivit jätetään pois
+    tai näytetään kysymysmerkillä, kuten lopullisessakin vastauksessa.
     """
 
-    if fetch_player_stats is None:
-        try:
-            await message.channel.send("Virhe: Metrix-moduuli ei ole käytettävissä.")
-        except Exception:
-            pass
-        return
-
-    user_id = getattr(getattr(message, "author", None), "id", None)
-    user_key = str(user_id) if user_id is not None else ""
-
-    used_saved_id = False
-    save_this_id = False
-
-    if not parts or len(parts) < 2:
-        saved_id: Optional[str] = None
-        if user_key and get_metrix_for_user is not None:
-            saved_id = get_metrix_for_user(user_key)
-
-        if not saved_id:
-            desc = (
-                "Hae Metrix-pelaajan perustiedot ja rating-historian.\n\n"
-                "Käyttöesimerkkejä:\n"
-                "!metrix lisää 12345 – tallenna oma MetrixID\n"
-                "!metrix 12345 – hae annetun ID:n tiedot\n"
-                "!metrix https://discgolfmetrix.com/player/12345 – poimii ID:n linkistä\n"
-                "!metrix poista – poista tallennettu MetrixID\n"
-                "Pelkkä !metrix käyttää aiemmin tallennettua ID:tä, jos sellainen on."
-            )
-            try:
-                Embed_cls = getattr(discord, "Embed", None) if discord is not None else None
-                title = "Käyttö: !metrix"
-                if Embed_cls:
-                    embed = Embed_cls(title=title, description=desc)
-                    await message.channel.send(embed=embed)
-                else:
-                    await message.channel.send(f"{title}\n{desc}")
-            except Exception:
-                pass
-            return
-
-        raw = str(saved_id).strip()
-        used_saved_id = True
-    else:
-        sub = str(parts[1] or "").strip().lower()
-        # Alakomento "poista": !metrix poista → poista tallennettu ID
-        if sub == "poista":
-            if user_key and set_metrix_for_user is not None:
-                try:
-                    set_metrix_for_user(user_key, "")
-                except Exception:
-                    pass
-            try:
-                await message.channel.send("Poistettu metrixID")
-            except Exception:
-                pass
-            return
-
-        # Alakomento "lisää": !metrix lisää 12345 → tallenna oma ID
-        if sub in ("lisaa", "lisää") and len(parts) >= 3:
-            raw = str(parts[2] or "").strip()
-            save_this_id = True
-        else:
-            # Pelkkä numerosarja tai linkki → hae tiedot, älä tallenna
-            raw = str(parts[1] or "").strip()
-
-    metrix_id = _extract_metrix_id(raw)
-    if not metrix_id:
-        try:
-            if save_this_id:
-                await message.channel.send("Anna Metrix-ID komennon muodossa: !metrix lisää 12345")
-            else:
-                await message.channel.send("Anna Metrix-ID (numerot) tai Metrix-linkki.")
-        except Exception:
-            pass
-        return
-
-    try:
-        if hasattr(message.channel, "trigger_typing"):
-            await message.channel.trigger_typing()
-    except Exception:
-        pass
-
-    loop = asyncio.get_running_loop()
-
-    def _do_fetch() -> Any:
-        return fetch_player_stats(metrix_id)  # type: ignore[func-returns-value]
-
-    stats = await loop.run_in_executor(None, _do_fetch)
-
-    if stats is None:
-        try:
-            await message.channel.send(
-                f"Metrix-tietojen haku epäonnistui ID:llä {metrix_id}. "
-                "Tarkista ID sekä METRIX_*-ympäristömuuttujat."
-            )
-        except Exception:
-            pass
-        return
-
-    if save_this_id and user_key and set_metrix_for_user is not None:
-        try:
-            set_metrix_for_user(user_key, metrix_id)
-            try:
-                await message.channel.send("Lisätty metrixID")
-            except Exception:
-                pass
-        except Exception:
-            pass
-
     name = stats.name or "(tuntematon)"
     rating = stats.rating
     rating_change = stats.rating_change
@@ -299,11 +201,56 @@ async def handle_metrix(message: Any, parts: Any) -> None:
         lines.extend(ansi_block)
         lines.append("```")
 
+    # Käyrän analytiikka (metrix_analytics): muutokset, huippu, trendi ja
+    # sijoitus seurassa. Rivit jätetään pois, jos arvoa ei saatu laskettua.
+    if analytics is not None:
+        deltas: list[str] = []
+        if analytics.delta_30d is not None:
+            deltas.append(f"30 pv {analytics.delta_30d:+.0f}")
+        if analytics.delta_90d is not None:
+            deltas.append(f"90 pv {analytics.delta_90d:+.0f}")
+        if deltas:
+            lines.append(f"**Muutos:** {' | '.join(deltas)}")
+
+        if analytics.peak_date:
+            lines.append(f"**Huippu:** {analytics.peak:.0f} ({analytics.peak_date})")
+        else:
+            lines.append(f"**Huippu:** {analytics.peak:.0f}")
+
+        form_parts: list[str] = []
+        if analytics.rolling_avg is not None:
+            form_parts.append(f"ka {analytics.rolling_avg:.0f}")
+        if analytics.slope_per_30d is not None:
+            form_parts.append(f"trendi {analytics.slope_per_30d:+.1f}/kk")
+        if analytics.volatility is not None:
+            form_parts.append(f"vaihtelu ±{analytics.volatility:.1f}")
+        if form_parts:
+            lines.append(f"**Vire:** {', '.join(form_parts)}")
+
+        if analytics.club_percentile is not None and analytics.club_size >= 2:
+            lines.append(
+                f"**Seurassa:** parempi kuin {analytics.club_percentile:.0f} % "
+                f"({analytics.club_size} pelaajaa)"
+            )
+
     # Profiililinkki loppuun lyhyellä ankkuritekstillä.
     if profile_url:
         lines.append(f"**Linkki:** [Metrix]({profile_url})")
 
-    desc = "\n".join(lines)
+    return "\n".join(lines)
+
+
+async def _send_stats(channel: Any, stats: Any, analytics: Any = None, footer: str = "", existing: Any = None) -> Any:
+    """Lähetä statsit upotteena (tai muokkaa aiempaa esikatseluviestiä).
+
+    ``footer`` lisätään viimeiseksi riviksi (esim. PENDING_LINE, kun
+    hitaammat sivut ovat vielä haussa). Palauttaa lähetetyn viestin tai None.
+    """
+
+    desc = _format_stats(stats, analytics)
+    if footer:
+        desc += "\n" + footer
+    rating_change = stats.rating_change
 
     try:
         Embed_cls = getattr(discord, "Embed", None) if discord is not None else None
@@ -320,11 +267,172 @@ async def handle_metrix(message: Any, parts: Any) -> None:
                 embed = Embed_cls(description=desc, colour=colour)
             else:
                 embed = Embed_cls(description=desc)
-            await message.channel.send(embed=embed)
+            if existing is not None:
+                await existing.edit(embed=embed)
+                return existing
+            return await channel.send(embed=embed)
+        if existing is not None:
+            await existing.edit(content=desc)
+            return existing
+        return await channel.send(desc)
+    except Exception:
+        try:
+            return await channel.send(desc)
+        except Exception:
+            return None
+
+
+async def handle_metrix(message: Any, parts: Any) -> None:
+    """!metrix  hae Metrix-rating ja kierroshistoria.
+
+    Käyttö:
+      - !metrix 12345         → hakee annetulla Metrix-ID:llä ja tallentaa sen käyttäjälle
+      - !metrix https://...   → poimii ID:n annetusta Metrix-linkistä
+      - !metrix               → käyttää aiemmin talletettua Metrix-ID:tä (pelaaja.json)
+    """
+
+    if fetch_player_stats is None:
+        try:
+            await message.channel.send("Virhe: Metrix-moduuli ei ole käytettävissä.")
+        except Exception:
+            pass
+        return
+
+    user_id = getattr(getattr(message, "author", None), "id", None)
+    user_key = str(user_id) if user_id is not None else ""
+
+    used_saved_id = False
+    save_this_id = False
+
+    if not parts or len(parts) < 2:
+        saved_id: Optional[str] = None
+        if user_key and get_metrix_for_user is not None:
+            saved_id = get_metrix_for_user(user_key)
+
+        if not saved_id:
+            desc = (
+                "Hae Metrix-pelaajan perustiedot ja rating-historian.\n\n"
+                "Käyttöesimerkkejä:\n"
+                "!metrix lisää 12345 – tallenna oma MetrixID\n"
+                "!metrix 12345 – hae annetun ID:n tiedot\n"
+                "!metrix https://discgolfmetrix.com/player/12345 – poimii ID:n linkistä\n"
+                "!metrix poista – poista tallennettu MetrixID\n"
+                "Pelkkä !metrix käyttää aiemmin tallennettua ID:tä, jos sellainen on."
+            )
+            try:
+                Embed_cls = getattr(discord, "Embed", None) if discord is not None else None
+                title = "Käyttö: !metrix"
+                if Embed_cls:
+                    embed = Embed_cls(title=title, description=desc)
+                    await message.channel.send(embed=embed)
+                else:
+                    await message.channel.send(f"{title}\n{desc}")
+            except Exception:
+                pass
+            return
+
+        raw = str(saved_id).strip()
+        used_saved_id = True
+    else:
+        sub = str(parts[1] or "").strip().lower()
+        # Alakomento "poista": !metrix poista → poista tallennettu ID
+        if sub == "poista":
+            if user_key and set_metrix_for_user is not None:
+                try:
+                    set_metrix_for_user(user_key, "")
+                except Exception:
+                    pass
+            try:
+                await message.channel.send("Poistettu metrixID")
+            except Exception:
+                pass
+            return
+
+        # Alakomento "lisää": !metrix lisää 12345 → tallenna oma ID
+        if sub in ("lisaa", "lisää") and len(parts) >= 3:
+            raw = str(parts[2] or "").strip()
+            save_this_id = True
         else:
-            await message.channel.send(desc)
+            # Pelkkä numerosarja tai linkki → hae tiedot, älä tallenna
+            raw = str(parts[1] or "").strip()
+
+    metrix_id = _extract_metrix_id(raw)
+    if not metrix_id:
+        try:
+            if save_this_id:
+                await message.channel.send("Anna Metrix-ID komennon muodossa: !metrix lisää 12345")
+            else:
+                await message.channel.send("Anna Metrix-ID (numerot) tai Metrix-linkki.")
+        except Exception:
+            pass
+        return
+
+    try:
+        if hasattr(message.channel, "trigger_typing"):
+            await message.channel.trigger_typing()
     except Exception:
+        pass
+
+    # Pelaajasivun tiedot lähetetään heti esikatseluna; viesti muokataan
+    # lopulliseksi, kun kisa- ja rating-sivut on haettu.
+    loop = asyncio.get_running_loop()
+    previews: List[Tuple[Any, "concurrent.futures.Future[Any]"]] = []
+
+    def _on_partial(partial: Any) -> None:
+        # Kutsutaan hakusäikeestä, joten lähetys ajetaan komennon silmukassa.
+        fut = asyncio.run_coroutine_threadsafe(_send_stats(message.channel, partial, footer=PENDING_LINE), loop)
+        previews.append((partial, fut))
+
+    def _do_fetch() -> Any:
+        return fetch_player_stats(metrix_id, on_partial=_on_partial)  # type: ignore[func-returns-value]
+
+    async def _preview_message() -> Any:
+        if not previews:
+            return None
         try:
-            await message.channel.send(desc)
+            return await asyncio.wrap_future(previews[0][1])
+        except Exception:
+            return None
+
+    try:
+        stats = await scrape_executor.run("metrix", _do_fetch, user=getattr(message.author, "id", None))
+    except scrape_executor.ScrapeError:
+        preview = await _preview_message()
+        if preview is not None:
+            await _send_stats(message.channel, previews[0][0], footer=INCOMPLETE_LINE, existing=preview)
+        raise
+
+    analytics = None
+    if stats is not None and metrix_analytics is not None:
+
+        def _do_analyze() -> Any:
+            try:
+                metrix_analytics.remember_player_rating(stats)
+                club_ratings = metrix_analytics.club_ratings_for(stats)
+                return metrix_analytics.analyze_curve(stats.rating_curve, club_ratings=club_ratings or None)
+            except Exception:
+                return None
+
+        analytics = await scrape_executor.run("metrix", _do_analyze, user=getattr(message.author, "id", None))
+
+    if stats is None:
+        try:
+            await message.channel.send(
+                f"Metrix-tietojen haku epäonnistui ID:llä {metrix_id}. "
+                "Tarkista ID sekä METRIX_*-ympäristömuuttujat."
+            )
         except Exception:
             pass
+        return
+
+    if save_this_id and user_key and set_metrix_for_user is not None:
+        try:
+            set_metrix_for_user(user_key, metrix_id)
+            try:
+                await message.channel.send("Lisätty metrixID")
+            except Exception:
+                pass
+        except Exception:
+            pass
+
+    await _send_stats(message.channel, stats, analytics, existing=await _preview_message())
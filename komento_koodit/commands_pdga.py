@@ -1,9 +1,10 @@
-import asyncio
 import re
 from typing import Any, Dict, Optional
 
 import requests  # type: ignore[import]
 
+from . import scrape_executor
+
 try:
     from bs4 import BeautifulSoup  # type: ignore[import]
 except Exception:  # pragma: no cover - optional
@@ -167,12 +168,10 @@ async def handle_pdga(message: Any, parts: Any) -> None:
     except Exception:
         pass
 
-    loop = asyncio.get_running_loop()
-
     def _do_fetch() -> Optional[Dict[str, Any]]:
         return _fetch_pdga_player(num)
 
-    info = await loop.run_in_executor(None, _do_fetch)
+    info = await scrape_executor.run("pdga", _do_fetch, user=getattr(message.author, "id", None))
 
     if not info:
         try:
@@ -20,40 +20,25 @@ try:
 except Exception:
     kk_data_store = None
 
+from . import embed_layout, response_cache, scrape_executor
+
 
 logger = logging.getLogger(__name__)
 
 
 async def _send_spots_lines(channel: Any, lines: List[str]) -> None:
-    max_len = 1900
-    cur: List[str] = []
-    cur_len = 0
-    for ln in lines:
-        if cur and cur_len + len(ln) + 1 > max_len:
-            try:
-                Embed_cls = getattr(discord, "Embed", None)
-                if Embed_cls:
-                    embed = Embed_cls(title="Kilpailut, joissa vähän paikkoja:", description="\n".join(cur))
-                    await channel.send(embed=embed)
-                else:
-                    await channel.send("\n".join(cur))
-            except Exception:
-                await channel.send("\n".join(cur))
-            cur = []
-            cur_len = 0
-        cur.append(ln)
-        cur_len += len(ln) + 1
-
-    if cur:
+    # Rivit pakataan embedeihin Discordin merkkirajojen mukaan (embed_layout).
+    Embed_cls = getattr(discord, "Embed", None)
+    for msg in embed_layout.pack_messages(lines, title="Kilpailut, joissa vähän paikkoja:"):
         try:
-            Embed_cls = getattr(discord, "Embed", None)
             if Embed_cls:
-                embed = Embed_cls(title="Kilpailut, joissa vähän paikkoja:", description="\n".join(cur))
-                await channel.send(embed=embed)
-            else:
-                await channel.send("\n".join(cur))
+                await channel.send(embeds=[Embed_cls.from_dict(e) for e in msg])
+                continue
         except Exception:
-            await channel.send("\n".join(cur))
+            pass
+        text = "\n".join(e.get("description") or "" for e in msg)
+        for part in embed_layout.split_text(text):
+            await channel.send(part)
 
 
 async def handle_spots(message: Any, parts: Any) -> None:
@@ -143,11 +128,11 @@ async def handle_spots(message: Any, parts: Any) -> None:
         await _send_spots_lines(channel, lines)
         return
 
-    # Otherwise perform the background capacity check as before
+    # Otherwise perform the background capacity check as before.
+    # Tulos lähetetään taustalta, joten vastausta ei välimuistiteta.
+    response_cache.skip(message)
     await channel.send("Tarkistan paikkojen tilannetta (suoritetaan taustalla)...")
 
-    loop = asyncio.get_running_loop()
-
     def run_check() -> Any:
         try:
             if capacity_mod is None or not hasattr(capacity_mod, "find_low_capacity"):
@@ -158,10 +143,13 @@ async def handle_spots(message: Any, parts: Any) -> None:
             logger.exception("Error in capacity check: %s", e)
             return e
 
-    future = loop.run_in_executor(None, run_check)
-
-    async def handle_result(fut: Any) -> None:
-        res = await fut
+    async def handle_result() -> None:
+        try:
+            # Koko kapasiteettiskannaus on pitkä; aikaraja tavallista väljempi.
+            res = await scrape_executor.run("paikat", run_check, user=getattr(message.author, "id", None), timeout=300)
+        except scrape_executor.ScrapeError as e:
+            await channel.send(e.reply)
+            return
         if isinstance(res, Exception):
             await channel.send(f"Virhe paikkojen tarkistuksessa: {res}")
             return
@@ -189,4 +177,4 @@ async def handle_spots(message: Any, parts: Any) -> None:
 
         await _send_spots_lines(channel, lines)
 
-    asyncio.create_task(handle_result(future))
+    asyncio.create_task(handle_result())
@@ -1,8 +1,9 @@
 import os
 import re
-import asyncio
+import logging
+import threading
 from datetime import datetime, date, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 import json
@@ -23,15 +24,23 @@ try:
 except Exception:  # pragma: no cover
     metrix_stats = None  # type: ignore[assignment]
 
+from . import results_parser
+from . import scrape_executor
+from .single_flight import coalesce
+
+try:
+    from . import club_leaderboard
+except Exception:  # pragma: no cover
+    club_leaderboard = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
 
 BASE_ROOT_URL = "https://discgolfmetrix.com"
 
 
 _RATING_CACHE: Dict[str, Optional[float]] = {}
 
-# Set to True during local debugging to enable console debug prints for this module.
-DEBUG_TULOKSET = False
-
 # Base dir for persistence (club successes)
 BASE_DIR = os.path.abspath(os.path.dirname(__file__) or "")
 CLUB_SUCCESS_FILE = os.path.join(BASE_DIR, "club_successes.json")
@@ -91,11 +100,81 @@ def _increment_club_success(metrix_id: str, name: str, club: str, context: Optio
         pass
 
 
+def _format_leaderboard_value(metric: str, row: Dict[str, Any]) -> str:
+    if metric == "kierrokset":
+        return f"{int(row.get('total_rounds') or 0)} kierrosta"
+    if metric == "vire":
+        return f"{float(row.get('form') or 0):+.0f}"
+    text = f"{float(row.get('rating') or 0):.0f}"
+    change = row.get("rating_change")
+    if isinstance(change, (int, float)) and abs(change) >= 0.5:
+        text += f" ({change:+.0f})"
+    return text
+
+
+async def _handle_seura_leaderboard(message, parts: List[str]) -> None:
+    """!seura rating|kierrokset|vire [N] – tulostaulu välimuistista.
+
+    Välimuistia päivittää club_leaderboard-taustatyö; komento itse ei tee
+    HTTP-kutsuja. Jos välimuisti on tyhjä, käynnistetään päivitys taustalle.
+    """
+
+    metric = parts[1].strip().lower()
+    top_n = 10
+    if len(parts) >= 3 and parts[2].strip().isdigit():
+        top_n = min(50, max(1, int(parts[2].strip())))
+
+    rows = await scrape_executor.run("seura", club_leaderboard.ranking, metric, top_n, user=getattr(message.author, "id", None))
+
+    if not rows:
+        if not club_leaderboard.is_refreshing():
+            threading.Thread(target=club_leaderboard.refresh_leaderboard, daemon=True).start()
+        try:
+            await message.channel.send(
+                "Seuran tulostaulua päivitetään taustalla. Yritä hetken päästä uudelleen."
+            )
+        except Exception:
+            pass
+        return
+
+    title = club_leaderboard.METRICS.get(metric, club_leaderboard.METRICS["rating"])[1]
+    lines = []
+    for idx, row in enumerate(rows, start=1):
+        name = row.get("name") or row.get("metrix_id") or ""
+        lines.append(f"{idx}) {name} — {_format_leaderboard_value(metric, row)}")
+
+    header = f"{club_leaderboard.CLUB_NAME} — {title}, top {len(rows)}"
+    try:
+        await message.channel.send(header + "\n" + "\n".join(lines))
+    except Exception:
+        pass
+
+
 async def handle_seura(message, parts: List[str]):
     """Handle '!seura' commands. Supported subcommands:
     - 'ranking' or no arg: show top-N club successes (default top 10)
     - number as first arg: show that many entries
+    - 'rating' / 'kierrokset' / 'vire' [N]: club leaderboard from cached player stats
+    - 'päivitä': start a background refresh of the leaderboard cache (admin,
+      gated by the command registry)
     """
+    if club_leaderboard is not None and len(parts) >= 2:
+        sub = parts[1].strip().lower()
+        if sub in club_leaderboard.METRICS:
+            await _handle_seura_leaderboard(message, parts)
+            return
+        if sub in ('päivitä', 'paivita'):
+            if club_leaderboard.is_refreshing():
+                reply = 'Seuran tulostaulun päivitys on jo käynnissä.'
+            else:
+                threading.Thread(target=club_leaderboard.refresh_leaderboard, daemon=True).start()
+                reply = 'Seuran tulostaulun päivitys käynnistetty taustalle.'
+            try:
+                await message.channel.send(reply)
+            except Exception:
+                pass
+            return
+
     try:
         data = _load_club_successes() or {}
     except Exception:
@@ -378,93 +457,6 @@ def _ensure_results_url(url: str) -> str:
     return txt + "&view=result"
 
 
-def _guess_event_name(soup: BS) -> str:
-    """Yritä päätellä kilpailun nimi sivun otsikoista."""
-
-    try:
-        h1 = soup.find("h1")
-        if h1 and h1.get_text(strip=True):
-            return h1.get_text(strip=True)
-    except Exception:
-        pass
-
-    try:
-        title_tag = soup.find("title")
-        if title_tag and title_tag.get_text(strip=True):
-            return title_tag.get_text(strip=True)
-    except Exception:
-        pass
-
-    return "Metrix-kilpailu"
-
-
-def _guess_class_name_for_table(table, fallback_index: int) -> str:
-    """Yritä löytää sarjan / luokan nimi taulukolle.
-
-    Parempi heuristiikka:
-      - Jos <thead> sisältää <th> jossa on jotain muotoa "Name (N)", käytä sitä.
-      - Muussa tapauksessa etsi ensimmäinen <th>, joka ei ole selvästi sarakkeen otsikko.
-      - Jos ei löydy, käytä captionia tai lähintä h2/h3 -otsikkoa.
-      - Lopuksi fallback "Sarja N".
-    """
-
-    name: Optional[str] = None
-
-    try:
-        thead = table if getattr(table, 'name', None) == 'thead' else table.find("thead")
-        if thead:
-            ths = thead.find_all("th")
-            candidate = None
-            for th in ths:
-                txt = th.get_text(" ", strip=True)
-                if not txt:
-                    continue
-                # Etsi muotoa "Something (3)"
-                if re.search(r"\(\d+\)", txt) and not txt.lower().startswith("sija"):
-                    name = txt
-                    break
-                low = txt.lower()
-                if low in ("sija", "sij", "nimi", "pelaaja", "+/-", "kortti", "tot"):
-                    continue
-                # Prefer multi-word labels (todennäköisemmin luokkien nimiä)
-                if len(txt.split()) >= 2:
-                    name = txt
-                    break
-                if candidate is None:
-                    candidate = txt
-            if not name and candidate:
-                name = candidate
-    except Exception:
-        name = None
-
-    if not name:
-        try:
-            # caption
-            cap = table.find("caption")
-            if cap and cap.get_text(strip=True):
-                name = cap.get_text(strip=True)
-        except Exception:
-            pass
-
-    if not name:
-        try:
-            heading = table.find_previous(["h3", "h4", "h2"])
-            if heading:
-                txt = heading.get_text(" ", strip=True)
-                if txt:
-                    name = txt
-        except Exception:
-            pass
-
-    if not name:
-        name = f"Sarja {fallback_index + 1}"
-
-    if len(name) > 80:
-        name = name[:77] + "..."
-
-    return name
-
-
 def _parse_metrix_date(value: str) -> Optional[date]:
     """Yritä tulkita Metrixin VIIKKOKISA.jsonissa oleva päivämäärä.
 
@@ -496,6 +488,10 @@ def _parse_metrix_date(value: str) -> Optional[date]:
 def _parse_results_html(html_text: str) -> Dict[str, Any]:
     """Parsii Metrix-kilpailun tulossivun HTML:n.
 
+    Varsinainen parsinta tehdään results_parser-moduulissa (vain
+    #content_auto-taulukot). Tässä täydennetään lisäksi puuttuvat
+    ratingit top3-pelaajille Metrixistä.
+
     Palauttaa rakenteen:
     {
       "event_name": str,
@@ -503,7 +499,8 @@ def _parse_results_html(html_text: str) -> Dict[str, Any]:
         {
           "class_name": str,
           "rows": [
-            {"position": int, "name": str, "to_par": str, "total": str},
+            {"position": int, "name": str, "to_par": str, "total": str,
+             "rating": str, "metrix_id": str},
             ...
           ],
         },
@@ -512,322 +509,37 @@ def _parse_results_html(html_text: str) -> Dict[str, Any]:
     }
     """
 
-    soup = BS(html_text, "html.parser")
-    event_name = _guess_event_name(soup)
-
-    class_results: List[Dict[str, Any]] = []
-
-    tables = soup.find_all("table")
-    idx = 0
-    for table in tables:
-        # Joissakin Metrix-sivuissa yksi <table> voi sisältää useita
-        # <thead>/<tbody>-pareja, jotka vastaavat eri luokkia. Käsitellään
-        # kukin thead/tbody -pariksi erikseen.
-        theads = table.find_all("thead")
-        if theads:
-            for thead in theads:
-                # Etsi mahdollinen rating-index theadin sisältä
-                rating_index = None
-                header_cells = thead.find_all("th")
-                for i, th in enumerate(header_cells):
-                    txt = th.get_text(strip=True).lower()
-                    if "rating" in txt or "rtg" in txt:
-                        rating_index = i
-                        break
+    result = results_parser.parse_results(html_text)
 
-                # Etsi vastaava tbody (seuraa theadia). Joissain sivuissa
-                # pelaajarivit ovat suoraan thead:in jälkeen <tr>-elementeinä
-                # (ei erillistä <tbody>). Käsitellään molemmat tapaukset.
-                tbody = thead.find_next_sibling("tbody")
-                rows_iterable = None
-                if tbody:
-                    rows_iterable = tbody.find_all("tr")
-                else:
-                    # Kerää tr-elementit, jotka seuraavat theadia, kunnes
-                    # törmätään uuteen theadiin tai tbody:hin.
-                    rows_tags: List[Any] = []
-                    s = thead.find_next_sibling()
-                    while s:
-                        if getattr(s, 'name', None) == 'tr':
-                            rows_tags.append(s)
-                            s = s.find_next_sibling()
-                            continue
-                        if getattr(s, 'name', None) == 'thead':
-                            break
-                        if getattr(s, 'name', None) == 'tbody':
-                            # jos löytyi tbody myöhemmin, lisää sen tr:t ja lopeta
-                            rows_tags.extend(s.find_all('tr'))
-                            break
-                        s = s.find_next_sibling()
-                    if rows_tags:
-                        rows_iterable = rows_tags
-
-                if not rows_iterable:
-                    # Jos ei löydy rivejä, etsitään seuraava tbody taulukosta
-                    tbodys = table.find_all("tbody")
-                    rows_iterable = tbodys[0].find_all("tr") if tbodys else None
-
-                if not rows_iterable:
-                    continue
-
-                rows_data: List[Dict[str, Any]] = []
-                for tr in rows_iterable:
-                    player_td = tr.find("td", class_="player-cell")
-                    if not player_td:
-                        continue
-                    tds = tr.find_all("td")
-                    if len(tds) < 3:
-                        continue
-
-                    pos_text = tds[0].get_text(strip=True)
-                    try:
-                        m_pos = re.match(r"(\d+)", pos_text)
-                        pos_html = int(m_pos.group(1)) if m_pos else None
-                    except Exception:
-                        pos_html = None
-
-                    name_parts = list(player_td.stripped_strings)
-                    name = name_parts[0] if name_parts else player_td.get_text(strip=True)
+    if metrix_stats is None:
+        return result
 
-                    metrix_id = ""
-                    try:
-                        link = player_td.find("a", href=True)
-                        if link is not None:
-                            href = str(link.get("href") or "")
-                            m_id = re.search(r"/player/(\d+)", href)
-                            if not m_id:
-                                m_id = re.search(r"user_id=(\d+)", href)
-                            if m_id:
-                                metrix_id = m_id.group(1)
-                    except Exception:
-                        metrix_id = ""
-
-                    to_par = tds[2].get_text(strip=True)
-                    total = tds[-1].get_text(strip=True)
-
-                    rating = ""
-                    if rating_index is not None and rating_index < len(tds):
-                        rating = tds[rating_index].get_text(strip=True)
-
-                    rows_data.append({
-                        "position": pos_html,
-                        "name": name,
-                        "to_par": to_par,
-                        "total": total,
-                        "rating": rating,
-                        "metrix_id": metrix_id,
-                    })
-
-                if rows_data:
-                    # Poista rivit, joissa total==0 (DNS / did not start)
-                    filtered_rows: List[Dict[str, Any]] = []
-                    for r in rows_data:
-                        total_txt = str(r.get("total") or "").strip()
-                        m = re.match(r"-?\d+", total_txt)
-                        total_num = int(m.group(0)) if m else None
-                        if total_num == 0:
-                            if DEBUG_TULOKSET:
-                                print(f"[DEBUG] Skipping DNS row: {r}")
-                            continue
-                        filtered_rows.append(r)
-                    rows_data = filtered_rows
-                    # Laske sijat kuten aiemmin
-                    def _score_key_inline(r: Dict[str, Any]) -> Any:
-                        total_txt = str(r.get("total") or "").strip()
-                        to_par_txt = str(r.get("to_par") or "").strip()
-
-                        def _parse_int(s: str) -> Optional[int]:
-                            m = re.match(r"-?\d+", s)
-                            if not m:
-                                return None
-                            try:
-                                return int(m.group(0))
-                            except Exception:
-                                return None
-
-                        total_val = _parse_int(total_txt)
-                        to_par_val = _parse_int(to_par_txt)
-
-                        primary = total_val if total_val is not None else 9999
-                        secondary = to_par_val if to_par_val is not None else 0
-                        return (primary, secondary)
-
-                    last_score: Optional[Any] = None
-                    current_place = 0
-                    same_count = 0
-                    for row in rows_data:
-                        score = _score_key_inline(row)
-                        if last_score is None:
-                            # first row
-                            current_place = 1
-                            same_count = 1
-                        elif score == last_score:
-                            # tie: same place as previous
-                            same_count += 1
-                        else:
-                            # new score: advance place by number of tied players
-                            current_place = current_place + same_count
-                            same_count = 1
-                        row["position"] = current_place
-                        last_score = score
-
-                    # Täydennetään ratingit top3:lle
-                    if metrix_stats is not None:
-                        top_rows = [
-                            r for r in rows_data
-                            if isinstance(r.get("position"), int) and 1 <= r["position"] <= 3
-                        ]
-                        if top_rows:
-                            unique_ids = {
-                                str(r.get("metrix_id") or "").strip()
-                                for r in top_rows
-                                if str(r.get("metrix_id") or "").strip()
-                            }
-                            for mid in unique_ids:
-                                _get_player_rating_from_metrix(mid)
-
-                            for r in top_rows:
-                                if not str(r.get("rating") or "").strip():
-                                    mid = str(r.get("metrix_id") or "").strip()
-                                    if not mid:
-                                        continue
-                                    val = _get_player_rating_from_metrix(mid)
-                                    if val is not None:
-                                        try:
-                                            r["rating"] = str(int(round(val)))
-                                        except Exception:
-                                            r["rating"] = str(val)
-
-                    class_name = _guess_class_name_for_table(thead, idx)
-                    class_results.append({
-                        "class_name": class_name,
-                        "rows": rows_data,
-                    })
-                    idx += 1
-            continue
-        # Fallback: jos ei theadeja, käsittele kuten aiemmin koko table rivinä
-        rows_data: List[Dict[str, Any]] = []
-        rating_index: Optional[int] = None
-        for tr in table.find_all("tr"):
-            header_cells = tr.find_all("th")
-            if header_cells:
-                if rating_index is None:
-                    for i, th in enumerate(header_cells):
-                        txt = th.get_text(strip=True).lower()
-                        if "rating" in txt or "rtg" in txt:
-                            rating_index = i
-                            break
+    # Täydennetään ratingit top3:lle
+    for cls in result.get("classes", []):
+        for r in cls.get("rows", []):
+            if not isinstance(r.get("position"), int) or not 1 <= r["position"] <= 3:
                 continue
-
-            player_td = tr.find("td", class_="player-cell")
-            if not player_td:
+            if str(r.get("rating") or "").strip():
                 continue
-
-            tds = tr.find_all("td")
-            if len(tds) < 3:
+            mid = str(r.get("metrix_id") or "").strip()
+            if not mid:
                 continue
+            val = _get_player_rating_from_metrix(mid)
+            if val is not None:
+                try:
+                    r["rating"] = str(int(round(val)))
+                except Exception:
+                    r["rating"] = str(val)
 
-            pos_text = tds[0].get_text(strip=True)
-            try:
-                m_pos = re.match(r"(\d+)", pos_text)
-                pos_html = int(m_pos.group(1)) if m_pos else None
-            except Exception:
-                pos_html = None
-
-            name_parts = list(player_td.stripped_strings)
-            name = name_parts[0] if name_parts else player_td.get_text(strip=True)
-
-            metrix_id = ""
-            try:
-                link = player_td.find("a", href=True)
-                if link is not None:
-                    href = str(link.get("href") or "")
-                    m_id = re.search(r"/player/(\d+)", href)
-                    if not m_id:
-                        m_id = re.search(r"user_id=(\d+)", href)
-                    if m_id:
-                        metrix_id = m_id.group(1)
-            except Exception:
-                metrix_id = ""
-
-            to_par = tds[2].get_text(strip=True)
-            total = tds[-1].get_text(strip=True)
-
-            rating = ""
-            if rating_index is not None and rating_index < len(tds):
-                rating = tds[rating_index].get_text(strip=True)
-
-            rows_data.append({
-                "position": pos_html,
-                "name": name,
-                "to_par": to_par,
-                "total": total,
-                "rating": rating,
-                "metrix_id": metrix_id,
-            })
-
-        if rows_data:
-            # Poista rivit, joissa total==0 (DNS / did not start)
-            filtered_rows: List[Dict[str, Any]] = []
-            for r in rows_data:
-                total_txt = str(r.get("total") or "").strip()
-                m = re.match(r"-?\d+", total_txt)
-                total_num = int(m.group(0)) if m else None
-                if total_num == 0:
-                    if DEBUG_TULOKSET:
-                        print(f"[DEBUG] Skipping DNS row: {r}")
-                    continue
-                filtered_rows.append(r)
-            rows_data = filtered_rows
-            # Sama laskenta kuin aiemmin
-            def _score_key_inline(r: Dict[str, Any]) -> Any:
-                total_txt = str(r.get("total") or "").strip()
-                to_par_txt = str(r.get("to_par") or "").strip()
-
-                def _parse_int(s: str) -> Optional[int]:
-                    m = re.match(r"-?\d+", s)
-                    if not m:
-                        return None
-                    try:
-                        return int(m.group(0))
-                    except Exception:
-                        return None
-
-                total_val = _parse_int(total_txt)
-                to_par_val = _parse_int(to_par_txt)
-
-                primary = total_val if total_val is not None else 9999
-                secondary = to_par_val if to_par_val is not None else 0
-                return (primary, secondary)
-
-            last_score: Optional[Any] = None
-            current_place = 0
-            for row in rows_data:
-                score = _score_key_inline(row)
-                if last_score is None:
-                    current_place = 1
-                elif score != last_score:
-                    current_place += 1
-                row["position"] = current_place
-                last_score = score
-
-            class_name = _guess_class_name_for_table(table, idx)
-            class_results.append({
-                "class_name": class_name,
-                "rows": rows_data,
-            })
-            idx += 1
-
-    return {
-        "event_name": event_name,
-        "classes": class_results,
-    }
+    return result
 
 
+@coalesce("results", cache_if=bool)
 def _fetch_competition_results(url: str) -> Optional[Dict[str, Any]]:
     """Hae Metrix-kilpailun tulossivu ja parsittu rakenne.
 
-    Palauttaa None, jos haku tai parsiminen epäonnistuu.
+    Palauttaa None, jos haku tai parsiminen epäonnistuu. Samanaikaiset
+    kutsut samalle URL:lle jakavat yhden haun (single_flight).
     """
 
     headers = {
@@ -1178,12 +890,17 @@ async def _handle_single_viikkari_results(message: Any, raw: str) -> None:
     except Exception:
         pass
 
-    loop = asyncio.get_running_loop()
-
-    def _do_fetch() -> Optional[Dict[str, Any]]:
-        return _fetch_competition_results(url)
+    def _do_fetch() -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        res = _fetch_competition_results(url)
+        if not res or not res.get("classes"):
+            return res, []
+        # Lisäksi yritetään hakea sivulta tasoitustaulukko (HC), jos sellainen on
+        try:
+            return res, _fetch_handicap_table(url)
+        except Exception:
+            return res, []
 
-    result = await loop.run_in_executor(None, _do_fetch)
+    result, hc_table = await scrape_executor.run("tulokset", _do_fetch, user=getattr(message.author, "id", None))
 
     if not result or not result.get("classes"):
         try:
@@ -1200,11 +917,6 @@ async def _handle_single_viikkari_results(message: Any, raw: str) -> None:
     hc_lines = []
     raw_lines = []
     classes = result.get("classes", [])
-    # Lisäksi yritetään hakea sivulta tasoitustaulukko (HC), jos sellainen on
-    try:
-        hc_table = _fetch_handicap_table(url)
-    except Exception:
-        hc_table = []
     if hc_table:
         hc_lines = _format_hc_top3_lines(hc_table)
     for cls in classes:
@@ -1457,17 +1169,10 @@ async def _handle_weekly_viikkari_results(message: Any, area_mode: str) -> None:
             pass
         return
 
-    # DEBUG: Näytetään perustiedot ennen hakusilmukkaa
-    try:
-        if DEBUG_TULOKSET:
-            print(f"[DEBUG] _handle_weekly_viikkari_results mode={mode} area_filter={area_filter} filename={filename} entries_total={len(entries)} week_entries={len(week_entries)}")
-            for i, we in enumerate(week_entries):
-                try:
-                    print(f"[DEBUG]  week_entry[{i}]: title={we.get('title')} url={we.get('url')}")
-                except Exception:
-                    continue
-    except Exception:
-        pass
+    logger.debug(
+        "viikkarit mode=%s area_filter=%s filename=%s entries_total=%d week_entries=%d",
+        mode, area_filter, filename, len(entries), len(week_entries),
+    )
 
     try:
         if hasattr(message.channel, "trigger_typing"):
@@ -1475,51 +1180,54 @@ async def _handle_weekly_viikkari_results(message: Any, area_mode: str) -> None:
     except Exception:
         pass
 
-    loop = asyncio.get_running_loop()
-
     lines: List[str] = []
     first_event = True
     week_detections: List[Dict[str, Any]] = []
+    skipped: List[str] = []
 
     # Progress tracking
     processed = 0
     total_events = len(week_entries)
     est_seconds = int(min(max(1, total_events * 1.5), 300))
-    print(f"[TULOKSET] Aloitetaan viikon viikkarit: {total_events} tapahtumaa, arvioitu ~{est_seconds}s")
+    logger.info("Viikon viikkarit: %d tapahtumaa, arvioitu ~%d s", total_events, est_seconds)
     try:
         await message.channel.send(f"Haetaan {total_events} tapahtumaa — arvioitu käsittelyaika ~{est_seconds}s. Lähetän tulokset, kun valmiina.")
     except Exception:
         pass
 
-    # Do not send debug messages to Discord; keep console debug behind DEBUG_TULOKSET
     for e in sorted(week_entries, key=lambda x: str(x.get("date") or "")):
         title = str(e.get("title") or "")
-        print(f"[TULOKSET] Aloitetaan käsittely tapahtumalle: {title}")
+        logger.debug("Käsitellään tapahtuma: %s", title)
         url_raw = str(e.get("url") or "")
         if not url_raw:
             continue
 
         url = _ensure_results_url(url_raw)
 
-        def _do_fetch_one(u: str = url) -> Optional[Dict[str, Any]]:
-            return _fetch_competition_results(u)
+        def _do_fetch_one(u: str = url) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+            res = _fetch_competition_results(u)
+            if not res or not res.get("classes"):
+                return res, []
+            # Also consider HC table presence as valid results
+            try:
+                return res, _fetch_handicap_table(u)
+            except Exception:
+                return res, []
 
-        result = await loop.run_in_executor(None, _do_fetch_one)
+        try:
+            result, hc_table = await scrape_executor.run("tulokset", _do_fetch_one, user=getattr(message.author, "id", None))
+        except scrape_executor.ScrapeError as ex:
+            # Ruuhka tai aikaraja koskee vain tätä kisaa; muut käsitellään normaalisti.
+            logger.info("Viikkarin haku ohitettiin (%s): %s", title, ex)
+            skipped.append(title or url)
+            continue
         if not result or not result.get("classes"):
             continue
 
-        # DEBUG: Tulosta kilpailun ja luokkien nimet sekä rivit konsoliin (vain kun DEBUG_TULOKSET)
-        if DEBUG_TULOKSET:
-            print(f"[DEBUG] KILPAILU: {title} ({url})")
-        # Tulostetaan luokkien tiedot vain konsoliin, jos DEBUG_TULOKSET on päällä
-        for cls in result.get("classes", []):
-            cname = str(cls.get("class_name") or "?")
-            if DEBUG_TULOKSET:
-                print(f"  [DEBUG]  LUOKKA: {cname}")
-            rows = cls.get("rows", []) or []
-            for r in rows:
-                if DEBUG_TULOKSET:
-                    print(f"    [DEBUG]   RIVI: {r}")
+        logger.debug(
+            "Kilpailu %s (%s): luokat %s", title, url,
+            ", ".join(f"{cls.get('class_name') or '?'} ({len(cls.get('rows') or [])})" for cls in result.get("classes", [])),
+        )
 
         # Determine if there are any valid result rows (total != 0)
         valid_rows_exist = False
@@ -1538,12 +1246,6 @@ async def _handle_weekly_viikkari_results(message: Any, area_mode: str) -> None:
             if valid_rows_exist:
                 break
 
-        # Also consider HC table presence as valid results
-        try:
-            hc_table = _fetch_handicap_table(url)
-        except Exception:
-            hc_table = []
-
         if not valid_rows_exist and not hc_table:
             # No real results yet (e.g., future scheduled event) — skip
             continue
@@ -1607,6 +1309,10 @@ async def _handle_weekly_viikkari_results(message: Any, area_mode: str) -> None:
         except Exception:
             pass
 
+    if skipped:
+        if lines:
+            lines.append("")
+        lines.append(f"Ohitettiin {len(skipped)} kisaa (haku ruuhkassa tai kesti liian kauan): " + ", ".join(skipped))
     desc = "\n".join(lines) if lines else "Tälle viikolle ei löytynyt tulostettavia viikkarikisoja."
 
     try:
@@ -1629,7 +1335,7 @@ async def _handle_weekly_viikkari_results(message: Any, area_mode: str) -> None:
     # After posting weekly summary for the area, announce any detected Lakeus Disc Golf successes
     try:
         if week_detections:
-            print(f"[TULOKSET] Löytyi {len(week_detections)} Lakeus-pelaajaa viikon Top3:sta; tallennetaan ja ilmoitetaan.")
+            logger.info("Viikon Top3:sta löytyi %d Lakeus-pelaajaa; tallennetaan ja ilmoitetaan", len(week_detections))
             # Persist detections
             for d in week_detections:
                 try:
@@ -1696,6 +1402,9 @@ async def handle_tulokset(message: Any, parts: Any) -> None:
             !tulokset kisa <Metrix-linkki tai ID>
             !tulokset viikkari <Metrix-linkki tai ID>
                                               – yksittäisen Metrix-kisan Top3 tulokset luokittain
+
+            !tulokset live [mk|<linkki/ID>|stop]
+                                              – tämän päivän kisojen live-seuranta (live_results)
     """
 
     # Ei lisäparametreja: tämän viikon viikkarit EP-alueella.
@@ -1705,6 +1414,13 @@ async def handle_tulokset(message: Any, parts: Any) -> None:
 
     sub = str(parts[1] or "").strip().lower()
 
+    # !tulokset live ... → käynnissä olevien kisojen seuranta yhdessä viestissä
+    if sub == "live":
+        from . import live_results
+
+        await live_results.handle_live(message, parts)
+        return
+
     # !tulokset kisa <linkki/ID> → yksittäisen kilpailun tulokset
     if sub in {"kisa", "k"}:
         if len(parts) < 3:
@@ -1,5 +1,4 @@
 import os
-import asyncio
 from datetime import datetime, date, timedelta
 from .date_utils import normalize_date_string
 from typing import Any, List, Optional, Tuple
@@ -23,6 +22,8 @@ try:
 except Exception:  # pragma: no cover
     data_store = None  # type: ignore[assignment]
 
+from . import scrape_executor
+
 try:
     from . import check_capacity as capacity_mod
 except Exception:  # pragma: no cover
@@ -40,8 +41,6 @@ async def _get_capacity_display(url: str) -> str:
     if capacity_mod is None or not hasattr(capacity_mod, "check_competition_capacity"):
         return ""
 
-    loop = asyncio.get_running_loop()
-
     def _run() -> Any:
         try:
             mod = capacity_mod
@@ -51,7 +50,11 @@ async def _get_capacity_display(url: str) -> str:
         except Exception:
             return None
 
-    cap = await loop.run_in_executor(None, _run)
+    try:
+        cap = await scrape_executor.run("viikkarit", _run, timeout=20)
+    except scrape_executor.ScrapeError:
+        # Kapasiteetti on lisätieto; ruuhkassa lista näytetään ilman sitä.
+        return ""
     if not isinstance(cap, dict):
         return ""
 
@@ -0,0 +1,302 @@
+"""Kilpailulistojen muutossyöte (delta) peräkkäisten hakujen välillä.
+
+Jokainen haku korvasi PDGA/VIIKKOKISA/DOUBLES-listat kokonaan, ja "uudet"
+päätettiin myöhemmin known_*-joukoista, joten päivämäärän, paikan tai
+nimen muutokset ja perumiset jäivät huomaamatta. Tämä moduuli vertaa
+uutta listaa edelliseen kilpailun id:n perusteella ja kirjoittaa
+tyypitetyt muutostapahtumat tauluun `competition_changes`:
+
+  added        uusi kilpailu
+  removed      kilpailu poistui listalta (peruttu/poistettu)
+  rescheduled  päivämäärä muuttui
+  renamed      nimi muuttui
+  moved        paikka muuttui
+
+Edellinen tila pidetään taulussa `competition_snapshot`. Ensimmäinen ajo
+kategorialle vain alustaa tilan (ei tapahtumia), ja tyhjä lista
+edellisen ei-tyhjän jälkeen tulkitaan hakuvirheeksi eikä poistoiksi.
+``diff_snapshot`` ei kirjoita mitään; kutsuja tallentaa tilan
+``commit_snapshot``-funktiolla vasta, kun muutokset on julkaistu, joten
+epäonnistunut julkaisu ei hukkaa "added"-tapahtumaa.
+
+Ilmoittautumistarkistus välimuistittaa tauluun `competition_checks` vain
+pysyvät tulokset (ilmoittautuminen jo auki). Suljetut ja pian avautuvat
+haetaan joka kerta, koska avautuminen näkyy vain sivun tekstistä, ei
+listan kentistä.
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from . import data_store
+from .date_utils import date_key
+
+
+logger = logging.getLogger(__name__)
+
+
+CHANGE_KINDS = ("added", "removed", "rescheduled", "renamed", "moved")
+# Kenttä, jonka muutos tuottaa kyseisen tapahtuman.
+FIELD_CHANGES = (("date", "rescheduled"), ("title", "renamed"), ("location", "moved"))
+KEEP_CHANGES_DAYS = 90
+
+
+def comp_key(entry: Dict[str, Any]) -> str:
+    """Kilpailun avain: id, url tai "nimi|PP.KK.VVVV" (sama kuin known_*-vertailussa)."""
+
+    if entry.get("id"):
+        return str(entry.get("id"))
+    if entry.get("url"):
+        return str(entry.get("url"))
+    name = str(entry.get("title") or entry.get("name") or "").strip()
+    raw_date = str(entry.get("date") or entry.get("start") or "")
+    return f"{name}|{date_key(raw_date)}".strip()
+
+
+def _fields(entry: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "title": str(entry.get("title") or entry.get("name") or "").strip(),
+        "date": str(entry.get("date") or "").strip(),
+        "location": str(entry.get("location") or "").strip(),
+        "url": str(entry.get("url") or "").strip(),
+    }
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(data_store._db_path())
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS competition_snapshot (
+               category TEXT NOT NULL,
+               comp_id TEXT NOT NULL,
+               title TEXT,
+               date TEXT,
+               location TEXT,
+               url TEXT,
+               seen_at REAL NOT NULL,
+               PRIMARY KEY (category, comp_id)
+           )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS competition_changes (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               category TEXT NOT NULL,
+               comp_id TEXT NOT NULL,
+               change TEXT NOT NULL,
+               old_value TEXT,
+               new_value TEXT,
+               title TEXT,
+               url TEXT,
+               detected_at REAL NOT NULL
+           )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_competition_changes_comp ON competition_changes (comp_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_competition_changes_detected ON competition_changes (category, detected_at)")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS competition_checks (
+               comp_id TEXT PRIMARY KEY,
+               result TEXT NOT NULL,
+               checked_at REAL NOT NULL
+           )"""
+    )
+    return conn
+
+
+def _current(entries: Optional[Sequence[Dict[str, Any]]]) -> Dict[str, Dict[str, str]]:
+    current: Dict[str, Dict[str, str]] = {}
+    for e in entries or []:
+        key = comp_key(e)
+        if key and key not in current:
+            current[key] = _fields(e)
+    return current
+
+
+def diff_snapshot(category: str, entries: Sequence[Dict[str, Any]], now: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+    """Vertaa ``entries`` kategorian edelliseen tilaan (ei tallenna mitään).
+
+    Palauttaa muutostapahtumat listana (tyhjä = ei muutoksia) tai None, kun
+    vertailua ei voitu tehdä (ensimmäinen ajo, epäilty hakuvirhe tai
+    tietokantavirhe); silloin kutsujan pitää käyttää vanhaa logiikkaa.
+    Ensimmäinen ajo alustaa tilan heti, koska tapahtumia ei ole.
+    Muuten tila päivitetään vasta ``commit_snapshot``-kutsulla.
+    """
+
+    now = now or time.time()
+    current = _current(entries)
+
+    try:
+        with _connect() as conn:
+            previous = {
+                row[0]: {"title": row[1] or "", "date": row[2] or "", "location": row[3] or "", "url": row[4] or ""}
+                for row in conn.execute(
+                    "SELECT comp_id, title, date, location, url FROM competition_snapshot WHERE category = ?",
+                    (category,),
+                )
+            }
+    except Exception as e:
+        logger.warning("kilpailumuutosten vertailu epäonnistui (%s): %s", category, e)
+        return None
+
+    if previous and not current:
+        logger.warning("kilpailumuutokset: %s-lista tyhjä, ohitetaan vertailu", category)
+        return None
+    if not previous:
+        if commit_snapshot(category, entries, [], now=now):
+            logger.info("kilpailumuutokset: %s alustettu (%d kilpailua)", category, len(current))
+        return None
+
+    changes: List[Dict[str, Any]] = []
+    for key, new in current.items():
+        old = previous.get(key)
+        if old is None:
+            changes.append(_change(category, key, "added", None, new["title"], new, now))
+            continue
+        for field, kind in FIELD_CHANGES:
+            if old[field] != new[field]:
+                changes.append(_change(category, key, kind, old[field], new[field], new, now))
+    for key, old in previous.items():
+        if key not in current:
+            changes.append(_change(category, key, "removed", old["title"], None, old, now))
+    return changes
+
+
+def commit_snapshot(
+    category: str,
+    entries: Sequence[Dict[str, Any]],
+    changes: Sequence[Dict[str, Any]],
+    now: Optional[float] = None,
+) -> bool:
+    """Tallenna julkaistut muutostapahtumat ja ``entries`` kategorian uudeksi tilaksi."""
+
+    now = now or time.time()
+    current = _current(entries)
+    try:
+        with _connect() as conn:
+            conn.executemany(
+                """INSERT INTO competition_changes (category, comp_id, change, old_value, new_value, title, url, detected_at)
+                   VALUES (:category, :comp_id, :change, :old_value, :new_value, :title, :url, :detected_at)""",
+                list(changes),
+            )
+            # Muuttuneiden kilpailujen välimuistitetut tarkistukset vanhenevat heti.
+            conn.executemany(
+                "DELETE FROM competition_checks WHERE comp_id = ?",
+                [(c["comp_id"],) for c in changes],
+            )
+            conn.execute("DELETE FROM competition_snapshot WHERE category = ?", (category,))
+            conn.executemany(
+                "INSERT INTO competition_snapshot (category, comp_id, title, date, location, url, seen_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(category, k, v["title"], v["date"], v["location"], v["url"], now) for k, v in current.items()],
+            )
+            conn.execute("DELETE FROM competition_changes WHERE detected_at < ?", (now - KEEP_CHANGES_DAYS * 86400,))
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.warning("kilpailutilan tallennus epäonnistui (%s): %s", category, e)
+        return False
+
+
+def _change(category: str, key: str, kind: str, old: Optional[str], new: Optional[str], fields: Dict[str, str], now: float) -> Dict[str, Any]:
+    return {
+        "category": category,
+        "comp_id": key,
+        "change": kind,
+        "old_value": old,
+        "new_value": new,
+        "title": fields.get("title") or "",
+        "url": fields.get("url") or "",
+        "detected_at": now,
+    }
+
+
+def ids_with(changes: Optional[Iterable[Dict[str, Any]]], kinds: Sequence[str] = CHANGE_KINDS) -> Optional[set]:
+    """Muutostapahtumien kilpailu-id:t (None, jos syötettä ei ole)."""
+
+    if changes is None:
+        return None
+    return {c["comp_id"] for c in changes if c.get("change") in kinds}
+
+
+def recent_changes(category: Optional[str] = None, since: Optional[float] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """Uusimmat tallennetut muutostapahtumat (uusin ensin)."""
+
+    sql = "SELECT category, comp_id, change, old_value, new_value, title, url, detected_at FROM competition_changes"
+    where, params = [], []
+    if category:
+        where.append("category = ?")
+        params.append(category)
+    if since is not None:
+        where.append("detected_at >= ?")
+        params.append(float(since))
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(int(limit))
+    cols = ("category", "comp_id", "change", "old_value", "new_value", "title", "url", "detected_at")
+    try:
+        with _connect() as conn:
+            return [dict(zip(cols, row)) for row in conn.execute(sql, params)]
+    except Exception:
+        return []
+
+
+def is_cacheable_check(result: Dict[str, Any]) -> bool:
+    """Vain pysyvä tila (ilmoittautuminen jo auki) kelpaa välimuistiin.
+
+    Suljettu tai pian avautuva tila voi muuttua minä hetkenä tahansa, eikä
+    muutos näy listan kentissä, joten ne tarkistetaan joka ajolla.
+    """
+
+    note = str(result.get("note") or "")
+    return bool(result.get("registration_open")) and not note.startswith(("error", "http"))
+
+
+def cached_check(comp_id: str, max_age_seconds: float, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Kilpailun edellinen ilmoittautumistarkistus, jos se on tuore ja pysyvä.
+
+    ``opens_in_days`` päivitetään tallennushetkestä kuluneella ajalla.
+    Tulosta ei käytetä, jos se ei ole pysyvä (``is_cacheable_check``) tai
+    jos sen avautumispäivä on jo koittanut.
+    """
+
+    if not comp_id:
+        return None
+    now = now or time.time()
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT result, checked_at FROM competition_checks WHERE comp_id = ?", (str(comp_id),)).fetchone()
+    except Exception:
+        return None
+    if row is None or (now - float(row[1] or 0)) > max_age_seconds:
+        return None
+    try:
+        result = json.loads(row[0])
+    except Exception:
+        return None
+    if not isinstance(result, dict) or not is_cacheable_check(result):
+        return None
+    opens_in = result.get("opens_in_days")
+    if isinstance(opens_in, (int, float)):
+        remaining = int(opens_in) - int((now - float(row[1] or 0)) // 86400)
+        if remaining <= 0 and int(opens_in) > 0:
+            return None
+        result["opens_in_days"] = remaining
+    return result
+
+
+def store_checks(results: Iterable[Dict[str, Any]], now: Optional[float] = None) -> None:
+    now = now or time.time()
+    rows = [
+        (comp_key(r), json.dumps(r, ensure_ascii=False), now)
+        for r in results
+        if comp_key(r) and is_cacheable_check(r)
+    ]
+    if not rows:
+        return
+    try:
+        with _connect() as conn:
+            conn.executemany("REPLACE INTO competition_checks (comp_id, result, checked_at) VALUES (?, ?, ?)", rows)
+            conn.commit()
+    except Exception as e:
+        logger.warning("ilmoittautumistarkistusten tallennus epäonnistui: %s", e)
@@ -0,0 +1,398 @@
+"""Yhteinen Metrix-kilpailulistan haku ja jäsennys.
+
+Aiemmin search_weekly_fast, search_weekly_areas, search_pari_EP2025 ja
+search_pdga_sfl tekivät kukin oman competitions_server.php-pyyntönsä ja
+jäsensivät saman gridlist-/taulukkomerkinnän omalla kopiollaan.
+Tässä moduulissa on yksi jäsennin (parse_entries), yksi luokittelija
+(classify / is_doubles) ja kertahaku (fetch_snapshot), josta VIIKKOKISA,
+VIIKKARIT_SEUTU ja DOUBLES täytetään paikallisesti:
+
+    snap = fetch_snapshot()
+    weekly = snap.weekly()            # EP, koko vuosi → VIIKKOKISA
+    seutu = snap.seutu()              # kaikki alueet, 7 pv → VIIKKARIT_SEUTU
+    doubles = snap.doubles()          # EP, koko vuosi → DOUBLES
+
+Metrixin listamerkinnöissä ei ole maakuntaa (sijainti on muotoa
+"Rata → Layout"), joten koko maan listaa ei voi jakaa alueisiin
+paikallisesti. Siksi jokainen alue haetaan kerran (rinnakkain) kaikilla
+kilpailutyypeillä ja alueen päiväysikkunaksi otetaan kuluttajien
+ikkunoiden yhdiste; viikkari-, seutu- ja parikisalistat erotellaan
+samasta vastauksesta. Näin erillinen type=d-haku ja kaksinkertainen
+EP-haku jäävät pois.
+"""
+
+import logging
+import re
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+from bs4 import BeautifulSoup as BS
+
+from .date_utils import normalize_date_string
+
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://discgolfmetrix.com"
+SERVER_URL = f"{BASE_URL}/competitions_server.php"
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+PAGE_SIZE = 500
+MAX_WORKERS = 6
+
+weekly_re = re.compile(r"\b(weekly|week|viikko|viikkari|viikotta|viikkokisa|viikkokisat|viikkot|weeklies)\b", re.I)
+pair_re = re.compile(r"\b(pari|parikisa|parikilpailu|parigolf|pariviikko|pariviikkokisat|pair|pairs|double|doubles|best shot|max2)\b", re.I)
+
+# substring fallback for robustness
+PAIR_KEYWORDS = ["pari", "parikisa", "parikilpailu", "parigolf", "pariviikko", "pariviikkokisat", "pair", "pairs", "double", "doubles", "best shot", "max2"]
+WEEKLY_KEYWORDS = ["weekly", "week", "viikko", "viikkari", "viikotta", "viikkokisa", "viikkokisat", "viikkot", "weeklies"]
+
+
+def abs_url(href: str) -> str:
+    if not href:
+        return ""
+    try:
+        return urllib.parse.urljoin(BASE_URL, href)
+    except Exception:
+        return href
+
+
+def build_server_url(
+    area: str = "",
+    date1: str = "",
+    date2: str = "",
+    country: str = "FI",
+    comp_type: str = "",
+    page_size: int = PAGE_SIZE,
+    **extra: str,
+) -> str:
+    """competitions_server-haun URL (iso sivukoko, ettei sivutusta tarvita)."""
+
+    type_part = f"&type={comp_type}" if comp_type else ""
+    extra_part = "".join(f"&{k}={urllib.parse.quote(str(v))}" for k, v in extra.items())
+    url = (
+        f"{SERVER_URL}?name=&date1={date1}&date2={date2}&registration_date1=&registration_date2="
+        f"&country_code={country}{type_part}{extra_part}&from=1&to={int(page_size)}&page=all"
+    )
+    if area:
+        url += f"&area={urllib.parse.quote(area)}"
+    return url
+
+
+def parse_entries(html: str) -> List[Dict[str, Any]]:
+    """Jäsennä listasivun kilpailut (gridlist + taulukkorivit).
+
+    Palauttaa raakamerkinnät avaimilla id, title, tier, raw_date, location,
+    url ja layout ("grid"/"table"), id:n (tai otsikon) mukaan
+    duplikaatit poistettuna. Luokittelu ja päiväysmuoto jätetään kutsujalle.
+    """
+
+    soup = BS(html or "", "html.parser")
+    container = soup.find(id="competition_list2") or soup
+    results: List[Dict[str, Any]] = []
+
+    for a in container.select("a.gridlist"):
+        href_str = str(a.get("href", "") or "")
+        m = re.search(r"/(\d+)", href_str)
+        h2 = a.find("h2")
+        title = h2.get_text(strip=True) if h2 is not None else (a.get_text(strip=True) or "")
+        tspan = a.select_one(".competition-type")
+        meta = a.select(".metadata-list li") or []
+        results.append(
+            {
+                "id": m.group(1) if m else None,
+                "title": title,
+                "tier": tspan.get_text(strip=True) if tspan is not None else "",
+                "raw_date": meta[0].get_text(strip=True) if len(meta) > 0 else "",
+                "location": meta[1].get_text(strip=True) if len(meta) > 1 else "",
+                "url": abs_url(href_str),
+                "layout": "grid",
+            }
+        )
+
+    for tr in container.select("table.table-list tbody tr"):
+        cols = tr.find_all("td")
+        if not cols:
+            continue
+        link = cols[0].find("a")
+        href_str = str(link.get("href", "") if link is not None else "")
+        m = re.search(r"/(\d+)", href_str)
+        results.append(
+            {
+                "id": m.group(1) if m else None,
+                "title": link.get_text(strip=True) if link is not None else (cols[0].get_text(strip=True) or ""),
+                "tier": cols[2].get_text(strip=True) if len(cols) > 2 else "",
+                "raw_date": cols[1].get_text(strip=True) if len(cols) > 1 else "",
+                "location": cols[3].get_text(strip=True) if len(cols) > 3 else "",
+                "url": abs_url(href_str),
+                "layout": "table",
+            }
+        )
+
+    seen = set()
+    unique: List[Dict[str, Any]] = []
+    for r in results:
+        cid = r.get("id") or r.get("title")
+        if not cid or cid in seen:
+            continue
+        seen.add(cid)
+        unique.append(r)
+    return unique
+
+
+def classify(entry: Dict[str, Any]) -> Optional[str]:
+    """PARIKISA / VIIKKOKISA / None otsikon, tyypin ja sijainnin perusteella."""
+
+    title_l = str(entry.get("title") or entry.get("name") or "").lower()
+    loc_l = str(entry.get("location") or "").lower()
+    tier_l = str(entry.get("tier") or "").lower()
+    texts = (title_l, loc_l, tier_l)
+    if any(pair_re.search(t) for t in texts) or any(k in t for k in PAIR_KEYWORDS for t in texts):
+        return "PARIKISA"
+    is_weekly = any(weekly_re.search(t) for t in texts) or any(k in t for k in WEEKLY_KEYWORDS for t in texts)
+    # avoid tagging PDGA-liiga as weekly
+    if is_weekly and "liiga" not in title_l and "liiga" not in tier_l:
+        return "VIIKKOKISA"
+    return None
+
+
+def is_doubles(entry: Dict[str, Any]) -> bool:
+    """Parikisa, jos otsikossa tai kilpailutyypissä on pariavainsana."""
+
+    title = str(entry.get("title") or entry.get("name") or "")
+    tier = str(entry.get("tier") or "")
+    return bool((title and pair_re.search(title)) or (tier and pair_re.search(tier)))
+
+
+def normalized_date(entry: Dict[str, Any]) -> str:
+    """Päiväys muotoon DD.MM.YYYY (Metrix käyttää MM/DD/YY-muotoa).
+
+    Taulukkorivien välit ("01/01/26 - 12/31/26") normalisoidaan
+    molemmista päistä kuten aiemmin; gridlistasta otetaan alkupäivä.
+    """
+
+    raw = str(entry.get("raw_date") or "")
+    if not raw:
+        return raw
+    try:
+        if entry.get("layout") == "table" and "-" in raw:
+            parts = [normalize_date_string(p.strip(), prefer_month_first=True) for p in raw.split("-")]
+            return " - ".join(p for p in parts if p)
+        return normalize_date_string(raw, prefer_month_first=True)
+    except Exception:
+        return raw
+
+
+def _parse_day(text: str) -> Optional[date]:
+    norm = normalize_date_string(text.strip(), prefer_month_first=True) if text else ""
+    try:
+        return datetime.strptime(str(norm)[:10], "%d.%m.%Y").date()
+    except Exception:
+        return None
+
+
+def date_span(entry: Dict[str, Any]) -> Tuple[Optional[date], Optional[date]]:
+    """(alku, loppu) raakapäiväyksestä; loppu = alku yksipäiväisille."""
+
+    raw = str(entry.get("raw_date") or entry.get("date") or "")
+    parts = [p for p in re.split(r"\s+-\s+", raw) if p.strip()]
+    if not parts:
+        return None, None
+    start = _parse_day(parts[0])
+    end = _parse_day(parts[-1]) if len(parts) > 1 else start
+    return start, end or start
+
+
+def in_window(entry: Dict[str, Any], date1: str, date2: str) -> bool:
+    """Osuuko kilpailu ikkunaan [date1, date2]; tuntematon päiväys → kyllä."""
+
+    start, end = date_span(entry)
+    if start is None:
+        return True
+    try:
+        lo = date.fromisoformat(date1)
+        hi = date.fromisoformat(date2)
+    except Exception:
+        return True
+    return start <= hi and (end or start) >= lo
+
+
+def fetch_html(url: str, session: Any = None, timeout: int = 20, headers: Optional[Dict[str, str]] = None) -> str:
+    http = session if session is not None else requests
+    resp = http.get(url, timeout=timeout, headers=headers or HEADERS)
+    try:
+        resp.raise_for_status()
+    except AttributeError:
+        pass
+    try:
+        resp.encoding = resp.apparent_encoding
+    except Exception:
+        pass
+    return resp.text or ""
+
+
+def fetch_listing(
+    area: str = "",
+    date1: str = "",
+    date2: str = "",
+    country: str = "FI",
+    comp_type: str = "",
+    session: Any = None,
+    timeout: int = 20,
+) -> List[Dict[str, Any]]:
+    """Hae yksi competitions_server-lista ja palauta raakamerkinnät."""
+
+    url = build_server_url(area, date1, date2, country, comp_type)
+    entries = parse_entries(fetch_html(url, session=session, timeout=timeout))
+    for e in entries:
+        e["area"] = area
+    return entries
+
+
+def seutu_window(today: Optional[date] = None, days: int = 7) -> Tuple[str, str]:
+    """Seutu-viikkareiden ikkuna: tänään → seuraavat ``days`` päivää."""
+
+    today = today or date.today()
+    return today.isoformat(), (today + timedelta(days=days)).isoformat()
+
+
+@dataclass
+class ListingSnapshot:
+    """Yhden haun tulos: alueittain jäsennetyt merkinnät ja ikkunat."""
+
+    by_area: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    windows: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    durations: Dict[str, float] = field(default_factory=dict)
+    weekly_area: str = ""
+    weekly_window: Tuple[str, str] = ("", "")
+    seutu_areas: Sequence[str] = ()
+    seutu_window: Tuple[str, str] = ("", "")
+
+    def entries(self, area: Optional[str] = None) -> List[Dict[str, Any]]:
+        if area is not None:
+            return list(self.by_area.get(area) or [])
+        out: List[Dict[str, Any]] = []
+        for items in self.by_area.values():
+            out.extend(items)
+        return out
+
+    def _window(self, entries: Iterable[Dict[str, Any]], window: Tuple[str, str], area: str) -> List[Dict[str, Any]]:
+        # Ikkunasuodatus tarvitaan vain, jos alue haettiin laajemmalla ikkunalla.
+        if self.windows.get(area) == window:
+            return list(entries)
+        return [e for e in entries if in_window(e, *window)]
+
+    def weekly(self, area: Optional[str] = None) -> List[Dict[str, Any]]:
+        """VIIKKOKISA-lista (search_weekly_fast.find_weekly -muoto)."""
+
+        area = area or self.weekly_area
+        out = []
+        for e in self._window(self.entries(area), self.weekly_window, area):
+            # Alueen luokittelemattomat kisat oletetaan viikkokisoiksi kuten ennenkin.
+            kind = classify(e) or "VIIKKOKISA"
+            if kind != "VIIKKOKISA":
+                continue
+            out.append({"id": e["id"], "title": e["title"], "tier": e["tier"], "date": normalized_date(e), "location": e["location"], "kind": kind, "url": e["url"]})
+        return out
+
+    def seutu(self, areas: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """VIIKKARIT_SEUTU-lista: kaikkien alueiden viikkarit seutuikkunassa."""
+
+        out: List[Dict[str, Any]] = []
+        seen = set()
+        for area in areas or self.seutu_areas:
+            for e in self._window(self.entries(area), self.seutu_window, area):
+                cid = e.get("id") or e.get("title")
+                if cid in seen:
+                    continue
+                seen.add(cid)
+                kind = classify(e) or "VIIKKOKISA"
+                if kind != "VIIKKOKISA":
+                    continue
+                out.append({"id": e["id"], "title": e["title"], "tier": e["tier"], "date": e["raw_date"], "location": e["location"], "kind": kind, "url": e["url"], "area": area})
+        return out
+
+    def doubles(self, area: Optional[str] = None) -> List[Dict[str, Any]]:
+        """DOUBLES-lista (search_pari_EP2025.find_doubles -muoto)."""
+
+        area = area or self.weekly_area
+        return [
+            doubles_entry(e)
+            for e in self._window(self.entries(area), self.weekly_window, area)
+            if e.get("id") and is_doubles(e)
+        ]
+
+    def summary(self) -> str:
+        parts = [f"{area} {len(items)} ({self.durations.get(area, 0.0):.1f} s)" for area, items in self.by_area.items()]
+        parts.extend(f"{area} virhe" for area in self.errors)
+        return ", ".join(parts)
+
+
+def doubles_entry(e: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": e["id"],
+        "title": e["title"],
+        "kind": e["tier"] or None,
+        "date": normalize_date_string(e["raw_date"], prefer_month_first=True) if e.get("raw_date") else None,
+        "location": e["location"] or None,
+        "url": abs_url(f"/{e['id']}") if e.get("id") else e.get("url", ""),
+    }
+
+
+def _union(a: Tuple[str, str], b: Tuple[str, str]) -> Tuple[str, str]:
+    return min(a[0], b[0]), max(a[1], b[1])
+
+
+def fetch_snapshot(
+    weekly_area: Optional[str] = None,
+    weekly_window: Optional[Tuple[str, str]] = None,
+    seutu_areas: Optional[Sequence[str]] = None,
+    seutu_dates: Optional[Tuple[str, str]] = None,
+    country: str = "FI",
+    session: Any = None,
+    timeout: int = 20,
+    max_workers: int = MAX_WORKERS,
+) -> ListingSnapshot:
+    """Hae jokainen alue kerran rinnakkain ja palauta ListingSnapshot.
+
+    Oletukset tulevat search_weekly_fast- (alue + vuosi-ikkuna) ja
+    search_weekly_areas-moduuleista (WEEKLY_AREAS + 7 päivää).
+    """
+
+    from . import search_weekly_areas, search_weekly_fast
+
+    snap = ListingSnapshot(
+        weekly_area=weekly_area or search_weekly_fast.AREA,
+        weekly_window=weekly_window or (search_weekly_fast.DATE1, search_weekly_fast.DATE2),
+        seutu_areas=list(seutu_areas if seutu_areas is not None else search_weekly_areas.AREAS),
+        seutu_window=seutu_dates or seutu_window(),
+    )
+
+    windows: Dict[str, Tuple[str, str]] = {}
+    for area in snap.seutu_areas:
+        windows[area] = snap.seutu_window
+    windows[snap.weekly_area] = _union(windows[snap.weekly_area], snap.weekly_window) if snap.weekly_area in windows else snap.weekly_window
+    snap.windows = windows
+
+    def one(area: str):
+        started = time.perf_counter()
+        d1, d2 = windows[area]
+        try:
+            return area, fetch_listing(area, d1, d2, country, session=session, timeout=timeout), None, time.perf_counter() - started
+        except Exception as e:
+            return area, None, e, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(windows))), thread_name_prefix="listing") as ex:
+        for area, entries, error, secs in ex.map(one, list(windows)):
+            snap.durations[area] = secs
+            if error is not None:
+                snap.errors[area] = error
+                logger.warning("Kilpailulistan haku epäonnistui alueelle %s: %s", area, error)
+            else:
+                snap.by_area[area] = entries or []
+    return snap
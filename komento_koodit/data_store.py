@@ -1,9 +1,12 @@
 import os
 import json
+import logging
 import sqlite3
 import datetime
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 
 def _base_dir(provided: Optional[str] = None) -> str:
     if provided is not None and provided != '':
@@ -19,6 +22,30 @@ def _db_path() -> str:
     return os.path.join(db_dir, 'discordbot.db')
 
 
+# Callbacks called with the category name after every save_category
+# (e.g. response_cache invalidates answers that depend on the category).
+_save_listeners = []
+
+
+def add_save_listener(callback):
+    if callback not in _save_listeners:
+        _save_listeners.append(callback)
+
+
+def notify_saved(name: str):
+    """Call the save listeners for ``name``.
+
+    save_category does this itself; callers that write a category file
+    directly (e.g. the known_* JSON caches) call it after the write.
+    """
+    name = os.path.splitext(os.path.basename(str(name)))[0]
+    for cb in list(_save_listeners):
+        try:
+            cb(name)
+        except Exception as e:
+            logger.exception("save listener failed for %s: %s", name, e)
+
+
 def _ensure_table(conn: sqlite3.Connection):
     conn.execute(
         'CREATE TABLE IF NOT EXISTS json_store (name TEXT PRIMARY KEY, content TEXT NOT NULL)'
@@ -48,10 +75,7 @@ def save_category(name: str, entries, out_path: Optional[str] = None, base_dir:
             content = json.dumps(entries, ensure_ascii=False)
             conn.execute('REPLACE INTO json_store (name, content) VALUES (?, ?)', (name, content))
             conn.commit()
-        try:
-            print(f"Saved {len(entries) if hasattr(entries, '__len__') else 'items'} to sqlite:{db} as {name}")
-        except Exception:
-            print(f"Saved to sqlite:{db} as {name}")
+        logger.info("Saved %s to sqlite as %s", len(entries) if hasattr(entries, '__len__') else 'items', name)
         # remove any legacy JSON file at project root to avoid duplicate on-disk artifacts
         try:
             root = _base_dir(base_dir)
@@ -63,9 +87,10 @@ def save_category(name: str, entries, out_path: Optional[str] = None, base_dir:
                     pass
         except Exception:
             pass
+        notify_saved(name)
         return
     except Exception as e:
-        print(f"SQLite save failed for {name}: {e}; falling back to file")
+        logger.warning("SQLite save failed for %s: %s; falling back to file", name, e)
 
     # fallback to file-based storage
     bd = _base_dir(base_dir)
@@ -76,9 +101,10 @@ def save_category(name: str, entries, out_path: Optional[str] = None, base_dir:
     try:
         with open(path, 'w', encoding='utf-8') as f:
             json.dump(entries, f, ensure_ascii=False, indent=2)
-        print(f"Saved {len(entries) if hasattr(entries, '__len__') else 'items'} {name} entries to {path}")
+        logger.info("Saved %s %s entries to %s", len(entries) if hasattr(entries, '__len__') else 'items', name, path)
     except Exception as e:
-        print(f"Failed to save {name} JSON: {e}")
+        logger.error("Failed to save %s JSON: %s", name, e)
+    notify_saved(name)
 
 
 def load_category(name: str, path: Optional[str] = None, base_dir: Optional[str] = None):
@@ -103,7 +129,7 @@ def load_category(name: str, path: Optional[str] = None, base_dir: Optional[str]
                 return parsed
     except Exception as e:
         # continue to file fallback
-        print(f"SQLite load failed for {name}: {e}; falling back to file")
+        logger.warning("SQLite load failed for %s: %s; falling back to file", name, e)
 
     bd = _base_dir(base_dir)
     p = path or os.path.join(str(bd), f"{name}.json")
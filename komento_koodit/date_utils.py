@@ -73,3 +73,30 @@ def normalize_date_string(s: str, prefer_month_first: bool = False) -> str:
     if dt.hour or dt.minute:
         out = f"{out} {dt.strftime('%H:%M')}"
     return out
+
+
+def date_key(raw_date: str) -> str:
+    """Listan päivämäärä vakioavaimeksi PP.KK.VVVV (ilman kellonaikaa).
+
+    Metrixin MM/DD/YY(YY), eurooppalainen PP.KK.VVVV ja ISO VVVV-KK-PP
+    tunnistetaan tekstin seasta; muuten palautetaan tyhjä merkkijono.
+    Käytetään kilpailujen vertailuavaimissa (known_*-listat ja
+    competition_changes), joten saman kisan avain ei riipu lähteen muodosta.
+    """
+    if not raw_date:
+        return ''
+    m = re.search(r'(\d{1,2})/(\d{1,2})/(\d{2,4})', raw_date)
+    if m:
+        mo, d, y = m.groups()  # Metrix antaa muodossa MM/DD/YY
+        if len(y) == 2:
+            y = '20' + y
+        return f"{d.zfill(2)}.{mo.zfill(2)}.{y}"
+    m2 = re.search(r'(\d{1,2})\.(\d{1,2})\.(\d{4})', raw_date)
+    if m2:
+        d, mo, y = m2.groups()
+        return f"{d.zfill(2)}.{mo.zfill(2)}.{y}"
+    m3 = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', raw_date)
+    if m3:
+        y, mo, d = m3.groups()
+        return f"{d.zfill(2)}.{mo.zfill(2)}.{y}"
+    return ''
@@ -0,0 +1,284 @@
+"""Kiekkokorttien kuva- ja lentonumerovälimuisti.
+
+send_disc_card haki aiemmin PDGA:n detaljisivun kahdesti jokaista korttia
+kohden (kuva + lentonumerot). Tämä moduuli tallentaa tulokset tauluun
+`pdga_disc_assets` avaimella cert-numero (tai "model:<malli>"):
+
+  - löytynyt sivu   → voimassa ASSET_TTL_HOURS (positiivinen TTL)
+  - puuttuva sivu   → voimassa ASSET_NEGATIVE_TTL_HOURS (negatiivinen TTL),
+                      ettei olemattomia sivuja haeta joka kerta uudelleen;
+                      vain varma "ei löydy" (404/410) lasketaan puuttuvaksi
+  - hakuvirhe       → voimassa ASSET_ERROR_TTL_MINUTES (aikakatkaisu, verkko-
+                      tai palvelinvirhe); aiempaa löytynyttä merkintää ei
+                      korvata virheellä
+
+Lentonumerot täydennetään myös json_storen FLIGHT_NUMBERS-kategoriasta
+("Valmistaja|Malli" → speed/glide/turn/fade) ilman verkkohakua.
+
+Taustasäie lämmittää välimuistia uusille hyväksytyille kiekoille
+(_check_new_pdga_discs_once → enqueue_warm) ja suosituimmille malleille
+(hits-laskuri), joten kortit piirtyvät yleensä ilman PDGA-kutsua.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+from . import data_store
+
+
+logger = logging.getLogger(__name__)
+
+ASSET_TTL_HOURS = int(getattr(settings, "DISC_ASSET_TTL_HOURS", 24 * 14)) if settings is not None else 24 * 14
+ASSET_NEGATIVE_TTL_HOURS = int(getattr(settings, "DISC_ASSET_NEGATIVE_TTL_HOURS", 24)) if settings is not None else 24
+ASSET_ERROR_TTL_MINUTES = int(getattr(settings, "DISC_ASSET_ERROR_TTL_MINUTES", 15)) if settings is not None else 15
+FLIGHT_NUMBERS_CATEGORY = "FLIGHT_NUMBERS"
+
+# found-sarakkeen arvot
+STATE_FOUND = 1
+STATE_MISSING = 0
+STATE_ERROR = -1
+
+# Lämmitetään enintään näin monta suosituinta mallia kierroksella.
+WARM_POPULAR_LIMIT = 25
+# Kahden taustahaun väli (sekuntia), ettei PDGA:ta kuormiteta.
+WARM_DELAY_SECONDS = 2.0
+# Kortin piirron yhteydessä tehtävän haun aikakatkaisu välimuistin ohi.
+INLINE_FETCH_TIMEOUT = 6
+
+_WARM_QUEUE: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+_WARMER_STARTED = threading.Lock()
+_warmer_thread: Optional[threading.Thread] = None
+
+
+def asset_key(rec: Dict[str, Any]) -> str:
+    cert = str(rec.get("cert_number") or "").strip()
+    if cert:
+        return cert
+    model = str(rec.get("model") or rec.get("product") or "").strip().lower()
+    return f"model:{model}"
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(data_store._db_path())
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS pdga_disc_assets (
+               key TEXT PRIMARY KEY,
+               model TEXT,
+               manufacturer TEXT,
+               image_url TEXT,
+               flight_numbers TEXT,
+               found INTEGER NOT NULL DEFAULT 0,
+               fetched_at REAL NOT NULL DEFAULT 0,
+               hits INTEGER NOT NULL DEFAULT 0
+           )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pdga_disc_assets_hits ON pdga_disc_assets (hits)")
+    return conn
+
+
+def _ttl_seconds(state: int) -> float:
+    if state == STATE_FOUND:
+        return ASSET_TTL_HOURS * 3600
+    if state == STATE_MISSING:
+        return ASSET_NEGATIVE_TTL_HOURS * 3600
+    return ASSET_ERROR_TTL_MINUTES * 60
+
+
+def _is_fresh(state: int, fetched_at: float, now: Optional[float] = None) -> bool:
+    return ((now or time.time()) - float(fetched_at or 0)) < _ttl_seconds(int(state))
+
+
+def get_cached(rec: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Palauta (merkintä, tuore) välimuistista ilman verkkohakua."""
+
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT image_url, flight_numbers, found, fetched_at FROM pdga_disc_assets WHERE key = ?",
+                (asset_key(rec),),
+            ).fetchone()
+    except Exception:
+        return None, False
+    if row is None or not row[3]:
+        return None, False
+    entry = {"image_url": row[0] or None, "flight_numbers": row[1] or None, "found": row[2] == STATE_FOUND}
+    return entry, _is_fresh(row[2], row[3])
+
+
+def _stored_flight_numbers(rec: Dict[str, Any]) -> Optional[str]:
+    """Lentonumerot FLIGHT_NUMBERS-kategoriasta muodossa "12 / 5 / -1 / 3"."""
+
+    try:
+        data = data_store.load_category(FLIGHT_NUMBERS_CATEGORY)
+    except Exception:
+        return None
+    if not isinstance(data, dict):
+        return None
+    manu = str(rec.get("manufacturer") or "").strip()
+    model = str(rec.get("model") or rec.get("product") or "").strip()
+    entry = data.get(f"{manu}|{model}")
+    if entry is None:
+        wanted = model.lower()
+        for k, v in data.items():
+            if str(k).split("|")[-1].strip().lower() == wanted:
+                entry = v
+                break
+    if not isinstance(entry, dict):
+        return None
+    try:
+        return " / ".join(str(entry[k]) for k in ("speed", "glide", "turn", "fade"))
+    except Exception:
+        return None
+
+
+def _store(rec: Dict[str, Any], state: int, image_url: Optional[str], flight_numbers: Optional[str]) -> None:
+    try:
+        with _connect() as conn:
+            conn.execute(
+                """INSERT INTO pdga_disc_assets (key, model, manufacturer, image_url, flight_numbers, found, fetched_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                       model = excluded.model,
+                       manufacturer = excluded.manufacturer,
+                       image_url = excluded.image_url,
+                       flight_numbers = excluded.flight_numbers,
+                       found = excluded.found,
+                       fetched_at = excluded.fetched_at""",
+                (
+                    asset_key(rec),
+                    rec.get("model") or rec.get("product") or "",
+                    rec.get("manufacturer") or "",
+                    image_url or "",
+                    flight_numbers or "",
+                    int(state),
+                    time.time(),
+                ),
+            )
+            conn.commit()
+    except Exception as e:
+        logger.exception("Failed to store disc assets: %s", e)
+
+
+def fetch_assets(rec: Dict[str, Any], timeout: int = 10) -> Dict[str, Any]:
+    """Hae kuva ja lentonumerot PDGA:lta (yksi sivupyyntö) ja tallenna."""
+
+    from . import commands_disc
+
+    model = str(rec.get("model") or rec.get("product") or "").strip()
+    found, image_url, flight_numbers = commands_disc._fetch_pdga_disc_assets(model, timeout=timeout)
+    if found is None:
+        # Hakuvirhe: vanha löytynyt merkintä jää voimaan (päivitetään myöhemmin),
+        # muuten kirjataan lyhytikäinen virhemerkintä, ei negatiivista tulosta.
+        previous, _fresh = get_cached(rec)
+        if previous is not None and previous.get("found"):
+            return previous
+        flight_numbers = _stored_flight_numbers(rec)
+        _store(rec, STATE_ERROR, None, flight_numbers)
+        return {"image_url": None, "flight_numbers": flight_numbers, "found": False}
+    if not flight_numbers:
+        flight_numbers = _stored_flight_numbers(rec)
+    _store(rec, STATE_FOUND if found else STATE_MISSING, image_url, flight_numbers)
+    return {"image_url": image_url, "flight_numbers": flight_numbers, "found": found}
+
+
+def get_assets(rec: Dict[str, Any], fetch: bool = True, timeout: int = INLINE_FETCH_TIMEOUT) -> Dict[str, Any]:
+    """Kortin kuva ja lentonumerot: tuore välimuisti, muuten haku.
+
+    Vanhentunut merkintä palautetaan heti ja päivitetään taustalla.
+    Puuttuvalle merkinnälle tehdään haku vain, jos ``fetch`` on tosi.
+    """
+
+    entry, fresh = get_cached(rec)
+    if entry is not None:
+        if not fresh:
+            enqueue_warm([rec])
+        return entry
+    if not fetch:
+        enqueue_warm([rec])
+        return {"image_url": None, "flight_numbers": _stored_flight_numbers(rec), "found": False}
+    return fetch_assets(rec, timeout=timeout)
+
+
+def record_query(rec: Dict[str, Any]) -> None:
+    """Kasvata mallin hakulaskuria (suosituimmat lämmitetään taustalla)."""
+
+    try:
+        with _connect() as conn:
+            conn.execute(
+                """INSERT INTO pdga_disc_assets (key, model, manufacturer, hits) VALUES (?, ?, ?, 1)
+                   ON CONFLICT(key) DO UPDATE SET hits = hits + 1""",
+                (asset_key(rec), rec.get("model") or rec.get("product") or "", rec.get("manufacturer") or ""),
+            )
+            conn.commit()
+    except Exception:
+        pass
+
+
+def popular_stale(limit: int = WARM_POPULAR_LIMIT) -> List[Dict[str, Any]]:
+    """Suosituimmat mallit, joiden merkintä puuttuu tai on vanhentunut.
+
+    Löytyneet sivut haetaan jo vuorokautta ennen vanhenemista, jotta kuva ei
+    ehdi puuttua. Puuttuvat sivut ja hakuvirheet noudattavat omaa (lyhyempää)
+    TTL:äänsä; muuten negatiivinen välimuisti ei koskaan olisi voimassa.
+    """
+
+    now = time.time()
+    horizon = now + 24 * 3600
+    out: List[Dict[str, Any]] = []
+    try:
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT key, model, manufacturer, found, fetched_at FROM pdga_disc_assets "
+                "WHERE hits > 0 ORDER BY hits DESC LIMIT ?",
+                (int(limit),),
+            ).fetchall()
+    except Exception:
+        return out
+    for key, model, manu, found, fetched_at in rows:
+        if fetched_at and _is_fresh(found, fetched_at, now=horizon if found == STATE_FOUND else now):
+            continue
+        rec = {"model": model, "manufacturer": manu}
+        if not str(key).startswith("model:"):
+            rec["cert_number"] = key
+        out.append(rec)
+    return out
+
+
+def enqueue_warm(records: Iterable[Dict[str, Any]]) -> None:
+    """Lisää kiekot taustalämmityksen jonoon (esim. uudet hyväksynnät)."""
+
+    for rec in records:
+        if rec and (rec.get("model") or rec.get("product")):
+            _WARM_QUEUE.put(dict(rec))
+    _ensure_warmer()
+
+
+def _ensure_warmer() -> None:
+    global _warmer_thread
+    with _WARMER_STARTED:
+        if _warmer_thread is not None and _warmer_thread.is_alive():
+            return
+
+        def worker():
+            while True:
+                rec = _WARM_QUEUE.get()
+                try:
+                    entry, fresh = get_cached(rec)
+                    if entry is None or not fresh:
+                        fetch_assets(rec)
+                        time.sleep(WARM_DELAY_SECONDS)
+                except Exception as e:
+                    logger.exception("Disc asset warmer error: %s", e)
+
+        _warmer_thread = threading.Thread(target=worker, daemon=True, name="disc-asset-warmer")
+        _warmer_thread.start()
+
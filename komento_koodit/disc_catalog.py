@@ -0,0 +1,340 @@
+"""Paikallinen PDGA-kiekkoluettelo (SQLite).
+
+PDGA:n kiekko-CSV (tuhansia rivejä) ladataan ja parsitaan kerran
+tauluun `pdga_discs`, jota kiekkotyöntekijä päivittää ehdollisella
+GETillä (If-None-Match / If-Modified-Since). !kiekko-haut tehdään
+indeksoiduista sarakkeista:
+  - model_lc   → tarkka osuma ja prefiksihaku (range-haku indeksillä)
+  - model_norm → normalisoitu tarkka osuma ("fd" → "FD (New)")
+Alimerkkijonohaku tehdään vasta, jos muut eivät osu.
+
+Tietue (dict) on samaa muotoa kuin aiemmin commands_disc._search_pdga_disc
+palautti, joten send_disc_card ja valintalista toimivat ennallaan.
+"""
+
+import csv
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+from . import data_store
+
+
+logger = logging.getLogger(__name__)
+
+PDGA_DISCS_CSV_URL = "https://www.pdga.com/technical-standards/equipment-certification/discs/export"
+
+# (tietueen avain, CSV-sarake)
+CSV_FIELDS = [
+    ("manufacturer", "Manufacturer / Distributor"),
+    ("model", "Disc Model"),
+    ("disc_class", "Class"),
+    ("approved_date", "Approved Date"),
+    ("max_weight_g", "Max Weight (gr)"),
+    ("diameter_cm", "Diameter (cm)"),
+    ("height_cm", "Height (cm)"),
+    ("rim_depth_cm", "Rim Depth (cm)"),
+    ("inside_rim_diameter_cm", "Inside Rim Diameter (cm)"),
+    ("rim_thickness_cm", "Rim Thickness (cm)"),
+    ("rim_depth_diameter_ratio_pct", "Rim Depth / Diameter Ratio (%)"),
+    ("rim_configuration", "Rim Configuration"),
+    ("flexibility_kg", "Flexibility (kg)"),
+    ("max_weight_vint_g", "Max Weight Vint (gr)"),
+    ("last_year_production", "Last Year Production"),
+    ("cert_number", "Certification Number"),
+]
+FIELD_NAMES = [f for f, _ in CSV_FIELDS] + ["flight_numbers"]
+
+_COLUMNS = ["row_order", "model_lc", "model_norm"] + FIELD_NAMES
+_SELECT_COLS = ", ".join(FIELD_NAMES)
+
+_NORM_RE = re.compile(r"[^a-z0-9]+")
+
+# Sarjallistaa päivitykset: työntekijä ja ensimmäinen !kiekko voivat
+# yrittää ladata CSV:n yhtä aikaa.
+_REFRESH_LOCK = threading.Lock()
+
+
+def normalize_name(value: str) -> str:
+    return _NORM_RE.sub("", (value or "").lower())
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(data_store._db_path())
+    _ensure_tables(conn)
+    return conn
+
+
+def _ensure_tables(conn: sqlite3.Connection) -> None:
+    cols = ", ".join(f"{c} TEXT" if c != "row_order" else "row_order INTEGER" for c in _COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS pdga_discs ({cols})")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pdga_discs_model_lc ON pdga_discs (model_lc)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pdga_discs_model_norm ON pdga_discs (model_norm)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pdga_discs_cert ON pdga_discs (cert_number)")
+    conn.execute("CREATE TABLE IF NOT EXISTS pdga_discs_meta (key TEXT PRIMARY KEY, value TEXT)")
+    # Uusien kiekkojen ilmoituksia varten jo nähdyt avaimet (cert tai "valmistaja|malli").
+    conn.execute("CREATE TABLE IF NOT EXISTS pdga_known_discs (key TEXT PRIMARY KEY, first_seen TEXT)")
+
+
+def _get_meta(conn: sqlite3.Connection) -> Dict[str, str]:
+    return {k: v for k, v in conn.execute("SELECT key, value FROM pdga_discs_meta")}
+
+
+def _set_meta(conn: sqlite3.Connection, values: Dict[str, Any]) -> None:
+    conn.executemany(
+        "REPLACE INTO pdga_discs_meta (key, value) VALUES (?, ?)",
+        [(k, "" if v is None else str(v)) for k, v in values.items()],
+    )
+
+
+def parse_csv(text: str) -> List[Dict[str, str]]:
+    """Muunna CSV-teksti tietueiksi (vain rivit, joilla on malli)."""
+
+    reader = csv.DictReader(text.splitlines())
+    flight_col = None
+    for name in reader.fieldnames or []:
+        if name and "flight" in name.lower():
+            flight_col = name
+            break
+
+    records: List[Dict[str, str]] = []
+    for row in reader:
+        model = (row.get("Disc Model") or "").strip()
+        if not model:
+            continue
+        rec = {field: (row.get(col) or "").strip() for field, col in CSV_FIELDS}
+        rec["flight_numbers"] = (row.get(flight_col) or "").strip() if flight_col else ""
+        records.append(rec)
+    return records
+
+
+def _to_record(row: Iterable[Any]) -> Dict[str, Any]:
+    rec = dict(zip(FIELD_NAMES, row))
+    # Vanhat avaimet, joita send_disc_card ja valintalista käyttävät.
+    rec["product"] = rec["model"]
+    rec["cert_type"] = rec["disc_class"]
+    rec["date"] = rec["approved_date"]
+    return rec
+
+
+def known_key(rec: Dict[str, Any]) -> str:
+    """Tunnetun kiekon avain: cert-numero tai "valmistaja|malli"."""
+
+    cert = str(rec.get("cert_number") or "").strip()
+    if cert:
+        return cert
+    return f"{rec.get('manufacturer') or ''}|{rec.get('model') or ''}"
+
+
+def set_meta(values: Dict[str, Any]) -> None:
+    with _connect() as conn:
+        _set_meta(conn, values)
+        conn.commit()
+
+
+def known_count() -> int:
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM pdga_known_discs").fetchone()[0]
+
+
+def unknown_keys(keys: List[str], batch_size: int = 500) -> List[str]:
+    """Palauta avaimet, joita ei ole pdga_known_discs-taulussa (järjestys säilyy).
+
+    Haku tehdään pääavaimella erissä, joten koko tunnettua listaa ei
+    ladata muistiin.
+    """
+
+    known: set = set()
+    with _connect() as conn:
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            marks = ", ".join("?" for _ in batch)
+            known.update(
+                k for (k,) in conn.execute(f"SELECT key FROM pdga_known_discs WHERE key IN ({marks})", batch)
+            )
+    return [k for k in keys if k not in known]
+
+
+def mark_known(keys: Iterable[str]) -> int:
+    """Lisää avaimet tunnettuihin (olemassa olevat ohitetaan). Palauttaa lisättyjen määrän."""
+
+    now = datetime.now().isoformat(timespec="seconds")
+    with _connect() as conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO pdga_known_discs (key, first_seen) VALUES (?, ?)",
+            [(str(k), now) for k in keys if k],
+        )
+        conn.commit()
+        return conn.total_changes - before
+
+
+def _replace_rows(conn: sqlite3.Connection, records: List[Dict[str, str]]) -> None:
+    placeholders = ", ".join("?" for _ in _COLUMNS)
+    conn.execute("DELETE FROM pdga_discs")
+    conn.executemany(
+        f"INSERT INTO pdga_discs ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+        [
+            [i, rec["model"].lower(), normalize_name(rec["model"])] + [rec.get(f, "") for f in FIELD_NAMES]
+            for i, rec in enumerate(records)
+        ],
+    )
+
+
+def refresh_catalog(force: bool = False, timeout: int = 30) -> Dict[str, Any]:
+    """Päivitä luettelo PDGA:n CSV:stä ehdollisella GETillä.
+
+    Palauttaa yhteenvedon, jossa "status" on jokin:
+      - "not_modified": palvelin vastasi 304
+      - "unchanged":    sisältö oli tavuilleen sama (tiiviste)
+      - "updated":      taulu kirjoitettiin uudelleen; "records" sisältää rivit
+      - "error":        haku tai parsinta epäonnistui
+    Lisäksi "rows" (rivimäärä) ja "timings" (sekunteina vaiheittain).
+    """
+
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    with _REFRESH_LOCK:
+        with _connect() as conn:
+            meta = _get_meta(conn)
+            row_count = conn.execute("SELECT COUNT(*) FROM pdga_discs").fetchone()[0]
+
+        headers: Dict[str, str] = {}
+        if not force and row_count:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            resp = requests.get(PDGA_DISCS_CSV_URL, headers=headers, timeout=timeout)
+        except Exception as e:
+            logger.exception("Failed to fetch PDGA discs CSV: %s", e)
+            return {"status": "error", "rows": row_count, "timings": timings}
+        timings["fetch"] = time.perf_counter() - t0
+
+        checked = {"checked_at": datetime.now().isoformat(timespec="seconds")}
+        if resp.status_code == 304:
+            with _connect() as conn:
+                _set_meta(conn, checked)
+            return {"status": "not_modified", "rows": row_count, "timings": timings}
+
+        if resp.status_code != 200 or not resp.text:
+            logger.warning("PDGA discs CSV fetch returned status %s", resp.status_code)
+            return {"status": "error", "rows": row_count, "timings": timings}
+
+        t1 = time.perf_counter()
+        body_hash = hashlib.sha1(resp.content).hexdigest()
+        cache_meta = dict(checked)
+        cache_meta["etag"] = resp.headers.get("ETag") or ""
+        cache_meta["last_modified"] = resp.headers.get("Last-Modified") or ""
+        if not force and row_count and body_hash == meta.get("body_hash"):
+            with _connect() as conn:
+                _set_meta(conn, cache_meta)
+            timings["hash"] = time.perf_counter() - t1
+            return {"status": "unchanged", "rows": row_count, "timings": timings}
+
+        try:
+            records = parse_csv(resp.text)
+        except Exception as e:
+            logger.exception("Failed to parse PDGA discs CSV: %s", e)
+            return {"status": "error", "rows": row_count, "timings": timings}
+        timings["parse"] = time.perf_counter() - t1
+
+        t2 = time.perf_counter()
+        cache_meta["body_hash"] = body_hash
+        cache_meta["refreshed_at"] = cache_meta["checked_at"]
+        cache_meta["row_count"] = len(records)
+        with _connect() as conn:
+            _replace_rows(conn, records)
+            _set_meta(conn, cache_meta)
+            conn.commit()
+        timings["store"] = time.perf_counter() - t2
+        logger.info("PDGA disc catalog updated: %d rows", len(records))
+        return {"status": "updated", "rows": len(records), "records": records, "timings": timings}
+
+
+def ensure_catalog() -> bool:
+    """Varmista, että luettelossa on rivejä (lataa CSV ensimmäisellä kerralla)."""
+
+    try:
+        with _connect() as conn:
+            if conn.execute("SELECT 1 FROM pdga_discs LIMIT 1").fetchone():
+                return True
+    except Exception:
+        return False
+    return refresh_catalog().get("rows", 0) > 0
+
+
+def catalog_info() -> Dict[str, str]:
+    """Palauta luettelon metatiedot (etag, refreshed_at, row_count, ...)."""
+
+    try:
+        with _connect() as conn:
+            return _get_meta(conn)
+    except Exception:
+        return {}
+
+
+def catalog_version() -> str:
+    """Tunniste, joka muuttuu aina kun luettelon rivit kirjoitetaan uudelleen.
+
+    Muistiin rakennetut rakenteet (disc_index, disc_similarity) vertaavat
+    tätä ja rakentavat itsensä uudelleen vain muutoksen jälkeen.
+    """
+
+    info = catalog_info()
+    return f"{info.get('refreshed_at', '')}|{info.get('row_count', '')}"
+
+
+def list_discs(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Kaikki tietueet CSV:n järjestyksessä (uusimmat hyväksynnät ensin)."""
+
+    sql = f"SELECT {_SELECT_COLS} FROM pdga_discs ORDER BY row_order"
+    params: List[Any] = []
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    with _connect() as conn:
+        return [_to_record(r) for r in conn.execute(sql, params)]
+
+
+def get_by_cert(cert_number: str) -> Optional[Dict[str, Any]]:
+    with _connect() as conn:
+        row = conn.execute(
+            f"SELECT {_SELECT_COLS} FROM pdga_discs WHERE cert_number = ? LIMIT 1", (cert_number,)
+        ).fetchone()
+    return _to_record(row) if row else None
+
+
+def search(name: str) -> List[Dict[str, Any]]:
+    """Hae kiekot nimellä: tarkka > normalisoitu tarkka > prefiksi > alimerkkijono."""
+
+    q = (name or "").strip().lower()
+    if not q:
+        return []
+    q_norm = normalize_name(q)
+
+    base = f"SELECT {_SELECT_COLS} FROM pdga_discs WHERE "
+    with _connect() as conn:
+        rows = conn.execute(base + "model_lc = ? ORDER BY row_order", (q,)).fetchall()
+        if not rows and q_norm:
+            rows = conn.execute(base + "model_norm = ? ORDER BY row_order", (q_norm,)).fetchall()
+        if not rows:
+            # Prefiksihaku indeksillä: model_lc >= q AND model_lc < q + U+10FFFF
+            rows = conn.execute(
+                base + "model_lc >= ? AND model_lc < ? ORDER BY row_order",
+                (q, q + "\U0010ffff"),
+            ).fetchall()
+        if not rows:
+            rows = conn.execute(
+                base + "instr(model_lc, ?) > 0 ORDER BY row_order", (q,)
+            ).fetchall()
+    return [_to_record(r) for r in rows]
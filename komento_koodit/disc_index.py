@@ -0,0 +1,148 @@
+"""Kirjoitusvirheitä sietävä kiekkohaku (trigrammi-indeksi).
+
+disc_catalog.search löytää vain tarkat, prefiksi- ja alimerkkijono-osumat,
+joten "destoyer" tai "buzzz ss" eivät tuota tulosta. Tämä moduuli
+rakentaa luettelosta kerran muistiin trigrammi-indeksin (käänteislistat
+trigrammi → rivit) mallin nimelle sekä "valmistaja malli" -yhdistelmälle
+ja palauttaa Dice-samankaltaisuuden mukaan järjestetyt ehdotukset.
+
+Indeksi rakennetaan uudelleen vain, kun luettelon metatiedot
+(refreshed_at / row_count) muuttuvat. Haku koskee vain kyselyn
+trigrammeja vastaavia listoja, joten se pysyy millisekuntien luokassa
+koko luettelolla.
+"""
+
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from . import disc_catalog
+except Exception:  # pragma: no cover - optional
+    disc_catalog = None  # type: ignore[assignment]
+
+
+DEFAULT_LIMIT = 9
+MIN_SCORE = 0.3
+
+
+def _trigrams(text: str) -> List[str]:
+    norm = " ".join(disc_catalog.normalize_name(w) for w in text.split()) if disc_catalog else text.lower()
+    norm = " ".join(w for w in norm.split() if w)
+    if not norm:
+        return []
+    padded = f"  {norm} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class TrigramIndex:
+    """Trigrammi-indeksi kiekkotietueille.
+
+    Jokaisella tietueella on kaksi avainta (malli ja "valmistaja malli");
+    tietueen pisteet ovat avainten paras Dice-kerroin.
+    """
+
+    __slots__ = ("records", "_postings", "_key_sizes", "_key_record", "version")
+
+    def __init__(self, records: List[Dict[str, Any]], version: str = "") -> None:
+        self.records = records
+        self.version = version
+        self._postings: Dict[str, array] = {}
+        self._key_sizes = array("H")
+        self._key_record = array("I")
+
+        for rec_idx, rec in enumerate(records):
+            model = rec.get("model") or rec.get("product") or ""
+            manu = rec.get("manufacturer") or ""
+            keys = [model]
+            if manu:
+                keys.append(f"{manu} {model}")
+            for key in keys:
+                grams = _trigrams(key)
+                if not grams:
+                    continue
+                key_idx = len(self._key_record)
+                self._key_record.append(rec_idx)
+                self._key_sizes.append(min(len(grams), 0xFFFF))
+                for g in grams:
+                    posting = self._postings.get(g)
+                    if posting is None:
+                        posting = self._postings[g] = array("I")
+                    posting.append(key_idx)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, min_score: float = MIN_SCORE) -> List[Tuple[float, Dict[str, Any]]]:
+        """Palauta enintään ``limit`` (pisteet, tietue) -paria parhaasta alkaen."""
+
+        grams = _trigrams(query)
+        if not grams:
+            return []
+
+        postings = [self._postings[g] for g in grams if g in self._postings]
+        if not postings:
+            return []
+
+        counts: Dict[int, int] = {}
+        get = counts.get
+        for posting in postings:
+            for key_idx in posting:
+                counts[key_idx] = get(key_idx, 0) + 1
+
+        q_size = len(grams)
+        best: Dict[int, float] = {}
+        for key_idx, shared in counts.items():
+            score = 2.0 * shared / (q_size + self._key_sizes[key_idx])
+            if score < min_score:
+                continue
+            rec_idx = self._key_record[key_idx]
+            if score > best.get(rec_idx, 0.0):
+                best[rec_idx] = score
+
+        # Tasapisteissä luettelon järjestys (uusin hyväksyntä ensin).
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, self.records[rec_idx]) for rec_idx, score in ranked[: max(1, int(limit))]]
+
+
+_INDEX: Optional[TrigramIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> Optional[TrigramIndex]:
+    """Palauta luettelon indeksi; rakennetaan uudelleen luettelon muuttuessa."""
+
+    global _INDEX
+    if disc_catalog is None:
+        return None
+    version = disc_catalog.catalog_version()
+    index = _INDEX
+    if index is not None and index.version == version:
+        return index
+    with _INDEX_LOCK:
+        if _INDEX is not None and _INDEX.version == version:
+            return _INDEX
+        try:
+            records = disc_catalog.list_discs()
+        except Exception:
+            return _INDEX
+        _INDEX = TrigramIndex(records, version)
+        return _INDEX
+
+
+def suggest(query: str, limit: int = DEFAULT_LIMIT, min_score: float = MIN_SCORE) -> List[Dict[str, Any]]:
+    """Sumeat ehdotukset kyselylle.
+
+    Palauttaa kopiot tietueista, joihin on lisätty avain "match_score";
+    handle_kiekko näyttää ne numeroituna valintalistana.
+    """
+
+    index = get_index()
+    if index is None:
+        return []
+    results: List[Dict[str, Any]] = []
+    for score, rec in index.search(query, limit=limit, min_score=min_score):
+        item = dict(rec)
+        item["match_score"] = round(score, 3)
+        results.append(item)
+    return results
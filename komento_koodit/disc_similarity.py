@@ -0,0 +1,179 @@
+"""Samankaltaiset kiekot teknisten mittojen perusteella (!kiekko vastaava).
+
+PDGA:n CSV antaa jokaiselle kiekolle halkaisijan, korkeuden, rimmin
+syvyyden ja leveyden, sisähalkaisijan, syvyys/halkaisija-suhteen sekä
+joustavuuden. Luettelosta rakennetaan kerran (per luettelon päivitys)
+NumPy-matriisi, jonka sarakkeet on standardoitu (z-arvot), ja haku laskee
+etäisyydet kaikkiin kiekkoihin yhdellä vektoroidulla operaatiolla.
+
+Puuttuvat mitat eivät vaikuta etäisyyteen: ne jätetään pois sekä
+kyselyvektorista että vertailtavista riveistä, ja etäisyys skaalataan
+yhteisten mittojen määrällä.
+
+NumPy on valinnainen: ilman sitä nearest_discs palauttaa None ja
+komento kertoo, ettei ominaisuus ole käytössä.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore[import]
+except Exception:  # pragma: no cover - optional
+    np = None  # type: ignore[assignment]
+
+try:
+    from . import disc_catalog
+except Exception:  # pragma: no cover - optional
+    disc_catalog = None  # type: ignore[assignment]
+
+
+# (tietueen avain, näyttönimi, yksikkö)
+SPEC_FIELDS: List[Tuple[str, str, str]] = [
+    ("diameter_cm", "Halkaisija", "cm"),
+    ("height_cm", "Korkeus", "cm"),
+    ("rim_depth_cm", "Rimmin syvyys", "cm"),
+    ("rim_thickness_cm", "Rimmin leveys", "cm"),
+    ("inside_rim_diameter_cm", "Sisähalkaisija", "cm"),
+    ("rim_depth_diameter_ratio_pct", "Syvyys/halkaisija", "%"),
+    ("flexibility_kg", "Joustavuus", "kg"),
+]
+
+# Vähintään näin monta yhteistä mittaa, jotta kiekkoja verrataan.
+MIN_SHARED_SPECS = 4
+DEFAULT_K = 5
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(str(value).replace(",", ".").strip())
+    except Exception:
+        return float("nan")
+
+
+class SpecMatrix:
+    """Standardoitu mittamatriisi (rivit = kiekot, sarakkeet = SPEC_FIELDS)."""
+
+    __slots__ = ("records", "values", "mask", "version")
+
+    def __init__(self, records: List[Dict[str, Any]], version: str = "") -> None:
+        self.version = version
+        raw = np.array(
+            [[_to_float(rec.get(field)) for field, _, _ in SPEC_FIELDS] for rec in records],
+            dtype=np.float64,
+        ).reshape(len(records), len(SPEC_FIELDS))
+
+        # Pidä vain kiekot, joilla on tarpeeksi mittoja.
+        keep = np.count_nonzero(~np.isnan(raw), axis=1) >= MIN_SHARED_SPECS
+        self.records = [rec for rec, ok in zip(records, keep) if ok]
+        raw = raw[keep]
+
+        if raw.shape[0]:
+            with np.errstate(all="ignore"):
+                mean = np.nanmean(raw, axis=0)
+                std = np.nanstd(raw, axis=0)
+            mean = np.where(np.isnan(mean), 0.0, mean)
+            std = np.where(np.isnan(std) | (std == 0), 1.0, std)
+            z = (raw - mean) / std
+        else:
+            z = raw
+        self.mask = ~np.isnan(z)
+        self.values = np.where(self.mask, z, 0.0).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def row_of(self, rec: Dict[str, Any]) -> Optional[int]:
+        cert = str(rec.get("cert_number") or "")
+        model = str(rec.get("model") or rec.get("product") or "").lower()
+        for i, r in enumerate(self.records):
+            if cert and str(r.get("cert_number") or "") == cert:
+                return i
+            if not cert and str(r.get("model") or "").lower() == model:
+                return i
+        return None
+
+    def nearest(self, row: int, k: int = DEFAULT_K) -> List[Tuple[float, Dict[str, Any]]]:
+        """k lähintä kiekkoa rivin ``row`` mittoihin (ei itseään eikä samannimisiä)."""
+
+        q = self.values[row]
+        q_mask = self.mask[row]
+        shared = self.mask & q_mask
+        n_shared = shared.sum(axis=1)
+        diff = np.where(shared, self.values - q, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dist = np.sqrt((diff * diff).sum(axis=1) / n_shared)
+        dist[n_shared < MIN_SHARED_SPECS] = np.inf
+
+        own_model = str(self.records[row].get("model") or "").lower()
+        dist[row] = np.inf
+
+        # Varaa ylimääräisiä samannimisten (eri painokset) karsimiseen.
+        take = min(len(dist), max(1, k) * 3)
+        if take <= 0:
+            return []
+        candidates = np.argpartition(dist, take - 1)[:take]
+        candidates = candidates[np.argsort(dist[candidates])]
+
+        out: List[Tuple[float, Dict[str, Any]]] = []
+        seen = {own_model}
+        for idx in candidates:
+            d = float(dist[idx])
+            if not np.isfinite(d):
+                break
+            rec = self.records[int(idx)]
+            name = str(rec.get("model") or "").lower()
+            if name in seen:
+                continue
+            seen.add(name)
+            out.append((d, rec))
+            if len(out) >= k:
+                break
+        return out
+
+
+_MATRIX: Optional[SpecMatrix] = None
+_MATRIX_LOCK = threading.Lock()
+
+
+def get_matrix() -> Optional[SpecMatrix]:
+    """Palauta mittamatriisi; rakennetaan uudelleen luettelon muuttuessa."""
+
+    global _MATRIX
+    if np is None or disc_catalog is None:
+        return None
+    version = disc_catalog.catalog_version()
+    matrix = _MATRIX
+    if matrix is not None and matrix.version == version:
+        return matrix
+    with _MATRIX_LOCK:
+        if _MATRIX is not None and _MATRIX.version == version:
+            return _MATRIX
+        try:
+            records = disc_catalog.list_discs()
+        except Exception:
+            return _MATRIX
+        _MATRIX = SpecMatrix(records, version)
+        return _MATRIX
+
+
+def similarity_percent(distance: float) -> int:
+    """Muunna etäisyys (z-yksiköissä) karkeaksi samankaltaisuusprosentiksi."""
+
+    return int(round(100.0 / (1.0 + distance)))
+
+
+def nearest_discs(rec: Dict[str, Any], k: int = DEFAULT_K) -> Optional[List[Tuple[float, Dict[str, Any]]]]:
+    """Palauta k mitoiltaan lähintä kiekkoa tietueelle ``rec``.
+
+    None tarkoittaa, ettei NumPy/luettelo ole käytettävissä; tyhjä lista,
+    ettei kiekolla ole tarpeeksi mittoja vertailuun.
+    """
+
+    matrix = get_matrix()
+    if matrix is None:
+        return None
+    row = matrix.row_of(rec)
+    if row is None:
+        return []
+    return matrix.nearest(row, k=k)
@@ -0,0 +1,269 @@
+"""Discordin REST-postaukset rate limitit huomioiden.
+
+post_to_discord, post_embeds_to_discord ja post_pending_registration
+tekivät jokaisesta viestistä oman ``requests.post``-kutsunsa ilman 429-
+käsittelyä, joten isot käynnistystiedotteet saattoivat katketa kesken.
+Tämä moduuli tarjoaa yhteisen asiakkaan:
+
+- yksi ``requests.Session`` yhteyspoolilla
+- bucket-kohtainen kuristus ``X-RateLimit-*``-otsakkeista (Remaining,
+  Reset-After, Bucket) sekä globaali tauko ``X-RateLimit-Global``-vastauksista
+- uudelleenyritys 429-vastauksille ``retry_after``-ajan jälkeen ja
+  5xx-/verkkovirheille kasvavalla viiveellä; POST-pyynnöt toistetaan
+  5xx-/verkkovirheissä vain, jos ne ovat idempotentteja. Viesteihin lisätään
+  ``nonce`` + ``enforce_nonce``, jolloin Discord ei luo toista viestiä samalla
+  noncella, vaikka ensimmäisen pyynnön vastaus katosi matkalla
+- lähetysjono kanavaa kohden: saman kanavan viestit lähtevät järjestyksessä
+  yksi kerrallaan, eri kanavat rinnakkain
+
+API:n osoitteen voi vaihtaa ``DISCORD_API_BASE``-asetuksella, jolloin
+asiakasta voi ajaa paikallista stub-palvelinta vasten
+(scripts/discord_rest_stub.py).
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name: str, default: Any) -> Any:
+    if settings is not None and getattr(settings, name, None) not in (None, ""):
+        return getattr(settings, name)
+    return os.environ.get(name, default)
+
+
+API_BASE = str(_setting("DISCORD_API_BASE", "https://discord.com/api/v10")).rstrip("/")
+MAX_RETRIES = int(_setting("DISCORD_REST_MAX_RETRIES", 5))
+REQUEST_TIMEOUT = 15
+# Kanavan jonosäie lopettaa, kun jono on ollut tyhjä näin monta sekuntia.
+QUEUE_IDLE_SECONDS = 60
+# Yksittäisen rate limit -odotuksen yläraja (suojaa virheellisiltä otsakkeilta).
+MAX_SLEEP_SECONDS = 60.0
+# Metodit, jotka saa toistaa 5xx-/verkkovirheen jälkeen ilman sivuvaikutuksia.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def _not_sent(exc: requests.RequestException) -> bool:
+    """True, kun yhteyttä ei saatu auki, eli pyyntö ei ehtinyt palvelimelle."""
+
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.ConnectionError):
+        return False
+    reason = exc.args[0] if exc.args else None
+    return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+
+
+@dataclass
+class _Bucket:
+    remaining: Optional[int] = None
+    reset_at: float = 0.0
+
+
+class RestClient:
+    def __init__(self, token: str, api_base: Optional[str] = None, session: Optional[requests.Session] = None):
+        self.token = token
+        self.api_base = (api_base or API_BASE).rstrip("/")
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self._lock = threading.Lock()
+        # reitti ("POST channels/<id>/messages") -> Discordin bucket-tunniste
+        self._route_bucket: Dict[str, str] = {}
+        self._buckets: Dict[str, _Bucket] = {}
+        self._global_until = 0.0
+        self._queues: Dict[str, "queue.Queue[Tuple[str, str, Any, Future]]"] = {}
+        self.rate_limited = 0
+
+    # --- kuristus ----------------------------------------------------------
+
+    def _bucket_key(self, route: str, major: str) -> str:
+        bucket = self._route_bucket.get(route)
+        return f"{bucket}:{major}" if bucket else route
+
+    def _wait_for_slot(self, route: str, major: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._global_until - now)
+            b = self._buckets.get(self._bucket_key(route, major))
+            if b is not None and b.remaining is not None and b.remaining <= 0 and b.reset_at > now:
+                wait = max(wait, b.reset_at - now)
+            if b is not None and b.remaining is not None and b.remaining > 0:
+                # Varataan paikka ennen pyyntöä, jotta rinnakkaiset lähettäjät eivät ylitä rajaa.
+                b.remaining -= 1
+        if wait > 0:
+            time.sleep(min(wait, MAX_SLEEP_SECONDS))
+
+    def _update_bucket(self, route: str, major: str, headers: Any) -> None:
+        bucket_id = headers.get("X-RateLimit-Bucket")
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        with self._lock:
+            if bucket_id:
+                self._route_bucket[route] = bucket_id
+            if remaining is None and reset_after is None:
+                return
+            b = self._buckets.setdefault(self._bucket_key(route, major), _Bucket())
+            try:
+                b.remaining = int(remaining) if remaining is not None else b.remaining
+            except (TypeError, ValueError):
+                pass
+            try:
+                if reset_after is not None:
+                    b.reset_at = time.monotonic() + float(reset_after)
+            except (TypeError, ValueError):
+                pass
+
+    def _retry_after(self, resp: requests.Response) -> Tuple[float, bool]:
+        body: Dict[str, Any] = {}
+        try:
+            body = resp.json() or {}
+        except Exception:
+            body = {}
+        delay = body.get("retry_after") or resp.headers.get("Retry-After") or 1
+        try:
+            delay = float(delay)
+        except (TypeError, ValueError):
+            delay = 1.0
+        is_global = bool(body.get("global")) or resp.headers.get("X-RateLimit-Global", "").lower() == "true"
+        return max(0.0, min(delay, MAX_SLEEP_SECONDS)), is_global
+
+    # --- pyynnöt -------------------------------------------------------------
+
+    def request(self, method: str, path: str, json: Any = None, major: str = "", idempotent: Optional[bool] = None) -> Optional[requests.Response]:
+        """Tee pyyntö rate limitit huomioiden; palauttaa viimeisen vastauksen tai None.
+
+        429 ja avautumatta jäänyt yhteys toistetaan aina. 5xx-vastaukset ja
+        muut verkkovirheet toistetaan vain idempotenteille pyynnöille
+        (oletus: IDEMPOTENT_METHODS), koska palvelin on voinut jo käsitellä
+        pyynnön.
+        """
+
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        route = f"{method.upper()} {path}"
+        url = f"{self.api_base}/{path.lstrip('/')}"
+        headers = {"Authorization": f"Bot {self.token}", "Content-Type": "application/json"}
+        resp: Optional[requests.Response] = None
+        for attempt in range(MAX_RETRIES + 1):
+            self._wait_for_slot(route, major)
+            try:
+                resp = self.session.request(method, url, headers=headers, json=json, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                logger.warning("%s verkkovirhe (%d/%d): %s", route, attempt + 1, MAX_RETRIES + 1, e)
+                if not idempotent and not _not_sent(e):
+                    # Pyyntö on voinut mennä perille; toisto voisi luoda kaksoiskappaleen.
+                    return None
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            self._update_bucket(route, major, resp.headers)
+            if resp.status_code == 429:
+                delay, is_global = self._retry_after(resp)
+                self.rate_limited += 1
+                logger.info("%s rate limit", route, extra={"scope": "global" if is_global else "bucket", "wait_s": round(delay, 2)})
+                if is_global:
+                    with self._lock:
+                        self._global_until = max(self._global_until, time.monotonic() + delay)
+                else:
+                    time.sleep(delay)
+                continue
+            if resp.status_code >= 500 and idempotent:
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            return resp
+        return resp
+
+    def _post_now(self, channel_id: str, payload: Dict[str, Any]) -> Optional[requests.Response]:
+        # Sama nonce kaikilla yrityksillä: Discord palauttaa jo luodun viestin
+        # uuden sijaan, joten viestin POST on toistettavissa.
+        payload = dict(payload)
+        payload.setdefault("nonce", uuid.uuid4().hex[:25])
+        payload.setdefault("enforce_nonce", True)
+        return self.request("POST", f"channels/{channel_id}/messages", json=payload, major=channel_id, idempotent=True)
+
+    # --- kanavajonot ---------------------------------------------------------
+
+    def enqueue(self, channel_id: Any, payload: Dict[str, Any]) -> "Future[Optional[requests.Response]]":
+        """Lisää viesti kanavan jonoon; Future valmistuu, kun viesti on lähetetty."""
+
+        channel_id = str(channel_id)
+        fut: "Future[Optional[requests.Response]]" = Future()
+        with self._lock:
+            q = self._queues.get(channel_id)
+            if q is None:
+                q = self._queues[channel_id] = queue.Queue()
+                threading.Thread(target=self._drain, args=(channel_id, q), daemon=True, name=f"rest-{channel_id}").start()
+            q.put((channel_id, "POST", payload, fut))
+        return fut
+
+    def _drain(self, channel_id: str, q: "queue.Queue[Tuple[str, str, Any, Future]]") -> None:
+        while True:
+            try:
+                item = q.get(timeout=QUEUE_IDLE_SECONDS)
+            except queue.Empty:
+                with self._lock:
+                    if q.empty():
+                        self._queues.pop(channel_id, None)
+                        return
+                continue
+            _, _, payload, fut = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(self._post_now(channel_id, payload))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def send_message(self, channel_id: Any, payload: Dict[str, Any], timeout: Optional[float] = 300) -> Optional[requests.Response]:
+        """Lähetä viesti kanavan jonon kautta ja odota vastausta."""
+
+        try:
+            return self.enqueue(channel_id, payload).result(timeout=timeout)
+        except Exception as e:
+            logger.error("viestin lähetys kanavalle %s epäonnistui: %s", channel_id, e)
+            return None
+
+
+_CLIENTS: Dict[Tuple[str, str], RestClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(token: str, api_base: Optional[str] = None) -> RestClient:
+    """Yksi asiakas (ja siten yksi sessio ja bucket-tila) tokenia kohden."""
+
+    key = (token, (api_base or API_BASE).rstrip("/"))
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = RestClient(token, api_base=key[1])
+        return client
+
+
+def post_message(channel_id: Any, token: str, content: Optional[str] = None, embeds: Optional[list] = None) -> Optional[requests.Response]:
+    payload: Dict[str, Any] = {}
+    if content:
+        payload["content"] = content
+    if embeds:
+        payload["embeds"] = embeds
+    return get_client(token).send_message(channel_id, payload)
@@ -0,0 +1,206 @@
+"""Embedien pakkaus Discordin todellisten merkkirajojen mukaan.
+
+Postauskoodi pilkkoi listat kiinteillä kappalemäärillä (12 kohdetta per
+embed, 20–40 riviä per lista, 10 embediä per viesti) ja jokainen paikka
+omilla säännöillään. Siksi viestejä lähti turhan monta tai pitkä lista
+katkesi. Tämä moduuli pakkaa rivit Discordin rajojen mukaan:
+
+    kuvaus (description)     4096 merkkiä
+    kentän arvo (field)      1024 merkkiä, enintään 25 kenttää
+    otsikko / kentän nimi     256 merkkiä
+    embedit yhteensä         6000 merkkiä ja 10 embediä per viesti
+    tekstiviesti (content)   2000 merkkiä
+
+``pack_messages`` täyttää jokaisen viestin mahdollisimman täyteen (rivit
+pysyvät järjestyksessä eikä riviä katkaista kahteen embediin), joten
+esim. 40 kilpailun yhteenveto lähtee pienimmällä mahdollisella määrällä
+API-kutsuja. ``batch_embeds`` ryhmittelee valmiit embedit viesteiksi ja
+``split_text`` pilkkoo tekstiviestit. Rajojen tarkistus:
+scripts/check_embed_layout.py.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+DESCRIPTION_LIMIT = 4096
+FIELD_VALUE_LIMIT = 1024
+FIELD_NAME_LIMIT = 256
+FIELDS_PER_EMBED = 25
+TITLE_LIMIT = 256
+FOOTER_LIMIT = 2048
+AUTHOR_LIMIT = 256
+TOTAL_LIMIT = 6000
+EMBEDS_PER_MESSAGE = 10
+CONTENT_LIMIT = 2000
+
+CONTINUED_SUFFIX = " (jatkuu)"
+ELLIPSIS = "…"
+
+Embed = Dict[str, Any]
+
+
+def truncate(text: Any, limit: int) -> str:
+    text = str(text or "")
+    if len(text) <= limit:
+        return text
+    return text[: max(0, limit - len(ELLIPSIS))] + ELLIPSIS
+
+
+def embed_size(embed: Embed) -> int:
+    """Merkit, jotka Discord laskee 6000 merkin kokonaisrajaan."""
+
+    size = len(str(embed.get("title") or "")) + len(str(embed.get("description") or ""))
+    for f in embed.get("fields") or []:
+        size += len(str(f.get("name") or "")) + len(str(f.get("value") or ""))
+    size += len(str((embed.get("footer") or {}).get("text") or ""))
+    size += len(str((embed.get("author") or {}).get("name") or ""))
+    return size
+
+
+def fit_embed(embed: Embed, budget: int = TOTAL_LIMIT) -> Embed:
+    """Palauta kopio, jonka jokainen osa ja kokonaiskoko mahtuvat rajoihin."""
+
+    e = dict(embed)
+    if e.get("title"):
+        e["title"] = truncate(e["title"], TITLE_LIMIT)
+    if e.get("description"):
+        e["description"] = truncate(e["description"], DESCRIPTION_LIMIT)
+    if e.get("fields"):
+        e["fields"] = [
+            dict(f, name=truncate(f.get("name") or "\u200b", FIELD_NAME_LIMIT), value=truncate(f.get("value") or "\u200b", FIELD_VALUE_LIMIT))
+            for f in e["fields"][:FIELDS_PER_EMBED]
+        ]
+    if (e.get("footer") or {}).get("text"):
+        e["footer"] = dict(e["footer"], text=truncate(e["footer"]["text"], FOOTER_LIMIT))
+    if (e.get("author") or {}).get("name"):
+        e["author"] = dict(e["author"], name=truncate(e["author"]["name"], AUTHOR_LIMIT))
+    over = embed_size(e) - budget
+    if over > 0 and e.get("description"):
+        e["description"] = truncate(e["description"], max(1, len(e["description"]) - over))
+        over = embed_size(e) - budget
+    while over > 0 and e.get("fields"):
+        e["fields"] = e["fields"][:-1]
+        over = embed_size(e) - budget
+    return e
+
+
+def pack_messages(
+    lines: Iterable[str],
+    title: str = "",
+    color: Optional[int] = None,
+    url: Optional[str] = None,
+    empty_text: str = "(ei kohteita)",
+    continued_suffix: str = CONTINUED_SUFFIX,
+) -> List[List[Embed]]:
+    """Pakkaa rivit embedien kuvauksiin; palauttaa viestit (embedilistat).
+
+    Ensimmäinen embed saa otsikon ja linkin. Saman viestin jatkoembedit
+    ovat otsikottomia (säästää merkkejä ja näyttää yhtenäiseltä), ja
+    seuraavien viestien ensimmäinen embed saa otsikon + ``continued_suffix``.
+    """
+
+    title = truncate(title, TITLE_LIMIT)
+    cont_title = truncate(title + continued_suffix, TITLE_LIMIT) if title else ""
+    messages: List[List[Embed]] = []
+    msg: List[Embed] = []
+    msg_used = 0
+    cur: List[str] = []
+    cur_len = 0
+    cur_title = title
+
+    def _embed(desc_lines: List[str], head: str) -> Embed:
+        e: Embed = {"description": "\n".join(desc_lines)}
+        if head:
+            e["title"] = head
+            if url and head == title:
+                e["url"] = url
+        if color is not None:
+            e["color"] = color
+        return e
+
+    for raw in lines:
+        line = str(raw if raw is not None else "")
+        cost = len(line) + (1 if cur else 0)
+        if cur and cur_len + cost <= DESCRIPTION_LIMIT and msg_used + cost <= TOTAL_LIMIT:
+            cur.append(line)
+            cur_len += cost
+            msg_used += cost
+            continue
+
+        if cur or cur_title:
+            if cur:
+                msg.append(_embed(cur, cur_title))
+            cur, cur_len = [], 0
+            # Uusi otsikoton embed samaan viestiin, jos rivi mahtuu.
+            if msg and len(msg) < EMBEDS_PER_MESSAGE and msg_used + min(len(line), DESCRIPTION_LIMIT) <= TOTAL_LIMIT:
+                cur_title = ""
+            elif msg:
+                messages.append(msg)
+                msg = []
+                cur_title = cont_title
+                msg_used = len(cur_title)
+            else:
+                msg_used = len(cur_title)
+
+        line = truncate(line, min(DESCRIPTION_LIMIT, TOTAL_LIMIT - msg_used))
+        cur = [line]
+        cur_len = len(line)
+        msg_used += cur_len
+
+    if cur:
+        msg.append(_embed(cur, cur_title))
+    if msg:
+        messages.append(msg)
+    if not messages:
+        messages.append([_embed([empty_text], title)])
+    return messages
+
+
+def pack_embeds(lines: Iterable[str], title: str = "", color: Optional[int] = None, **kwargs: Any) -> List[Embed]:
+    """Kuten pack_messages, mutta litteänä embedilistana (batch_embeds ryhmittelee)."""
+
+    return [e for msg in pack_messages(lines, title=title, color=color, **kwargs) for e in msg]
+
+
+def batch_embeds(embeds: Iterable[Embed]) -> List[List[Embed]]:
+    """Ryhmittele valmiit embedit viesteiksi (≤10 embediä, ≤6000 merkkiä)."""
+
+    messages: List[List[Embed]] = []
+    msg: List[Embed] = []
+    used = 0
+    for embed in embeds:
+        e = fit_embed(embed)
+        size = embed_size(e)
+        if msg and (len(msg) >= EMBEDS_PER_MESSAGE or used + size > TOTAL_LIMIT):
+            messages.append(msg)
+            msg, used = [], 0
+        msg.append(e)
+        used += size
+    if msg:
+        messages.append(msg)
+    return messages
+
+
+def split_text(content: str, limit: int = CONTENT_LIMIT) -> List[str]:
+    """Pilko tekstiviesti riveittäin ``limit``-merkkisiin osiin."""
+
+    content = str(content or "")
+    if len(content) <= limit:
+        return [content]
+    parts: List[str] = []
+    cur = ""
+    for line in content.split("\n"):
+        while len(line) > limit:
+            if cur:
+                parts.append(cur)
+                cur = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{cur}\n{line}" if cur else line
+        if len(candidate) > limit:
+            parts.append(cur)
+            cur = line
+        else:
+            cur = candidate
+    if cur:
+        parts.append(cur)
+    return parts
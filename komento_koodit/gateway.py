@@ -0,0 +1,271 @@
+"""Yksi yhteinen Discord-gateway-yhteys koko botille.
+
+Aiemmin läsnäolo (discord_presence) ja komentokuuntelija (command_handler)
+loivat kumpikin oman discord.Clientin omaan säikeeseensä ja omaan
+tapahtumasilmukkaansa: kaksi websocketia, kaksi heartbeat-silmukkaa ja
+kaksi välimuistia samalle tokenille. Nyt botilla on yksi Gateway-säie,
+jossa pyörii yksi asyncio-silmukka ja yksi client:
+
+- läsnäolo ja muut käynnistystoimet rekisteröidään ``add_ready_hook``-kutsulla
+- komentojen käsittelijät rekisteröidään ``add_message_handler``-kutsulla
+- muut säikeet (scheduler, run_once) voivat ajaa korutiineja silmukassa
+  ``submit``-kutsulla, ajaa blokkaavia töitä sen executorissa
+  ``run_blocking``-kutsulla ja lähettää ajastetut postaukset ``send``-kutsulla.
+
+Käytä ``get_gateway``-funktiota; se palauttaa prosessin ainoan instanssin.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+try:
+    import discord  # type: ignore[import]
+except Exception:
+    discord = None
+
+
+logger = logging.getLogger(__name__)
+
+# send(): lähetys aikakatkaistiin, mutta korutiini voi yhä lähettää viestin.
+SEND_UNKNOWN = 'unknown'
+
+ReadyHook = Callable[[Any], Awaitable[None]]
+MessageHandler = Callable[[Any], Awaitable[None]]
+
+
+def normalize_token(token: Optional[str]) -> Optional[str]:
+    """Poista .env-tiedostosta mahdollisesti jääneet lainausmerkit."""
+
+    if isinstance(token, str):
+        token = token.strip()
+        if (token.startswith('"') and token.endswith('"')) or (token.startswith("'") and token.endswith("'")):
+            token = token[1:-1]
+    return token or None
+
+
+class Gateway(threading.Thread):
+    def __init__(self, token: Optional[str], run_forever: bool = True):
+        super().__init__(daemon=True, name='discord-gateway')
+        self.token = normalize_token(token)
+        self.run_forever = run_forever
+        self.client = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready_hooks: List[ReadyHook] = []
+        self._message_handlers: List[MessageHandler] = []
+        self._ready = threading.Event()
+
+    # --- rekisteröinti ---------------------------------------------------
+
+    def add_ready_hook(self, hook: ReadyHook) -> None:
+        """``hook(client)`` ajetaan jokaisen on_ready-tapahtuman yhteydessä."""
+
+        self._ready_hooks.append(hook)
+
+    def add_message_handler(self, handler: MessageHandler) -> None:
+        """``handler(message)`` ajetaan jokaiselle vastaanotetulle viestille."""
+
+        if self.is_alive() and not self._message_handlers:
+            logger.warning('viestikäsittelijä lisätty käynnistyksen jälkeen; message_content-intent puuttuu')
+        self._message_handlers.append(handler)
+
+    # --- tila ------------------------------------------------------------
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set() and self.loop is not None and not self.loop.is_closed()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self
+
+    # --- muiden säikeiden rajapinta -----------------------------------------
+
+    def submit(self, coro: Awaitable[Any]) -> Optional[concurrent.futures.Future]:
+        """Aja korutiini gatewayn silmukassa; palauttaa Futuren tai None."""
+
+        loop = self.loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            try:
+                coro.close()  # type: ignore[attr-defined]
+            except Exception:
+                pass
+            return None
+        return asyncio.run_coroutine_threadsafe(coro, loop)  # type: ignore[arg-type]
+
+    def run_blocking(self, func: Callable[..., Any], *args: Any) -> Optional[concurrent.futures.Future]:
+        """Aja blokkaava työ (esim. haku) silmukan executorissa."""
+
+        loop = self.loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            return None
+
+        async def _run():
+            return await loop.run_in_executor(None, func, *args)
+
+        return self.submit(_run())
+
+    def send(self, channel_id: Any, content: Optional[str] = None, embeds: Optional[list] = None, timeout: float = 30) -> Any:
+        """Lähetä viesti kanavalle/ketjuun gatewayn clientin kautta.
+
+        Palauttaa None, jos gateway ei ole käytettävissä (tai kutsu tulee
+        silmukan omasta säikeestä, jolloin odottaminen lukitsisi sen);
+        kutsuja käyttää silloin REST-postausta. Aikakatkaisussa palautetaan
+        SEND_UNKNOWN: viesti voi olla jo lähtenyt, joten REST-varapostaus
+        tuottaisi tuplaviestin. Korutiinin annetaan valmistua ja lopputulos
+        kirjataan lokiin.
+        """
+
+        if not self.is_ready() or self.in_loop_thread():
+            return None
+        fut = self.submit(self._send(channel_id, content, embeds))
+        if fut is None:
+            return None
+        try:
+            return bool(fut.result(timeout=timeout))
+        except concurrent.futures.TimeoutError:
+            logger.warning('send kanavalle %s aikakatkaistiin %s s jälkeen; lopputulos tuntematon', channel_id, timeout)
+            fut.add_done_callback(lambda f: self._log_late_send(channel_id, f))
+            return SEND_UNKNOWN
+        except Exception as e:
+            logger.warning('send epäonnistui: %s', e)
+            return False
+
+    @staticmethod
+    def _log_late_send(channel_id: Any, fut: 'concurrent.futures.Future') -> None:
+        if fut.cancelled():
+            logger.warning('Myöhästynyt send kanavalle %s peruttiin', channel_id)
+            return
+        sent = fut.exception() is None and bool(fut.result())
+        logger.info('Myöhästynyt send kanavalle %s valmistui: %s', channel_id, 'lähetetty' if sent else 'epäonnistui')
+
+    async def _send(self, channel_id: Any, content: Optional[str], embeds: Optional[list]) -> bool:
+        client = self.client
+        if client is None or discord is None:
+            return False
+        try:
+            cid = int(channel_id)
+            channel = client.get_channel(cid)
+            if channel is None:
+                channel = await client.fetch_channel(cid)
+            kwargs: dict = {}
+            if content:
+                kwargs['content'] = content
+            if embeds:
+                kwargs['embeds'] = [e if isinstance(e, discord.Embed) else discord.Embed.from_dict(e) for e in embeds]
+            await channel.send(**kwargs)  # type: ignore[union-attr]
+            return True
+        except Exception as e:
+            logger.warning('send kanavalle %s epäonnistui: %s', channel_id, e)
+            return False
+
+    # --- säie ------------------------------------------------------------
+
+    def _intents(self):
+        Intents = getattr(discord, 'Intents', None)
+        if Intents is None:
+            return None
+        if not self._message_handlers:
+            # Pelkkä läsnäolo ei tarvitse yhtään intenttiä.
+            return Intents.none()
+        intents = Intents.default()
+        intents.message_content = True
+        intents.messages = True
+        return intents
+
+    def run(self):
+        if discord is None:
+            logger.warning('discord.py not installed; gateway disabled')
+            return
+        if not self.token:
+            logger.warning('No token available for gateway client; aborting')
+            return
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+
+        client_kwargs = {}
+        intents = self._intents()
+        if intents is not None:
+            client_kwargs['intents'] = intents
+        client = discord.Client(**client_kwargs)
+        self.client = client
+
+        @client.event
+        async def on_ready():
+            logger.info('yhdistetty käyttäjänä %s', client.user)
+            for hook in list(self._ready_hooks):
+                try:
+                    await hook(client)
+                except Exception as e:
+                    logger.exception('ready hook epäonnistui: %s', e)
+            self._ready.set()
+            if not self.run_forever:
+                await client.close()
+
+        @client.event
+        async def on_message(message):
+            for handler in list(self._message_handlers):
+                try:
+                    await handler(message)
+                except Exception as e:
+                    logger.exception('viestikäsittelijä epäonnistui: %s', e)
+
+        try:
+            loop.run_until_complete(client.start(self.token, reconnect=True))
+        except Exception as e:
+            logger.exception('client-virhe: %s', e)
+        finally:
+            self._ready.clear()
+            try:
+                if not client.is_closed():
+                    loop.run_until_complete(client.close())
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            except Exception:
+                pass
+            loop.close()
+
+
+_GATEWAY: Optional[Gateway] = None
+_LOCK = threading.Lock()
+
+
+def get_gateway(token: Optional[str] = None, run_forever: bool = True) -> Gateway:
+    """Prosessin ainoa Gateway; luodaan ensimmäisellä kutsulla."""
+
+    global _GATEWAY
+    with _LOCK:
+        if _GATEWAY is None:
+            _GATEWAY = Gateway(token, run_forever=run_forever)
+        elif token and not _GATEWAY.token:
+            _GATEWAY.token = normalize_token(token)
+        return _GATEWAY
+
+
+def current() -> Optional[Gateway]:
+    """Käynnissä oleva Gateway tai None."""
+
+    gw = _GATEWAY
+    if gw is None or not gw.is_alive():
+        return None
+    return gw
+
+
+def start_gateway(token: Optional[str] = None, run_forever: bool = True) -> Optional[Gateway]:
+    """Käynnistä yhteinen gateway (idempotentti)."""
+
+    gw = get_gateway(token, run_forever=run_forever)
+    if not gw.token:
+        logger.warning('Ei tokenia, gateway ohitetaan')
+        return None
+    with _LOCK:
+        if not gw.is_alive() and gw.ident is None:
+            gw.start()
+            # give a little time for the thread to start
+            time.sleep(0.5)
+    return gw
@@ -71,8 +71,9 @@ def _kiekot_help_description() -> str:
         "🔍 Haku: tarkka, alku- ja osuma hakusanaan\n"
         "🖼️ Kiekon kuva: yritetään hakea PDGA-sivulta, jos saatavilla\n"
         "📊 Lentonumerot: yritetään hakea automaattisesti PDGA-tiedoista\n\n"
+        "🧭 Vastaavat kiekot: !kiekko vastaava <malli> etsii mitoiltaan lähimmät kiekot\n\n"
         "💡 Komento: !kiekko\n\n"
-        "Komennot:\n!kiekko\n!paivita_lentonumerot\n"
+        "Komennot:\n!kiekko\n!kiekko vastaava <malli>\n!paivita_lentonumerot\n"
     )
 
 
@@ -142,6 +143,9 @@ def _kilpailut_help_description() -> str:
         "!kisa viikkari — Listaa viikkokisat kuten !viikkarit, mutta komento voidaan ajaa myös suoraan\n"
         "  muodossa `!kisa viikkari` jolloin se delegoi olemassa olevaan viikkarit-toiminnallisuuteen.\n\n"
         "Tulospalvelu-komennot on kuvattu erikseen: !ohje tulospalvelu.\n\n"
+        "Live-seuranta (päivittää yhtä viestiä, kun johtaja vaihtuu tai seurapelaaja nousee Top3:een):\n"
+        "!tulokset live [mk|<Metrix-linkki tai ID>] — Seuraa tämän päivän viikkareita tai annettua kisaa.\n"
+        "!tulokset live stop — Lopeta kanavan live-seuranta.\n\n"
         "Lyhenteet: ep = Etelä-Pohjanmaa, pohj = Pohjanmaa, kp = Keski-Pohjanmaa, ks = Keski-Suomi, pirk = Pirkanmaa, sata = Satakunta, mk = lähimaakunnat (EP + naapurit).\n\n"
         "Komennot:\n!etsi\n!paikat\n!viikkarit\n"
     )
@@ -180,13 +184,16 @@ def _seuraranking_help_description() -> str:
         "Miten käyttää:\n"
         "• !seura ranking - Näytä nykyinen top-lista seuran menestyjistä (esim. top-pelaajat ja sijoitukset)\n"
         "• !seura menestys - Yhteenveto kauden onnistumisista ja podium-sijoituksista\n"
-        "• !seura päivitä - (admin) Päivitä club_successes.json historiasta tai simulaatiolla\n\n"
+        "• !seura rating [N] - Seuran pelaajat Metrix-ratingin mukaan\n"
+        "• !seura kierrokset [N] - Seuran pelaajat Metrix-kierrosmäärän mukaan\n"
+        "• !seura vire [N] - Seuran pelaajat viimeisen 30 päivän rating-muutoksen mukaan\n"
+        "• !seura päivitä - (admin) Käynnistä tulostaulun päivitys taustalle\n\n"
         "Missä data tulee:\n"
         "• Automaattilöydöt !tulokset-ajosta: botti tunnistaa seurapelaajat ja kirjaa Top3-sijoituksia\n"
+        "• Tulostaulu: tallennetut MetrixID:t ja havaitut seurapelaajat päivitetään taustalla tunnin välein\n"
         "• Manuaalinen ylläpito: tiedoston muokkaus tai dev-skriptit `scripts/`-hakemistossa\n\n"
         "Tulevaisuuden ideat:\n"
         "• Komentoja suodattamiseen (kausi, luokka, kategoria)\n"
-        "• Pysyvä leaderboard Discordiin upotettuna\n"
     )
 
 
@@ -0,0 +1,405 @@
+"""Käynnissä olevien kisojen live-seuranta (!tulokset live).
+
+Seuranta hakee tulossivua mukautuvin välein (tiheämmin kun tuloksia
+muuttuu, harvemmin kun sivu pysyy samana) ja päivittää yhtä Discord-viestiä.
+
+Kustannusten minimointi, jotta yksi prosessi voi seurata useaa viikkaria:
+  - koko tulososan tiiviste: jos sivu ei muuttunut, ei parsita mitään
+  - luokkakohtaiset palat (results_parser.split_class_sections) tiivistetään
+    erikseen ja vain muuttuneet luokat parsitaan uudelleen
+  - uutta tilannetta verrataan edelliseen ja viestiin kirjataan vain
+    muutokset: uusi johtaja luokassa tai seurapelaaja nousi top3:een
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import requests
+
+try:
+    import discord  # type: ignore[import]
+except Exception:  # pragma: no cover
+    discord = None  # type: ignore[assignment]
+
+try:
+    from . import data_store
+except Exception:  # pragma: no cover
+    data_store = None  # type: ignore[assignment]
+
+try:
+    from . import club_leaderboard
+except Exception:  # pragma: no cover
+    club_leaderboard = None  # type: ignore[assignment]
+
+from . import results_parser, scrape_executor
+from .date_utils import normalize_date_string
+from .results_parser import ResultRow
+
+
+LIVE_MIN_INTERVAL = int(os.environ.get("LIVE_MIN_INTERVAL", "60"))
+LIVE_MAX_INTERVAL = int(os.environ.get("LIVE_MAX_INTERVAL", "600"))
+# Seuranta päättyy, kun tuloksiin ei ole tullut muutoksia tähän aikaan
+# tai kun kokonaiskesto ylittyy.
+LIVE_MAX_IDLE = int(os.environ.get("LIVE_MAX_IDLE", str(90 * 60)))
+LIVE_MAX_DURATION = int(os.environ.get("LIVE_MAX_DURATION", str(8 * 60 * 60)))
+# Kuinka monta viimeisintä muutosriviä viestissä näytetään.
+LIVE_MAX_CHANGE_LINES = 8
+
+# Aktiiviset seurannat kanavittain: {channel_id: LiveSession}
+_SESSIONS: Dict[int, "LiveSession"] = {}
+
+Snapshot = Dict[str, List[ResultRow]]
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()
+
+
+def diff_snapshots(prev: Optional[Snapshot], cur: Snapshot, club_ids: Set[str]) -> List[str]:
+    """Vertaa kahta tilannetta ja palauta muutosrivit.
+
+    Ensimmäisellä kerralla (prev None) muutoksia ei raportoida, vaan tilanne
+    toimii vertailupohjana.
+    """
+
+    if prev is None:
+        return []
+
+    changes: List[str] = []
+    for class_name, rows in cur.items():
+        prev_rows = prev.get(class_name) or []
+
+        leaders = [r for r in rows if r.position == 1]
+        prev_leaders = {r.name for r in prev_rows if r.position == 1}
+        if leaders and {r.name for r in leaders} != prev_leaders:
+            names = ", ".join(r.name for r in leaders)
+            changes.append(f"🥇 {class_name}: {names} johtaa ({leaders[0].to_par})")
+
+        if not club_ids:
+            continue
+        prev_pos = {(r.metrix_id or r.name): r.position for r in prev_rows}
+        for r in rows:
+            if not r.metrix_id or r.metrix_id not in club_ids:
+                continue
+            if not isinstance(r.position, int) or r.position > 3:
+                continue
+            before = prev_pos.get(r.metrix_id)
+            if not isinstance(before, int) or before > 3:
+                changes.append(f"⬆️ {r.name} nousi sijalle {r.position} ({class_name})")
+
+    return changes
+
+
+def _section_key(snapshot: Snapshot, name: str, heading: Optional[str], index: int) -> str:
+    """Snapshot-avain luokalle: nimi, tai samannimisille otsikko/järjestysnumero.
+
+    Erikseen parsitut palat voivat tuottaa saman yleisnimen (esim. "Open"
+    kahden eri otsikon alla), jolloin myöhempi luokka korvaisi aiemman.
+    """
+
+    if name not in snapshot:
+        return name
+    if heading and heading != name:
+        key = f"{heading}: {name}"
+        if key not in snapshot:
+            return key
+    return f"{name} ({index + 1})"
+
+
+class EventTracker:
+    """Yhden kilpailun tulossivun seuranta."""
+
+    def __init__(self, url: str, title: str = "") -> None:
+        self.url = url
+        self.title = title or url
+        self.page_hash: Optional[str] = None
+        self.section_cache: Dict[str, List[Tuple[str, List[ResultRow]]]] = {}
+        self.snapshot: Optional[Snapshot] = None
+        self.interval = LIVE_MIN_INTERVAL
+        self.next_poll = 0.0
+        self.started = time.monotonic()
+        self.last_change = self.started
+        self.done = False
+        self.polls = 0
+        self.parses = 0
+
+    def _fetch(self) -> Optional[str]:
+        headers = {
+            "User-Agent": os.environ.get(
+                "METRIX_USER_AGENT",
+                "Mozilla/5.0 (compatible; MetrixDiscordBot/1.0)",
+            )
+        }
+        try:
+            resp = requests.get(self.url, headers=headers, timeout=25)
+        except Exception:
+            return None
+        if resp.status_code != 200 or not resp.text:
+            return None
+        return resp.text
+
+    def _parse(self, html_text: str) -> Snapshot:
+        sections = results_parser.split_class_sections(html_text)
+        if not sections:
+            # Ei thead-rakennetta: parsitaan koko tulososa kerralla.
+            self.parses += 1
+            return {name: rows for name, rows in results_parser.iter_result_tables(html_text)}
+
+        snapshot: Snapshot = {}
+        cache: Dict[str, List[Tuple[str, List[ResultRow]]]] = {}
+        for index, (heading, section) in enumerate(sections):
+            # Otsikko ja järjestys kuuluvat avaimeen: nimetön luokka saa
+            # nimensä niistä, vaikka palan HTML olisi sama.
+            key = _hash(f"{heading}\n{index}\n{section}")
+            parsed = self.section_cache.get(key)
+            if parsed is None:
+                parsed = list(results_parser.iter_result_tables(section, heading=heading, start_index=index))
+                self.parses += 1
+            cache[key] = parsed
+            for name, rows in parsed:
+                snapshot[_section_key(snapshot, name, heading, index)] = rows
+        self.section_cache = cache
+        return snapshot
+
+    def poll(self, club_ids: Set[str]) -> List[str]:
+        """Hae ja vertaa; palauttaa muutosrivit. Ajetaan taustasäikeessä."""
+
+        now = time.monotonic()
+        self.polls += 1
+        changes: List[str] = []
+        changed = False
+
+        html_text = self._fetch()
+        if html_text is not None:
+            page_hash = _hash(results_parser.results_fragment(html_text))
+            if page_hash != self.page_hash:
+                self.page_hash = page_hash
+                if self.title == self.url:
+                    self.title = results_parser.guess_event_name(html_text)
+                snapshot = self._parse(html_text)
+                changes = diff_snapshots(self.snapshot, snapshot, club_ids)
+                changed = snapshot != self.snapshot
+                self.snapshot = snapshot
+
+        if changed:
+            self.last_change = now
+            self.interval = LIVE_MIN_INTERVAL
+        else:
+            self.interval = min(LIVE_MAX_INTERVAL, int(self.interval * 1.5))
+        self.next_poll = now + self.interval
+
+        if now - self.last_change > LIVE_MAX_IDLE or now - self.started > LIVE_MAX_DURATION:
+            self.done = True
+        return changes
+
+
+class LiveSession:
+    """Yhden kanavan live-seuranta: useita kisoja, yksi päivitettävä viesti."""
+
+    def __init__(self, channel: Any, trackers: List[EventTracker], club_ids: Set[str]) -> None:
+        self.channel = channel
+        self.trackers = trackers
+        self.club_ids = club_ids
+        self.changes: List[str] = []
+        self.message: Any = None
+        self.task: Optional["asyncio.Task[None]"] = None
+        self.stopped = False
+
+    def render(self, finished: bool = False) -> Tuple[str, str]:
+        title = "LIVE-tulokset" if not finished else "LIVE-tulokset (päättynyt)"
+        lines: List[str] = []
+        for tr in self.trackers:
+            lines.append(f"**[{tr.title}]({tr.url})**")
+            if not tr.snapshot:
+                lines.append("Ei tuloksia vielä.")
+            for class_name, rows in (tr.snapshot or {}).items():
+                top = [r for r in rows if isinstance(r.position, int) and r.position <= 3]
+                if not top:
+                    continue
+                podium = " | ".join(f"{r.position}) {r.name} {r.to_par}" for r in top)
+                lines.append(f"• {class_name}: {podium}")
+            lines.append("")
+
+        if self.changes:
+            lines.append("**Muutokset**")
+            lines.extend(self.changes[-LIVE_MAX_CHANGE_LINES:])
+            lines.append("")
+
+        if not finished:
+            pending = [t.next_poll for t in self.trackers if not t.done]
+            if pending:
+                wait_s = max(0, int(min(pending) - time.monotonic()))
+                lines.append(f"Päivitetty {datetime.now():%H:%M} — seuraava tarkistus ~{max(1, wait_s // 60)} min")
+        else:
+            lines.append(f"Seuranta päättyi {datetime.now():%H:%M}.")
+
+        desc = "\n".join(lines).strip()
+        if len(desc) > 4000:
+            desc = desc[:3997] + "..."
+        return title, desc
+
+    async def publish(self, finished: bool = False) -> None:
+        title, desc = self.render(finished)
+        Embed_cls = getattr(discord, "Embed", None) if discord is not None else None
+        try:
+            if self.message is None:
+                if Embed_cls:
+                    self.message = await self.channel.send(embed=Embed_cls(title=title, description=desc))
+                else:
+                    self.message = await self.channel.send(f"{title}\n{desc}")
+            elif Embed_cls:
+                await self.message.edit(embed=Embed_cls(title=title, description=desc))
+            else:
+                await self.message.edit(content=f"{title}\n{desc}")
+        except Exception as e:
+            logger.warning("Live results publish failed: %s", e)
+
+    async def run(self) -> None:
+        try:
+            while not self.stopped:
+                now = time.monotonic()
+                any_change = False
+                for tr in self.trackers:
+                    if tr.done or tr.next_poll > now:
+                        continue
+                    had_snapshot = tr.snapshot is not None
+                    try:
+                        new_changes = await scrape_executor.run("tulokset_live", tr.poll, self.club_ids)
+                    except scrape_executor.ScrapeError as e:
+                        # Hakupooli täynnä tai haku aikakatkaistiin: yritetään seuraavalla kierroksella.
+                        logger.info("Live-haku ohitettiin (%s): %s", tr.url, e)
+                        continue
+                    stamp = datetime.now().strftime("%H:%M")
+                    self.changes.extend(f"`{stamp}` {c}" for c in new_changes)
+                    if new_changes or (not had_snapshot and tr.snapshot is not None):
+                        any_change = True
+
+                if all(t.done for t in self.trackers):
+                    break
+                if any_change or self.message is None:
+                    await self.publish()
+
+                next_due = min(t.next_poll for t in self.trackers if not t.done)
+                await asyncio.sleep(max(5.0, min(30.0, next_due - time.monotonic())))
+        finally:
+            await self.publish(finished=True)
+            for key, sess in list(_SESSIONS.items()):
+                if sess is self:
+                    _SESSIONS.pop(key, None)
+
+
+def _load_club_ids() -> Set[str]:
+    ids: Set[str] = set()
+    if club_leaderboard is not None:
+        try:
+            for mid, entry in club_leaderboard.load_leaderboard().items():
+                if isinstance(entry, dict) and entry.get("member"):
+                    ids.add(str(mid))
+        except Exception:
+            pass
+    if data_store is not None:
+        try:
+            successes = data_store.load_category("club_successes")
+            if isinstance(successes, dict):
+                ids.update(str(k) for k in successes.keys() if str(k).strip())
+        except Exception:
+            pass
+    return ids
+
+
+def _todays_events(category_name: str) -> List[Tuple[str, str]]:
+    """Palauta (otsikko, url) tämän päivän viikkokisoille kategoriasta."""
+
+    if data_store is None:
+        return []
+    try:
+        entries = data_store.load_category(category_name) or []
+    except Exception:
+        return []
+
+    today = date.today()
+    events: List[Tuple[str, str]] = []
+    seen: Set[str] = set()
+    for e in entries:
+        if not isinstance(e, dict):
+            continue
+        url = str(e.get("url") or "").strip()
+        d_raw = str(e.get("date") or "").strip()
+        if not url or not d_raw or " - " in d_raw or url in seen:
+            continue
+        try:
+            d_norm = normalize_date_string(d_raw, prefer_month_first=True)
+            d_parsed = datetime.strptime(d_norm.split()[0], "%d.%m.%Y").date()
+        except Exception:
+            continue
+        if d_parsed == today:
+            seen.add(url)
+            events.append((str(e.get("title") or url), url))
+    return events
+
+
+async def handle_live(message: Any, parts: List[str]) -> None:
+    """!tulokset live [mk|<Metrix-linkki tai ID>|stop]
+
+      - !tulokset live        → seuraa tämän päivän EP-viikkareita (VIIKKOKISA)
+      - !tulokset live mk     → tämän päivän lähimaakuntien viikkarit
+      - !tulokset live 3523711 → seuraa yksittäistä kisaa
+      - !tulokset live stop   → lopeta kanavan seuranta
+    """
+
+    from .commands_tulokset import _build_competition_url, _ensure_results_url
+
+    channel = message.channel
+    channel_id = int(getattr(channel, "id", 0) or 0)
+    arg = str(parts[2] if len(parts) >= 3 else "").strip()
+
+    existing = _SESSIONS.get(channel_id)
+    if arg.lower() in ("stop", "lopeta"):
+        if existing is not None:
+            existing.stopped = True
+            reply = "Live-seuranta lopetetaan."
+        else:
+            reply = "Tällä kanavalla ei ole käynnissä live-seurantaa."
+        try:
+            await channel.send(reply)
+        except Exception:
+            pass
+        return
+
+    events: List[Tuple[str, str]] = []
+    if arg and arg.lower() not in ("ep", "mk"):
+        url_base = _build_competition_url(arg)
+        if url_base:
+            events.append(("", _ensure_results_url(url_base)))
+    else:
+        category = "VIIKKARIT_SEUTU" if arg.lower() == "mk" else "VIIKKOKISA"
+        todays = await scrape_executor.run("tulokset_live", _todays_events, category, user=getattr(message.author, "id", None))
+        events = [(title, _ensure_results_url(url)) for title, url in todays]
+
+    if not events:
+        try:
+            await channel.send("Tälle päivälle ei löytynyt seurattavia kisoja.")
+        except Exception:
+            pass
+        return
+
+    if existing is not None:
+        existing.stopped = True
+
+    club_ids = await scrape_executor.run("tulokset_live", _load_club_ids, user=getattr(message.author, "id", None))
+    session = LiveSession(channel, [EventTracker(url, title) for title, url in events], club_ids)
+    _SESSIONS[channel_id] = session
+    session.task = asyncio.create_task(session.run())
+    try:
+        await channel.send(
+            f"Live-seuranta käynnistetty ({len(events)} kisaa). Lopeta komennolla !tulokset live stop."
+        )
+    except Exception:
+        pass
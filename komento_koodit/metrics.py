@@ -0,0 +1,412 @@
+"""Komentojen ja hakujen mittarit muistissa, tilannekuvat SQLiteen.
+
+Emme tienneet, mitkä komennot ovat hitaita tai epäonnistuvat, koska
+poikkeukset niellään ``except Exception``-lohkoissa. Tämä moduuli kerää:
+
+- komennon kokonaiskesto ja virheet (command_registry.timing_middleware)
+- hakupoolin jonotusaika ja ajoaika (scrape_executor)
+- ajoajan jako HTTP-aikaan, yhdistettyjen hakujen odotukseen ja muuhun
+  (jäsennys): ``install_http_timing`` mittaa ``requests.Session.send``-kutsut
+  ja single_flight kirjaa seuraajien odotuksen ``record_wait``-kutsulla
+- välimuistien osumat (response_cache, single_flight) raporttia koottaessa
+
+Kestot tallennetaan kiinteälukuisiin logaritmisiin lokeroihin
+(``Histogram``), joten p50/p95/p99 saadaan vakiomuistilla ja tulokset
+voi yhdistää. ``snapshot`` kirjoittaa tilannekuvan ``metrics_snapshots``
+-tauluun ja ``METRICS_DUMP_FILE``-tiedostoon (ajastimen työ), ja
+``!admin stats`` näyttää ``format_report``-yhteenvedon.
+"""
+
+import atexit
+import bisect
+import contextvars
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+try:
+    from . import data_store
+except Exception:  # pragma: no cover
+    data_store = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default) if settings is not None else default
+
+
+SNAPSHOT_INTERVAL = int(_setting("METRICS_SNAPSHOT_INTERVAL", 300))
+KEEP_DAYS = int(_setting("METRICS_KEEP_DAYS", 14))
+DUMP_FILE = str(_setting("METRICS_DUMP_FILE", os.path.join("logs", "metrics.json")))
+
+# Lokeroiden ylärajat sekunteina: 1 ms ... ~5 min, kerroin ~1.2 (virhe < 10 %).
+BOUNDS: Tuple[float, ...] = tuple(0.001 * 1.2 ** i for i in range(70))
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        seconds = max(0.0, seconds)
+        self.counts[bisect.bisect_left(BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Lokeron yläraja, jonka alle ``p`` prosenttia havainnoista osuu."""
+
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(BOUNDS[i], self.max) if i < len(BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p95_ms": round(self.percentile(95) * 1000, 1),
+            "p99_ms": round(self.percentile(99) * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+_lock = threading.Lock()
+# (mittari, nimi) -> Histogram; mittarit: command, queue_wait, run, http,
+# shared_wait, parse, http_host.
+#
+# run = http + shared_wait + parse hakua kohden. http on seinäkelloaika, jona
+# vähintään yksi haun pyyntö oli käynnissä (rinnakkaiset pyynnöt eivät
+# summaudu), shared_wait on single_flight-seuraajan odotus toisen hakua.
+# Haun tila kulkee ContextVarissa: sisäkkäiset poolit näkevät sen vain, jos
+# työ lähetetään ``submit``-funktiolla (contextvars.copy_context). Pelkällä
+# threading.Threadilla tai executor.submitilla ajettu HTTP-aika jää
+# jäsennysaikaan.
+_histograms: Dict[Tuple[str, str], Histogram] = {}
+# (laskuri, nimi) -> lukumäärä; laskurit: errors, error_type
+_counters: Dict[Tuple[str, str], int] = {}
+_started = time.time()
+
+
+class _JobTimes:
+    """Yhden haun HTTP- ja odotusaika; jaettu haun kaikkien säikeiden kesken."""
+
+    __slots__ = ("lock", "http", "wait", "active", "since")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.http = 0.0
+        self.wait = 0.0
+        self.active = 0
+        self.since = 0.0
+
+    def http_started(self) -> None:
+        with self.lock:
+            if self.active == 0:
+                self.since = time.perf_counter()
+            self.active += 1
+
+    def http_finished(self) -> None:
+        with self.lock:
+            self.active = max(0, self.active - 1)
+            if self.active == 0:
+                self.http += time.perf_counter() - self.since
+
+
+_job: "contextvars.ContextVar[Optional[_JobTimes]]" = contextvars.ContextVar("metrics_job", default=None)
+
+
+def observe(metric: str, name: str, seconds: float) -> None:
+    with _lock:
+        h = _histograms.get((metric, name))
+        if h is None:
+            h = _histograms[(metric, name)] = Histogram()
+        h.observe(seconds)
+
+
+def incr(counter: str, name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[(counter, name)] = _counters.get((counter, name), 0) + n
+
+
+def record_command(name: str, seconds: float, error: Optional[BaseException] = None) -> None:
+    observe("command", name, seconds)
+    if error is not None:
+        incr("errors", name)
+        incr("error_type", f"{name}:{type(error).__name__}")
+
+
+# --- HTTP-aika hakusäikeissä -----------------------------------------------------
+
+
+def begin_job() -> None:
+    """Aloita haun ajanotto tässä kontekstissa (scrape_executor kutsuu ennen hakua)."""
+
+    _job.set(_JobTimes())
+
+
+def end_job(command: str, run_seconds: float) -> None:
+    """Kirjaa haun ajoaika ja sen jako HTTP-aikaan, odotukseen ja jäsennykseen."""
+
+    job = _job.get()
+    _job.set(None)
+    http = job.http if job is not None else 0.0
+    wait = job.wait if job is not None else 0.0
+    observe("run", command, run_seconds)
+    observe("http", command, http)
+    if wait:
+        observe("shared_wait", command, wait)
+    observe("parse", command, max(0.0, run_seconds - http - wait))
+
+
+def record_wait(seconds: float) -> None:
+    """Kirjaa käynnissä olevalle haulle aika, joka odotettiin toisen hakua."""
+
+    job = _job.get()
+    if job is not None:
+        with job.lock:
+            job.wait += max(0.0, seconds)
+
+
+def submit(executor: Executor, func: Callable[..., Any], *args: Any) -> Future:
+    """``executor.submit``, joka vie haun ajanoton mukaan poolin säikeeseen."""
+
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+
+_http_installed = False
+_started_dump = False
+
+
+def start() -> None:
+    """Ota botin mittaukset käyttöön: HTTP-ajanotto ja dump-tiedosto sammuttaessa."""
+
+    global _started_dump
+    install_http_timing()
+    with _lock:
+        if _started_dump:
+            return
+        _started_dump = True
+    atexit.register(dump)
+
+
+def install_http_timing() -> None:
+    """Mittaa jokaisen ``requests``-pyynnön keston (sisältää rungon latauksen)."""
+
+    global _http_installed
+    if _http_installed:
+        return
+    try:
+        import requests
+        from urllib.parse import urlsplit
+    except Exception:
+        return
+    orig = requests.Session.send
+
+    def send(self: Any, request: Any, **kwargs: Any) -> Any:
+        job = _job.get()
+        if job is not None:
+            job.http_started()
+        started = time.perf_counter()
+        try:
+            return orig(self, request, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            if job is not None:
+                job.http_finished()
+            try:
+                host = urlsplit(request.url).hostname or "?"
+            except Exception:
+                host = "?"
+            observe("http_host", host, elapsed)
+
+    send.__wrapped__ = orig  # type: ignore[attr-defined]
+    requests.Session.send = send  # type: ignore[assignment]
+    _http_installed = True
+
+
+# --- raportit --------------------------------------------------------------------
+
+
+def _cache_stats() -> Dict[str, Dict[str, int]]:
+    out: Dict[str, Dict[str, int]] = {}
+    try:
+        from . import response_cache
+
+        out["response_cache"] = response_cache.stats()
+    except Exception:
+        pass
+    try:
+        from . import single_flight
+
+        out["single_flight"] = single_flight.get_group().stats()
+    except Exception:
+        pass
+    return out
+
+
+def snapshot_data() -> Dict[str, Any]:
+    with _lock:
+        hist: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (metric, name), h in _histograms.items():
+            hist.setdefault(metric, {})[name] = h.summary()
+        counters: Dict[str, Dict[str, int]] = {}
+        for (counter, name), n in _counters.items():
+            counters.setdefault(counter, {})[name] = n
+    return {
+        "taken_at": time.time(),
+        "uptime_s": round(time.time() - _started),
+        "histograms": hist,
+        "counters": counters,
+        "caches": _cache_stats(),
+    }
+
+
+def _hit_rate(hits: int, total: int) -> str:
+    return f"{hits / total * 100:.0f} %" if total else "-"
+
+
+def format_report(data: Optional[Dict[str, Any]] = None) -> str:
+    """Tekstitaulukko ``!admin stats``-komennolle."""
+
+    data = data or snapshot_data()
+    hist = data["histograms"]
+    errors = data["counters"].get("errors", {})
+    lines = [f"Mittarit {data['uptime_s'] // 3600} h {data['uptime_s'] % 3600 // 60} min käynnistyksestä"]
+
+    commands = hist.get("command", {})
+    if commands:
+        lines.append("")
+        lines.append("Komento     kutsut virh   p50    p95    p99  (ms)")
+        for name, s in sorted(commands.items(), key=lambda kv: -kv[1]["count"]):
+            lines.append(
+                f"{name:10s} {int(s['count']):6d} {errors.get(name, 0):4d} {s['p50_ms']:6.0f} {s['p95_ms']:6.0f} {s['p99_ms']:6.0f}"
+            )
+    else:
+        lines.append("Komentoja ei ole vielä ajettu.")
+
+    runs = hist.get("run", {})
+    if runs:
+        lines.append("")
+        lines.append("Haku       jono p95  http p50  yhd. odotus p50  jäsennys p50  (ms)")
+        for name in sorted(runs, key=lambda n: -runs[n]["count"]):
+            wait = hist.get("queue_wait", {}).get(name, {})
+            http = hist.get("http", {}).get(name, {})
+            shared = hist.get("shared_wait", {}).get(name, {})
+            parse = hist.get("parse", {}).get(name, {})
+            lines.append(
+                f"{name:10s} {wait.get('p95_ms', 0):8.0f} {http.get('p50_ms', 0):9.0f} "
+                f"{shared.get('p50_ms', 0):16.0f} {parse.get('p50_ms', 0):13.0f}"
+            )
+
+    caches = data.get("caches", {})
+    rc = caches.get("response_cache")
+    sf = caches.get("single_flight")
+    if rc or sf:
+        lines.append("")
+    if rc:
+        lookups = rc.get("hits", 0) + rc.get("misses", 0)
+        lines.append(f"Vastausvälimuisti: {_hit_rate(rc.get('hits', 0), lookups)} osumia ({lookups} hakua)")
+    if sf:
+        total = sf.get("hits", 0) + sf.get("shared", 0) + sf.get("misses", 0)
+        lines.append(f"Yhdistetyt haut: {_hit_rate(sf.get('hits', 0) + sf.get('shared', 0), total)} ilman omaa hakua ({total} kutsua)")
+
+    types = data["counters"].get("error_type", {})
+    if types:
+        lines.append("")
+        lines.append("Yleisimmät virheet:")
+        for name, n in sorted(types.items(), key=lambda kv: -kv[1])[:5]:
+            lines.append(f"  {name}: {n}")
+    return "\n".join(lines)
+
+
+# --- tilannekuvat ----------------------------------------------------------------
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(data_store._db_path())  # type: ignore[union-attr]
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS metrics_snapshots (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               taken_at REAL NOT NULL,
+               payload TEXT NOT NULL
+           )"""
+    )
+    return conn
+
+
+def dump(path: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Kirjoita mittarit JSON-tiedostoon (oletus METRICS_DUMP_FILE)."""
+
+    path = path or DUMP_FILE
+    if not os.path.isabs(path):
+        path = os.path.join(ROOT, path)
+    data = data or snapshot_data()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return path
+    except Exception as e:
+        logger.warning("mittaritiedoston kirjoitus epäonnistui: %s", e)
+        return None
+
+
+def snapshot() -> None:
+    """Tallenna tilannekuva SQLiteen ja dump-tiedostoon (ajastimen työ)."""
+
+    data = snapshot_data()
+    if data_store is not None:
+        try:
+            with _connect() as conn:
+                conn.execute(
+                    "INSERT INTO metrics_snapshots (taken_at, payload) VALUES (?, ?)",
+                    (data["taken_at"], json.dumps(data, ensure_ascii=False)),
+                )
+                conn.execute("DELETE FROM metrics_snapshots WHERE taken_at < ?", (data["taken_at"] - KEEP_DAYS * 86400,))
+                conn.commit()
+        except Exception as e:
+            logger.warning("mittarien tallennus epäonnistui: %s", e)
+    dump(data=data)
+
+
+def recent_snapshots(limit: int = 12) -> List[Dict[str, Any]]:
+    try:
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT payload FROM metrics_snapshots ORDER BY taken_at DESC LIMIT ?", (int(limit),)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+    except Exception:
+        return []
+
@@ -0,0 +1,217 @@
+"""Metrix rating -käyrän analytiikka (NumPy).
+
+Laskee RatingCurve-taulukoista (ks. metrix_stats.RatingCurve) liukuvan
+keskiarvon, trendin kulmakertoimen, 30/90 päivän muutoksen, huipun,
+vaihtelun sekä sijoituksen (persentiili) saman seuran pelaajiin nähden.
+
+NumPy on valinnainen: jos sitä ei ole asennettu, analyze_curve palauttaa
+None ja !metrix näyttää vain perustiedot.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np  # type: ignore[import]
+except Exception:  # pragma: no cover - optional
+    np = None  # type: ignore[assignment]
+
+try:
+    from .data_store import load_category, save_category
+except Exception:  # pragma: no cover - optional
+    load_category = None  # type: ignore[assignment]
+    save_category = None  # type: ignore[assignment]
+
+
+# data_storen kategoria, johon talletetaan !metrix-hauissa nähtyjen
+# pelaajien viimeisin rating ja seurat persentiilivertailua varten.
+RATINGS_CATEGORY = "metrix_ratings"
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+@dataclass
+class CurveAnalytics:
+    """Yhteenveto yhden pelaajan rating-käyrästä."""
+
+    points: int
+    current: float
+    peak: float
+    peak_date: Optional[str] = None
+    rolling_avg: Optional[float] = None
+    delta_30d: Optional[float] = None
+    delta_90d: Optional[float] = None
+    # Trendin kulmakerroin rating-pisteinä 30 päivää kohden (viim. 90 pv).
+    slope_per_30d: Optional[float] = None
+    # Peräkkäisten pisteiden muutosten keskihajonta.
+    volatility: Optional[float] = None
+    club_percentile: Optional[float] = None
+    club_size: int = 0
+
+
+def rolling_average(ratings: Any, window: int = 5) -> Any:
+    """Palauta liukuva keskiarvo ikkunalla `window` (NumPy-taulukko).
+
+    Palauttaa tyhjän taulukon, jos pisteitä on vähemmän kuin ikkunan koko.
+    """
+
+    if np is None:
+        return None
+    arr = np.asarray(ratings, dtype=np.float64)
+    if window <= 0 or arr.size < window:
+        return np.empty(0, dtype=np.float64)
+    kernel = np.full(window, 1.0 / window)
+    return np.convolve(arr, kernel, mode="valid")
+
+
+def percentile_of(value: float, others: Iterable[float]) -> Optional[float]:
+    """Laske, kuinka monta prosenttia vertailuryhmästä jää arvon alle.
+
+    Tasatilanteet lasketaan puoliksi (ns. mid-rank), joten ryhmän
+    ainoa pelaaja saa arvon 50.
+    """
+
+    if np is None:
+        return None
+    arr = np.fromiter((float(v) for v in others), dtype=np.float64)
+    if arr.size == 0:
+        return None
+    below = np.count_nonzero(arr < value)
+    equal = np.count_nonzero(arr == value)
+    return float((below + 0.5 * equal) / arr.size * 100.0)
+
+
+def _delta_since(ts: Any, ratings: Any, current: float, cutoff_ms: int) -> Optional[float]:
+    """Muutos viimeisimmästä ennen `cutoff_ms`-hetkeä olleesta pisteestä."""
+
+    idx = int(np.searchsorted(ts, cutoff_ms, side="right")) - 1
+    if idx < 0:
+        return None
+    return float(current - ratings[idx])
+
+
+def analyze_curve(
+    curve: Any,
+    window: int = 5,
+    club_ratings: Optional[Iterable[float]] = None,
+    now_ms: Optional[int] = None,
+) -> Optional[CurveAnalytics]:
+    """Analysoi RatingCurve ja palauta CurveAnalytics.
+
+    Palauttaa None, jos NumPy puuttuu tai käyrässä ei ole pisteitä.
+    """
+
+    if np is None or curve is None or len(curve) == 0:
+        return None
+
+    # frombuffer ei kopioi: array('q')/array('f') -puskurit luetaan suoraan.
+    ts_all = np.frombuffer(curve.timestamps, dtype=np.int64)
+    ratings = np.frombuffer(curve.ratings, dtype=np.float32).astype(np.float64)
+
+    current = float(ratings[-1])
+    peak_idx = int(np.argmax(ratings))
+    peak = float(ratings[peak_idx])
+
+    peak_date: Optional[str] = None
+    if ts_all[peak_idx] >= 0:
+        try:
+            peak_date = datetime.fromtimestamp(int(ts_all[peak_idx]) / 1000.0).strftime("%d.%m.%Y")
+        except Exception:
+            peak_date = None
+
+    result = CurveAnalytics(points=int(ratings.size), current=current, peak=peak, peak_date=peak_date)
+
+    rolling = rolling_average(ratings, window)
+    if rolling is not None and rolling.size:
+        result.rolling_avg = float(rolling[-1])
+
+    if ratings.size >= 3:
+        result.volatility = float(np.std(np.diff(ratings)))
+
+    # Aikaperusteiset luvut lasketaan vain pisteistä, joilla on aikaleima.
+    valid = ts_all >= 0
+    ts = ts_all[valid]
+    rt = ratings[valid]
+    if ts.size:
+        now = int(now_ms if now_ms is not None else time.time() * 1000)
+        result.delta_30d = _delta_since(ts, rt, current, now - 30 * DAY_MS)
+        result.delta_90d = _delta_since(ts, rt, current, now - 90 * DAY_MS)
+
+        recent = ts >= now - 90 * DAY_MS
+        if np.count_nonzero(recent) >= 3:
+            days = (ts[recent] - ts[recent][0]) / float(DAY_MS)
+            if float(days[-1]) > 0:
+                slope_per_day = float(np.polyfit(days, rt[recent], 1)[0])
+                result.slope_per_30d = slope_per_day * 30.0
+
+    if club_ratings is not None:
+        club_list = [float(v) for v in club_ratings]
+        result.club_size = len(club_list)
+        result.club_percentile = percentile_of(current, club_list)
+
+    return result
+
+
+def _load_ratings() -> Dict[str, Dict[str, Any]]:
+    if load_category is None:
+        return {}
+    try:
+        data = load_category(RATINGS_CATEGORY)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def remember_player_rating(stats: Any) -> None:
+    """Talleta pelaajan rating ja seurat myöhempää seuravertailua varten."""
+
+    if save_category is None or stats is None:
+        return
+    metrix_id = str(getattr(stats, "metrix_id", "") or "")
+    rating = getattr(stats, "rating", None)
+    if not metrix_id or rating is None:
+        return
+
+    data = _load_ratings()
+    data[metrix_id] = {
+        "name": getattr(stats, "name", None),
+        "rating": float(rating),
+        "clubs": list(getattr(stats, "clubs", None) or []),
+        "updated": datetime.now().isoformat(timespec="seconds"),
+    }
+    try:
+        save_category(RATINGS_CATEGORY, data)
+    except Exception:
+        pass
+
+
+def club_ratings_for(stats: Any) -> List[float]:
+    """Palauta saman seuran (vähintään yksi yhteinen seura) pelaajien ratingit.
+
+    Vertailuryhmään otetaan mukaan myös pelaaja itse, jotta persentiili
+    kuvaa sijoitusta koko seurassa.
+    """
+
+    clubs = {str(c).strip().lower() for c in (getattr(stats, "clubs", None) or []) if str(c).strip()}
+    if not clubs:
+        return []
+
+    own_id = str(getattr(stats, "metrix_id", "") or "")
+    values: List[float] = []
+    for metrix_id, entry in _load_ratings().items():
+        if not isinstance(entry, dict) or metrix_id == own_id:
+            continue
+        other_clubs = {str(c).strip().lower() for c in (entry.get("clubs") or [])}
+        if not clubs & other_clubs:
+            continue
+        try:
+            values.append(float(entry.get("rating")))
+        except Exception:
+            continue
+
+    rating = getattr(stats, "rating", None)
+    if values and rating is not None:
+        values.append(float(rating))
+    return values
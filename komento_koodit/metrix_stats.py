@@ -1,12 +1,21 @@
 import os
 import re
 import html
+import copy
+import functools
+from array import array
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, List, Tuple, Union
 
 import requests
 
+try:
+    from . import metrics
+except Exception:  # pragma: no cover
+    metrics = None  # type: ignore[assignment]
+
 
 BASE_ROOT_URL = "https://discgolfmetrix.com"
 BASE_PLAYER_URL = f"{BASE_ROOT_URL}/player/"
@@ -30,6 +39,62 @@ class RatingPoint:
     label: Optional[str] = None
 
 
+class RatingCurve:
+    """Metrix rating -käyrä (oranssi viiva) tiiviinä taulukkona.
+
+    Pisteet tallennetaan kahteen rinnakkaiseen taulukkoon: aikaleimat
+    millisekunteina (int64, -1 = tuntematon) ja ratingit float32-arvoina.
+    Näin yhden pelaajan käyrä vie välimuistissa murto-osan siitä, mitä
+    RatingPoint-olioiden lista veisi, ja taulukot voidaan antaa NumPylle
+    ilman kopiointia (ks. metrix_analytics).
+
+    Vanhaa käyttöä varten luokka käyttäytyy RatingPoint-listan tavoin:
+    len(), iterointi ja indeksointi (myös slicet) palauttavat RatingPoint-olioita.
+    """
+
+    __slots__ = ("timestamps", "ratings")
+
+    def __init__(self) -> None:
+        self.timestamps = array("q")
+        self.ratings = array("f")
+
+    def append(self, timestamp_ms: Optional[float], rating: float) -> None:
+        ts = -1
+        if isinstance(timestamp_ms, (int, float)):
+            ts = int(timestamp_ms)
+        self.timestamps.append(ts)
+        self.ratings.append(float(rating))
+
+    def _point(self, idx: int) -> RatingPoint:
+        ts = self.timestamps[idx]
+        date_str: Optional[str] = None
+        if ts >= 0:
+            try:
+                date_str = datetime.fromtimestamp(ts / 1000.0).strftime("%d.%m.%Y")
+            except Exception:
+                date_str = None
+        return RatingPoint(date=date_str, rating=round(float(self.ratings[idx]), 2))
+
+    def __len__(self) -> int:
+        return len(self.ratings)
+
+    def __iter__(self) -> Iterator[RatingPoint]:
+        for idx in range(len(self.ratings)):
+            yield self._point(idx)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Any:
+        if isinstance(idx, slice):
+            return [self._point(i) for i in range(*idx.indices(len(self.ratings)))]
+        if idx < 0:
+            idx += len(self.ratings)
+        if idx < 0 or idx >= len(self.ratings):
+            raise IndexError("RatingCurve index out of range")
+        return self._point(idx)
+
+    def __repr__(self) -> str:
+        return f"RatingCurve(points={len(self.ratings)})"
+
+
 @dataclass
 class PlayerStats:
     """Yksinkertainen tietorakenne Metrix-pelaajan statseille.
@@ -53,7 +118,7 @@ class PlayerStats:
     best_course_rating: Optional[float] = None
     best_course_date: Optional[str] = None
     # Metrix rating -käyrän (oranssi viiva) pisteet aikajärjestyksessä.
-    rating_curve: List[RatingPoint] = field(default_factory=list)
+    rating_curve: RatingCurve = field(default_factory=RatingCurve)
     # List of clubs (seurat) parsed from profile page, e.g. ["Lakeus Disc Golf", ...]
     clubs: List[str] = field(default_factory=list)
 
@@ -110,6 +175,19 @@ def _create_session() -> Optional[requests.Session]:
     return session
 
 
+def _clone_session(session: requests.Session) -> requests.Session:
+    """Uusi sessio samoilla otsakkeilla ja evästeillä (ei uutta kirjautumista).
+
+    requests.Session ei ole säieturvallinen, joten jokainen rinnakkainen
+    pyyntö saa oman kopionsa kirjautuneesta sessiosta.
+    """
+
+    clone = requests.Session()
+    clone.headers.update(session.headers)
+    clone.cookies.update(session.cookies)
+    return clone
+
+
 def _strip_tags(value: str) -> str:
     """Poista HTML-tagit ja dekoodaa entiteetit yksinkertaisesti."""
 
@@ -497,7 +575,7 @@ def _fetch_total_rounds(session: requests.Session, metrix_id: str) -> Optional[i
 
 def _fetch_rating_curve(
     session: requests.Session, metrix_id: str
-) -> Tuple[List[RatingPoint], Optional[float], Optional[str], Optional[int]]:
+) -> Tuple[RatingCurve, Optional[float], Optional[str], Optional[int]]:
     """Hae Metrix rating -käyrän (oranssi viiva) pisteet.
 
     Pelaajasivun "Ratingit"-graafi käyttää JSON-endpointtia
@@ -513,27 +591,27 @@ def _fetch_rating_curve(
       - data[2] → Course based rating (vihreä)
       - data[1] → Metrix rating (oranssi)
 
-    Tässä palautetaan vain Metrix rating -sarja (data[1]) muunnettuna
-    RatingPoint-olioiksi. Jos JSONia ei saada tai rakenne ei vastaa
-    odotuksia, palautetaan tyhjä lista.
+    Tässä palautetaan vain Metrix rating -sarja (data[1]) tiiviinä
+    RatingCurve-taulukkona. Jos JSONia ei saada tai rakenne ei vastaa
+    odotuksia, palautetaan tyhjä käyrä.
     """
 
     url = f"{BASE_ROOT_URL}/mystat_server_rating.php?user_id={metrix_id}&other=1&course_id=0"
     try:
         resp = session.get(url, timeout=20)
     except Exception:
-        return [], None, None, None
+        return RatingCurve(), None, None, None
 
     if resp.status_code != 200:
-        return [], None, None, None
+        return RatingCurve(), None, None, None
 
     try:
         data = resp.json()
     except Exception:
-        return [], None, None, None
+        return RatingCurve(), None, None, None
 
     if not isinstance(data, list) or len(data) < 2:
-        return [], None, None, None
+        return RatingCurve(), None, None, None
 
     # Quick rating (sininen viiva) oletetaan olevan data[0]
     quick_len: Optional[int] = None
@@ -546,36 +624,22 @@ def _fetch_rating_curve(
     # Metrix rating (oranssi viiva) oletetaan olevan data[1]
     series = data[1]
     if not isinstance(series, list):
-        return [], None, None, quick_len
+        return RatingCurve(), None, None, quick_len
 
-    points: List[RatingPoint] = []
+    points = RatingCurve()
 
     for item in series:
         if not isinstance(item, (list, tuple)) or len(item) < 2:
             continue
 
-        ts_raw = item[0]
-        val_raw = item[1]
-        label_raw = item[2] if len(item) >= 3 else None
-
         try:
-            rating_val = float(val_raw)
+            rating_val = float(item[1])
         except Exception:
             continue
 
-        date_str: Optional[str] = None
-        try:
-            if isinstance(ts_raw, (int, float)):
-                dt = datetime.fromtimestamp(float(ts_raw) / 1000.0)
-                date_str = dt.strftime("%d.%m.%Y")
-        except Exception:
-            date_str = None
-
-        label: Optional[str] = None
-        if isinstance(label_raw, str) and label_raw.strip():
-            label = label_raw.strip()
-
-        points.append(RatingPoint(date=date_str, rating=rating_val, label=label))
+        # Tooltip-teksti (item[2]) jätetään tallentamatta: sitä ei käytetä
+        # mihinkään ja se on käyrän ylivoimaisesti suurin osa.
+        points.append(item[0], rating_val)
 
     # Course based rating (vihreä jana) oletetaan olevan data[2]
     best_course_rating: Optional[float] = None
@@ -608,29 +672,9 @@ def _fetch_rating_curve(
     return points, best_course_rating, best_course_date, quick_len
 
 
-def fetch_player_stats(metrix_id: str) -> Optional[PlayerStats]:
-    """Hae Metrix-pelaajan statsit.
-
-    Päälogiikka:
-    - Haetaan aina pelaajasivu /player/<id> ja parsitaan sieltä nimi,
-      rating, kisat ja paras kierros.
-        - Optionaalisesti (vain omalle ID:lle) haetaan lisäksi:
-            - etusivu ja sieltä tarkka rating sekä rating-muutos id="rating"/"rating_change" -elementeistä
-            - "Omat 5 parasta kierrosta" -lista AJAX-endpointista main_server.php?section=best_rounds
-            - Metrix rating -käyrä (oranssi viiva) mystat_server_rating.php-JSONista.
-
-    Palauttaa PlayerStats tai None, jos haku epäonnistuu tai kirjautuminen ei
-    onnistu.
-    """
-
-    if not metrix_id:
-        return None
-
-    session = _create_session()
-    if session is None:
-        return None
+def _fetch_player_page(session: requests.Session, metrix_id: str) -> Optional[str]:
+    """Hae pelaajasivun /player/<id> HTML tai None, jos haku epäonnistuu."""
 
-    # 1) Haetaan AINA pelaajasivu tälle MetrixID:lle.
     try:
         player_resp = session.get(f"{BASE_PLAYER_URL}{metrix_id}", timeout=20)
     except Exception:
@@ -650,107 +694,246 @@ def fetch_player_stats(metrix_id: str) -> Optional[PlayerStats]:
         except Exception:
             pass
 
-    stats = _parse_player_stats(player_resp.text, metrix_id)
+    return player_resp.text
 
-    # 2) Voidaan erotella oma ID ja muiden ID:t lisäparannuksia varten.
-    # Omalle ID:lle (METRIX_OWN_ID) täydennetään lisäksi rating ja rating-muutos
-    # etusivulta sekä "Omat 5 parasta kierrosta" -lista.
-    own_id = os.environ.get("METRIX_OWN_ID", "").strip()
 
-    # 3) Täydennetään OMALLE ID:lle rating ja rating-muutos etusivulta ja
-    # sieltä ladattavasta mystat-metrix-rating -osiosta.
-    if own_id and own_id == metrix_id:
+def _fetch_front_rating(
+    session: requests.Session, metrix_id: str
+) -> Tuple[Optional[float], Optional[float]]:
+    """Hae kirjautuneen käyttäjän etusivulta rating ja rating-muutos.
+
+    Palauttaa (rating, rating_change); puuttuvat arvot ovat None.
+    """
+
+    try:
+        front_resp = session.get(BASE_ROOT_URL, timeout=20)
+    except Exception:
+        return None, None
+
+    if front_resp.status_code != 200 or not front_resp.text:
+        return None, None
+
+    # Debug: tallenna etusivun HTML erilliseen tiedostoon vain, jos
+    # METRIX_DEBUG_HTML on asetettu.
+    if os.environ.get("METRIX_DEBUG_HTML", "").strip():
         try:
-            front_resp = session.get(BASE_ROOT_URL, timeout=20)
+            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+            debug_path_front = os.path.join(base_dir, "Metrix_front_debug.html")
+            with open(debug_path_front, "w", encoding="utf-8") as f_dbg:
+                f_dbg.write(front_resp.text)
         except Exception:
-            front_resp = None
+            pass
 
-        if front_resp is not None and front_resp.status_code == 200 and front_resp.text:
-            # Debug: tallenna etusivun HTML erilliseen tiedostoon vain, jos
-            # METRIX_DEBUG_HTML on asetettu.
-            if os.environ.get("METRIX_DEBUG_HTML", "").strip():
-                try:
-                    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
-                    debug_path_front = os.path.join(base_dir, "Metrix_front_debug.html")
-                    with open(debug_path_front, "w", encoding="utf-8") as f_dbg:
-                        f_dbg.write(front_resp.text)
-                except Exception:
-                    pass
+    front_stats = _parse_player_stats(front_resp.text, metrix_id)
+    return front_stats.rating, front_stats.rating_change
 
-            front_stats = _parse_player_stats(front_resp.text, metrix_id)
 
-            if front_stats.rating is not None:
-                stats.rating = front_stats.rating
-            if front_stats.rating_change is not None:
-                stats.rating_change = front_stats.rating_change
+def _fetch_best_rounds(session: requests.Session) -> Tuple[Optional[float], Optional[str]]:
+    """Hae "Omat 5 parasta kierrosta" -listan paras rating ja sen päivämäärä.
+
+    Etusivulla lista ladataan AJAXilla (data-section="best_rounds"), joten
+    se haetaan erillisellä kutsulla main_server.php?section=best_rounds.
+    """
 
-            # Yritä hakea "Omat 5 parasta kierrosta" -lista erillisellä kutsulla,
-            # koska etusivulla se ladataan AJAXilla (data-section="best_rounds").
-            try:
-                br_resp = session.get(f"{BASE_ROOT_URL}/main_server.php?section=best_rounds", timeout=20)
-            except Exception:
-                br_resp = None
-
-            if br_resp is not None and br_resp.status_code == 200 and br_resp.text:
-                html_br = br_resp.text
-                best_rating_br: Optional[float] = None
-                best_date_br: Optional[str] = None
-
-                m_tbody_br = re.search(r"<tbody>(.*?)</tbody>", html_br, re.IGNORECASE | re.DOTALL)
-                if m_tbody_br:
-                    tbody_br = m_tbody_br.group(1)
-                    rows_br = re.findall(r"<tr>(.*?)</tr>", tbody_br, re.IGNORECASE | re.DOTALL)
-                    for row_html in rows_br:
-                        cols_br: List[str] = re.findall(
-                            r"<td[^>]*>(.*?)</td>", row_html, re.IGNORECASE | re.DOTALL
-                        )
-                        if len(cols_br) < 2:
-                            continue
-
-                        # Rating on yleensä viimeisessä sarakkeessa
-                        rating_str = _strip_tags(cols_br[-1])
-                        try:
-                            rating_val = float(rating_str.replace(",", "."))
-                        except Exception:
-                            continue
-
-                        # Päivämäärä löytyy span.competition-date -elementistä, jos sellainen on
-                        m_date = re.search(
-                            r"class=\"competition-date\"[^>]*>(.*?)</span>",
-                            row_html,
-                            re.IGNORECASE | re.DOTALL,
-                        )
-                        date_val: Optional[str] = None
-                        if m_date:
-                            date_val = _strip_tags(m_date.group(1))
-
-                        if best_rating_br is None or rating_val > best_rating_br:
-                            best_rating_br = rating_val
-                            best_date_br = date_val
-
-                if best_rating_br is not None:
-                    if stats.best_round_rating is None or best_rating_br > stats.best_round_rating:
-                        stats.best_round_rating = best_rating_br
-                        stats.best_round_date = best_date_br
-
-    # 4) Hae pelaamisaktiivisuudesta arvio kaikkien Metrix-kierrosten määrästä.
     try:
-        total_rounds = _fetch_total_rounds(session, metrix_id)
+        br_resp = session.get(f"{BASE_ROOT_URL}/main_server.php?section=best_rounds", timeout=20)
     except Exception:
-        total_rounds = None
-    if total_rounds is not None:
-        stats.total_rounds = total_rounds
+        return None, None
+
+    if br_resp.status_code != 200 or not br_resp.text:
+        return None, None
 
-    # 5) Hae Metrix rating -käyrä (oranssi viiva), Quick rating -sarjan
-    # (sininen viiva) pituus ja paras course based rating -peli (vihreä jana)
-    # mystat_server_rating-JSONista.
+    html_br = br_resp.text
+    best_rating_br: Optional[float] = None
+    best_date_br: Optional[str] = None
+
+    m_tbody_br = re.search(r"<tbody>(.*?)</tbody>", html_br, re.IGNORECASE | re.DOTALL)
+    if not m_tbody_br:
+        return None, None
+
+    tbody_br = m_tbody_br.group(1)
+    rows_br = re.findall(r"<tr>(.*?)</tr>", tbody_br, re.IGNORECASE | re.DOTALL)
+    for row_html in rows_br:
+        cols_br: List[str] = re.findall(r"<td[^>]*>(.*?)</td>", row_html, re.IGNORECASE | re.DOTALL)
+        if len(cols_br) < 2:
+            continue
+
+        # Rating on yleensä viimeisessä sarakkeessa
+        rating_str = _strip_tags(cols_br[-1])
+        try:
+            rating_val = float(rating_str.replace(",", "."))
+        except Exception:
+            continue
+
+        # Päivämäärä löytyy span.competition-date -elementistä, jos sellainen on
+        m_date = re.search(
+            r"class=\"competition-date\"[^>]*>(.*?)</span>",
+            row_html,
+            re.IGNORECASE | re.DOTALL,
+        )
+        date_val: Optional[str] = None
+        if m_date:
+            date_val = _strip_tags(m_date.group(1))
+
+        if best_rating_br is None or rating_val > best_rating_br:
+            best_rating_br = rating_val
+            best_date_br = date_val
+
+    return best_rating_br, best_date_br
+
+
+class _SerialExecutor:
+    """ThreadPoolExecutorin korvike sarjahakuun: työ ajetaan vasta, kun
+    tulosta pyydetään, kutsujan säikeessä ja samalla sessiolla."""
+
+    class _Lazy:
+        def __init__(self, func: Any, args: tuple) -> None:
+            self._func = func
+            self._args = args
+            self._done = False
+            self._value: Any = None
+
+        def result(self) -> Any:
+            if not self._done:
+                self._done = True
+                self._value = self._func(*self._args)
+            return self._value
+
+        def cancel(self) -> bool:
+            self._done = True
+            return True
+
+    def submit(self, func: Any, *args: Any) -> "_SerialExecutor._Lazy":
+        return self._Lazy(func, args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+
+
+def _future_result(future: Optional[Future], default: Any) -> Any:
+    """Palauta futuren tulos tai oletusarvo, jos haku kaatui."""
+
+    if future is None:
+        return default
     try:
-        curve, best_course_rating, best_course_date, quick_series_len = _fetch_rating_curve(session, metrix_id)
+        return future.result()
     except Exception:
-        curve = []
-        best_course_rating = None
-        best_course_date = None
-        quick_series_len = None
+        return default
+
+
+def fetch_player_stats(
+    metrix_id: str,
+    session: Optional[requests.Session] = None,
+    concurrent: bool = True,
+    on_partial: Optional[Callable[[PlayerStats], None]] = None,
+) -> Optional[PlayerStats]:
+    """Hae Metrix-pelaajan statsit.
+
+    Päälogiikka:
+    - Haetaan aina pelaajasivu /player/<id> ja parsitaan sieltä nimi,
+      rating, kisat ja paras kierros.
+        - Optionaalisesti (vain omalle ID:lle) haetaan lisäksi:
+            - etusivu ja sieltä tarkka rating sekä rating-muutos id="rating"/"rating_change" -elementeistä
+            - "Omat 5 parasta kierrosta" -lista AJAX-endpointista main_server.php?section=best_rounds
+            - Metrix rating -käyrä (oranssi viiva) mystat_server_rating.php-JSONista.
+
+    Toisistaan riippumattomat pyynnöt (pelaajasivu, etusivu, best_rounds,
+    aktiivisuus ja rating-käyrä) lähetetään rinnakkain, kukin omalla
+    kopiollaan kirjautuneesta sessiosta, joten kokonaisaika on lähellä
+    hitainta yksittäistä pyyntöä.
+
+    Rajatusta poolista kutsuttaessa (esim. seuran tulostaulu) annetaan
+    ``concurrent=False``, jolloin pyynnöt tehdään peräkkäin kutsujan
+    säikeessä, ja ``session``, jolloin kirjautumista ei tehdä uudelleen.
+
+    Jos ``on_partial`` on annettu, sitä kutsutaan heti pelaajasivun
+    parsinnan jälkeen (hakusäikeessä) kopiolla osittaisesta PlayerStatsista,
+    jotta !metrix voi vastata ennen hitaampia sivuja.
+
+    Palauttaa PlayerStats tai None, jos haku epäonnistuu tai kirjautuminen ei
+    onnistu.
+    """
+
+    if not metrix_id:
+        return None
+
+    if session is None:
+        session = _create_session()
+    if session is None:
+        return None
+
+    # Omalle ID:lle (METRIX_OWN_ID) täydennetään lisäksi rating ja rating-muutos
+    # etusivulta sekä "Omat 5 parasta kierrosta" -lista.
+    own_id = os.environ.get("METRIX_OWN_ID", "").strip()
+    is_own = bool(own_id) and own_id == metrix_id
+
+    executor: Any
+    if concurrent:
+        executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="metrix-stats")
+        worker_session = _clone_session
+        # Haun ajanotto (metrics) kulkee kontekstissa, joka ei periydy poolin säikeisiin.
+        submit = functools.partial(metrics.submit, executor) if metrics is not None else executor.submit
+    else:
+        executor = _SerialExecutor()
+        submit = executor.submit
+
+        def worker_session(s: requests.Session) -> requests.Session:
+            return s  # sarjahaussa yksi säie, yksi sessio
+    try:
+        player_fut = submit(_fetch_player_page, worker_session(session), metrix_id)
+        front_fut: Optional[Future] = None
+        best_fut: Optional[Future] = None
+        if is_own:
+            front_fut = submit(_fetch_front_rating, worker_session(session), metrix_id)
+            best_fut = submit(_fetch_best_rounds, worker_session(session))
+        rounds_fut = submit(_fetch_total_rounds, worker_session(session), metrix_id)
+        curve_fut = submit(_fetch_rating_curve, worker_session(session), metrix_id)
+
+        # 1) Pelaajasivu on pakollinen: ilman sitä ei palauteta mitään.
+        player_html = _future_result(player_fut, None)
+        if not player_html:
+            for fut in (front_fut, best_fut, rounds_fut, curve_fut):
+                if fut is not None:
+                    fut.cancel()
+            return None
+
+        stats = _parse_player_stats(player_html, metrix_id)
+
+        if on_partial is not None:
+            try:
+                on_partial(copy.copy(stats))
+            except Exception:
+                pass
+
+        # 2) Täydennetään OMALLE ID:lle rating ja rating-muutos etusivulta
+        # sekä paras kierros best_rounds-listasta.
+        if is_own:
+            front_rating, front_change = _future_result(front_fut, (None, None))
+            if front_rating is not None:
+                stats.rating = front_rating
+            if front_change is not None:
+                stats.rating_change = front_change
+
+            best_rating_br, best_date_br = _future_result(best_fut, (None, None))
+            if best_rating_br is not None:
+                if stats.best_round_rating is None or best_rating_br > stats.best_round_rating:
+                    stats.best_round_rating = best_rating_br
+                    stats.best_round_date = best_date_br
+
+        # 3) Arvio kaikkien Metrix-kierrosten määrästä pelaamisaktiivisuudesta.
+        total_rounds = _future_result(rounds_fut, None)
+        if total_rounds is not None:
+            stats.total_rounds = total_rounds
+
+        # 4) Metrix rating -käyrä (oranssi viiva), Quick rating -sarjan
+        # (sininen viiva) pituus ja paras course based rating -peli (vihreä jana)
+        # mystat_server_rating-JSONista.
+        curve, best_course_rating, best_course_date, quick_series_len = _future_result(
+            curve_fut, (RatingCurve(), None, None, None)
+        )
+    finally:
+        executor.shutdown(wait=False)
+
     if curve:
         stats.rating_curve = curve
 
@@ -761,38 +944,30 @@ def fetch_player_stats(metrix_id: str) -> Optional[PlayerStats]:
     # Jos Quick rating -sarjan (sininen viiva) pituus on suurempi kuin
     # aiemmin analyysitaulukosta päätelty competitions_count, käytä sitä
     # kaikkien kisojen määränä.
-    if isinstance(locals().get("quick_series_len"), int):
+    if isinstance(quick_series_len, int):
         try:
-            qlen = int(quick_series_len)  # type: ignore[arg-type]
+            qlen = int(quick_series_len)
             if qlen > 0:
                 if not isinstance(stats.competitions_count, int) or stats.competitions_count < qlen:
                     stats.competitions_count = qlen
         except Exception:
             pass
 
-    # 6) Johda rating ja rating-muutos suoraan oranssin Metrix rating -käyrän
+    # 5) Johda rating ja rating-muutos suoraan oranssin Metrix rating -käyrän
     # kahdesta viimeisestä pisteestä, jos mahdollista. Kilpailujen lukumäärä
     # otetaan nyt sinisestä Quick rating -sarjasta (quick_series_len), ei
     # oranssin käyrän pisteiden lukumäärästä.
     if stats.rating_curve:
-        curve_all = list(stats.rating_curve)
+        ratings = stats.rating_curve.ratings
+        try:
+            stats.rating = round(float(ratings[-1]), 2)
+        except Exception:
+            pass
 
-        last_pt = curve_all[-1]
-        if getattr(last_pt, "rating", None) is not None:
+        if len(ratings) >= 2:
             try:
-                stats.rating = float(last_pt.rating)  # type: ignore[arg-type]
+                stats.rating_change = round(float(ratings[-1]) - float(ratings[-2]), 2)
             except Exception:
                 pass
 
-        if len(curve_all) >= 2:
-            prev_pt = curve_all[-2]
-            if (
-                getattr(last_pt, "rating", None) is not None
-                and getattr(prev_pt, "rating", None) is not None
-            ):
-                try:
-                    stats.rating_change = float(last_pt.rating) - float(prev_pt.rating)  # type: ignore[arg-type]
-                except Exception:
-                    pass
-
     return stats
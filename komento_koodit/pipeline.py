@@ -0,0 +1,95 @@
+"""Pieni riippuvuusgraafi (DAG) rinnakkaisille ajovaiheille.
+
+run_once käyttää tätä: toisistaan riippumattomat haut (PDGA, viikkarit,
+seutu-viikkarit, parikisat) ajetaan yhtä aikaa, ja jatkovaiheet saavat
+edeltäjiensä tulokset suoraan muistista argumentteina.
+
+    stages = [
+        Stage("pdga", fetch_pdga),
+        Stage("weekly", fetch_weekly),
+        Stage("lists", build_lists, deps=("pdga", "weekly")),
+    ]
+    run = run_pipeline(stages)
+    run.results["lists"], run.durations["pdga"]
+
+Vaiheen funktio saa riippuvuuksiensa tulokset nimettyinä argumentteina.
+Jos vaihe epäonnistuu, virhe tallennetaan (run.errors) ja sen tulos on
+None; riippuvat vaiheet ajetaan silti, ja niiden pitää sietää None.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    deps: Sequence[str] = ()
+
+
+@dataclass
+class PipelineRun:
+    results: Dict[str, Any] = field(default_factory=dict)
+    durations: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    total: float = 0.0
+
+    def summary(self) -> str:
+        parts = []
+        for name, secs in self.durations.items():
+            mark = " (virhe)" if name in self.errors else ""
+            parts.append(f"{name} {secs:.1f} s{mark}")
+        return f"{self.total:.1f} s: " + ", ".join(parts)
+
+
+def _run_stage(stage: Stage, kwargs: Dict[str, Any]) -> Any:
+    started = time.perf_counter()
+    try:
+        return stage.func(**kwargs), None, time.perf_counter() - started
+    except Exception as e:
+        return None, e, time.perf_counter() - started
+
+
+def run_pipeline(stages: List[Stage], max_workers: int = 4) -> PipelineRun:
+    """Aja vaiheet riippuvuusjärjestyksessä, valmiit vaiheet rinnakkain."""
+
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        for dep in s.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage {s.name!r} depends on unknown stage {dep!r}")
+
+    run = PipelineRun()
+    started = time.perf_counter()
+    pending = list(stages)
+    running: Dict[Any, Stage] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="pipeline") as executor:
+        while pending or running:
+            ready = [s for s in pending if all(d in run.durations for d in s.deps)]
+            for s in ready:
+                pending.remove(s)
+                kwargs = {d: run.results.get(d) for d in s.deps}
+                running[executor.submit(_run_stage, s, kwargs)] = s
+            if not running:
+                # Kehä riippuvuuksissa: loput eivät voi koskaan valmistua.
+                raise ValueError("Cyclic stage dependencies: " + ", ".join(s.name for s in pending))
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                s = running.pop(fut)
+                result, error, secs = fut.result()
+                run.results[s.name] = result
+                run.durations[s.name] = secs
+                if error is not None:
+                    run.errors[s.name] = error
+                    logger.error("Vaihe %s epäonnistui: %s", s.name, error, exc_info=error)
+
+    run.total = time.perf_counter() - started
+    return run
@@ -107,3 +107,14 @@ def set_metrix_for_user(user_id: str, metrix_id: str) -> None:
     entry["metrix"] = str(metrix_id).strip()
     players[uid] = entry
     _save_players_raw(players)
+
+
+def list_metrix_ids() -> Dict[str, str]:
+    """Palauta kaikki tallennetut MetrixID:t muodossa {metrix_id: discord_user_id}."""
+
+    result: Dict[str, str] = {}
+    for user_id, entry in _load_players_raw().items():
+        value = str(entry.get("metrix") or "").strip()
+        if value:
+            result[value] = str(user_id)
+    return result
@@ -1,5 +1,6 @@
 import os
 import json
+import logging
 import requests
 import pathlib
 from datetime import datetime
@@ -12,6 +13,13 @@ try:
     from komento_koodit import check_capacity
 except Exception:
     check_capacity = None
+try:
+    from komento_koodit import discord_rest
+except Exception:
+    discord_rest = None
+from komento_koodit import embed_layout
+
+logger = logging.getLogger(__name__)
 
 
 def _load_dotenv(path='.env'):
@@ -101,9 +109,6 @@ if not WEEKLY_THREAD:
 
 HEADERS = {'Authorization': f'Bot {TOKEN}' if TOKEN else '', 'Content-Type': 'application/json'}
 
-MAX_ITEMS_PER_EMBED = 12
-
-
 def load_pending():
     # prefer sqlite-backed store
     try:
@@ -120,11 +125,6 @@ def load_pending():
         return []
 
 
-def chunk(items, n):
-    for i in range(0, len(items), n):
-        yield items[i:i+n]
-
-
 def build_embeds(items):
     # Deprecated: kept for compatibility but prefer build_embeds_with_title below
     return build_embeds_with_title(items, f"REKISTERÖINTI AVOINNA ({len(items)})", 16753920)
@@ -135,122 +135,117 @@ def build_embeds_with_title(items, title, color):
     if not items:
         embeds.append({'title': title, 'description': '(ei ilmoituksia)', 'color': color})
         return embeds
-    first_title = title
-    for part in chunk(items, MAX_ITEMS_PER_EMBED):
-        lines = []
-        for it in part:
-            name = it.get('name') or it.get('title') or it.get('id')
-            # If name contains a parent prefix like 'Parent → Child', display only the child
-            try:
-                if '→' in name:
-                    name = name.split('→')[-1].strip()
-            except Exception:
-                pass
-            url = it.get('url') or ''
-            # build two-line block: name line, then date/capacity line, then an empty line
-            date_str = ''
-            cap_str = ''
-            opens_str = ''
-            # include date+time if available (normalize to DD.MM.YYYY HH:MM when time present)
-            try:
-                raw_dt = it.get('date')
-                if raw_dt:
-                    def _format_date_with_optional_time(s):
-                        fmt_date = '%d.%m.%Y'
-                        fmt_date_time = '%d.%m.%Y %H:%M'
-                        patterns = [
-                            ('%m/%d/%y %H:%M', True), ('%m/%d/%y', False),
-                            ('%d/%m/%Y %H:%M', True), ('%d/%m/%Y', False),
-                            ('%d.%m.%Y %H:%M', True), ('%d.%m.%Y', False),
-                            ('%Y-%m-%d %H:%M', True), ('%Y-%m-%d', False)
-                        ]
-                        for p, has_time in patterns:
-                            try:
-                                dt = datetime.strptime(s, p)
-                                return dt.strftime(fmt_date_time if has_time else fmt_date)
-                            except Exception:
-                                continue
-                        # fallback: extract first token and try heuristics
+    blocks = []
+    for it in items:
+        name = it.get('name') or it.get('title') or it.get('id')
+        # If name contains a parent prefix like 'Parent → Child', display only the child
+        try:
+            if '→' in name:
+                name = name.split('→')[-1].strip()
+        except Exception:
+            pass
+        url = it.get('url') or ''
+        # build two-line block: name line, then date/capacity line, then an empty line
+        date_str = ''
+        cap_str = ''
+        opens_str = ''
+        # include date+time if available (normalize to DD.MM.YYYY HH:MM when time present)
+        try:
+            raw_dt = it.get('date')
+            if raw_dt:
+                def _format_date_with_optional_time(s):
+                    fmt_date = '%d.%m.%Y'
+                    fmt_date_time = '%d.%m.%Y %H:%M'
+                    patterns = [
+                        ('%m/%d/%y %H:%M', True), ('%m/%d/%y', False),
+                        ('%d/%m/%Y %H:%M', True), ('%d/%m/%Y', False),
+                        ('%d.%m.%Y %H:%M', True), ('%d.%m.%Y', False),
+                        ('%Y-%m-%d %H:%M', True), ('%Y-%m-%d', False)
+                    ]
+                    for p, has_time in patterns:
                         try:
-                            token = str(s).split()[0]
-                            for sep in ('/', '.', '-'):
-                                if sep in token:
-                                    parts = token.split(sep)
-                                    if len(parts) >= 3:
-                                        a, b, c = parts[0], parts[1], parts[2]
-                                        if len(c) == 2:
-                                            c = '20' + c
-                                        # try common orders
-                                        for y, m, d in ((c, b, a), (c, a, b)):
-                                            try:
-                                                dt = datetime(int(y), int(m), int(d))
-                                                return dt.strftime(fmt_date)
-                                            except Exception:
-                                                pass
+                            dt = datetime.strptime(s, p)
+                            return dt.strftime(fmt_date_time if has_time else fmt_date)
                         except Exception:
-                            pass
-                        return str(s)
-                    date_str = _format_date_with_optional_time(str(raw_dt))
-            except Exception:
-                pass
-            # prepare name line (always present). If URL available, make name a Markdown link.
-            try:
-                if url:
-                    # Use markdown link format; Discord embed descriptions render these as clickable
-                    name_line = f"• [{name}]({url})"
-                else:
-                    name_line = f"• {name}"
-            except Exception:
+                            continue
+                    # fallback: extract first token and try heuristics
+                    try:
+                        token = str(s).split()[0]
+                        for sep in ('/', '.', '-'):
+                            if sep in token:
+                                parts = token.split(sep)
+                                if len(parts) >= 3:
+                                    a, b, c = parts[0], parts[1], parts[2]
+                                    if len(c) == 2:
+                                        c = '20' + c
+                                    # try common orders
+                                    for y, m, d in ((c, b, a), (c, a, b)):
+                                        try:
+                                            dt = datetime(int(y), int(m), int(d))
+                                            return dt.strftime(fmt_date)
+                                        except Exception:
+                                            pass
+                    except Exception:
+                        pass
+                    return str(s)
+                date_str = _format_date_with_optional_time(str(raw_dt))
+        except Exception:
+            pass
+        # prepare name line (always present). If URL available, make name a Markdown link.
+        try:
+            if url:
+                # Use markdown link format; Discord embed descriptions render these as clickable
+                name_line = f"• [{name}]({url})"
+            else:
                 name_line = f"• {name}"
-            # attempt to include capacity/player counts when possible
+        except Exception:
+            name_line = f"• {name}"
+        # attempt to include capacity/player counts when possible
+        cap = None
+        # Prefer precomputed cache when available (use nightly scan results)
+        try:
+            cap = CAPACITY_CACHE.get(url) or CAPACITY_CACHE.get(str(it.get('id')))
+        except Exception:
             cap = None
-            # Prefer precomputed cache when available (use nightly scan results)
+
+        if not cap and check_capacity is not None and url:
             try:
-                cap = CAPACITY_CACHE.get(url) or CAPACITY_CACHE.get(str(it.get('id')))
+                cap = check_capacity.check_competition_capacity(url, timeout=6)
             except Exception:
                 cap = None
 
-            if not cap and check_capacity is not None and url:
-                try:
-                    cap = check_capacity.check_competition_capacity(url, timeout=6)
-                except Exception:
-                    cap = None
-
-            if isinstance(cap, dict):
-                reg = cap.get('registered')
-                lim = cap.get('limit')
-                rem = cap.get('remaining')
-                queued = cap.get('queued') or cap.get('queue') or cap.get('waiting') or 0
-                # prefer showing registered/limit when both known
-                if reg is not None and lim is not None:
-                    cap_str = f"{reg}/{lim}"
-                # if no registered players known but limit exists, show 0/limit
-                elif reg is None and lim is not None:
-                    cap_str = f"0/{lim}"
-                elif reg is not None and lim is None:
-                    cap_str = f"{reg}"
-                elif rem is not None:
-                    cap_str = f"jäljellä: {rem}"
-                # append queued/waitlist info if present
-                try:
-                    qn = int(queued) if queued is not None else 0
-                except Exception:
-                    qn = 0
-                if qn:
-                    if cap_str:
-                        cap_str = f"{cap_str} (+{qn} jonossa)"
-                    else:
-                        cap_str = f"jonossa: {qn}"
-            meta_parts = [p for p in (date_str, cap_str, opens_str) if p]
-            meta_line = ('  ' + ' — '.join(meta_parts)) if meta_parts else ''
-            lines.append(name_line)
-            if meta_line:
-                lines.append(meta_line)
-            lines.append('')
-        embed = {'title': first_title, 'description': '\n'.join(lines), 'color': color}
-        embeds.append(embed)
-        first_title = ' '
-    return embeds
+        if isinstance(cap, dict):
+            reg = cap.get('registered')
+            lim = cap.get('limit')
+            rem = cap.get('remaining')
+            queued = cap.get('queued') or cap.get('queue') or cap.get('waiting') or 0
+            # prefer showing registered/limit when both known
+            if reg is not None and lim is not None:
+                cap_str = f"{reg}/{lim}"
+            # if no registered players known but limit exists, show 0/limit
+            elif reg is None and lim is not None:
+                cap_str = f"0/{lim}"
+            elif reg is not None and lim is None:
+                cap_str = f"{reg}"
+            elif rem is not None:
+                cap_str = f"jäljellä: {rem}"
+            # append queued/waitlist info if present
+            try:
+                qn = int(queued) if queued is not None else 0
+            except Exception:
+                qn = 0
+            if qn:
+                if cap_str:
+                    cap_str = f"{cap_str} (+{qn} jonossa)"
+                else:
+                    cap_str = f"jonossa: {qn}"
+        meta_parts = [p for p in (date_str, cap_str, opens_str) if p]
+        meta_line = ('  ' + ' — '.join(meta_parts)) if meta_parts else ''
+        # Kilpailun rivit (nimi, tiedot, tyhjä väli) pysyvät samassa embedissä.
+        blocks.append('\n'.join([name_line] + ([meta_line] if meta_line else []) + ['']))
+
+    # Pakataan embedeihin merkkirajojen mukaan (post_embeds ryhmittelee viesteiksi)
+    return embed_layout.pack_embeds(blocks, title=title, color=color)
 
 
 def load_known(path):
@@ -321,20 +316,30 @@ def save_known(path, ids):
 
 def post_embeds(thread_id, embeds):
     if not TOKEN:
-        print('DISCORD_TOKEN not set; cannot post')
+        logger.warning('DISCORD_TOKEN not set; cannot post')
         return False
-    url = f'https://discord.com/api/v10/channels/{thread_id}/messages'
+    # ≤10 embediä ja ≤6000 merkkiä per viesti
+    return all([_post_embed_batch(thread_id, batch) for batch in embed_layout.batch_embeds(embeds)])
+
+
+def _post_embed_batch(thread_id, embeds):
     payload = {'embeds': embeds}
     try:
-        r = requests.post(url, headers=HEADERS, json=payload, timeout=15)
-        if r.status_code in (200, 201):
-            print('Posted embeds to Discord thread', thread_id)
+        if discord_rest is not None:
+            r = discord_rest.get_client(TOKEN).send_message(thread_id, payload)
+        else:
+            url = f'https://discord.com/api/v10/channels/{thread_id}/messages'
+            r = requests.post(url, headers=HEADERS, json=payload, timeout=15)
+        if r is not None and r.status_code in (200, 201):
+            logger.info('Posted embeds to Discord thread %s', thread_id, extra={'embeds': len(embeds)})
             return True
         else:
-            print('Discord post failed:', r.status_code, r.text[:400])
+            logger.warning(
+                'Discord post failed', extra={'thread': thread_id, 'status': getattr(r, 'status_code', None), 'body': (getattr(r, 'text', '') or '')[:400]}
+            )
             return False
     except Exception as e:
-        print('Exception posting to Discord:', e)
+        logger.exception('Exception posting to Discord: %s', e)
         return False
 
 
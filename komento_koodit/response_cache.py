@@ -0,0 +1,222 @@
+"""Vastausvälimuisti toistuville komennoille (``!viikkarit ep``, ``!etsi``, ...).
+
+Monen komennon vastaus pysyy samana minuutteja tai tunteja, mutta jokainen
+kutsu latasi tietovarastot uudelleen ja usein myös haki sivut uudelleen,
+ja päivän koosteen jälkeen samoja komentoja ajetaan kymmeniä kertoja
+peräkkäin. ``cache_middleware`` nauhoittaa käsittelijän lähettämät viestit
+(``channel.send``-kutsut) avaimella (komento, normalisoidut argumentit) ja
+toistaa ne seuraavalla kerralla ilman tiedosto-, tietokanta- tai verkko-
+I/O:ta.
+
+Komennon ``CachePolicy`` määrää eliniän (TTL), kategoriat joista vastaus
+riippuu (``depends_on``) sekä argumentit, joita ei välimuistiteta
+(``skip_args``). ``data_store.save_category`` ilmoittaa tallennuksista,
+jolloin kategoriasta riippuvat vastaukset mitätöidään heti. Toisessa
+prosessissa tehdyt tallennukset näkyvät vasta TTL:n jälkeen.
+
+Vastausta ei tallenneta, jos käsittelijä epäonnistuu, lähettää tiedoston
+tai näkymän, lähettää viestejä vasta palattuaan (taustatehtävä) tai
+kutsuu ``skip(message)``.
+
+Kategorioiden nimet vertaillaan ilman ".json"-päätettä ja kirjainkoosta
+riippumatta (``category_key``). Suoraan tiedostoon kirjoitetut kategoriat
+(known_*-välimuistit) ilmoitetaan ``data_store.notify_saved``-kutsulla.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from . import data_store
+except Exception:  # pragma: no cover
+    data_store = None  # type: ignore[assignment]
+
+
+MAX_ENTRIES = 256
+# Lähetykset, joita ei voi toistaa (tiedostovirrat kuluvat, näkymät ovat tilallisia).
+_UNREPLAYABLE_KWARGS = ("file", "files", "view", "delete_after")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float
+    depends_on: Tuple[str, ...] = ()
+    skip_args: Tuple[str, ...] = ()
+
+
+Call = Tuple[tuple, Dict[str, Any]]
+Key = Tuple[str, str]
+
+
+@dataclass
+class _Entry:
+    expires: float
+    calls: List[Call]
+    depends_on: Tuple[str, ...]
+
+
+_lock = threading.Lock()
+_entries: Dict[Key, _Entry] = {}
+_counters = {"hits": 0, "misses": 0, "stored": 0, "invalidated": 0}
+
+
+def category_key(name: str) -> str:
+    """Kategorian vertailuavain: "club_successes.json" ja "CLUB_SUCCESSES" ovat sama."""
+
+    return os.path.splitext(os.path.basename(str(name).strip()))[0].upper()
+
+
+def make_key(command: str, parts: List[str]) -> Key:
+    args = " ".join(str(p).strip().lower() for p in (parts or [])[1:] if str(p).strip())
+    return (command, args)
+
+
+def get(key: Key) -> Optional[List[Call]]:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry.expires <= time.monotonic():
+            if entry is not None:
+                del _entries[key]
+            _counters["misses"] += 1
+            return None
+        _counters["hits"] += 1
+        return entry.calls
+
+
+def put(key: Key, calls: List[Call], policy: CachePolicy) -> None:
+    if policy.ttl <= 0 or not calls:
+        return
+    with _lock:
+        now = time.monotonic()
+        if len(_entries) >= MAX_ENTRIES:
+            for k in [k for k, e in _entries.items() if e.expires <= now]:
+                del _entries[k]
+            while len(_entries) >= MAX_ENTRIES:
+                del _entries[min(_entries, key=lambda k: _entries[k].expires)]
+        _entries[key] = _Entry(now + policy.ttl, list(calls), tuple(category_key(d) for d in policy.depends_on))
+        _counters["stored"] += 1
+
+
+def invalidate(category: Optional[str] = None, command: Optional[str] = None) -> int:
+    """Mitätöi kaikki, kategoriasta riippuvat tai yhden komennon vastaukset."""
+
+    cat = category_key(category) if category else None
+    with _lock:
+        if cat is None and command is None:
+            doomed = list(_entries)
+        else:
+            doomed = [
+                k for k, e in _entries.items()
+                if (cat is not None and cat in e.depends_on) or (command is not None and k[0] == command)
+            ]
+        for k in doomed:
+            del _entries[k]
+        _counters["invalidated"] += len(doomed)
+    return len(doomed)
+
+
+def _drop(key: Key) -> None:
+    with _lock:
+        if _entries.pop(key, None) is not None:
+            _counters["invalidated"] += 1
+
+
+def _on_category_saved(name: str) -> None:
+    invalidate(category=name)
+
+
+if data_store is not None and hasattr(data_store, "add_save_listener"):
+    data_store.add_save_listener(_on_category_saved)
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        out = dict(_counters)
+        out["entries"] = len(_entries)
+        return out
+
+
+def format_stats() -> str:
+    s = stats()
+    lookups = s["hits"] + s["misses"]
+    rate = f"{s['hits'] / lookups * 100:.0f} %" if lookups else "-"
+    return f"Vastausvälimuisti: {s['hits']}/{lookups} osumaa ({rate}), {s['entries']} vastausta, {s['invalidated']} mitätöity"
+
+
+# --- nauhoitus ja toisto ---------------------------------------------------------
+
+
+class _RecordingChannel:
+    """Kanavan sijainen: välittää kaiken alkuperäiselle ja nauhoittaa send-kutsut."""
+
+    def __init__(self, channel: Any, key: Key):
+        self._channel = channel
+        self.key = key
+        self.calls: List[Call] = []
+        self.replayable = True
+        self.closed = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._channel, name)
+
+    async def send(self, *args: Any, **kwargs: Any) -> Any:
+        if self.closed:
+            # Taustatehtävä lähetti vasta käsittelijän jälkeen: vastaus ei ollut valmis.
+            _drop(self.key)
+        elif any(kwargs.get(k) is not None for k in _UNREPLAYABLE_KWARGS):
+            self.replayable = False
+        else:
+            self.calls.append((args, dict(kwargs)))
+        return await self._channel.send(*args, **kwargs)
+
+
+class _RecordingMessage:
+    def __init__(self, message: Any, channel: _RecordingChannel):
+        self._message = message
+        self.channel = channel
+        self.skip_cache = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._message, name)
+
+
+def skip(message: Any) -> None:
+    """Käsittelijä merkitsee vastauksensa välimuistiin kelpaamattomaksi
+    (esim. käynnistää taustahaun, jonka tulos lähetetään myöhemmin)."""
+
+    try:
+        message.skip_cache = True
+    except Exception:
+        pass
+
+
+async def cache_middleware(ctx: Any, call_next: Any) -> Any:
+    policy: Optional[CachePolicy] = getattr(ctx.command, "cache", None)
+    if policy is None or getattr(ctx.message, "attachments", None):
+        return await call_next(ctx)
+    key = make_key(ctx.command.name, ctx.parts)
+    if key[1] and key[1].split()[0] in policy.skip_args:
+        return await call_next(ctx)
+
+    calls = get(key)
+    if calls is not None:
+        channel = ctx.message.channel
+        for args, kwargs in calls:
+            await channel.send(*args, **kwargs)
+        return None
+
+    original = ctx.message
+    recorder = _RecordingChannel(original.channel, key)
+    proxy = _RecordingMessage(original, recorder)
+    ctx.message = proxy
+    try:
+        result = await call_next(ctx)
+    finally:
+        ctx.message = original
+        recorder.closed = True
+    if recorder.replayable and not proxy.skip_cache:
+        put(key, recorder.calls, policy)
+    return result
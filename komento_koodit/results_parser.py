@@ -0,0 +1,471 @@
+"""Metrix-tulossivun kevyt parseri.
+
+Aiempi _parse_results_html rakensi BeautifulSoup-puun koko sivusta
+(skriptit, valikot, reikätilastot) ja kävi jokaisen taulukon kohdalla
+dokumenttia taaksepäin luokan nimeä etsiessään. Tämä parseri:
+
+  - parsii vain #content_auto-osion reikätilastoihin asti
+  - lukee rivit suoraan lxml-puusta ilman BeautifulSoup-puuta, jos lxml on
+    asennettu; muuten BeautifulSoup + html.parser (SoupStrainer: vain
+    taulukot ja otsikot)
+  - laskee sarakekartan (rating-sarake) kerran taulukkoa/otsikkoa kohden
+  - tuottaa rivit ResultRow-tupleina dictien sijaan
+
+Tulosrakenne (parse_results) on sama kuin commands_tulokset käyttää:
+{"event_name": str, "classes": [{"class_name": str, "rows": [dict, ...]}]}.
+"""
+
+import html as html_lib
+import re
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from bs4 import BeautifulSoup as BS
+from bs4 import SoupStrainer
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except Exception:  # lxml on valinnainen
+    etree = None
+    lxml_html = None
+
+HAS_LXML = lxml_html is not None
+# Parseri, jolla tulostaulukot luetaan: "lxml" tai varapolun "html.parser".
+PARSER = "lxml" if HAS_LXML else "html.parser"
+
+
+class ResultRow(NamedTuple):
+    position: Optional[int]
+    name: str
+    to_par: str
+    total: str
+    rating: str
+    metrix_id: str
+
+
+# BeautifulSoup-varapolulla vain nämä elementit rakennetaan puuksi.
+_STRAINER = SoupStrainer(["table", "h2", "h3", "h4"])
+
+_CONTENT_AUTO_RE = re.compile(r"<div[^>]*\bid=[\"']content_auto[\"']", re.IGNORECASE)
+# Reikätilastot (kaaviot + taulukko) tulevat tulostaulukoiden jälkeen eikä
+# niitä tarvita; parsinta lopetetaan niiden alkuun.
+_HOLE_STATS_RE = re.compile(r"<div[^>]*\bid=[\"']hole-stats", re.IGNORECASE)
+_THEAD_SPLIT_RE = re.compile(r"(?=<thead\b)", re.IGNORECASE)
+_H1_RE = re.compile(r"<h1[^>]*>(.*?)</h1>", re.IGNORECASE | re.DOTALL)
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_HEADING_RE = re.compile(r"<h[234]\b[^>]*>(.*?)</h[234]>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_INT_RE = re.compile(r"-?\d+")
+_POS_RE = re.compile(r"(\d+)")
+_PLAYER_ID_RE = re.compile(r"/player/(\d+)")
+_USER_ID_RE = re.compile(r"user_id=(\d+)")
+
+_HEADER_WORDS = ("sija", "sij", "nimi", "pelaaja", "+/-", "kortti", "tot")
+
+
+def _strip_markup(fragment: str, sep: str = "") -> str:
+    # Sama kuin BeautifulSoupin get_text(sep, strip=True): tekstipalat
+    # trimmataan ja liitetään yhteen sep-erottimella.
+    pieces = [html_lib.unescape(p).strip() for p in _TAG_RE.split(fragment)]
+    return sep.join(p for p in pieces if p)
+
+
+def guess_event_name(html_text: str) -> str:
+    """Kilpailun nimi ensimmäisestä <h1>:stä tai <title>:sta ilman puuta."""
+
+    for pattern in (_H1_RE, _TITLE_RE):
+        m = pattern.search(html_text)
+        if m:
+            txt = _strip_markup(m.group(1))
+            if txt:
+                return txt
+    return "Metrix-kilpailu"
+
+
+def _class_name_from_texts(texts: Iterator[str]) -> Optional[str]:
+    """Luokan nimi theadin th-soluista: "Nimi (N)" tai ensimmäinen ei-sarakeotsikko."""
+
+    candidate = None
+    for txt in texts:
+        if not txt:
+            continue
+        if re.search(r"\(\d+\)", txt) and not txt.lower().startswith("sija"):
+            return txt
+        if txt.lower() in _HEADER_WORDS:
+            continue
+        if len(txt.split()) >= 2:
+            return txt
+        if candidate is None:
+            candidate = txt
+    return candidate
+
+
+def _finish_class_name(name: Optional[str], caption: Optional[str], heading: Optional[str], fallback_index: int) -> str:
+    if not name and caption:
+        name = caption
+    if not name and heading:
+        name = heading
+    if not name:
+        name = f"Sarja {fallback_index + 1}"
+    if len(name) > 80:
+        name = name[:77] + "..."
+    return name
+
+
+def _rating_index_from_texts(texts: Iterator[str]) -> Optional[int]:
+    for i, txt in enumerate(texts):
+        txt = txt.lower()
+        if "rating" in txt or "rtg" in txt:
+            return i
+    return None
+
+
+# --- lxml: rivit suoraan elementeistä ---------------------------------------
+
+
+def _lx_text(el: Any, sep: str = "") -> str:
+    # Vastaa BeautifulSoupin get_text(sep, strip=True); itertext ohittaa kommentit.
+    return sep.join(t for t in (s.strip() for s in el.itertext()) if t)
+
+
+def _lx_has_class(el: Any, name: str) -> bool:
+    return name in (el.get("class") or "").split()
+
+
+def _lx_first(el: Any, tag: str) -> Any:
+    for child in el.iter(tag):
+        if child is not el:
+            return child
+    return None
+
+
+def _lx_caption(el: Any) -> Optional[str]:
+    cap = _lx_first(el, "caption")
+    return _lx_text(cap) if cap is not None else None
+
+
+def _lx_parse_row(tr: Any, rating_index: Optional[int]) -> Optional[ResultRow]:
+    tds = [c for c in tr if c.tag == "td"] or [c for c in tr.iter("td") if c is not tr]
+    if len(tds) < 3:
+        return None
+
+    player_td = None
+    for td in tds:
+        if _lx_has_class(td, "player-cell"):
+            player_td = td
+            break
+    if player_td is None:
+        return None
+
+    m_pos = _POS_RE.match(_lx_text(tds[0]))
+    pos_html = int(m_pos.group(1)) if m_pos else None
+
+    name = next((t for t in (s.strip() for s in player_td.itertext()) if t), "")
+
+    metrix_id = ""
+    for link in player_td.iter("a"):
+        href = link.get("href")
+        if href is None:
+            continue
+        m_id = _PLAYER_ID_RE.search(href) or _USER_ID_RE.search(href)
+        if m_id:
+            metrix_id = m_id.group(1)
+        break
+
+    rating = ""
+    if rating_index is not None and rating_index < len(tds):
+        rating = _lx_text(tds[rating_index])
+
+    return ResultRow(pos_html, name, _lx_text(tds[2]), _lx_text(tds[-1]), rating, metrix_id)
+
+
+def _lx_thead_row_groups(table: Any, theads: List[Any]) -> Iterator[Tuple[Any, List[Any]]]:
+    """Kuten _thead_row_groups, mutta lxml-elementeille (kommentit ohitetaan)."""
+
+    for thead in theads:
+        rows: List[Any] = []
+        sib = thead.getnext()
+        while sib is not None:
+            tag = sib.tag
+            if tag == "tr":
+                rows.append(sib)
+            elif tag == "thead":
+                break
+            elif tag == "tbody":
+                rows.extend(sib.iter("tr"))
+                break
+            sib = sib.getnext()
+
+        if not rows:
+            first_tbody = _lx_first(table, "tbody")
+            if first_tbody is not None:
+                rows = list(first_tbody.iter("tr"))
+        yield thead, rows
+
+
+def _iter_lxml(fragment: str, heading: Optional[str], idx: int) -> Iterator[Tuple[str, List[ResultRow]]]:
+    try:
+        root = lxml_html.document_fromstring(fragment)
+    except (etree.ParserError, ValueError):
+        # Tyhjä tai pelkkää tekstiä sisältävä pala: ei taulukoita.
+        return
+
+    for node in root.iter("table", "h2", "h3", "h4"):
+        if node.tag != "table":
+            txt = _lx_text(node, " ")
+            if txt:
+                heading = txt
+            continue
+        table = node
+        if not any(_lx_has_class(td, "player-cell") for td in table.iter("td")):
+            continue
+
+        theads = list(table.iter("thead"))
+        if theads:
+            for thead, tr_list in _lx_thead_row_groups(table, theads):
+                if not tr_list:
+                    continue
+                ths = list(thead.iter("th"))
+                rating_index = _rating_index_from_texts(_lx_text(th) for th in ths)
+                parsed = [row for row in (_lx_parse_row(tr, rating_index) for tr in tr_list) if row is not None]
+                if not parsed:
+                    continue
+                name = _finish_class_name(
+                    _class_name_from_texts(_lx_text(th, " ") for th in ths), _lx_caption(thead), heading, idx
+                )
+                yield name, _rank(parsed, ties_skip=True)
+                idx += 1
+            continue
+
+        # Ei theadeja: otsikkorivit (th) määräävät rating-sarakkeen.
+        rating_index = None
+        parsed = []
+        for tr in table.iter("tr"):
+            ths = list(tr.iter("th"))
+            if ths:
+                if rating_index is None:
+                    rating_index = _rating_index_from_texts(_lx_text(th) for th in ths)
+                continue
+            row = _lx_parse_row(tr, rating_index)
+            if row is not None:
+                parsed.append(row)
+        if parsed:
+            yield _finish_class_name(None, _lx_caption(table), heading, idx), _rank(parsed, ties_skip=False)
+            idx += 1
+
+
+# --- BeautifulSoup-varapolku (ei lxml:ää) ------------------------------------
+
+
+def _soup_caption(tag: Any) -> Optional[str]:
+    cap = tag.find("caption")
+    return cap.get_text(strip=True) if cap is not None else None
+
+
+def _parse_row(tr: Any, rating_index: Optional[int]) -> Optional[ResultRow]:
+    tds = tr.find_all("td", recursive=False) or tr.find_all("td")
+    if len(tds) < 3:
+        return None
+
+    player_td = None
+    for td in tds:
+        if "player-cell" in (td.get("class") or ()):
+            player_td = td
+            break
+    if player_td is None:
+        return None
+
+    m_pos = _POS_RE.match(tds[0].get_text(strip=True))
+    pos_html = int(m_pos.group(1)) if m_pos else None
+
+    name = next(player_td.stripped_strings, "") or player_td.get_text(strip=True)
+
+    metrix_id = ""
+    link = player_td.find("a", href=True)
+    if link is not None:
+        href = str(link.get("href") or "")
+        m_id = _PLAYER_ID_RE.search(href) or _USER_ID_RE.search(href)
+        if m_id:
+            metrix_id = m_id.group(1)
+
+    rating = ""
+    if rating_index is not None and rating_index < len(tds):
+        rating = tds[rating_index].get_text(strip=True)
+
+    return ResultRow(
+        pos_html,
+        name,
+        tds[2].get_text(strip=True),
+        tds[-1].get_text(strip=True),
+        rating,
+        metrix_id,
+    )
+
+
+def _to_int(value: str) -> Optional[int]:
+    m = _INT_RE.match(value.strip())
+    return int(m.group(0)) if m else None
+
+
+def _rank(rows: List[ResultRow], ties_skip: bool) -> List[ResultRow]:
+    """Poista DNS-rivit (total == 0) ja laske sijat tuloksen mukaan.
+
+    ties_skip=True: tasatilanteen jälkeen hypätään (1, 1, 3);
+    muuten sijat juoksevat (1, 1, 2) kuten vanhan parserin fallback-tilassa.
+    """
+
+    kept = [r for r in rows if _to_int(r.total) != 0]
+
+    ranked: List[ResultRow] = []
+    last_score: Optional[Tuple[int, int]] = None
+    place = 0
+    same = 0
+    for r in kept:
+        total_val = _to_int(r.total)
+        to_par_val = _to_int(r.to_par)
+        score = (
+            total_val if total_val is not None else 9999,
+            to_par_val if to_par_val is not None else 0,
+        )
+        if last_score is None:
+            place, same = 1, 1
+        elif score == last_score:
+            same += 1
+        else:
+            place = place + same if ties_skip else place + 1
+            same = 1
+        ranked.append(r._replace(position=place))
+        last_score = score
+    return ranked
+
+
+def _thead_row_groups(table: Any, theads: List[Any]) -> Iterator[Tuple[Any, List[Any]]]:
+    """Yhdistä jokainen thead sitä seuraaviin riveihin (tbody tai suorat tr:t)."""
+
+    for thead in theads:
+        rows: List[Any] = []
+        sib = thead.find_next_sibling()
+        while sib is not None:
+            tag = getattr(sib, "name", None)
+            if tag == "tr":
+                rows.append(sib)
+            elif tag == "thead":
+                break
+            elif tag == "tbody":
+                rows.extend(sib.find_all("tr"))
+                break
+            sib = sib.find_next_sibling()
+
+        if not rows:
+            first_tbody = table.find("tbody")
+            if first_tbody is not None:
+                rows = first_tbody.find_all("tr")
+        yield thead, rows
+
+
+def results_fragment(html_text: str) -> str:
+    """Palauta sivusta vain tulostaulukoiden osa (#content_auto → reikätilastot)."""
+
+    m = _CONTENT_AUTO_RE.search(html_text)
+    start = m.start() if m else 0
+    m_end = _HOLE_STATS_RE.search(html_text, start)
+    return html_text[start:m_end.start()] if m_end else html_text[start:]
+
+
+def split_class_sections(html_text: str) -> List[Tuple[Optional[str], str]]:
+    """Pilko tulostaulukot luokkakohtaisiin HTML-paloihin <thead>-rajoista.
+
+    Palauttaa (otsikko, pala) -parit. Jokainen pala on oma <table>, jonka voi
+    antaa iter_result_tables-funktiolle erikseen; otsikko on palaa edeltävän
+    h2/h3/h4:n teksti (None, jos sellaista ei ole), jotta erikseen parsittu
+    luokka saa saman nimen kuin koko sivua parsittaessa. Näin muuttumattomat
+    luokat voidaan jättää parsimatta (live-seuranta vertaa palojen
+    tiivisteitä). Palauttaa tyhjän listan, jos sivulla ei ole theadeja.
+    """
+
+    sections: List[Tuple[Optional[str], str]] = []
+    heading: Optional[str] = None
+    for i, part in enumerate(_THEAD_SPLIT_RE.split(results_fragment(html_text))):
+        if i and "player-cell" in part:
+            sections.append((heading, f"<table>{part}</table>"))
+        for m in _HEADING_RE.finditer(part):
+            heading = _strip_markup(m.group(1), " ") or heading
+    return sections
+
+
+def _iter_soup(fragment: str, heading: Optional[str], idx: int) -> Iterator[Tuple[str, List[ResultRow]]]:
+    soup = BS(fragment, "html.parser", parse_only=_STRAINER)
+
+    for node in soup.find_all(["table", "h2", "h3", "h4"]):
+        if node.name != "table":
+            txt = node.get_text(" ", strip=True)
+            if txt:
+                heading = txt
+            continue
+        table = node
+        if table.find("td", class_="player-cell") is None:
+            continue
+
+        theads = table.find_all("thead")
+        if theads:
+            for thead, tr_list in _thead_row_groups(table, theads):
+                if not tr_list:
+                    continue
+                ths = thead.find_all("th")
+                rating_index = _rating_index_from_texts(th.get_text(strip=True) for th in ths)
+                parsed = [row for row in (_parse_row(tr, rating_index) for tr in tr_list) if row is not None]
+                if not parsed:
+                    continue
+                name = _finish_class_name(
+                    _class_name_from_texts(th.get_text(" ", strip=True) for th in ths),
+                    _soup_caption(thead),
+                    heading,
+                    idx,
+                )
+                yield name, _rank(parsed, ties_skip=True)
+                idx += 1
+            continue
+
+        # Ei theadeja: otsikkorivit (th) määräävät rating-sarakkeen.
+        rating_index = None
+        parsed = []
+        for tr in table.find_all("tr"):
+            ths = tr.find_all("th")
+            if ths:
+                if rating_index is None:
+                    rating_index = _rating_index_from_texts(th.get_text(strip=True) for th in ths)
+                continue
+            row = _parse_row(tr, rating_index)
+            if row is not None:
+                parsed.append(row)
+        if parsed:
+            yield _finish_class_name(None, _soup_caption(table), heading, idx), _rank(parsed, ties_skip=False)
+            idx += 1
+
+
+def iter_result_tables(
+    html_text: str,
+    parser: Optional[str] = None,
+    heading: Optional[str] = None,
+    start_index: int = 0,
+) -> Iterator[Tuple[str, List[ResultRow]]]:
+    """Käy läpi tulossivun luokat: (luokan nimi, ranked ResultRow-lista).
+
+    parser: "lxml" tai "html.parser"; oletuksena PARSER.
+    heading/start_index: split_class_sections-palan otsikko ja järjestysnumero,
+    joista nimetön luokka saa nimensä ("Sarja N") kuten koko sivulla.
+    """
+
+    fragment = results_fragment(html_text)
+    if (parser or PARSER) == "lxml" and HAS_LXML:
+        return _iter_lxml(fragment, heading, start_index)
+    return _iter_soup(fragment, heading, start_index)
+
+
+def parse_results(html_text: str, parser: Optional[str] = None) -> Dict[str, Any]:
+    """Parsii tulossivun commands_tulokset-moduulin käyttämään muotoon."""
+
+    classes: List[Dict[str, Any]] = []
+    for class_name, rows in iter_result_tables(html_text, parser):
+        classes.append({"class_name": class_name, "rows": [r._asdict() for r in rows]})
+    return {"event_name": guess_event_name(html_text), "classes": classes}
@@ -0,0 +1,378 @@
+"""Keskitetty ajastin taustatöille (korvaa erilliset while True/sleep-säikeet).
+
+Jokainen työ (Job) on funktio ja laukaisin:
+
+    IntervalTrigger(1800, jitter=60)     joka 30 min (+0–60 s satunnaisviive)
+    DailyTrigger(4, 0)                   päivittäin klo 04:00
+    OnceTrigger(delay=5)                 kerran, 5 s käynnistyksestä
+
+Ajastin huolehtii siitä, että
+  - sama työ ei koskaan ole käynnissä kahdesti (päällekkäisyyden esto),
+  - saman ryhmän (group, esim. "metrix") työt ajetaan peräkkäin, jotta
+    skannaukset ja digestit eivät kilpaile samoista palvelimista,
+  - samanaikaisia töitä on enintään max_concurrent,
+  - käyttökatkon aikana väliin jääneet ajot ajetaan kerran heti
+    käynnistyksen jälkeen (catch-up; viimeisin ajo luetaan taulusta),
+  - jokainen ajo kirjataan tauluun `scheduler_runs` kestoineen.
+
+!admin status näyttää tilan format_status()-funktiolla.
+"""
+
+import logging
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+from . import data_store
+
+
+logger = logging.getLogger(__name__)
+
+
+MAX_CONCURRENT = int(getattr(settings, "SCHEDULER_MAX_CONCURRENCY", 2)) if settings is not None else 2
+KEEP_RUNS_DAYS = 30
+# Dispatcher herää vähintään näin usein (sekuntia), vaikka töitä ei olisi erääntymässä.
+MAX_IDLE_WAIT = 30.0
+
+IntOrCallable = Union[int, Callable[[], int]]
+
+
+def _value(v: IntOrCallable) -> int:
+    return int(v() if callable(v) else v)
+
+
+class IntervalTrigger:
+    def __init__(self, seconds: float, jitter: float = 0.0) -> None:
+        self.seconds = max(1.0, float(seconds))
+        self.jitter = max(0.0, float(jitter))
+
+    def next_after(self, ts: float) -> Optional[float]:
+        return ts + self.seconds
+
+    def first_run(self, now: float) -> float:
+        # Kuten vanhat työsäikeet: ensimmäinen ajo heti käynnistyksessä.
+        return now
+
+    def describe(self) -> str:
+        if self.seconds >= 3600:
+            return f"joka {self.seconds / 3600:.1f} h"
+        return f"joka {self.seconds / 60:.0f} min"
+
+
+class DailyTrigger:
+    """Päivittäin klo hour:minute; arvot voivat olla funktioita (!admin aika)."""
+
+    def __init__(self, hour: IntOrCallable, minute: IntOrCallable = 0, jitter: float = 0.0) -> None:
+        self.hour = hour
+        self.minute = minute
+        self.jitter = max(0.0, float(jitter))
+
+    def next_after(self, ts: float) -> Optional[float]:
+        base = datetime.fromtimestamp(ts)
+        run = base.replace(hour=_value(self.hour), minute=_value(self.minute), second=0, microsecond=0)
+        if run <= base:
+            run += timedelta(days=1)
+        return run.timestamp()
+
+    def first_run(self, now: float) -> float:
+        # Ilman historiaa: tämän päivän ajo, jos kellonaika on jo ohitettu.
+        midnight = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.next_after(midnight.timestamp() - 1) or now
+
+    def describe(self) -> str:
+        return f"päivittäin klo {_value(self.hour):02d}:{_value(self.minute):02d}"
+
+
+class OnceTrigger:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = max(0.0, float(delay))
+        self.jitter = 0.0
+
+    def next_after(self, ts: float) -> Optional[float]:
+        return None
+
+    def first_run(self, now: float) -> float:
+        return now + self.delay
+
+    def describe(self) -> str:
+        return "kerran"
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Any]
+    trigger: Any
+    group: Optional[str] = None
+    priority: int = 10
+    catch_up: bool = True
+    next_run: Optional[float] = None
+    running: bool = False
+    last_started: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_status: str = ""
+    last_error: str = ""
+    runs: int = 0
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(data_store._db_path())
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS scheduler_runs (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               job TEXT NOT NULL,
+               started_at REAL NOT NULL,
+               finished_at REAL NOT NULL,
+               duration REAL NOT NULL,
+               status TEXT NOT NULL,
+               error TEXT
+           )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scheduler_runs_job ON scheduler_runs (job, started_at)")
+    return conn
+
+
+def _last_run(name: str) -> Optional[tuple]:
+    try:
+        with _connect() as conn:
+            return conn.execute(
+                "SELECT started_at, duration, status, error FROM scheduler_runs WHERE job = ? ORDER BY started_at DESC LIMIT 1",
+                (name,),
+            ).fetchone()
+    except Exception:
+        return None
+
+
+def _record_run(name: str, started: float, finished: float, status: str, error: str) -> None:
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT INTO scheduler_runs (job, started_at, finished_at, duration, status, error) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, started, finished, finished - started, status, error or None),
+            )
+            conn.execute("DELETE FROM scheduler_runs WHERE job = ? AND started_at < ?", (name, finished - KEEP_RUNS_DAYS * 86400))
+            conn.commit()
+    except Exception as e:
+        logger.warning("Failed to record scheduler run: %s", e)
+
+
+def last_started(name: str) -> Optional[float]:
+    """Työn viimeisimmän kirjatun ajon alkuhetki (epoch) tai None."""
+
+    row = _last_run(name)
+    return float(row[0]) if row else None
+
+
+def recent_runs(limit: int = 20) -> List[Dict[str, Any]]:
+    """Viimeisimmät ajot (uusin ensin) scheduler_runs-taulusta."""
+
+    cols = ("job", "started_at", "duration", "status", "error")
+    try:
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT job, started_at, duration, status, error FROM scheduler_runs ORDER BY started_at DESC LIMIT ?",
+                (int(limit),),
+            ).fetchall()
+    except Exception:
+        return []
+    return [dict(zip(cols, row)) for row in rows]
+
+
+class Scheduler:
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT) -> None:
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._jobs: Dict[str, Job] = {}
+        self._cond = threading.Condition()
+        self._active = 0
+        self._busy_groups: set = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- työt ---------------------------------------------------------
+
+    def add_job(self, job: Job) -> Job:
+        """Lisää (tai korvaa) työ ja laske sen ensimmäinen ajo historian perusteella."""
+
+        now = time.time()
+        last = _last_run(job.name) if not isinstance(job.trigger, OnceTrigger) else None
+        if last is not None:
+            job.last_started, job.last_duration, job.last_status, job.last_error = last[0], last[1], last[2], last[3] or ""
+        job.next_run = self._initial_run(job, now)
+        with self._cond:
+            self._jobs[job.name] = job
+            self._cond.notify_all()
+        self.start()
+        return job
+
+    def _initial_run(self, job: Job, now: float) -> Optional[float]:
+        if job.last_started and not isinstance(job.trigger, OnceTrigger):
+            nxt = job.trigger.next_after(job.last_started)
+            if nxt is not None and nxt <= now:
+                # Väliin jääneet ajot: yksi korvaava ajo heti (tai seuraava vuoro).
+                return now if job.catch_up else job.trigger.next_after(now)
+            return self._jittered(job, nxt)
+        return job.trigger.first_run(now)
+
+    @staticmethod
+    def _jittered(job: Job, ts: Optional[float]) -> Optional[float]:
+        if ts is None or not job.trigger.jitter:
+            return ts
+        return ts + random.uniform(0, job.trigger.jitter)
+
+    def get(self, name: str) -> Optional[Job]:
+        return self._jobs.get(name)
+
+    def run_now(self, name: str) -> bool:
+        """Aja työ mahdollisimman pian (ei päällekkäin jo käynnissä olevan kanssa)."""
+
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None:
+                return False
+            if not job.running:
+                job.next_run = time.time()
+            self._cond.notify_all()
+        return True
+
+    def reschedule(self, name: str) -> None:
+        """Laske seuraava ajo uudelleen (esim. kun digestin kellonaika muuttuu)."""
+
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None or job.running:
+                return
+            job.next_run = self._initial_run(job, time.time())
+            self._cond.notify_all()
+
+    # --- ajo ----------------------------------------------------------
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="job")
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="scheduler")
+            self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                now = time.time()
+                wait = MAX_IDLE_WAIT
+                due = sorted(
+                    (j for j in self._jobs.values() if j.next_run is not None and not j.running),
+                    key=lambda j: (j.next_run, j.priority),
+                )
+                for job in due:
+                    if job.next_run > now:
+                        wait = min(wait, job.next_run - now)
+                        continue
+                    if self._active >= self.max_concurrent or (job.group and job.group in self._busy_groups):
+                        continue
+                    job.running = True
+                    self._active += 1
+                    if job.group:
+                        self._busy_groups.add(job.group)
+                    assert self._executor is not None
+                    self._executor.submit(self._run, job)
+                self._cond.wait(timeout=max(0.05, wait))
+
+    def _run(self, job: Job) -> None:
+        started = time.time()
+        status, error = "ok", ""
+        try:
+            job.func()
+        except Exception as e:
+            status, error = "error", str(e)
+            logger.exception("Ajastettu työ %s epäonnistui: %s", job.name, e)
+        except BaseException as e:
+            status, error = "error", repr(e)
+            raise
+        finally:
+            # Paikka ja ryhmä vapautetaan aina, ettei BaseException jumita ajastinta.
+            _record_run(job.name, started, time.time(), status, error)
+            self._finish(job, started, status, error)
+
+    def _finish(self, job: Job, started: float, status: str, error: str) -> None:
+        finished = time.time()
+        with self._cond:
+            job.running = False
+            job.runs += 1
+            job.last_started, job.last_duration = started, finished - started
+            job.last_status, job.last_error = status, error
+            nxt = job.trigger.next_after(started)
+            if nxt is not None and nxt < finished:
+                # Ajo kesti yli välin: seuraava vuoro heti, ei kasautumista.
+                nxt = finished
+            job.next_run = self._jittered(job, nxt)
+            if nxt is None and self._jobs.get(job.name) is job:
+                # Ajon aikana samalla nimellä lisättyä uutta työtä ei poisteta.
+                del self._jobs[job.name]
+            self._active -= 1
+            if job.group:
+                self._busy_groups.discard(job.group)
+            self._cond.notify_all()
+
+    # --- tila ---------------------------------------------------------
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            jobs = sorted(self._jobs.values(), key=lambda j: (j.next_run or float("inf"), j.name))
+            return [
+                {
+                    "name": j.name,
+                    "trigger": j.trigger.describe(),
+                    "group": j.group or "",
+                    "running": j.running,
+                    "next_run": j.next_run,
+                    "last_started": j.last_started,
+                    "last_duration": j.last_duration,
+                    "last_status": j.last_status,
+                }
+                for j in jobs
+            ]
+
+
+def _fmt_ts(ts: Optional[float]) -> str:
+    if not ts:
+        return "-"
+    dt = datetime.fromtimestamp(ts)
+    return dt.strftime("%H:%M") if dt.date() == datetime.now().date() else dt.strftime("%d.%m. %H:%M")
+
+
+def format_status(scheduler: Optional["Scheduler"] = None) -> str:
+    """Työtaulukko tekstinä (!admin status)."""
+
+    rows = (scheduler or get_scheduler()).status()
+    if not rows:
+        return "(ei ajastettuja töitä)"
+    lines = [f"{'työ':<16} {'ajo':<22} {'edell.':>11} {'kesto':>7} {'tila':<6} {'seur.':>11}"]
+    for r in rows:
+        dur = f"{r['last_duration']:.0f} s" if r["last_duration"] is not None else "-"
+        state = "käy" if r["running"] else (r["last_status"] or "-")
+        lines.append(
+            f"{r['name'][:16]:<16} {r['trigger'][:22]:<22} {_fmt_ts(r['last_started']):>11} {dur:>7} {state:<6} {_fmt_ts(r['next_run']):>11}"
+        )
+    return "\n".join(lines)
+
+
+_SCHEDULER: Optional[Scheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = Scheduler()
+        return _SCHEDULER
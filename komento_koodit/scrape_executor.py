@@ -0,0 +1,222 @@
+"""Rajattu säiepooli komentojen blokkaaville hauille (Metrix, PDGA).
+
+Komennot ajoivat haut ``loop.run_in_executor(None, ...)``-kutsulla, eli
+silmukan pienessä oletuspoolissa ilman minkäänlaista vastapainetta: viisi
+samanaikaista ``!tulokset suomi`` -komentoa saattoi varata kaikki säikeet.
+Tämä moduuli antaa niille oman poolin ja rajat:
+
+- ``SCRAPE_WORKERS``           poolin koko
+- ``SCRAPE_MAX_PER_COMMAND``   saman komennon samanaikaiset haut (loput odottavat)
+- ``SCRAPE_MAX_PER_USER``      yhden käyttäjän keskeneräiset haut (ylitys → Busy)
+- ``SCRAPE_MAX_QUEUE``         kaikki keskeneräiset haut yhteensä (ylitys → Busy)
+- ``SCRAPE_TIMEOUT_SECONDS``   haun aikaraja odotus mukaan lukien (ylitys → ScrapeTimeout)
+
+Aikarajan ylittyessä jonossa oleva haku perutaan; jo käynnissä oleva
+säie saa peruutuslipun, jota pitkät silmukat voivat tarkistaa
+``cancelled()``-funktiolla. Komentojen käsittelijä vastaa Busy- ja
+ScrapeTimeout-virheisiin kohteliaalla viestillä (``ScrapeError.reply``).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+try:
+    from . import metrics
+except Exception:  # pragma: no cover
+    metrics = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default) if settings is not None else default
+
+
+WORKERS = int(_setting("SCRAPE_WORKERS", 6))
+MAX_PER_COMMAND = int(_setting("SCRAPE_MAX_PER_COMMAND", 3))
+MAX_PER_USER = int(_setting("SCRAPE_MAX_PER_USER", 2))
+MAX_QUEUE = int(_setting("SCRAPE_MAX_QUEUE", 24))
+DEFAULT_TIMEOUT = float(_setting("SCRAPE_TIMEOUT_SECONDS", 60))
+
+BUSY_REPLY = "Botilla on juuri nyt paljon hakuja käynnissä — yritä hetken päästä uudelleen."
+USER_BUSY_REPLY = "Edellinen hakusi on vielä kesken — odota, että se valmistuu, ja yritä sitten uudelleen."
+TIMEOUT_REPLY = "Haku kesti liian kauan ja keskeytettiin. Yritä myöhemmin uudelleen."
+
+
+class ScrapeError(Exception):
+    """Haku hylättiin tai keskeytettiin; ``reply`` on käyttäjälle näytettävä viesti."""
+
+    def __init__(self, reply: str):
+        super().__init__(reply)
+        self.reply = reply
+
+
+class Busy(ScrapeError):
+    pass
+
+
+class ScrapeTimeout(ScrapeError):
+    pass
+
+
+_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+_inflight = 0
+_per_user: Dict[str, int] = {}
+_per_command: Dict[str, int] = {}
+_rejected = 0
+_timeouts = 0
+# Semaforit ovat silmukkakohtaisia; käytännössä silmukka on gatewayn ainoa silmukka.
+_semaphores: Dict[Tuple[int, str], asyncio.Semaphore] = {}
+_local = threading.local()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, WORKERS), thread_name_prefix="scrape")
+        return _pool
+
+
+def _command_semaphore(command: str) -> asyncio.Semaphore:
+    key = (id(asyncio.get_running_loop()), command)
+    sem = _semaphores.get(key)
+    if sem is None:
+        sem = _semaphores[key] = asyncio.Semaphore(max(1, MAX_PER_COMMAND))
+    return sem
+
+
+def cancelled() -> bool:
+    """True, jos tämän säikeen haun aikaraja on jo ylittynyt."""
+
+    ev = getattr(_local, "cancel", None)
+    return bool(ev is not None and ev.is_set())
+
+
+def _call(cancel: threading.Event, func: Callable[..., Any], args: tuple, command: str = "", queued_at: float = 0.0) -> Any:
+    _local.cancel = cancel
+    started = time.perf_counter()
+    if metrics is not None:
+        # Jonotus = komennon semaforin ja poolin jonon odotus yhteensä.
+        metrics.observe("queue_wait", command, started - queued_at if queued_at else 0.0)
+        metrics.begin_job()
+    try:
+        return func(*args)
+    finally:
+        _local.cancel = None
+        if metrics is not None:
+            metrics.end_job(command, time.perf_counter() - started)
+
+
+def _admit(command: str, user_key: Optional[str]) -> None:
+    global _inflight, _rejected
+    with _lock:
+        if _inflight >= MAX_QUEUE:
+            _rejected += 1
+            raise Busy(BUSY_REPLY)
+        if user_key is not None and _per_user.get(user_key, 0) >= MAX_PER_USER:
+            _rejected += 1
+            raise Busy(USER_BUSY_REPLY)
+        _inflight += 1
+        _per_command[command] = _per_command.get(command, 0) + 1
+        if user_key is not None:
+            _per_user[user_key] = _per_user.get(user_key, 0) + 1
+
+
+def _release(command: str, user_key: Optional[str]) -> None:
+    global _inflight
+    with _lock:
+        _inflight = max(0, _inflight - 1)
+        left = _per_command.get(command, 0) - 1
+        if left > 0:
+            _per_command[command] = left
+        else:
+            _per_command.pop(command, None)
+        if user_key is not None:
+            left = _per_user.get(user_key, 0) - 1
+            if left > 0:
+                _per_user[user_key] = left
+            else:
+                _per_user.pop(user_key, None)
+
+
+async def run(command: str, func: Callable[..., Any], *args: Any, user: Any = None, timeout: Optional[float] = None) -> Any:
+    """Aja ``func(*args)`` hakupoolissa komennon ja käyttäjän rajoilla.
+
+    Nostaa Busy, jos jono tai käyttäjän raja on täynnä, ja ScrapeTimeout,
+    jos haku ei valmistunut ``timeout`` sekunnissa (oletus SCRAPE_TIMEOUT_SECONDS).
+    """
+
+    global _timeouts
+    user_key = str(user) if user is not None else None
+    _admit(command, user_key)
+    cancel = threading.Event()
+    queued_at = time.perf_counter()
+    submitted = False
+    loop = asyncio.get_running_loop()
+    sem = _command_semaphore(command)
+
+    def _on_done(_fut: Any) -> None:
+        # Paikat vapautuvat vasta, kun säie on oikeasti valmis.
+        _release(command, user_key)
+        try:
+            loop.call_soon_threadsafe(sem.release)
+        except RuntimeError:
+            pass
+
+    async def _job() -> Any:
+        nonlocal submitted
+        await sem.acquire()
+        try:
+            fut = _executor().submit(_call, cancel, func, args, command, queued_at)
+        except BaseException:
+            sem.release()
+            raise
+        submitted = True
+        fut.add_done_callback(_on_done)
+        # wrap_future peruu jonossa odottavan työn, jos tämä korutiini perutaan.
+        return await asyncio.wrap_future(fut)
+
+    try:
+        return await asyncio.wait_for(_job(), timeout if timeout is not None else DEFAULT_TIMEOUT)
+    except asyncio.TimeoutError:
+        cancel.set()
+        with _lock:
+            _timeouts += 1
+        logger.warning("%s: aikaraja ylittyi, haku keskeytetty", command, extra={"command": command})
+        raise ScrapeTimeout(TIMEOUT_REPLY) from None
+    finally:
+        if not submitted:
+            _release(command, user_key)
+
+
+def status() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "workers": WORKERS,
+            "inflight": _inflight,
+            "max_queue": MAX_QUEUE,
+            "per_command": dict(_per_command),
+            "rejected": _rejected,
+            "timeouts": _timeouts,
+        }
+
+
+def format_status() -> str:
+    st = status()
+    cmds = ", ".join(f"{k}={v}" for k, v in sorted(st["per_command"].items())) or "-"
+    return (
+        f"Hakupooli: {st['inflight']}/{st['max_queue']} keskeneräistä ({st['workers']} säiettä), "
+        f"komennoittain: {cmds}; hylätty {st['rejected']}, aikakatkaistu {st['timeouts']}"
+    )
@@ -1,117 +1,40 @@
-import requests
-from bs4 import BeautifulSoup as BS
-import re
-import urllib.parse
-from .date_utils import normalize_date_string
+"""Parikisojen (doubles) haku Metrixin competitions_server-listalta.
+
+Moduulin tuonti ei tee verkkokutsuja; find_doubles() hakee listan
+annetulle alueelle ja päiväysikkunalle. HTTP-asiakkaan voi antaa
+``session``-parametrilla (requests-yhteensopiva get()). Jäsennys ja
+parikisatunnistus ovat yhteisiä competition_listing-moduulin kanssa;
+run_once ottaa parikisat suoraan sen alueittaisesta kertahausta.
+"""
+
+from . import competition_listing
 
-# Debug + robustness: set a User-Agent and print short response snippets when parsing fails
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; metrixbot/1.0)"}
 
-area = "Etelä-Pohjanmaa"
-encoded = urllib.parse.quote(area)
-# search window: 2026-01-01 .. 2027-01-01
-url = f"https://discgolfmetrix.com/competitions_server.php?name=&date1=2026-01-01&date2=2027-01-01&registration_date1=&registration_date2=&country_code=FI&type=d&from=1&to=200&page=all&area={encoded}"
-resp = requests.get(url, headers=HEADERS, timeout=30)
-resp.encoding = resp.apparent_encoding
-html = resp.text
-soup = BS(html, "html.parser")
-
-
-def find_doubles(area_name=None, date1='2026-01-01', date2='2027-01-01'):
-    """Return list of doubles (parikilpailu) entries for the configured area/date window."""
-    results = []
-    container = soup
-    # gridlist items
-    for a in container.select('a.gridlist'):
-        href = a.get('href', '') or ''
-        href_str = str(href)
-        m = re.search(r"/(\d+)", href_str)
-        comp_id = m.group(1) if m else None
-        h2 = a.find('h2')
-        if h2 is not None:
-            title = h2.get_text(strip=True)
-        else:
-            title = a.get_text(strip=True) or ''
-        kind = None
-        tspan = a.select_one('.competition-type')
-        if tspan is not None:
-            kind = tspan.get_text(strip=True)
-        meta = a.select_one('.metadata-list')
-        date = None
-        location = None
-        if meta is not None:
-            lis = meta.find_all('li') or []
-            if lis:
-                raw_date = lis[0].get_text(strip=True) if getattr(lis[0], 'get_text', None) else None
-                # Metrix often presents dates as MM/DD/YY — normalize preferring month-first
-                try:
-                    date = normalize_date_string(raw_date, prefer_month_first=True) if raw_date else raw_date
-                except Exception:
-                    date = raw_date
-            if len(lis) > 1:
-                location = lis[1].get_text(strip=True) if getattr(lis[1], 'get_text', None) else None
-        # Rakenna absoluuttinen URL aina kun id on saatavilla
-        url_full = ''
-        if comp_id:
-            try:
-                url_full = urllib.parse.urljoin('https://discgolfmetrix.com', f'/{comp_id}')
-            except Exception:
-                url_full = f'https://discgolfmetrix.com/{comp_id}'
-        elif href_str:
-            # fallback jos tunnistettu id puuttuu
-            try:
-                url_full = urllib.parse.urljoin('https://discgolfmetrix.com', href_str)
-            except Exception:
-                url_full = href_str
-
-        results.append({'id':comp_id,'title':title,'kind':kind,'date':date,'location':location,'url':url_full})
-
-    # table rows
-    for tr in container.select('table.table-list tbody tr'):
-        a = tr.select_one('a')
-        href = a.get('href','') if a else ''
-        href_str = str(href)
-        m = re.search(r"/(\d+)", href_str)
-        comp_id = m.group(1) if m else None
-        name = a.get_text(strip=True) if a is not None else tr.get_text(strip=True)
-        cols = [td.get_text(strip=True) for td in tr.find_all('td')]
-        date = cols[1] if len(cols) > 1 else None
-        # Normalize date tokens found in table rows as well (assume Metrix month-first)
-        try:
-            date = normalize_date_string(date, prefer_month_first=True) if date else date
-        except Exception:
-            pass
-        kind = cols[2] if len(cols) > 2 else None
-        location = cols[3] if len(cols) > 3 else None
-
-        # Rakenna absoluuttinen URL aina kun id on saatavilla
-        url_full = ''
-        if comp_id:
-            try:
-                url_full = urllib.parse.urljoin('https://discgolfmetrix.com', f'/{comp_id}')
-            except Exception:
-                url_full = f'https://discgolfmetrix.com/{comp_id}'
-        elif href_str:
-            try:
-                url_full = urllib.parse.urljoin('https://discgolfmetrix.com', href_str)
-            except Exception:
-                url_full = href_str
-
-        results.append({'id':comp_id,'title':name,'kind':kind,'date':date,'location':location,'url':url_full})
-
-    # Deduplicate by id
-    seen = set()
-    unique = []
-    for r in results:
-        if r.get('id') and r['id'] not in seen:
-            seen.add(r['id'])
-            unique.append(r)
-
-    # Filter heuristically for pair/doubles keywords
-    pair_re = re.compile(r"\b(pari|parikisa|parikilpailu|parigolf|pariviikko|pair|pairs|double|doubles|best shot|max2)\b", re.I)
-    doubles = [r for r in unique if (r.get('title') and pair_re.search(r.get('title'))) or (r.get('kind') and pair_re.search(r.get('kind')))]
-
-    return doubles
+AREA = "Etelä-Pohjanmaa"
+DATE1 = "2026-01-01"
+DATE2 = "2027-01-01"
+
+pair_re = competition_listing.pair_re
+
+
+def build_url(area=AREA, date1=DATE1, date2=DATE2, comp_type='d', country='FI'):
+    return competition_listing.build_server_url(area or '', date1, date2, country, comp_type)
+
+
+def find_doubles(area_name=None, date1=DATE1, date2=DATE2, comp_type='d', session=None, timeout=30):
+    """Return list of doubles (parikilpailu) entries for the given area/date window."""
+    html = competition_listing.fetch_html(build_url(area_name or AREA, date1, date2, comp_type), session=session, timeout=timeout, headers=HEADERS)
+    return parse_doubles(html)
+
+
+def parse_doubles(html):
+    """Parse a competitions_server listing and keep the pair/doubles entries."""
+    return [
+        competition_listing.doubles_entry(e)
+        for e in competition_listing.parse_entries(html)
+        if e.get('id') and competition_listing.is_doubles(e)
+    ]
 
 
 def save_doubles_list(entries, out_path=None):
@@ -1,12 +1,8 @@
-import requests
 import logging
-from bs4 import BeautifulSoup as BS
-import re
-import urllib.parse
 import os
 import time
 import json
-from . import data_store
+from . import competition_listing, data_store
 import argparse
 
 # Default SFL "Kaikki kilpailut" URL (user-provided)
@@ -18,129 +14,37 @@ DEFAULT_URL = (
 )
 
 
-def fetch_competitions(url: str):
+def _to_pdga_entry(e: dict) -> dict:
+    return {"id": e.get("id"), "name": e.get("title"), "tier": e.get("tier"), "date": e.get("raw_date"), "location": e.get("location"), "url": _abs(e.get("url") or "")}
+
+
+def fetch_competitions(url: str, session=None):
     headers = {"User-Agent": "Mozilla/5.0 (pdga-finder)"}
     logger = logging.getLogger(__name__)
     try:
         start = time.perf_counter()
-        r = requests.get(url, timeout=20, headers=headers)
-        r.raise_for_status()
-        elapsed = time.perf_counter() - start
-        logger.info("Fetched %s in %.2fs, status=%s", url, elapsed, r.status_code)
+        html = competition_listing.fetch_html(url, session=session, timeout=20, headers=headers)
+        logger.info("Fetched %s in %.2fs", url, time.perf_counter() - start)
     except Exception as e:
         logger.exception("Fetch failed: %s", e)
         return []
 
-    r.encoding = r.apparent_encoding
-    soup = BS(r.text, "html.parser")
-    container = soup.find(id="competition_list2") or soup
-
-    results = []
-    # gridlist
-    for a in container.select("a.gridlist"):
-        href = a.get("href", "") or ''
-        href_str = str(href)
-        comp_id = None
-        m = re.search(r"/(\d+)", href_str)
-        if m:
-            comp_id = m.group(1)
-        h2 = a.find("h2")
-        title = h2.get_text(strip=True) if h2 is not None and getattr(h2, 'get_text', None) else (a.get_text(strip=True) or '')
-        tspan = a.select_one(".competition-type")
-        tier = tspan.get_text(strip=True) if tspan is not None else ""
-        meta = a.select(".metadata-list li") or []
-        date = meta[0].get_text(strip=True) if len(meta) > 0 and getattr(meta[0], 'get_text', None) else ""
-        location = meta[1].get_text(strip=True) if len(meta) > 1 and getattr(meta[1], 'get_text', None) else ""
-        results.append({"id": comp_id, "name": title, "tier": tier, "date": date, "location": location, "url": _abs(href_str)})
-
-    # table rows
-    for tr in container.select("table.table-list tbody tr"):
-        cols = tr.find_all("td")
-        if not cols:
-            continue
-        link = cols[0].find("a")
-        href = link.get('href', '') if link is not None else ''
-        href_str = str(href)
-        comp_id = None
-        m = re.search(r"/(\d+)", href_str)
-        if m:
-            comp_id = m.group(1)
-        name = link.get_text(strip=True) if link is not None and getattr(link, 'get_text', None) else (cols[0].get_text(strip=True) or '')
-        date = cols[1].get_text(strip=True) if len(cols) > 1 and getattr(cols[1], 'get_text', None) else ""
-        tier = cols[2].get_text(strip=True) if len(cols) > 2 and getattr(cols[2], 'get_text', None) else ""
-        location = cols[3].get_text(strip=True) if len(cols) > 3 and getattr(cols[3], 'get_text', None) else ""
-        results.append({"id": comp_id, "name": name, "tier": tier, "date": date, "location": location, "url": _abs(href_str)})
-
-    # dedupe by id/title
-    seen = set()
-    unique = []
-    for r in results:
-        cid = r.get("id") or r.get("name")
-        if not cid or cid in seen:
-            continue
-        seen.add(cid)
-        unique.append(r)
+    unique = [_to_pdga_entry(e) for e in competition_listing.parse_entries(html)]
     # If nothing found on the page, try the fast server endpoint as a fallback
     if not unique:
         try:
             logger.info("No entries found on page; trying competitions_server.php fallback...")
             # derive date1/date2 and clubid from provided URL if present
-            from urllib.parse import urlparse, parse_qs, urlencode
-            parsed = urlparse(url)
-            qs = parse_qs(parsed.query)
+            from urllib.parse import urlparse, parse_qs
+            qs = parse_qs(urlparse(url).query)
             date1 = qs.get('date1', ['2026-01-01'])[0]
             date2 = qs.get('date2', ['2027-01-01'])[0]
-            clubid = qs.get('club_id', qs.get('clubid', qs.get('club_id', ['1'])))[0] if qs else '1'
-            # build server endpoint URL
-            server_url = (
-                f"https://discgolfmetrix.com/competitions_server.php?name=&date1={date1}&date2={date2}"
-                f"&registration_date1=&registration_date2=&country_code=FI&clubid={clubid}&clubtype=1&from=1&to=500&page=all"
-            )
+            clubid = qs.get('club_id', qs.get('clubid', ['1']))[0] if qs else '1'
+            server_url = competition_listing.build_server_url('', date1, date2, 'FI', clubid=clubid, clubtype='1')
             start = time.perf_counter()
-            r2 = requests.get(server_url, timeout=20, headers={"User-Agent": "Mozilla/5.0 (pdga-finder)"})
-            r2.raise_for_status()
-            elapsed = time.perf_counter() - start
-            logger.info("Server endpoint fetch time: %.2fs, status=%s", elapsed, r2.status_code)
-            r2.encoding = r2.apparent_encoding
-            soup2 = BS(r2.text, 'html.parser')
-            cont2 = soup2.find(id='competition_list2') or soup2
-            results2 = []
-            for a in cont2.select('a.gridlist'):
-                href = a.get('href','') or ''
-                href_str = str(href)
-                m = re.search(r"/(\d+)", href_str)
-                cid = m.group(1) if m else None
-                h2 = a.find('h2')
-                title = h2.get_text(strip=True) if h2 is not None and getattr(h2, 'get_text', None) else (a.get_text(strip=True) or '')
-                tspan = a.select_one('.competition-type')
-                tier = tspan.get_text(strip=True) if tspan is not None else ''
-                meta = a.select('.metadata-list li') or []
-                date = meta[0].get_text(strip=True) if len(meta) > 0 and getattr(meta[0], 'get_text', None) else ''
-                location = meta[1].get_text(strip=True) if len(meta) > 1 and getattr(meta[1], 'get_text', None) else ''
-                results2.append({"id": cid, "name": title, "tier": tier, "date": date, "location": location, "url": _abs(href_str)})
-            for tr in cont2.select('table.table-list tbody tr'):
-                cols = tr.find_all('td')
-                if not cols:
-                    continue
-                link = cols[0].find('a')
-                href = link.get('href','') if link is not None else ''
-                href_str = str(href)
-                m = re.search(r"/(\d+)", href_str)
-                cid = m.group(1) if m else None
-                name = link.get_text(strip=True) if link is not None and getattr(link, 'get_text', None) else cols[0].get_text(strip=True)
-                date = cols[1].get_text(strip=True) if len(cols) > 1 and getattr(cols[1], 'get_text', None) else ''
-                tier = cols[2].get_text(strip=True) if len(cols) > 2 and getattr(cols[2], 'get_text', None) else ''
-                location = cols[3].get_text(strip=True) if len(cols) > 3 and getattr(cols[3], 'get_text', None) else ''
-                results2.append({"id": cid, "name": name, "tier": tier, "date": date, "location": location, "url": _abs(href_str)})
-            # dedupe
-            seen2 = set()
-            unique2 = []
-            for r in results2:
-                cid = r.get('id') or r.get('name')
-                if not cid or cid in seen2:
-                    continue
-                seen2.add(cid)
-                unique2.append(r)
+            html2 = competition_listing.fetch_html(server_url, session=session, timeout=20, headers=headers)
+            logger.info("Server endpoint fetch time: %.2fs", time.perf_counter() - start)
+            unique2 = [_to_pdga_entry(e) for e in competition_listing.parse_entries(html2)]
             logger.info("Server endpoint returned %d entries", len(unique2))
             return unique2
         except Exception as e:
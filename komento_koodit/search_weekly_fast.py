@@ -1,13 +1,28 @@
-import requests
+"""Viikkokisahaku Metrixin competitions_server-listalta (VIIKKOKISA).
+
+Moduulin tuonti ei tee verkkokutsuja: haku tehdään kutsumalla
+search_weekly()/find_weekly(), joille voi antaa alueen, päiväysikkunan,
+tyypin sekä HTTP-asiakkaan (esim. requests.Session tai testien
+tynkä, jolla on get(url, timeout=..., headers=...)-metodi).
+
+    entries = find_weekly(area="Etelä-Pohjanmaa")
+    save_weekly_list(entries)
+
+Komentoriviltä (python -m komento_koodit.search_weekly_fast) haku
+tallentaa tuloksen VIIKKOKISA-kategoriaan kuten ennenkin. Jäsennin ja
+luokittelu ovat competition_listing-moduulissa; run_once käyttää sen
+alueittaista kertahakua (fetch_snapshot) eikä hae tätä listaa erikseen.
+"""
+
 import logging
-from bs4 import BeautifulSoup as BS
-import re
-import urllib.parse
 import os
-from . import data_store
 import time
-import json
-from .date_utils import normalize_date_string
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from . import competition_listing, data_store
 
 # Config: area and date window. Read from env if provided.
 AREA = os.environ.get('WEEKLY_LOCATION', 'Etelä-Pohjanmaa')
@@ -15,151 +30,123 @@ DATE1 = os.environ.get('WEEKLY_DATE1', '2026-01-01')
 DATE2 = os.environ.get('WEEKLY_DATE2', '2027-01-01')
 COUNTRY = os.environ.get('WEEKLY_COUNTRY', 'FI')
 TYPE = os.environ.get('WEEKLY_TYPE', '')  # '' = all, 'd' = doubles, 'c' = all competitions, etc.
+WEEKLY_VERBOSE = os.environ.get('WEEKLY_VERBOSE', '0') == '1'
 
-area_enc = urllib.parse.quote(AREA)
-# Use server endpoint with large page size for speed
-type_part = f"&type={TYPE}" if TYPE else ""
-url = f"https://discgolfmetrix.com/competitions_server.php?name=&date1={DATE1}&date2={DATE2}&registration_date1=&registration_date2=&country_code={COUNTRY}{type_part}&from=1&to=200&page=all&area={area_enc}"
+HEADERS = competition_listing.HEADERS
+SERVER_URL = competition_listing.SERVER_URL
 
 logger = logging.getLogger(__name__)
-logger.info('URL: %s', url)
-start = time.perf_counter()
-resp = requests.get(url, timeout=20, headers={'User-Agent':'Mozilla/5.0'})
-elapsed = time.perf_counter() - start
-logger.info("HTTP fetch time: %.2fs, status: %s", elapsed, resp.status_code)
-resp.encoding = resp.apparent_encoding
-soup = BS(resp.text, 'html.parser')
-container = soup.find(id='competition_list2')
-
-results = []
-
-weekly_re = re.compile(r"\b(weekly|week|viikko|viikotta|viikkokisa|viikkokisat|weeklies)\b", re.I)
-pair_re = re.compile(r"\b(pari|parikisa|parikilpailu|parigolf|pariviikko|pariviikkokisat|pair|pairs|double|doubles|best shot|max2)\b", re.I)
-
-if container:
-    # gridlist entries
-    for a in container.select('a.gridlist'):
-        href = a.get('href', '') or ''
-        href_str = str(href)
-        comp_id = None
-        m = re.search(r"/(\d+)", href_str)
-        if m:
-            comp_id = m.group(1)
-        h2 = a.find('h2')
-        if h2 is not None:
-            title = h2.get_text(strip=True)
-        else:
-            title = a.get_text(strip=True) or ''
-        tspan = a.select_one('.competition-type')
-        tier = tspan.get_text(strip=True) if tspan is not None else ''
-        meta = a.select('.metadata-list li') or []
-        raw_date = meta[0].get_text(strip=True) if len(meta) > 0 and getattr(meta[0], 'get_text', None) else ''
-        try:
-            # Metrix often uses MM/DD/YY; prefer month-first when normalizing
-            date = normalize_date_string(raw_date, prefer_month_first=True) if raw_date else raw_date
-        except Exception:
-            date = raw_date
-        location = meta[1].get_text(strip=True) if len(meta) > 1 and getattr(meta[1], 'get_text', None) else ''
-        kind = None
-        title_l = (title or '').lower()
-        loc_l = (location or '').lower()
-        tier_l = (tier or '').lower()
-        # substring fallback for robustness
-        pair_keywords = ['pari','parikisa','parikilpailu','parigolf','pariviikko','pariviikkokisat','pair','pairs','double','doubles','best shot','max2']
-        weekly_keywords = ['weekly','week','viikko','viikkari','viikotta','viikkokisa','viikkokisat','viikkot','weeklies']
-        is_pair = bool(pair_re.search(title_l) or pair_re.search(loc_l) or pair_re.search(tier_l) or any(k in title_l or k in loc_l or k in tier_l for k in pair_keywords))
-        is_weekly = bool(weekly_re.search(title_l) or weekly_re.search(loc_l) or weekly_re.search(tier_l) or any(k in title_l or k in loc_l or k in tier_l for k in weekly_keywords))
-        # avoid tagging PDGA-liiga as weekly
-        is_liiga = 'liiga' in title_l or 'liiga' in tier_l
-        if is_pair:
-            kind = 'PARIKISA'
-        elif is_weekly and not is_liiga:
-            kind = 'VIIKKOKISA'
-        # build absolute URL when href is present
-        url = ''
-        if href_str:
-            try:
-                url = urllib.parse.urljoin('https://discgolfmetrix.com', href_str)
-            except Exception:
-                url = href_str
-        results.append({'id': comp_id, 'title': title, 'tier': tier, 'date': date, 'location': location, 'kind': kind, 'url': url})
-    # table rows fallback
-    for tr in container.select('table.table-list tbody tr'):
-        cols = tr.find_all('td')
-        if not cols:
-            continue
-        link = cols[0].find('a')
-        href = link.get('href', '') if link else ''
-        href_str = str(href)
-        comp_id = None
-        m = re.search(r"/(\d+)", href_str)
-        if m:
-            comp_id = m.group(1)
-        name = link.get_text(strip=True) if link is not None else cols[0].get_text(strip=True) or ''
-        raw_date = cols[1].get_text(strip=True) if len(cols) > 1 and getattr(cols[1], 'get_text', None) else ''
-        date = raw_date
-        try:
-            if raw_date:
-                # Handle ranges like '01/01/26 - 12/31/26'
-                if '-' in raw_date:
-                    parts = [p.strip() for p in raw_date.split('-')]
-                    norm_parts = [normalize_date_string(p, prefer_month_first=True) for p in parts]
-                    date = ' - '.join(n for n in norm_parts if n)
-                else:
-                    date = normalize_date_string(raw_date, prefer_month_first=True)
-        except Exception:
-            date = raw_date
-        tier = cols[2].get_text(strip=True) if len(cols) > 2 and getattr(cols[2], 'get_text', None) else ''
-        location = cols[3].get_text(strip=True) if len(cols) > 3 and getattr(cols[3], 'get_text', None) else ''
-        kind = None
-        if pair_re.search(name) or pair_re.search(location) or pair_re.search(tier):
-            kind = 'PARIKISA'
-        elif weekly_re.search(name) or weekly_re.search(location) or weekly_re.search(tier):
-            kind = 'VIIKKOKISA'
-        # build absolute URL when href is present
-        url = ''
-        if href_str:
-            try:
-                url = urllib.parse.urljoin('https://discgolfmetrix.com', href_str)
-            except Exception:
-                url = href_str
-        results.append({'id': comp_id, 'title': name, 'tier': tier, 'date': date, 'location': location, 'kind': kind, 'url': url})
-
-# dedupe
-seen = set()
-unique = []
-for r in results:
-    cid = r.get('id') or r.get('title')
-    if cid in seen:
-        continue
-    seen.add(cid)
-    unique.append(r)
-# If area filter is used, default entries without an explicit kind to VIIKKOKISA
-if AREA and unique:
-    for r in unique:
-        if not r.get('kind'):
-            # Default any unclassified area result to weekly
-            r['kind'] = 'VIIKKOKISA'
-
-logger.info("Parsed %d entries (gridlist/table) in %s", len(unique), AREA)
-# show counts by kind
-from collections import Counter
-kcounts = Counter([r.get('kind') or 'OTHER' for r in unique])
-logger.info('Counts by kind: %s', dict(kcounts))
-
-# Report how many were defaulted to VIIKKOKISA and save them
-wk_count = sum(1 for r in unique if r.get('kind') == 'VIIKKOKISA')
-logger.info("VIIKKOKISA after defaulting: %d", wk_count)
-try:
-    # Persist using centralized data_store (keeps filename VIIKKOKISA.json by default)
-    entries = [r for r in unique if r.get('kind') == 'VIIKKOKISA']
-    data_store.save_category('VIIKKOKISA', entries)
-except Exception as e:
-    logger.exception('Failed to save VIIKKOKISA.json: %s', e)
 
-WEEKLY_VERBOSE = os.environ.get('WEEKLY_VERBOSE', '0') == '1'
-if WEEKLY_VERBOSE:
-    for r in unique:
-        logger.info("- %s | %s | %s | %s | %s", r.get('id'), r.get('title'), r.get('kind'), r.get('location'), r.get('date'))
+# Luokittelu on yhteinen competition_listing-moduulin kanssa.
+weekly_re = competition_listing.weekly_re
+pair_re = competition_listing.pair_re
+PAIR_KEYWORDS = competition_listing.PAIR_KEYWORDS
+WEEKLY_KEYWORDS = competition_listing.WEEKLY_KEYWORDS
+
+
+def build_url(area: str = AREA, date1: str = DATE1, date2: str = DATE2, country: str = COUNTRY, comp_type: str = TYPE) -> str:
+    """competitions_server-haun URL (iso sivukoko nopeuden vuoksi)."""
+
+    return competition_listing.build_server_url(area or '', date1, date2, country, comp_type)
+
+
+def to_weekly_entry(e: Dict[str, Any], area: Optional[str] = AREA) -> Dict[str, Any]:
+    """Raakamerkintä (competition_listing.parse_entries) VIIKKOKISA-muotoon."""
+
+    kind = competition_listing.classify(e)
+    if area and not kind:
+        # Default any unclassified area result to weekly
+        kind = 'VIIKKOKISA'
+    return {
+        'id': e.get('id'),
+        'title': e.get('title'),
+        'tier': e.get('tier'),
+        'date': competition_listing.normalized_date(e),
+        'location': e.get('location'),
+        'kind': kind,
+        'url': e.get('url'),
+    }
+
+
+def parse_listing(html: str, area: Optional[str] = AREA) -> List[Dict[str, Any]]:
+    """Parsii listasivun kilpailut (gridlist + taulukkorivit) ja luokittelee ne.
+
+    Jos ``area`` on annettu, luokittelemattomat merkinnät oletetaan
+    viikkokisoiksi kuten ennenkin.
+    """
+
+    return [to_weekly_entry(e, area) for e in competition_listing.parse_entries(html)]
+
+
+def search_weekly(
+    area: Optional[str] = None,
+    date1: Optional[str] = None,
+    date2: Optional[str] = None,
+    comp_type: Optional[str] = None,
+    country: Optional[str] = None,
+    session: Any = None,
+    timeout: int = 20,
+) -> List[Dict[str, Any]]:
+    """Hae ja parsi kaikki alueen kilpailut (kaikki luokitukset).
+
+    Parametrit, joita ei anneta, otetaan ympäristömuuttujista
+    (WEEKLY_LOCATION, WEEKLY_DATE1/2, WEEKLY_TYPE, WEEKLY_COUNTRY).
+    ``session`` on HTTP-asiakas, jolla on requests-yhteensopiva get();
+    oletuksena requests-moduuli.
+    """
+
+    area = AREA if area is None else area
+    url = build_url(
+        area,
+        DATE1 if date1 is None else date1,
+        DATE2 if date2 is None else date2,
+        COUNTRY if country is None else country,
+        TYPE if comp_type is None else comp_type,
+    )
+    http = session if session is not None else requests
+
+    logger.info('URL: %s', url)
+    start = time.perf_counter()
+    resp = http.get(url, timeout=timeout, headers=HEADERS)
+    elapsed = time.perf_counter() - start
+    logger.info("HTTP fetch time: %.2fs, status: %s", elapsed, resp.status_code)
+    try:
+        resp.encoding = resp.apparent_encoding
+    except Exception:
+        pass
+
+    unique = parse_listing(resp.text or '', area)
+    logger.info("Parsed %d entries (gridlist/table) in %s", len(unique), area)
+    # show counts by kind
+    kcounts = Counter([r.get('kind') or 'OTHER' for r in unique])
+    logger.info('Counts by kind: %s', dict(kcounts))
+    if WEEKLY_VERBOSE:
+        for r in unique:
+            logger.info("- %s | %s | %s | %s | %s", r.get('id'), r.get('title'), r.get('kind'), r.get('location'), r.get('date'))
+    return unique
+
+
+def find_weekly(**kwargs: Any) -> List[Dict[str, Any]]:
+    """Palauta vain viikkokisat (kind == VIIKKOKISA); argumentit kuten search_weekly."""
+
+    entries = [r for r in search_weekly(**kwargs) if r.get('kind') == 'VIIKKOKISA']
+    # Report how many were defaulted to VIIKKOKISA
+    logger.info("VIIKKOKISA after defaulting: %d", len(entries))
+    return entries
+
+
+def save_weekly_list(entries: List[Dict[str, Any]]) -> None:
+    try:
+        # Persist using centralized data_store (keeps filename VIIKKOKISA.json by default)
+        data_store.save_category('VIIKKOKISA', entries)
+    except Exception as e:
+        logger.exception('Failed to save VIIKKOKISA.json: %s', e)
+
+
+def main() -> None:
+    save_weekly_list(find_weekly())
+    logger.info('Done.')
+
 
-logger.info('Done.')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Samanaikaisten identtisten hakujen yhdistäminen (single-flight).
+
+Kun useampi käyttäjä ajaa ``!kisa``-, ``!viikkarit``- tai ``!tulokset kisa``
+-komennon lähes yhtä aikaa, jokainen kutsu haki samat Metrix-sivut
+erikseen. ``coalesce``-dekoraattori avaimella (operaatio, normalisoitu URL)
+ohjaa samanaikaiset kutsujat odottamaan yhtä käynnissä olevaa hakua ja
+jakaa sen tuloksen. Valmis tulos pidetään lyhyen ajan (TTL) muistissa,
+joten peräkkäisetkin kutsut samassa kanavakeskustelussa osuvat siihen.
+
+Lukitus on säiepohjainen, koska haut ajetaan scrape_executor- ja
+ajastinsäikeissä. Kutsujat saavat tuloksesta oman kopionsa.
+"""
+
+import copy
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import settings
+except Exception:  # pragma: no cover
+    settings = None
+
+try:
+    from . import metrics
+except Exception:  # pragma: no cover
+    metrics = None  # type: ignore[assignment]
+
+
+DEFAULT_TTL = float(getattr(settings, "SINGLE_FLIGHT_TTL_SECONDS", 30)) if settings is not None else 30.0
+
+
+def normalize_url(url: Any) -> str:
+    """Sama sivu samaksi avaimeksi: pienet kirjaimet hostissa, ei fragmenttia,
+    ei loppukauttaviivaa, kyselyparametrit järjestettyinä."""
+
+    text = str(url or "").strip()
+    try:
+        parts = urlsplit(text)
+    except Exception:
+        return text
+    if not parts.scheme and not parts.netloc:
+        return text.rstrip("/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, query, ""))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str], _Call] = {}
+        self._results: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self.hits = 0
+        self.shared = 0
+        self.misses = 0
+
+    def do(
+        self,
+        key: Tuple[str, str],
+        func: Callable[[], Any],
+        ttl: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            now = time.monotonic()
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > now:
+                self.hits += 1
+                return copy.deepcopy(cached[1])
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            waited = time.perf_counter()
+            call.done.wait()
+            if metrics is not None:
+                # Odotus ei ole tämän haun HTTP- eikä jäsennysaikaa.
+                metrics.record_wait(time.perf_counter() - waited)
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if call.error is None and ttl > 0 and (cache_if is None or cache_if(call.result)):
+                    now = time.monotonic()
+                    self._results[key] = (now + ttl, copy.deepcopy(call.result))
+                    for k in [k for k, (exp, _) in self._results.items() if exp <= now]:
+                        del self._results[k]
+            call.done.set()
+        return call.result
+
+    def forget(self, operation: Optional[str] = None, url: Any = None) -> None:
+        """Unohda välimuistitetut tulokset (kaikki, operaation tai yhden URL:n)."""
+
+        with self._lock:
+            if operation is None:
+                self._results.clear()
+                return
+            norm = normalize_url(url) if url is not None else None
+            for k in list(self._results):
+                if k[0] == operation and (norm is None or k[1] == norm):
+                    del self._results[k]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared": self.shared,
+                "misses": self.misses,
+                "inflight": len(self._inflight),
+                "cached": len(self._results),
+            }
+
+
+_GROUP = SingleFlight()
+
+
+def get_group() -> SingleFlight:
+    return _GROUP
+
+
+def coalesce(operation: str, ttl: Optional[float] = None, cache_if: Optional[Callable[[Any], bool]] = None):
+    """Dekoraattori funktioille, joiden ensimmäinen argumentti on URL.
+
+    Muut argumentit (esim. timeout) eivät vaikuta avaimeen.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(url: Any, *args: Any, **kwargs: Any) -> Any:
+            key = (operation, normalize_url(url))
+            return _GROUP.do(key, lambda: func(url, *args, **kwargs), ttl=ttl, cache_if=cache_if)
+
+        wrapper.uncoalesced = func  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
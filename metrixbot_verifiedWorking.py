@@ -5,10 +5,8 @@ import threading
 import requests
 import logging
 import re
-import csv
 from datetime import datetime, date, timedelta
 from typing import Optional
-import traceback
 import socket
 import sys
 
@@ -31,9 +29,17 @@ except Exception:
     print(f'Another MetrixBot instance appears to be running (port {SINGLE_INSTANCE_PORT} in use); exiting.')
     sys.exit(0)
 
-# Configure structured logging similar to discord.py examples
+# Configure structured logging similar to discord.py examples.
+# Records go through a queue to a background writer (console + rotating
+# JSON-lines file logs/bot.log), so logging never blocks the gateway loop.
 LOG_FMT = "%(asctime)s %(levelname)-8s %(name)s %(message)s"
-logging.basicConfig(level=logging.INFO, format=LOG_FMT)
+try:
+    from komento_koodit import bot_logging as kk_logging
+    kk_logging.setup()
+except Exception as e:
+    logging.basicConfig(level=logging.INFO, format=LOG_FMT)
+    logging.getLogger(__name__).warning('Queue logging unavailable, using basicConfig: %s', e)
+logger = logging.getLogger('metrixbot')
 # Keep discord related loggers at INFO level
 logging.getLogger('discord').setLevel(logging.INFO)
 logging.getLogger('discord.client').setLevel(logging.INFO)
@@ -59,6 +65,28 @@ try:
     from komento_koodit import data_store as kk_data_store
 except Exception:
     kk_data_store = None
+try:
+    from komento_koodit import disc_catalog as kk_disc_catalog
+except Exception:
+    kk_disc_catalog = None
+try:
+    from komento_koodit import competition_changes as kk_changes
+except Exception:
+    kk_changes = None
+from komento_koodit.date_utils import date_key
+try:
+    from komento_koodit import scheduler as kk_scheduler
+except Exception:
+    kk_scheduler = None
+try:
+    from komento_koodit import gateway as kk_gateway
+except Exception:
+    kk_gateway = None
+try:
+    from komento_koodit import discord_rest as kk_rest
+except Exception:
+    kk_rest = None
+from komento_koodit import embed_layout as kk_embed_layout
 
 # Configuration values (fall back to env when not provided in settings)
 DISCORD_TOKEN = getattr(S, 'DISCORD_TOKEN', os.environ.get('DISCORD_TOKEN'))
@@ -82,6 +110,9 @@ AUTO_LIST_INTERVAL = int(getattr(S, 'AUTO_LIST_INTERVAL', os.environ.get('AUTO_L
 CHECK_INTERVAL = int(getattr(S, 'CHECK_INTERVAL', os.environ.get('CHECK_INTERVAL', '600')))
 CHECK_REGISTRATION_INTERVAL = int(getattr(S, 'CHECK_REGISTRATION_INTERVAL', os.environ.get('CHECK_REGISTRATION_INTERVAL', '3600')))
 CURRENT_CAPACITY_INTERVAL = CHECK_INTERVAL
+# Muuttumattoman kilpailun ilmoittautumistilanne tarkistetaan uudelleen vasta
+# näin monen tunnin jälkeen; muuttuneet (competition_changes) tarkistetaan aina.
+REGISTRATION_RECHECK_HOURS = float(getattr(S, 'REGISTRATION_RECHECK_HOURS', os.environ.get('REGISTRATION_RECHECK_HOURS', '6')))
 
 # Päivittäisen digestin viimeisin ajopäivä (päivitetään daemon-loopissa).
 # Tämä tuodaan globaaliksi, jotta admin-komennot voivat tarvittaessa
@@ -119,37 +150,9 @@ def _format_date_field(raw_date: str) -> str:
     Jos DISCORD_DATE_FORMAT == 'DDMMYYYY', palautetaan ilman erottimia
     muodossa DDMMYYYY. Muuten käytetään 'DD/MM/YYYY'.
     """
-    if not raw_date:
-        return ''
-    # Etsi ensimmäinen "MM/DD/YY"-tyyppinen päivämääräteksti.
-    m = re.search(r'(\d{1,2})/(\d{1,2})/(\d{2,4})', raw_date)
-    if m:
-        mo, d, y = m.groups()  # Metrix antaa muodossa MM/DD/YY → vaihdetaan paikkaa
-        if len(y) == 2:
-            y = '20' + y
-        d = d.zfill(2)
-        mo = mo.zfill(2)
-        # ALWAYS return in DD.MM.YYYY format as requested
-        return f"{d}.{mo}.{y}"
-
-    # Kokeile myös eurooppalaista DD.MM.YYYY -muotoa
-    m2 = re.search(r'(\d{1,2})\.(\d{1,2})\.(\d{4})', raw_date)
-    if m2:
-        d, mo, y = m2.groups()
-        d = d.zfill(2)
-        mo = mo.zfill(2)
-        return f"{d}.{mo}.{y}"
-
-    # Lopuksi koetetaan ISO-tyyppinen YYYY-MM-DD
-    m3 = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', raw_date)
-    if m3:
-        y, mo, d = m3.groups()
-        d = d.zfill(2)
-        mo = mo.zfill(2)
-        return f"{d}.{mo}.{y}"
-
-    # Jos ei osunut mihinkään tunnistettuun muotoon, palauta tyhjä merkkijono
-    return ''
+    # Sama normalisointi kuin kilpailujen vertailuavaimissa (date_utils.date_key):
+    # MM/DD/YY(YY), DD.MM.YYYY tai YYYY-MM-DD → DD.MM.YYYY, muuten ''.
+    return date_key(raw_date)
 
 
 def _load_dotenv(path='.env'):
@@ -166,74 +169,93 @@ def _load_dotenv(path='.env'):
             os.environ.setdefault(k.strip(), v.strip())
 
 
-def post_to_discord(thread_id: str, token: str, content: str) -> bool:
-    if not token or not thread_id:
-        print('Discord token or thread id missing; skipping post')
+def _post_via_gateway(thread_id: str, content: Optional[str] = None, embeds: Optional[list] = None) -> bool:
+    """Postaa jaetun gateway-clientin kautta, jos se on yhdistetty.
+
+    True myös, kun lähetyksen tulos jäi tuntemattomaksi (SEND_UNKNOWN), jotta
+    kutsuja ei postaa samaa viestiä uudelleen REST-rajapinnan kautta.
+    """
+    gw = kk_gateway.current() if kk_gateway is not None else None
+    if gw is None:
         return False
+    ok = gw.send(thread_id, content=content, embeds=embeds)
+    if ok == kk_gateway.SEND_UNKNOWN:
+        # The send may still complete; a REST fallback could post it twice.
+        logger.warning('Gateway post timed out; not falling back to REST', extra={'thread': thread_id})
+        return True
+    if ok:
+        logger.info('Posted to Discord thread via gateway', extra={'thread': thread_id})
+    return bool(ok)
+
+
+def _rest_post(thread_id: str, token: str, payload: dict, tag: str):
+    """REST-postaus rate limit -tietoisen asiakkaan kanavajonon kautta."""
+    if kk_rest is not None:
+        return kk_rest.get_client(token).send_message(thread_id, payload)
     url = f'https://discord.com/api/v10/channels/{thread_id}/messages'
     headers = {'Authorization': f'Bot {token}', 'Content-Type': 'application/json'}
-    payload = {'content': content}
-    # Verbose logging
     try:
-        safe_token = token[:6] + '...' if token else '(none)'
-        print(f'[POST] Discord -> url={url} thread={thread_id} token={safe_token} payload_len={len(content)}')
-        r = requests.post(url, headers=headers, json=payload, timeout=15)
-        print(f'[POST] Response status: {r.status_code}')
-        try:
-            txt = r.text
-            print(f'[POST] Response text (truncated): {txt[:400]}')
-        except Exception:
-            pass
-        if r.status_code in (200, 201):
-            print('Posted summary to Discord thread', thread_id)
-            return True
-        else:
-            print('Discord post failed:', r.status_code)
-            return False
+        return requests.post(url, headers=headers, json=payload, timeout=15)
     except Exception as e:
-        print('Discord post exception:', e)
-        traceback.print_exc()
+        logger.warning('Discord post exception: %s', e, extra={'tag': tag, 'thread': thread_id})
+        return None
+
+
+def post_to_discord(thread_id: str, token: str, content: str) -> bool:
+    if not token or not thread_id:
+        logger.warning('Discord token or thread id missing; skipping post')
         return False
+    # Yli 2000 merkin viestit lähetetään riveittäin pilkottuina.
+    parts = kk_embed_layout.split_text(content)
+    return all([_post_text_part(thread_id, token, part) for part in parts])
+
+
+def _post_text_part(thread_id: str, token: str, content: str) -> bool:
+    if _post_via_gateway(thread_id, content=content):
+        return True
+    r = _rest_post(thread_id, token, {'content': content}, 'POST')
+    if r is not None and r.status_code in (200, 201):
+        logger.info('Posted summary to Discord thread', extra={'thread': thread_id, 'chars': len(content)})
+        return True
+    if r is not None:
+        logger.warning('Discord post failed', extra={'thread': thread_id, 'status': r.status_code, 'body': (r.text or '')[:200]})
+    return False
 
 
 def post_embeds_to_discord(thread_id: str, token: str, embeds: list) -> bool:
-    """Post embeds array to a channel/thread. Falls back to text if embeds are rejected."""
+    """Post embeds array to a channel/thread. Falls back to text if embeds are rejected.
+
+    Embedit ryhmitellään viesteiksi Discordin rajojen mukaan (≤10 embediä,
+    ≤6000 merkkiä per viesti; ks. komento_koodit.embed_layout).
+    """
     if not token or not thread_id:
-        print('Discord token or thread id missing; skipping post')
+        logger.warning('Discord token or thread id missing; skipping post')
         return False
-    url = f'https://discord.com/api/v10/channels/{thread_id}/messages'
-    headers = {'Authorization': f'Bot {token}', 'Content-Type': 'application/json'}
-    payload = {'embeds': embeds}
+    batches = kk_embed_layout.batch_embeds(embeds)
+    return all([_post_embed_batch(thread_id, token, batch) for batch in batches])
+
+
+def _post_embed_batch(thread_id: str, token: str, embeds: list) -> bool:
+    if _post_via_gateway(thread_id, embeds=embeds):
+        return True
+    r = _rest_post(thread_id, token, {'embeds': embeds}, 'POST-EMBED')
+    if r is not None and r.status_code in (200, 201):
+        logger.info('Posted embeds to Discord thread', extra={'thread': thread_id, 'embeds': len(embeds)})
+        return True
+    if r is None:
+        return False
+    logger.warning('Embed post failed', extra={'thread': thread_id, 'status': r.status_code, 'body': (r.text or '')[:200]})
+    # fallback: try to post plain text combining embed descriptions
     try:
-        safe_token = token[:6] + '...' if token else '(none)'
-        print(f'[POST-EMBED] Discord -> url={url} thread={thread_id} token={safe_token} embeds={len(embeds)}')
-        r = requests.post(url, headers=headers, json=payload, timeout=15)
-        print(f'[POST-EMBED] Response status: {r.status_code}')
-        try:
-            print(f'[POST-EMBED] Response text (truncated): {r.text[:400]}')
-        except Exception:
-            pass
-        if r.status_code in (200, 201):
-            print('Posted embeds to Discord thread', thread_id)
-            return True
-        else:
-            print('Embed post failed, status', r.status_code)
-            # fallback: try to post plain text combining embed descriptions
-            try:
-                combined = []
-                for e in embeds:
-                    title = e.get('title', '')
-                    desc = e.get('description', '')
-                    combined.append(f"**{title}**\n{desc}")
-                print('[POST-EMBED] Falling back to plain text post')
-                return post_to_discord(thread_id, token, "\n\n".join(combined))
-            except Exception as e:
-                print('Fallback post exception:', e)
-                traceback.print_exc()
-                return False
+        combined = []
+        for e in embeds:
+            title = e.get('title', '')
+            desc = e.get('description', '')
+            combined.append(f"**{title}**\n{desc}" if title else desc)
+        logger.info('Falling back to plain text post', extra={'thread': thread_id})
+        return post_to_discord(thread_id, token, "\n\n".join(combined))
     except Exception as e:
-        print('Discord embed post exception:', e)
-        traceback.print_exc()
+        logger.exception('Fallback post exception: %s', e)
         return False
 
 
@@ -346,8 +368,26 @@ def post_startup_capacity_alerts(base_dir: str, token: Optional[str]):
         print('Failed to post startup capacity summary; check target ID and bot permissions')
     except Exception as e:
         print('Exception posting startup capacity summary:', e)
-def run_once():
-    # Import modules from komento_koodit (entinen hyvat_koodit)
+def run_once(check_registrations=False, capacity_scan=False):
+    """Fetch all competition listings and post the daily digest.
+
+    The independent scrapes run concurrently as a small dependency graph
+    (komento_koodit.pipeline); downstream steps get the lists in memory:
+
+        pdga ───┬─> changes ─> digest ─> registrations ─> capacity
+        weekly ─┤
+        doubles ┘
+        weekly_areas (own output only)
+
+    The digest is posted as soon as the lists are in; its registration and
+    capacity suffixes come from the previous scan. ``check_registrations``
+    adds the registration check (posts open registrations, writes
+    pending_registration) and ``capacity_scan`` the capacity scan that reads
+    it; both run after the digest. A failed list stage falls back to the last
+    stored list (shown in the digest, never posted as new or written to the
+    known_* caches). Stage durations are printed and stored in the
+    RUN_ONCE_STAGES category.
+    """
     global RUN_ONCE_LOCK
     if RUN_ONCE_LOCK is None:
         try:
@@ -358,75 +398,250 @@ def run_once():
     if RUN_ONCE_LOCK is not None and not RUN_ONCE_LOCK.acquire(blocking=False):
         print('run_once already in progress; skipping duplicate invocation')
         return
+    try:
+        return _run_once_pipeline(check_registrations, capacity_scan)
+    finally:
+        if RUN_ONCE_LOCK is not None and RUN_ONCE_LOCK.locked():
+            RUN_ONCE_LOCK.release()
+
+
+def _record_run_once_stages(run):
+    """Print and store per-stage durations of run_once (last 14 runs)."""
+    digest_seconds = run.durations.get('digest', 0.0)
+    print('run_once vaiheet ' + run.summary())
+    if kk_data_store is None:
+        return
+    try:
+        history = kk_data_store.load_category('RUN_ONCE_STAGES')
+        if not isinstance(history, list):
+            history = []
+        history.append({
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'total_s': round(run.total, 2),
+            'stages_s': {k: round(v, 2) for k, v in run.durations.items()},
+            'digest_s': round(digest_seconds, 2),
+            'errors': sorted(run.errors),
+        })
+        kk_data_store.save_category('RUN_ONCE_STAGES', history[-14:])
+    except Exception:
+        pass
+
+
+def _run_once_pipeline(check_registrations=False, capacity_scan=False):
+    # Import modules from komento_koodit (entinen hyvat_koodit)
     import komento_koodit.search_pdga_sfl as pdga_mod
     # Import tulokset module for competition result parsing and club detection
     import komento_koodit.commands_tulokset as tulokset_mod
-    # Importing weekly module executes it and writes VIIKKOKISA.json
-    import komento_koodit.search_weekly_fast as weekly_mod
     # Seutu-viikkarit (EP + naapurimaakunnat) kirjoitetaan erilliseen JSONiin
     import komento_koodit.search_weekly_areas as weekly_areas_mod
     import komento_koodit.search_pari_EP2025 as pari_mod
+    import komento_koodit.search_weekly_fast as weekly_mod
+    import komento_koodit.competition_listing as listing_mod
+    from komento_koodit.pipeline import Stage, run_pipeline
 
     base_dir = os.path.abspath(os.path.dirname(__file__))
 
-    # PDGA: fetch competitions and save PDGA.json
-    try:
-        comps = pdga_mod.fetch_competitions(pdga_mod.DEFAULT_URL)
-        pdga_entries = [c for c in comps if pdga_mod.is_pdga_entry(c)]
-        out_pdga = os.path.join(base_dir, 'PDGA.json')
+    def _save(category, entries, fallback):
         # prefer sqlite-backed store when available
         try:
             if kk_data_store is not None:
-                kk_data_store.save_category('PDGA', pdga_entries)
-            else:
-                pdga_mod.save_pdga_list(pdga_entries, out_pdga)
+                kk_data_store.save_category(category, entries)
+                return
         except Exception:
-            pdga_mod.save_pdga_list(pdga_entries, out_pdga)
-    except Exception as e:
-        print('PDGA step failed:', e)
+            pass
+        fallback(entries)
 
-    # Weekly: module import already attempted to save VIIKKOKISA.json; if not present, try to trigger explicitly
-    out_weekly = os.path.join(base_dir, 'VIIKKOKISA.json')
-    if not os.path.exists(out_weekly):
-        # nothing else to call; inform user
-        print('VIIKKOKISA.json not found after import of weekly script')
+    # PDGA: fetch competitions and save PDGA.json
+    def stage_pdga():
+        comps = pdga_mod.fetch_competitions(pdga_mod.DEFAULT_URL)
+        pdga_entries = [c for c in comps if pdga_mod.is_pdga_entry(c)]
+        _save('PDGA', pdga_entries, lambda e: pdga_mod.save_pdga_list(e, os.path.join(base_dir, 'PDGA.json')))
+        return pdga_entries
+
+    # Alueiden kilpailulistat haetaan kerran (rinnakkain); viikkarit,
+    # seutu-viikkarit ja parikisat erotellaan samasta tuloksesta.
+    def stage_listings():
+        snap = listing_mod.fetch_snapshot(seutu_areas=weekly_areas_mod.AREAS)
+        print('Kilpailulistat:', snap.summary())
+        return snap
+
+    def _require_weekly_area(snap):
+        # Älä korvaa tallennettua listaa tyhjällä, jos alueen haku epäonnistui.
+        if snap is None:
+            raise RuntimeError('kilpailulistaa ei saatu')
+        if snap.weekly_area in snap.errors:
+            raise snap.errors[snap.weekly_area]
+
+    # Weekly: fresh VIIKKOKISA list on every run
+    def stage_weekly(listings):
+        _require_weekly_area(listings)
+        weekly = listings.weekly()
+        weekly_mod.save_weekly_list(weekly)
+        return weekly
+
+    # Seutu-viikkarit → VIIKKARIT_SEUTU (kaikki alueet epäonnistuivat → ei tallenneta)
+    def stage_weekly_areas(listings):
+        if listings is None or not listings.by_area:
+            raise RuntimeError('kilpailulistaa ei saatu')
+        return weekly_areas_mod.main(listings)
+
+    # Doubles: save DOUBLES.json
+    def stage_doubles(listings):
+        _require_weekly_area(listings)
+        doubles = listings.doubles()
+        _save('DOUBLES', doubles, lambda e: pari_mod.save_doubles_list(e, os.path.join(base_dir, 'DOUBLES.json')))
+        return doubles
+
+    # Muutossyöte: vertaa listoja edelliseen hakuun (None = ei vertailua tällä kertaa)
+    def stage_changes(pdga, weekly, doubles):
+        if kk_changes is None:
+            return {}
+        out = {}
+        for category, entries in (('PDGA', pdga), ('VIIKKOKISA', weekly), ('DOUBLES', doubles)):
+            out[category] = kk_changes.diff_snapshot(category, entries) if entries is not None else None
+            if out[category]:
+                logger.info(
+                    'kilpailumuutokset %s: %s', category,
+                    ', '.join(f"{c['change']} {c['comp_id']}" for c in out[category][:20]),
+                )
+        return out
+
+    # Epäonnistunut vaihe (tulos None): yhteenvedossa näytetään viimeksi
+    # tallennettu lista, eikä kategoriasta julkaista uusia kisoja tai
+    # ylikirjoiteta known_*-tiedostoa.
+    def stage_digest(pdga, weekly, doubles, changes):
+        lists = {}
+        stale = set()
+        for category, entries in (('PDGA', pdga), ('VIIKKOKISA', weekly), ('DOUBLES', doubles)):
+            if entries is None:
+                stale.add(category)
+                entries = _stored_competitions(base_dir, category)
+                logger.warning('%s: haku epäonnistui, yhteenvedossa tallennettu lista (%d kpl)', category, len(entries))
+            lists[category] = entries
+        posted = _post_run_once_digest(
+            base_dir,
+            tulokset_mod,
+            lists['PDGA'],
+            lists['VIIKKOKISA'],
+            lists['DOUBLES'],
+            changes=changes or {},
+            stale=stale,
+        )
+        _commit_competition_snapshots({'pdga': pdga, 'weekly': weekly, 'doubles': doubles, 'changes': changes}, posted)
+        return posted
+
+    def stage_registrations(pdga, weekly, changes, digest):
+        # Epäonnistunut lista korvataan tallennetulla, jotta pending_registration
+        # ei menetä sen kilpailuja.
+        if pdga is None:
+            pdga = _stored_competitions(base_dir, 'PDGA')
+        if weekly is None:
+            weekly = _stored_competitions(base_dir, 'VIIKKOKISA')
+        if not pdga and not weekly:
+            raise RuntimeError('kilpailulistoja ei saatu; pending_registrationia ei päivitetty')
+        comps = list(pdga or [])
+        for c in weekly or []:
+            c = dict(c)
+            c.setdefault('kind', 'VIIKKOKISA')
+            comps.append(c)
+        changed = set()
+        if kk_changes is not None:
+            for events in (changes or {}).values():
+                changed |= kk_changes.ids_with(events) or set()
+        _run_registration_check_once(base_dir, competitions=comps, changed_ids=changed)
+        return len(comps)
+
+    def stage_capacity(registrations=None, digest=None):
+        if check_registrations and registrations is None:
+            raise RuntimeError('ilmoittautumistarkistus epäonnistui; kapasiteettiskannaus ohitettu')
+        _run_capacity_scan_and_alerts_once(base_dir)
+
+    stages = [
+        Stage('pdga', stage_pdga),
+        Stage('listings', stage_listings),
+        Stage('weekly', stage_weekly, deps=('listings',)),
+        Stage('weekly_areas', stage_weekly_areas, deps=('listings',)),
+        Stage('doubles', stage_doubles, deps=('listings',)),
+        Stage('changes', stage_changes, deps=('pdga', 'weekly', 'doubles')),
+        Stage('digest', stage_digest, deps=('pdga', 'weekly', 'doubles', 'changes')),
+    ]
+    if check_registrations:
+        stages.append(Stage('registrations', stage_registrations, deps=('pdga', 'weekly', 'changes', 'digest')))
+    if capacity_scan:
+        stages.append(Stage('capacity', stage_capacity, deps=('registrations',) if check_registrations else ('digest',)))
+
+    run = run_pipeline(stages, max_workers=len(stages))
+    for name, label in (('pdga', 'PDGA step failed:'), ('listings', 'Kilpailulistojen haku epäonnistui:'), ('weekly', 'Weekly step failed:'), ('weekly_areas', 'Seutu-viikkareiden haku (VIIKKARIT_SEUTU) epäonnistui:'), ('doubles', 'Doubles step failed:')):
+        if name in run.errors:
+            print(label, run.errors[name])
+
+    _record_run_once_stages(run)
+    return run
+
+
+def _commit_competition_snapshots(results, posted):
+    """Tallenna listojen tila vasta julkaisun jälkeen.
+
+    ``results`` sisältää vaiheiden pdga/weekly/doubles/changes tulokset.
+    Jos kategorian julkaisu epäonnistui, tilaa ei päivitetä, joten sen
+    muutokset (myös "added") havaitaan uudelleen seuraavalla ajolla.
+    """
+    if kk_changes is None:
+        return
+    changes = results.get('changes') or {}
+    for category, stage in (('PDGA', 'pdga'), ('VIIKKOKISA', 'weekly'), ('DOUBLES', 'doubles')):
+        events = changes.get(category)
+        entries = results.get(stage)
+        if events is None or entries is None:
+            continue
+        if events and not (posted or {}).get(category):
+            logger.warning('kilpailumuutokset %s: julkaisu epäonnistui, tilaa ei päivitetty', category)
+            continue
+        kk_changes.commit_snapshot(category, entries, events)
 
-    # Seutu-viikkarit: ajetaan erillinen hakuskripti, joka kirjoittaa VIIKKARIT_SEUTU.json
-    try:
-        weekly_areas_mod.main()
-    except Exception as e:
-        print('Seutu-viikkareiden haku (VIIKKARIT_SEUTU) epäonnistui:', e)
 
-    # Doubles: call function and save DOUBLES.json
+def _stored_competitions(base_dir, category):
+    """Last saved competition list of PDGA/VIIKKOKISA/DOUBLES ([] if none)."""
     try:
-        doubles = pari_mod.find_doubles()
-        try:
-            if kk_data_store is not None:
-                kk_data_store.save_category('DOUBLES', doubles)
-            else:
-                pari_mod.save_doubles_list(doubles, os.path.join(base_dir, 'DOUBLES.json'))
-        except Exception:
-            pari_mod.save_doubles_list(doubles, os.path.join(base_dir, 'DOUBLES.json'))
-    except Exception as e:
-        print('Doubles step failed:', e)
+        if kk_data_store is not None:
+            data = kk_data_store.load_category(category)
+        else:
+            with open(os.path.join(base_dir, f'{category}.json'), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+    except Exception:
+        data = None
+    return data if isinstance(data, list) else []
 
-    # Summarize outputs
-    def _read_json(path):
-        try:
-            if kk_data_store is not None:
-                return kk_data_store.load_category(os.path.basename(path)) or []
-        except Exception:
-            pass
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return []
 
-    pdga_list = _read_json(os.path.join(base_dir, 'PDGA.json'))
-    weekly_list = _read_json(os.path.join(base_dir, 'VIIKKOKISA.json'))
-    doubles_list = _read_json(os.path.join(base_dir, 'DOUBLES.json'))
+def _write_known_file(base_dir, filename, entries):
+    """Overwrite a known_* cache file and notify data_store save listeners.
+
+    These caches are plain JSON files (not json_store), so save_category's
+    notification does not fire for them; !etsi answers depend on them.
+    """
+    with open(os.path.join(base_dir, filename), 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    if kk_data_store is not None:
+        kk_data_store.notify_saved(filename)
 
+
+def _post_run_once_digest(base_dir, tulokset_mod, pdga_list, weekly_list, doubles_list, changes=None, stale=()):
+    """Filter the fetched lists and post new competitions / the daily digest.
+
+    ``changes`` maps PDGA/VIIKKOKISA/DOUBLES to competition_changes events.
+    When a category has events, only its "added" items count as new; when it
+    is None (first run, failed diff) the known_* caches decide as before.
+
+    ``stale`` names categories whose fetch failed and whose list is the last
+    stored one: they are shown in the summary, but nothing is posted as new
+    and their known_* cache is left untouched.
+
+    Returns {category: bool} telling whether the new competitions and change
+    events of PDGA/VIIKKOKISA/DOUBLES were posted; the known_* cache of a
+    category is not overwritten when its post failed.
+    """
+    changes = changes or {}
+    posted = {'PDGA': True, 'VIIKKOKISA': True, 'DOUBLES': True}
     # Suodata pois pelkät "runko"-sarjat (esim. "FGK viikkarit 2026"),
     # jotta viestissä näkyvät vain varsinaiset kilpailukerrat (nuolimerkinnällä "→").
     def _is_weekly_container(item, all_items):
@@ -654,15 +869,14 @@ def run_once():
     weekly_count = len(weekly_display_list)
     doubles_count = len(doubles_list)
 
-    def fmt_pdga_list(lst, limit=20):
+    def fmt_pdga_list(lst):
+        # Ei kappalerajaa: post_to_discord pilkkoo pitkän tekstin 2000 merkin osiin.
         lines = []
-        for i, c in enumerate(lst[:limit]):
+        for c in lst:
             name = c.get('name') or c.get('title') or ''
             cid = c.get('id') or ''
             date = c.get('date') or ''
             lines.append(f"- {cid} | {name} | {date}")
-        if len(lst) > limit:
-            lines.append(f"...and {len(lst)-limit} more")
         return '\n'.join(lines) if lines else '(none)'
 
     def _shorten_series_title(raw_title: str) -> str:
@@ -871,9 +1085,10 @@ def run_once():
                     return str(item.get('id'))
                 if item.get('url'):
                     return str(item.get('url'))
-                name = item.get('name') or item.get('title') or ''
-                date = item.get('date') or ''
-                return f"{name}|{date}".strip()
+                # Sama avain kuin competition_changes.comp_key (päivä normalisoituna)
+                name = (item.get('title') or item.get('name') or '').strip()
+                raw_date = item.get('date') or item.get('start') or ''
+                return f"{name}|{date_key(str(raw_date))}".strip()
             except Exception:
                 return str(item)
 
@@ -886,6 +1101,11 @@ def run_once():
 
         known_keys = { _unique_key(x) for x in known_pdga }
         new_pdga = [c for c in pdga_display_list if _unique_key(c) not in known_keys]
+        added_pdga = kk_changes.ids_with(changes.get('PDGA'), ('added',)) if kk_changes is not None else None
+        if added_pdga is not None:
+            new_pdga = [c for c in new_pdga if _unique_key(c) in added_pdga]
+        if 'PDGA' in stale:
+            new_pdga = []
 
         pdga_detections = []
         if new_pdga:
@@ -923,11 +1143,10 @@ def run_once():
                 embed['description'] = desc or '(lisätietoja ei saatavilla)'
                 embeds.append(embed)
 
-            # Send embeds in batches of 10
+            # post_embeds_to_discord ryhmittelee embedit viesteiksi merkkirajojen mukaan
             try:
-                for i in range(0, len(embeds), 10):
-                    batch = embeds[i:i+10]
-                    post_embeds_to_discord(pdga_thread, token, batch)
+                if not post_embeds_to_discord(pdga_thread, token, embeds):
+                    raise RuntimeError('embed post failed')
                 # Mark each posted PDGA competition as published in sqlite/json_store
                 try:
                     if kk_data_store is not None:
@@ -944,9 +1163,9 @@ def run_once():
                 # Fallback to a compact text message when embed posting fails
                 try:
                     pdga_msg = f"UUSIA PDGA-KILPAILUJA LISÄTTY ({len(new_pdga)})\n\n" + fmt_pdga_list(new_pdga)
-                    post_to_discord(pdga_thread, token, pdga_msg)
+                    posted['PDGA'] = bool(post_to_discord(pdga_thread, token, pdga_msg))
                 except Exception:
-                    pass
+                    posted['PDGA'] = False
             # Try to detect Lakeus players in Top3 for any PDGA items that include a results URL
             try:
                 for it in new_pdga:
@@ -1011,9 +1230,9 @@ def run_once():
         else:
             # Ei uusia PDGA-kisoja -> lähetetään silti päivittäinen yhteenveto
             print('Ei uusia PDGA-kisoja; lähetetään päivittäinen yhteenveto Discordiin')
-            # Rakennetaan yksi embed kaikista tunnetuista PDGA-kisoista (rajataan tarvittaessa)
+            # Kaikki tunnetut PDGA-kisat pakataan merkkirajojen mukaan mahdollisimman vähiin viesteihin
             lines = []
-            for it in pdga_display_list[:40]:
+            for it in pdga_display_list:
                 name = it.get('name') or it.get('title') or ''
                 url = it.get('url') or ''
                 suffix = _capacity_suffix(it)
@@ -1021,14 +1240,13 @@ def run_once():
                     lines.append(f"• [{name}]({url}){suffix}")
                 else:
                     lines.append(f"• {name}{suffix}")
-            if len(pdga_display_list) > 40:
-                lines.append(f"...ja {len(pdga_display_list)-40} muuta PDGA-kisaa")
-            embed = {
-                'title': f'PDGA-kisat (päivittäinen yhteenveto, {len(pdga_display_list)})',
-                'description': "\n".join(lines) or '(ei kisoja)',
-                'color': 16750848
-            }
-            post_embeds_to_discord(pdga_thread, token, [embed])
+            embeds = kk_embed_layout.pack_embeds(
+                lines,
+                title=f'PDGA-kisat (päivittäinen yhteenveto, {len(pdga_display_list)})',
+                color=16750848,
+                empty_text='(ei kisoja)',
+            )
+            post_embeds_to_discord(pdga_thread, token, embeds)
             # Also try detection for listed PDGA items when no new_pdga (daily summary)
             try:
                 for it in pdga_display_list[:40]:
@@ -1112,17 +1330,19 @@ def run_once():
         except Exception:
             pass
 
-        # Persist the current list as the known cache (overwrite)
-        try:
-            with open(os.path.join(base_dir, CACHE_FILE), 'w', encoding='utf-8') as f:
-                json.dump(pdga_list, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print('Failed to update PDGA cache file:', e)
+        # Persist the current list as the known cache (overwrite), unless the
+        # new competitions could not be posted (they stay "new" for the next run)
+        if posted['PDGA'] and 'PDGA' not in stale:
+            try:
+                _write_known_file(base_dir, CACHE_FILE, pdga_list)
+            except Exception as e:
+                print('Failed to update PDGA cache file:', e)
     except Exception as e:
+        posted['PDGA'] = False
         print('Failed to build/send PDGA embeds:', e)
 
-    # Post weeklies + doubles as a single compact embed (falls back to plain text)
-    def build_weekly_embed(weeks, doubles):
+    # Post weeklies + doubles as compact embeds packed to Discord limits (falls back to plain text)
+    def build_weekly_embeds(weeks, doubles):
         # Sort weeks and doubles by parsed date (ascending). Do not remove entries; only order them.
         try:
             weeks_sorted = sorted(weeks, key=lambda w: (_parse_raw_date_to_date(w.get('date') or w.get('start') or '') or datetime.max))
@@ -1197,14 +1417,8 @@ def run_once():
 
                 lines.append(f"• {' — '.join(p for p in parts if p)}")
 
-        desc = "\n".join(lines) or '(none)'
         # Discord embed color: a neutral/blurple tone
-        embed = {
-            'title': title,
-            'description': desc,
-            'color': 5763714
-        }
-        return embed
+        return kk_embed_layout.pack_embeds(lines, title=title, color=5763714, empty_text='(none)')
 
     try:
         def _unique_key(item) -> str:
@@ -1219,12 +1433,8 @@ def run_once():
                     return str(item.get('url'))
                 name = (item.get('title') or item.get('name') or '').strip()
                 raw_date = item.get('date') or item.get('start') or ''
-                # Normalize date to consistent DD.MM.YYYY (no time) for stable keys
-                try:
-                    date_norm = _format_date_field(str(raw_date)) or ''
-                except Exception:
-                    date_norm = str(raw_date or '')
-                return f"{name}|{date_norm}".strip()
+                # Sama avain kuin competition_changes.comp_key (päivä normalisoituna)
+                return f"{name}|{date_key(str(raw_date))}".strip()
             except Exception:
                 return str(item)
 
@@ -1246,6 +1456,17 @@ def run_once():
 
         new_weeklies = [w for w in weekly_display_list if _unique_key(w) not in known_weekly_keys]
         new_doubles = [d for d in doubles_list if _unique_key(d) not in known_double_keys]
+        if kk_changes is not None:
+            added_weekly = kk_changes.ids_with(changes.get('VIIKKOKISA'), ('added',))
+            added_doubles = kk_changes.ids_with(changes.get('DOUBLES'), ('added',))
+            if added_weekly is not None:
+                new_weeklies = [w for w in new_weeklies if _unique_key(w) in added_weekly]
+            if added_doubles is not None:
+                new_doubles = [d for d in new_doubles if _unique_key(d) in added_doubles]
+        if 'VIIKKOKISA' in stale:
+            new_weeklies = []
+        if 'DOUBLES' in stale:
+            new_doubles = []
 
         # Filter out any new weeklies that already have results available on Metrix.
         # This prevents posting items like "Uusia viikkokisoja lisätty" for events
@@ -1407,11 +1628,11 @@ def run_once():
                     pass
 
         if new_weeklies or new_doubles:
-            embed = build_weekly_embed(new_weeklies, new_doubles)
-            posted = post_embeds_to_discord(weekly_thread, token, [embed])
-            if not posted:
+            weekly_posted = post_embeds_to_discord(weekly_thread, token, build_weekly_embeds(new_weeklies, new_doubles))
+            if not weekly_posted:
                 wd_msg = f"VIIKKARIT ({len(new_weeklies)}) ja PARIKISAT ({len(new_doubles)})\n\n" + fmt_weekly_and_doubles(new_weeklies, new_doubles)
-                post_to_discord(weekly_thread, token, wd_msg)
+                if not post_to_discord(weekly_thread, token, wd_msg):
+                    posted['VIIKKOKISA'] = posted['DOUBLES'] = False
             else:
                 # Mark weeklies/doubles as published in DB
                 try:
@@ -1435,35 +1656,90 @@ def run_once():
         else:
             # Ei uusia viikkokisoja/parikisoja -> lähetetään silti päivittäinen yhteenveto
             print('Ei uusia viikkokisoja tai parikisoja; lähetetään päivittäinen yhteenveto Discordiin')
-            embed = build_weekly_embed(weekly_display_list, doubles_list)
-            posted = post_embeds_to_discord(weekly_thread, token, [embed])
-            if not posted:
+            summary_posted = post_embeds_to_discord(weekly_thread, token, build_weekly_embeds(weekly_display_list, doubles_list))
+            if not summary_posted:
                 wd_msg = f"VIIKKARIT ({len(weekly_display_list)}) ja PARIKISAT ({len(doubles_list)})\n\n" + fmt_weekly_and_doubles(weekly_display_list, doubles_list)
                 post_to_discord(weekly_thread, token, wd_msg)
 
-        # Persist known weeklies/doubles (overwrite with current lists)
-        try:
-            with open(os.path.join(base_dir, KNOWN_WEEKLY_FILE), 'w', encoding='utf-8') as f:
-                json.dump(weekly_list, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print('Failed to update known weekly file:', e)
+        # Persist known weeklies/doubles (overwrite with current lists), unless
+        # the new ones could not be posted
+        if posted['VIIKKOKISA'] and 'VIIKKOKISA' not in stale:
+            try:
+                _write_known_file(base_dir, KNOWN_WEEKLY_FILE, weekly_list)
+            except Exception as e:
+                print('Failed to update known weekly file:', e)
 
-        try:
-            with open(os.path.join(base_dir, KNOWN_DOUBLES_FILE), 'w', encoding='utf-8') as f:
-                json.dump(doubles_list, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print('Failed to update known doubles file:', e)
+        if posted['DOUBLES'] and 'DOUBLES' not in stale:
+            try:
+                _write_known_file(base_dir, KNOWN_DOUBLES_FILE, doubles_list)
+            except Exception as e:
+                print('Failed to update known doubles file:', e)
     except Exception as e:
         print('Failed to build/send weekly embed:', e)
         wd_msg = f"VIIKKARIT ({weekly_count}) ja PARIKISAT ({doubles_count})\n\n" + fmt_weekly_and_doubles(weekly_list, doubles_list)
-        post_to_discord(weekly_thread, token, wd_msg)
+        if not post_to_discord(weekly_thread, token, wd_msg):
+            posted['VIIKKOKISA'] = posted['DOUBLES'] = False
+
+    try:
+        for category in _post_competition_changes(changes, token, pdga_thread, weekly_thread):
+            posted[category] = False
+    except Exception as e:
+        logger.warning('kilpailumuutosten julkaisu epäonnistui: %s', e)
+        posted = {category: False for category in posted}
+    return posted
 
 
-def _run_registration_check_once(base_dir, out_path=None):
+def _post_competition_changes(changes, token, pdga_thread, weekly_thread, limit=None):
+    """Post rescheduled/renamed/moved/removed events (added ones are posted as new).
+
+    Returns the categories whose events could not be posted.
+    """
+    failed = []
+    labels = {
+        'rescheduled': 'päivä',
+        'renamed': 'nimi',
+        'moved': 'paikka',
+    }
+    for category, thread, title in (
+        ('PDGA', pdga_thread, 'PDGA-kisojen muutokset'),
+        ('VIIKKOKISA', weekly_thread, 'Viikkokisojen muutokset'),
+        ('DOUBLES', weekly_thread, 'Parikisojen muutokset'),
+    ):
+        events = [c for c in (changes.get(category) or []) if c.get('change') != 'added']
+        if not events:
+            continue
+        lines = []
+        for c in (events[:limit] if limit else events):
+            name = c.get('title') or c.get('comp_id') or ''
+            url = c.get('url') or ''
+            name_part = f"[{name}]({url})" if url else name
+            if c.get('change') == 'removed':
+                lines.append(f"• {name_part} — poistunut listalta")
+                continue
+            old_v = c.get('old_value') or '-'
+            new_v = c.get('new_value') or '-'
+            if c.get('change') == 'rescheduled':
+                old_v = _format_date_field(old_v) or old_v
+                new_v = _format_date_field(new_v) or new_v
+            lines.append(f"• {name_part} — {labels.get(c.get('change'), c.get('change'))}: {old_v} → {new_v}")
+        if limit and len(events) > limit:
+            lines.append(f"...ja {len(events) - limit} muuta muutosta")
+        embeds = kk_embed_layout.pack_embeds(lines, title=f'{title} ({len(events)})', color=15105570)
+        if not post_embeds_to_discord(thread, token, embeds):
+            if not post_to_discord(thread, token, f"{title} ({len(events)})\n\n" + '\n'.join(lines)):
+                failed.append(category)
+    return failed
+
+
+def _run_registration_check_once(base_dir, out_path=None, competitions=None, changed_ids=None):
     """Run the registration checker once: inspect PDGA + weekly lists, write pending file,
     and call posting helpers to post new/open registrations.
     This mirrors komento_koodit.check_registration + post_pending_registration logic but
     keeps it inside this process to avoid subprocesses.
+
+    ``competitions`` lets run_once pass the freshly fetched lists in memory;
+    otherwise PDGA.json and VIIKKOKISA.json are read from disk. ``changed_ids``
+    (competition_changes keys) are always re-checked.
     """
     try:
         import komento_koodit.check_registration as reg_mod
@@ -1476,8 +1752,10 @@ def _run_registration_check_once(base_dir, out_path=None):
     weekly_path = os.path.join(base_dir, 'VIIKKOKISA.json')
     out_path = out_path or os.path.join(base_dir, REG_CHECK_FILE)
 
-    comps = []
+    comps = list(competitions or [])
     for path, label in ((pdga_path, 'PDGA'), (weekly_path, 'VIIKKOKISA')):
+        if competitions is not None:
+            break
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 lst = json.load(f)
@@ -1491,13 +1769,35 @@ def _run_registration_check_once(base_dir, out_path=None):
         except Exception as e:
             print('Failed to read competition list for registration check:', e)
 
+    # Välimuistista käytetään vain pysyviä tuloksia (ilmoittautuminen jo auki)
+    # muuttumattomille kilpailuille; suljetut ja pian avautuvat tarkistetaan
+    # aina, koska avautuminen näkyy vain kisasivun tekstistä.
     results = []
+    checked = []
+    from_cache = 0
+    max_age = REGISTRATION_RECHECK_HOURS * 3600
+    changed_ids = changed_ids or set()
     for c in comps:
+        cached = None
+        if kk_changes is not None:
+            key = kk_changes.comp_key(c)
+            if key not in changed_ids:
+                cached = kk_changes.cached_check(key, max_age)
+        if cached is not None:
+            cached['kind'] = c.get('kind') or c.get('tier') or cached.get('kind') or ''
+            results.append(cached)
+            from_cache += 1
+            continue
         try:
             r = reg_mod.check_competition(c)
             results.append(r)
+            if not str(r.get('note') or '').startswith(('error', 'http')):
+                checked.append(r)
         except Exception as e:
             print('check_competition error for', c.get('id') or c.get('name'), e)
+    if kk_changes is not None:
+        kk_changes.store_checks(checked)
+    logger.info('ilmoittautumistarkistus: %d haettu, %d välimuistista', len(results) - from_cache, from_cache)
 
     # Save pending registration file (only open or opening_soon entries)
     pending = [r for r in results if r.get('registration_open') or r.get('opening_soon')]
@@ -1572,25 +1872,20 @@ def _run_registration_check_once(base_dir, out_path=None):
     except Exception as e:
         print('Failed to post pending registrations via post_mod:', e)
 
-    # Ensure lock released
-    try:
-        if RUN_ONCE_LOCK is not None and RUN_ONCE_LOCK.locked():
-            RUN_ONCE_LOCK.release()
-    except Exception:
-        pass
+
+# Metrixiä kuormittavat työt ajetaan samassa ryhmässä peräkkäin.
+METRIX_JOB_GROUP = 'metrix'
+
+
+def _interval_job(name, func, interval_seconds, group=None, priority=10):
+    """Rekisteröi toistuva työ keskitettyyn ajastimeen (jitter ~5 %, enintään 2 min)."""
+    secs = float(interval_seconds)
+    job = kk_scheduler.Job(name, func, kk_scheduler.IntervalTrigger(secs, jitter=min(120.0, secs * 0.05)), group=group, priority=priority)
+    return kk_scheduler.get_scheduler().add_job(job)
 
 
 def start_registration_worker(base_dir, interval_seconds: int):
-    def worker():
-        while True:
-            try:
-                _run_registration_check_once(base_dir)
-            except Exception as e:
-                print('Registration worker error:', e)
-            time.sleep(max(10, int(interval_seconds)))
-    t = threading.Thread(target=worker, daemon=True)
-    t.start()
-    return t
+    return _interval_job('registrations', lambda: _run_registration_check_once(base_dir), max(10, int(interval_seconds)), group=METRIX_JOB_GROUP, priority=5)
 
 
 def _run_capacity_scan_and_alerts_once(base_dir):
@@ -1637,101 +1932,150 @@ def _run_capacity_scan_and_alerts_once(base_dir):
 
 
 def start_capacity_worker(base_dir, interval_seconds: int):
-    """Run capacity scan + alert generation periodically in background.
-    Calls `_run_capacity_scan_and_alerts_once` in a loop.
-    """
-    def worker():
-        while True:
-            try:
-                _run_capacity_scan_and_alerts_once(base_dir)
-            except Exception as e:
-                print('Capacity worker error:', e)
-            time.sleep(max(10, int(interval_seconds)))
-    t = threading.Thread(target=worker, daemon=True)
-    t.start()
-    return t
+    """Schedule capacity scan + alert generation (`_run_capacity_scan_and_alerts_once`)."""
+    return _interval_job('capacity', lambda: _run_capacity_scan_and_alerts_once(base_dir), max(10, int(interval_seconds)), group=METRIX_JOB_GROUP, priority=20)
+
+
+def _load_legacy_known_pdga_discs(base_dir):
+    """Known disc keys from the old KNOWN_PDGA_DISCS_FILE list (file or json_store)."""
+    try:
+        with open(os.path.join(base_dir, KNOWN_PDGA_DISCS_FILE), 'r', encoding='utf-8') as f:
+            data = json.load(f) or []
+            if isinstance(data, list) and data:
+                return [str(k) for k in data]
+    except Exception:
+        pass
+    if kk_data_store is not None:
+        try:
+            data = kk_data_store.load_category(KNOWN_PDGA_DISCS_FILE)
+            if isinstance(data, list):
+                return [str(k) for k in data]
+        except Exception:
+            pass
+    return []
+
+
+def _record_pdga_discs_run(status, timings, new_count, started):
+    """Print and store per-run timings of the PDGA discs worker (last 30 runs)."""
+    total = time.perf_counter() - started
+    parts = ', '.join(f'{k} {v * 1000:.0f} ms' for k, v in timings.items())
+    print(f'PDGA discs check: {status}, {new_count} new, {total * 1000:.0f} ms' + (f' ({parts})' if parts else ''))
+    if kk_data_store is None:
+        return
+    try:
+        runs = kk_data_store.load_category('pdga_discs_runs')
+        if not isinstance(runs, list):
+            runs = []
+        runs.append({
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'status': status,
+            'new': new_count,
+            'total_ms': round(total * 1000, 1),
+            'timings_ms': {k: round(v * 1000, 1) for k, v in timings.items()},
+        })
+        kk_data_store.save_category('pdga_discs_runs', runs[-30:])
+    except Exception:
+        pass
 
 
 def _check_new_pdga_discs_once(base_dir):
     """Check PDGA discs CSV export for newly approved discs and post to Discord.
 
-    Uses a local JSON file (KNOWN_PDGA_DISCS_FILE) to remember which
-    certification numbers/models have already been seen. On the very first run
-    (no known file), it will initialise the file but will NOT post anything to
+    The CSV is fetched through the local disc catalog (komento_koodit.disc_catalog),
+    which sends If-None-Match/If-Modified-Since and skips parsing when the
+    body hash is unchanged; the same table then serves !kiekko searches.
+    When the catalog has not changed since the last diff, the run ends after
+    that single conditional request.
+
+    Already seen certification numbers (or manufacturer|model keys) live in
+    the indexed pdga_known_discs table; only new keys are inserted. The old
+    KNOWN_PDGA_DISCS_FILE list is imported once. On the very first run
+    (nothing known), the table is initialised but nothing is posted to
     avoid spamming historical discs.
     """
-    url = 'https://www.pdga.com/technical-standards/equipment-certification/discs/export'
+    started = time.perf_counter()
+    timings = {}
     token = os.environ.get('DISCORD_TOKEN')
     if not token:
         print('No DISCORD_TOKEN; skipping PDGA discs check')
         return
+    if kk_disc_catalog is None:
+        print('Disc catalog unavailable; skipping PDGA discs check')
+        return
 
-    known_path = os.path.join(base_dir, KNOWN_PDGA_DISCS_FILE)
     first_run = False
-    try:
-        with open(known_path, 'r', encoding='utf-8') as f:
-            known_list = json.load(f) or []
-    except FileNotFoundError:
-        known_list = []
-        first_run = True
-    except Exception:
-        known_list = []
-
-    known_keys = set(str(k) for k in known_list)
+    if not kk_disc_catalog.known_count():
+        legacy = _load_legacy_known_pdga_discs(base_dir)
+        if legacy:
+            added = kk_disc_catalog.mark_known(legacy)
+            print('Imported', added, 'known PDGA discs from', KNOWN_PDGA_DISCS_FILE)
+        else:
+            first_run = True
 
-    try:
-        resp = requests.get(url, timeout=30)
-    except Exception as e:
-        print('Failed to fetch PDGA discs CSV:', e)
+    result = kk_disc_catalog.refresh_catalog()
+    timings.update(result.get('timings') or {})
+    status = result.get('status')
+    if status == 'error' and not result.get('rows'):
+        _record_pdga_discs_run(status, timings, 0, started)
         return
 
-    if resp.status_code != 200 or not resp.text:
-        print('PDGA discs CSV fetch returned status', resp.status_code)
+    version = kk_disc_catalog.catalog_version()
+    if status != 'updated' and not first_run and kk_disc_catalog.catalog_info().get('known_synced_version') == version:
+        _record_pdga_discs_run(status, timings, 0, started)
         return
 
-    text = resp.text
-    try:
-        rows = list(csv.DictReader(text.splitlines()))
-    except Exception as e:
-        print('Failed to parse PDGA discs CSV:', e)
-        return
+    t_diff = time.perf_counter()
+    records = result.get('records')
+    if records is None:
+        try:
+            records = kk_disc_catalog.list_discs()
+        except Exception as e:
+            print('Failed to read PDGA disc catalog:', e)
+            return
 
-    all_keys = []
-    new_rows = []
-    for row in rows:
-        manu = (row.get('Manufacturer / Distributor') or '').strip()
-        model = (row.get('Disc Model') or '').strip()
-        cert = (row.get('Certification Number') or '').strip()
-        if not manu and not model and not cert:
+    keyed = []
+    for rec in records:
+        if not rec.get('manufacturer') and not rec.get('model') and not rec.get('cert_number'):
             continue
-        key = cert or f"{manu}|{model}"
-        all_keys.append(key)
-        if key not in known_keys:
-            new_rows.append(row)
+        keyed.append((kk_disc_catalog.known_key(rec), rec))
+    new_keys = set(kk_disc_catalog.unknown_keys([k for k, _ in keyed]))
+    new_rows = [rec for k, rec in keyed if k in new_keys]
+    timings['diff'] = time.perf_counter() - t_diff
 
-    # First run: initialise known file but do not post
+    # First run: initialise known table but do not post
     if first_run:
         try:
-            with open(known_path, 'w', encoding='utf-8') as f:
-                json.dump(all_keys, f, ensure_ascii=False, indent=2)
-            print('Initialised known PDGA discs list with', len(all_keys), 'entries')
+            added = kk_disc_catalog.mark_known(k for k, _ in keyed)
+            kk_disc_catalog.set_meta({'known_synced_version': version})
+            print('Initialised known PDGA discs table with', added, 'entries')
         except Exception as e:
-            print('Failed to initialise known PDGA discs file:', e)
+            print('Failed to initialise known PDGA discs table:', e)
+        _record_pdga_discs_run('initialised', timings, 0, started)
         return
 
     if not new_rows:
         print('No new PDGA discs found')
+        kk_disc_catalog.set_meta({'known_synced_version': version})
+        _record_pdga_discs_run(status, timings, 0, started)
         return
 
+    # Warm image/flight-number cache so !kiekko cards for new discs render
+    # without waiting on PDGA detail pages.
+    try:
+        from komento_koodit import disc_assets
+        disc_assets.enqueue_warm(new_rows[:20])
+    except Exception as e:
+        print('Failed to queue disc asset warming:', e)
+
     # Build a compact embed listing the newly approved discs (limit to 10)
     lines = []
-    for row in new_rows[:10]:
-        manu = (row.get('Manufacturer / Distributor') or '').strip()
-        model = (row.get('Disc Model') or '').strip()
-        disc_class = (row.get('Class') or '').strip()
-        approved = (row.get('Approved Date') or '').strip()
-        max_weight = (row.get('Max Weight (gr)') or '').strip()
-        diameter = (row.get('Diameter (cm)') or '').strip()
+    for rec in new_rows[:10]:
+        manu = rec.get('manufacturer') or ''
+        model = rec.get('model') or ''
+        disc_class = rec.get('disc_class') or ''
+        approved = rec.get('approved_date') or ''
+        max_weight = rec.get('max_weight_g') or ''
+        diameter = rec.get('diameter_cm') or ''
 
         parts = []
         title = model or 'Tuntematon malli'
@@ -1772,98 +2116,104 @@ def _check_new_pdga_discs_once(base_dir):
         except Exception as e:
             print('Exception while posting PDGA discs alert:', e)
 
-    # Update known file with all current keys
+    # Remember only the new keys (incremental insert)
     try:
-        with open(known_path, 'w', encoding='utf-8') as f:
-            json.dump(all_keys, f, ensure_ascii=False, indent=2)
-        print('Updated known PDGA discs file with', len(all_keys), 'entries')
+        added = kk_disc_catalog.mark_known(new_keys)
+        kk_disc_catalog.set_meta({'known_synced_version': version})
+        print('Added', added, 'new PDGA discs to known table')
     except Exception as e:
-        print('Failed to update known PDGA discs file:', e)
+        print('Failed to update known PDGA discs table:', e)
+    _record_pdga_discs_run(status, timings, len(new_rows), started)
 
 
 def start_pdga_discs_worker(base_dir, interval_seconds: int):
-    """Background worker that periodically checks for new PDGA discs."""
-    def worker():
-        while True:
-            try:
-                _check_new_pdga_discs_once(base_dir)
-            except Exception as e:
-                print('PDGA discs worker error:', e)
-            time.sleep(max(600, int(interval_seconds)))
-
-    t = threading.Thread(target=worker, daemon=True)
-    t.start()
-    return t
+    """Schedule the periodic check for new PDGA discs."""
+    return _interval_job('pdga_discs', lambda: _check_new_pdga_discs_once(base_dir), max(600, int(interval_seconds)), group='pdga')
 
 
 def start_nightly_capacity_scan(hour: int = 3, minute: int = 0):
-    """Start a background thread that runs `_run_capacity_scan_and_alerts_once` at the given hour:minute daily.
+    """Schedule `_run_capacity_scan_and_alerts_once` daily at hour:minute."""
+    job = kk_scheduler.Job(
+        'nightly_capacity',
+        lambda: _run_capacity_scan_and_alerts_once(BASE_DIR),
+        kk_scheduler.DailyTrigger(hour, minute),
+        group=METRIX_JOB_GROUP,
+        priority=20,
+    )
+    return kk_scheduler.get_scheduler().add_job(job)
+
+
+def start_metrics_snapshots():
+    """Tallenna komentomittarit SQLiteen ja logs/metrics.json-tiedostoon säännöllisesti."""
+    from komento_koodit import metrics as kk_metrics
+    interval = int(getattr(S, 'METRICS_SNAPSHOT_INTERVAL', os.environ.get('METRICS_SNAPSHOT_INTERVAL', '300')))
+    return _interval_job('metrics_snapshot', kk_metrics.snapshot, max(60, interval), group='metrics', priority=50)
+
 
-    The thread is a daemon and will not block process exit. It will run immediately if the next
-    scheduled time is within a minute.
+def _run_daily_digest():
+    """run_once + registrations, at most once per day (LAST_DIGEST_DATE gate).
+
+    !admin aika resets LAST_DIGEST_DATE so a new time can trigger a second
+    digest on the same day.
     """
-    def worker():
-        while True:
-            try:
-                now = datetime.now()
-                # compute next run datetime
-                next_run = datetime(now.year, now.month, now.day, hour, minute)
-                if next_run <= now:
-                    next_run = next_run + timedelta(days=1)
-                wait_seconds = (next_run - now).total_seconds()
-                # sleep until next run (but wake up periodically to handle signals)
-                slept = 0
-                while slept < wait_seconds:
-                    to_sleep = min(60, wait_seconds - slept)
-                    time.sleep(max(1, to_sleep))
-                    slept += to_sleep
-
-                print(f'[NIGHTLY] Running capacity scan at {datetime.now():%Y-%m-%d %H:%M}')
-                try:
-                    _run_capacity_scan_and_alerts_once(BASE_DIR)
-                except Exception as e:
-                    print('Nightly capacity scan failed:', e)
-                # loop continues and will schedule next day
-            except Exception as e:
-                print('Nightly capacity scan thread exception:', e)
-                time.sleep(60)
+    global LAST_DIGEST_DATE
+    today = datetime.now().date()
+    if LAST_DIGEST_DATE == today:
+        print('Daily digest already ran today; skipping')
+        return
+    print(f"[SCHED] Running daily digest at {datetime.now():%Y-%m-%d %H:%M}")
+    run_once(check_registrations=True)
+    LAST_DIGEST_DATE = today
 
-    t = threading.Thread(target=worker, daemon=True)
-    t.start()
-    return t
 
+def _run_startup_fetch():
+    """Initial run_once on startup; counts as today's digest once the digest time has passed."""
+    global LAST_DIGEST_DATE
+    print('[STARTUP] Running initial competition fetch (run_once)')
+    run_once()
+    now = datetime.now()
+    if (now.hour, now.minute) >= (DAILY_DIGEST_HOUR, DAILY_DIGEST_MINUTE):
+        LAST_DIGEST_DATE = now.date()
 
-def start_daily_scheduler_thread(hour: int, minute: int, interval_minutes: float = 5.0):
-    """Start a background thread that runs `run_once()` once per day after the given hour:minute.
 
-    This is used when the bot runs with presence/command listener instead of --daemon.
-    The thread is a daemon and will not block process exit.
+def _digest_runs_at_startup(presence_digest: bool) -> bool:
+    """True when the daily_digest job itself runs right after startup.
+
+    That is the case when it has not run today and either the digest time has
+    already passed (scheduler catch-up) or presence mode triggers it with
+    run_now. The separate startup_fetch is then skipped so startup scrapes once.
     """
-    def sched_worker():
-        global LAST_DIGEST_DATE
-        while True:
-            try:
-                now = datetime.now()
-                today = now.date()
-                if LAST_DIGEST_DATE != today:
-                    if (now.hour > hour) or (now.hour == hour and now.minute >= minute):
-                        try:
-                            print(f"[SCHED] Triggering daily digest at {now:%Y-%m-%d %H:%M}")
-                            run_once()
-                            try:
-                                _run_registration_check_once(BASE_DIR)
-                            except Exception as e:
-                                print('Registration check failed after scheduled run_once:', e)
-                            LAST_DIGEST_DATE = today
-                        except Exception as e:
-                            print('Scheduled run_once failed:', e)
-            except Exception as e:
-                print('Scheduler worker exception:', e)
-            time.sleep(max(30, int(interval_minutes * 60)))
+    now = datetime.now()
+    if LAST_DIGEST_DATE == now.date():
+        return False
+    last = kk_scheduler.last_started('daily_digest')
+    if last and datetime.fromtimestamp(last).date() == now.date():
+        return False
+    return presence_digest or (now.hour, now.minute) >= (DAILY_DIGEST_HOUR, DAILY_DIGEST_MINUTE)
+
 
-    t = threading.Thread(target=sched_worker, daemon=True)
-    t.start()
-    return t
+def start_daily_scheduler_thread(hour: int, minute: int, interval_minutes: float = 5.0):
+    """Schedule the daily digest (`run_once(check_registrations=True)`).
+
+    The time is read from DAILY_DIGEST_HOUR/MINUTE on every evaluation so
+    `!admin aika` takes effect (it calls reschedule('daily_digest')).
+    ``hour``/``minute`` seed those values; ``interval_minutes`` is kept for
+    compatibility and no longer used.
+    """
+    global DAILY_DIGEST_HOUR, DAILY_DIGEST_MINUTE, LAST_DIGEST_DATE
+    DAILY_DIGEST_HOUR, DAILY_DIGEST_MINUTE = int(hour), int(minute)
+    job = kk_scheduler.Job(
+        'daily_digest',
+        _run_daily_digest,
+        kk_scheduler.DailyTrigger(lambda: DAILY_DIGEST_HOUR, lambda: DAILY_DIGEST_MINUTE),
+        group=METRIX_JOB_GROUP,
+        priority=0,
+    )
+    job = kk_scheduler.get_scheduler().add_job(job)
+    # Restart on the same day: the digest history gates the presence run_now too.
+    if job.last_started and job.last_status == 'ok' and datetime.fromtimestamp(job.last_started).date() == datetime.now().date():
+        LAST_DIGEST_DATE = datetime.now().date()
+    return job
 
 
 def main():
@@ -1873,13 +2223,10 @@ def main():
     parser.add_argument('--daemon', action='store_true', help='Run continuously')
     parser.add_argument('--presence', action='store_true', help='Start Discord gateway client to show bot as online (requires discord.py and valid token)')
     parser.add_argument('--interval-minutes', type=float, default=float(os.environ.get('METRIX_INTERVAL_MINUTES', '120')),
-                        help='Interval between runs when --daemon (minutes)')
+                        help='Minutes between scheduler status reports when --daemon (jobs run on their own triggers)')
     parser.add_argument('--times', type=int, default=1, help='When used with --once, run the orchestrator this many times in sequence')
     args = parser.parse_args()
 
-    # Ensure we treat LAST_DIGEST_DATE as the module-level global throughout main()
-    global LAST_DIGEST_DATE
-
     # Do not post capacity scan results immediately on startup; only a short "I'm here" notice.
     token = os.environ.get('DISCORD_TOKEN')
 
@@ -2137,30 +2484,25 @@ def main():
                             lines.append('🔜 Ei tulevan viikon kisoja, joissa seuramme pelaajia nähtiin heti.')
                             lines.append('')
 
-                        # Include new PDGA-approved discs (check known file but don't update it here)
+                        # Include new PDGA-approved discs (check known table but don't update it here)
                         try:
                             discs_lines = []
-                            known_path = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')), KNOWN_PDGA_DISCS_FILE)
-                            known_keys = set()
+                            # Read the newest rows from the local disc catalog and detect new keys without updating the table
                             try:
-                                with open(known_path, 'r', encoding='utf-8') as f:
-                                    known_keys = set(str(x) for x in (json.load(f) or []))
-                            except Exception:
-                                known_keys = set()
-                            # Fetch CSV quickly and detect new keys without updating file
-                            try:
-                                resp = requests.get('https://www.pdga.com/technical-standards/equipment-certification/discs/export', timeout=20)
-                                if resp.status_code == 200 and resp.text:
-                                    rows = list(csv.DictReader(resp.text.splitlines()))
+                                rows = []
+                                if kk_disc_catalog is not None and kk_disc_catalog.ensure_catalog():
+                                    rows = kk_disc_catalog.list_discs(limit=20)
+                                # Nothing is "new" before the worker has initialised the known table
+                                if rows and kk_disc_catalog.known_count():
                                     new_count = 0
-                                    for row in rows[:20]:
-                                        manu = (row.get('Manufacturer / Distributor') or '').strip()
-                                        model = (row.get('Disc Model') or '').strip()
-                                        cert = (row.get('Certification Number') or '').strip()
-                                        key = cert or f"{manu}|{model}"
-                                        if key and key not in known_keys:
-                                            disc_class = (row.get('Class') or '').strip()
-                                            approved = (row.get('Approved Date') or '').strip()
+                                    unknown = set(kk_disc_catalog.unknown_keys([kk_disc_catalog.known_key(r) for r in rows]))
+                                    for row in rows:
+                                        manu = row.get('manufacturer') or ''
+                                        model = row.get('model') or ''
+                                        key = kk_disc_catalog.known_key(row)
+                                        if key and key in unknown:
+                                            disc_class = row.get('disc_class') or ''
+                                            approved = row.get('approved_date') or ''
                                             parts = [model or 'Tuntematon malli']
                                             if manu:
                                                 parts.append(manu)
@@ -2205,16 +2547,17 @@ def main():
             except Exception:
                 pass
 
-            # Run in background so presence and command listener can start quickly
-            def _startup_run():
-                try:
-                    print('[STARTUP] Running initial competition fetch (run_once)')
-                    run_once()
-                except Exception as e:
-                    print('Startup run_once failed:', e)
-
-            thr = threading.Thread(target=_startup_run, daemon=True)
-            thr.start()
+            # Run via the scheduler so presence and command listener can start quickly
+            # and the fetch does not overlap the capacity/registration jobs.
+            # When the daily digest is due anyway it is the single startup run.
+            digest_scheduled = args.daemon or (args.presence and bool(token))
+            presence_digest = args.presence and not args.daemon and os.environ.get('RUN_DIGEST_ON_PRESENCE', '1') == '1'
+            if digest_scheduled and _digest_runs_at_startup(presence_digest):
+                print('[STARTUP] Daily digest is due; skipping the separate startup fetch')
+            else:
+                kk_scheduler.get_scheduler().add_job(
+                    kk_scheduler.Job('startup_fetch', _run_startup_fetch, kk_scheduler.OnceTrigger(), group=METRIX_JOB_GROUP, priority=0)
+                )
     except Exception as e:
         print('Failed to schedule startup run:', e)
 
@@ -2226,24 +2569,28 @@ def main():
             print('DISCORD_TOKEN not set; skipping presence and command listener')
         else:
             try:
-                from komento_koodit.discord_presence import start_presence
-                # run_forever True for daemon mode; if --once, run_forever=False so it disconnects
+                # Läsnäolo ja komentokuuntelija jakavat yhden gateway-yhteyden;
+                # run_forever False (--once) katkaisee yhteyden on_readyn jälkeen.
+                from komento_koodit.discord_presence import attach_presence
+                gw = kk_gateway.get_gateway(token, run_forever=not args.once)
                 # Default status text now matches the LakeusBotti branding;
                 # can be overridden with DISCORD_STATUS.
-                presence_thread = start_presence(token, status_message=os.environ.get('DISCORD_STATUS', 'LakeusBotti'), run_forever=not args.once)
+                attach_presence(gw, os.environ.get('DISCORD_STATUS', 'LakeusBotti'))
                 try:
-                    from komento_koodit.command_handler import start_command_listener
-                    start_command_listener(token, prefix='!', run_forever=not args.once)
+                    from komento_koodit.command_handler import CommandListener
+                    CommandListener(prefix='!').attach(gw)
                 except Exception as e:
-                    print('Failed to start command listener:', e)
+                    print('Failed to attach command listener:', e)
+                presence_thread = kk_gateway.start_gateway(token, run_forever=not args.once)
             except Exception as e:
-                print('Failed to start presence thread:', e)
+                print('Failed to start gateway:', e)
 
             # When presence is started (non-daemon mode), start the daily scheduler
             try:
                 if args.presence and not args.daemon:
                     try:
                         start_daily_scheduler_thread(DAILY_DIGEST_HOUR, DAILY_DIGEST_MINUTE)
+                        start_metrics_snapshots()
                         # also start nightly capacity prefetch thread
                         try:
                             nh = int(os.environ.get('CAPACITY_NIGHT_HOUR', '3'))
@@ -2261,24 +2608,8 @@ def main():
                         if run_on_presence:
                             today = datetime.now().date()
                             if LAST_DIGEST_DATE != today:
-                                def _presence_trigger():
-                                    try:
-                                        print('[PRESENCE] Presence active — running immediate daily digest')
-                                        run_once()
-                                        try:
-                                            _run_registration_check_once(BASE_DIR)
-                                        except Exception as e:
-                                            print('Registration check failed after presence-triggered run_once:', e)
-                                        # Update module-level LAST_DIGEST_DATE without declaring global here
-                                        try:
-                                            globals()['LAST_DIGEST_DATE'] = datetime.now().date()
-                                        except Exception:
-                                            pass
-                                    except Exception as e:
-                                        print('Presence-triggered run_once failed:', e)
-
-                                t = threading.Thread(target=_presence_trigger, daemon=True)
-                                t.start()
+                                print('[PRESENCE] Presence active — running immediate daily digest')
+                                kk_scheduler.get_scheduler().run_now('daily_digest')
                     except Exception as e:
                         print('Failed to trigger presence-based digest:', e)
             except Exception:
@@ -2288,16 +2619,9 @@ def main():
         times = max(1, int(args.times or 1))
         for i in range(times):
             print(f'Run {i+1}/{times}')
-            # Päivitä kapasiteettidata ennen jokaista kertaluonteista ajoa,
-            # jotta PDGA-yhteenvedot käyttävät tuoreita pelaajamääriä.
-            try:
-                _run_capacity_scan_and_alerts_once(BASE_DIR)
-            except Exception as e:
-                print('Capacity scan (once) failed:', e)
-            run_once()
-            # run registration check once after each run_once when requested
-            if args.check_registrations:
-                _run_registration_check_once(BASE_DIR)
+            # Kapasiteettidata päivitetään ajon sisällä ennen yhteenvetoa (rekisteröintien
+            # jälkeen, kun ne pyydetään), jotta PDGA-yhteenvedot käyttävät tuoreita pelaajamääriä.
+            run_once(check_registrations=args.check_registrations, capacity_scan=True)
             if i < times - 1:
                 # small delay between runs to avoid hammering upstream
                 time.sleep(1)
@@ -2336,64 +2660,39 @@ def main():
             start_pdga_discs_worker(BASE_DIR, discs_interval)
         except Exception as e:
             print('Failed to start PDGA discs worker:', e)
-        # Päivittäinen kilpailudigesti: ajetaan run_once()+rekisteröinnit kerran vuorokaudessa
-        # konfiguroidussa kellonajassa (DAILY_DIGEST_HOUR/MINUTE).
-        # Käytetään globaalia LAST_DIGEST_DATE-arvoa, jotta admin-komennot
-        # voivat nollata tämän tarvittaessa (esim. kellonaikaa muutettaessa).
-        last_digest_date = LAST_DIGEST_DATE
+        # warm the disc image/flight-number cache for the most queried models
+        try:
+            from komento_koodit import disc_assets
+            warm_interval = int(os.environ.get('DISC_ASSET_WARM_INTERVAL', '21600'))
+            _interval_job('disc_asset_warm', lambda: disc_assets.enqueue_warm(disc_assets.popular_stale()), max(600, warm_interval), group='pdga')
+        except Exception as e:
+            print('Failed to start disc asset warmer:', e)
+        # club leaderboard refresh (!seura rating/kierrokset/vire)
+        try:
+            from komento_koodit import club_leaderboard
+            lb_interval = int(os.environ.get('CLUB_LEADERBOARD_INTERVAL', '3600'))
+            _interval_job('club_leaderboard', club_leaderboard.refresh_leaderboard, max(600, lb_interval), group=METRIX_JOB_GROUP, priority=30)
+        except Exception as e:
+            print('Failed to start club leaderboard worker:', e)
+        # Päivittäinen kilpailudigesti: run_once()+rekisteröinnit kerran vuorokaudessa
+        # konfiguroidussa kellonajassa (DAILY_DIGEST_HOUR/MINUTE). Käynnistyksessä
+        # väliin jäänyt digesti ajetaan heti (ajastimen catch-up).
+        try:
+            start_daily_scheduler_thread(DAILY_DIGEST_HOUR, DAILY_DIGEST_MINUTE)
+        except Exception as e:
+            print('Failed to schedule daily digest:', e)
+        try:
+            start_metrics_snapshots()
+        except Exception as e:
+            print('Failed to schedule metrics snapshots:', e)
 
+        # Kaikki työt ajetaan ajastimen säikeissä; pääsäie vain raportoi tilan.
         while True:
-            now = datetime.now()
-            today = now.date()
-
-            # Päivitä paikallinen muuttuja globaalista, jotta mahdollinen
-            # admin-komennon tekemä nollaus (LAST_DIGEST_DATE = None)
-            # huomioidaan seuraavalla kierroksella.
-            last_digest_date = LAST_DIGEST_DATE
-
-            should_run = False
-            if last_digest_date != today:
-                # Suoritetaan kun nykyinen kellonaika on asetetun ajan jälkeen.
-                if (now.hour > DAILY_DIGEST_HOUR or
-                        (now.hour == DAILY_DIGEST_HOUR and now.minute >= DAILY_DIGEST_MINUTE)):
-                    should_run = True
-
-            if should_run:
-                print(f"Running daily digest for {today} at {now:%H:%M}")
-                try:
-                    run_once()
-                    # After updating competition files and known caches, run registration check
-                    try:
-                        _run_registration_check_once(BASE_DIR)
-                    except Exception as e:
-                        print('Registration check failed after run_once:', e)
-                    last_digest_date = today
-                    LAST_DIGEST_DATE = today
-                    # Tulosta yhteenvedot taustatyöntekijöiden tarkistusväleistä,
-                    # kun kaikki tämän kierroksen tarkistukset on tehty.
-                    try:
-                        reg_interval = CHECK_REGISTRATION_INTERVAL
-                        cap_interval_log = CURRENT_CAPACITY_INTERVAL or CHECK_INTERVAL
-                    except Exception:
-                        reg_interval = CHECK_REGISTRATION_INTERVAL
-                        cap_interval_log = CHECK_INTERVAL
-
-                    discs_interval_log = int(os.environ.get('DISCS_CHECK_INTERVAL', '86400'))
-                    mins_reg = reg_interval / 60.0
-                    mins_cap = cap_interval_log / 60.0
-                    hours_discs = discs_interval_log / 3600.0
-                    print(f"Rekisteröintien tarkistus käynnissä (väli {reg_interval} s (~{mins_reg:.1f} min).")
-                    print(f"Kapasiteettiskannaus ja -hälytykset käynnissä (väli {cap_interval_log} s ~{mins_cap:.1f} min).")
-                    print(f"PDGA-kiekkojen uutuustarkistus käynnissä (väli {discs_interval_log} s ~{hours_discs:.1f} h).")
-                except Exception as e:
-                    print('Run failed in daemon loop:', e)
-
-            # sleep interval: tarkistetaan tilanne esim. 5–10 minuutin välein
-            mins = max(0.1, args.interval_minutes)
-            secs = mins * 60.0
-            next_check = datetime.now() + timedelta(minutes=mins)
-            print(f"Seuraava tarkistus klo {next_check:%H:%M}")
-            time.sleep(secs)
+            try:
+                print('Ajastetut työt:\n' + kk_scheduler.format_status())
+            except Exception as e:
+                print('Scheduler status failed:', e)
+            time.sleep(max(0.1, args.interval_minutes) * 60.0)
 
 
 if __name__ == '__main__':
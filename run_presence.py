@@ -3,6 +3,9 @@ load_dotenv()
 import os
 import time
 import komento_koodit.discord_presence as dp
+from komento_koodit import bot_logging
+
+bot_logging.setup()
 
 token = os.environ.get('DISCORD_TOKEN') or os.environ.get('BOT_TOKEN')
 if not token:
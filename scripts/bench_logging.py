@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Mittaa lokikutsun hinnan kutsujan säikeessä (bot_logging vs. print).
+
+Vertailee
+  - ``print`` tiedostoon ohjattuun stdoutiin (kuten start_bot.bat)
+  - ``logging`` + tavallinen FileHandler (synkroninen kirjoitus)
+  - ``bot_logging.setup`` eli QueueHandler + taustakirjoittaja
+ja tarkistaa, että jonon kautta kirjoitetut JSON-rivit päätyvät tiedostoon
+kokonaisina. Lokit kirjoitetaan väliaikaiseen hakemistoon.
+
+Käyttö:
+    python scripts/bench_logging.py
+    python scripts/bench_logging.py -n 50000
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+sys.path.insert(0, ROOT)
+
+from komento_koodit import bot_logging
+
+
+def per_call_us(func, n):
+    start = time.perf_counter()
+    for i in range(n):
+        func(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=20000, help="lokirivejä per mittaus")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "print.log"), "w", encoding="utf-8") as out, contextlib.redirect_stdout(out):
+            t_print = per_call_us(lambda i: print(f"[Outgoing -> Discord] Bot -> #kanava: send succeeded {i}", flush=True), args.n)
+
+        sync = logging.getLogger("bench.sync")
+        sync.propagate = False
+        fh = logging.FileHandler(os.path.join(tmp, "sync.log"), encoding="utf-8")
+        fh.setFormatter(bot_logging.JsonFormatter())
+        sync.addHandler(fh)
+        sync.setLevel(logging.INFO)
+        t_sync = per_call_us(lambda i: sync.info("send ok", extra={"channel": 123, "i": i}), args.n)
+        fh.close()
+
+        bot_logging.setup(level="INFO", log_dir=tmp, console=False)
+        log = logging.getLogger("bench.queue")
+        t_queue = per_call_us(lambda i: log.info("send ok", extra={"channel": 123, "i": i}), args.n)
+        t_debug = per_call_us(lambda i: log.debug("send ok", extra={"channel": 123, "i": i}), args.n)
+        bot_logging.shutdown()
+
+        with open(os.path.join(tmp, "bot.log"), encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        got = sorted(r["i"] for r in rows if r.get("logger") == "bench.queue")
+
+    print(f"print + flush tiedostoon        {t_print:7.2f} µs/kutsu")
+    print(f"logging + FileHandler (sync)    {t_sync:7.2f} µs/kutsu")
+    print(f"bot_logging (jono)              {t_queue:7.2f} µs/kutsu")
+    print(f"bot_logging debug (suodatettu)  {t_debug:7.2f} µs/kutsu")
+    ok = got == list(range(args.n))
+    print("OK" if ok else f"VIRHE: tiedostossa {len(got)}/{args.n} riviä")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
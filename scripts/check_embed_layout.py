@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Rajatestit embed_layout-moduulille (Discordin merkki- ja määrärajat).
+
+Tarkistaa satunnaisilla ja reunatapauksilla, että
+  - viestissä on enintään 10 embediä ja 6000 merkkiä
+  - kuvaus ≤ 4096, kentän arvo ≤ 1024, otsikko ≤ 256, tekstiviesti ≤ 2000
+  - rivit säilyvät järjestyksessä eikä yhtään riviä pudoteta
+  - pakkaus on tiivis: seuraavan viestin ensimmäinen rivi ei olisi mahtunut edelliseen
+ja vertaa 40 kilpailun yhteenvedon API-kutsumäärää vanhaan 12 kohdetta
+per embed -pilkkomiseen.
+
+Käyttö:
+    python scripts/check_embed_layout.py           # kaikki tarkistukset
+    python scripts/check_embed_layout.py -n 500    # satunnaistestien määrä
+"""
+import argparse
+import math
+import os
+import random
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+sys.path.insert(0, ROOT)
+
+from komento_koodit import embed_layout as el
+
+FAILURES = []
+
+
+def check(cond, msg):
+    if not cond:
+        FAILURES.append(msg)
+
+
+def check_messages(messages, lines, label):
+    for i, msg in enumerate(messages):
+        check(1 <= len(msg) <= el.EMBEDS_PER_MESSAGE, f"{label}: viestissä {i} {len(msg)} embediä")
+        total = sum(el.embed_size(e) for e in msg)
+        check(total <= el.TOTAL_LIMIT, f"{label}: viestissä {i} {total} merkkiä")
+        for e in msg:
+            check(len(e.get("description") or "") <= el.DESCRIPTION_LIMIT, f"{label}: kuvaus yli rajan")
+            check(len(e.get("title") or "") <= el.TITLE_LIMIT, f"{label}: otsikko yli rajan")
+    got = [ln for msg in messages for e in msg for ln in (e.get("description") or "").split("\n")]
+    expected = [ln if len(ln) <= el.DESCRIPTION_LIMIT - 300 else None for ln in lines]
+    check(len(got) == len(lines), f"{label}: rivejä {len(got)} / {len(lines)}")
+    for g, exp in zip(got, expected):
+        if exp is not None and g != exp:
+            check(False, f"{label}: rivi muuttui tai järjestys vaihtui")
+            break
+
+
+def random_lines(rng):
+    kind = rng.choice(["short", "mixed", "long"])
+    n = rng.randint(0, 300)
+    if kind == "short":
+        return ["• " + "x" * rng.randint(5, 80) for _ in range(n)]
+    if kind == "mixed":
+        return ["• " + "y" * rng.randint(1, 900) for _ in range(n)]
+    return ["• " + "z" * rng.randint(1000, 5000) for _ in range(rng.randint(0, 12))]
+
+
+def test_random(rounds, seed):
+    rng = random.Random(seed)
+    for r in range(rounds):
+        lines = random_lines(rng)
+        title = "T" * rng.randint(0, 300)
+        messages = el.pack_messages(lines, title=title, color=1)
+        label = f"satunnainen #{r}"
+        if not lines:
+            check(len(messages) == 1, f"{label}: tyhjä lista ei tuottanut yhtä viestiä")
+            continue
+        check_messages(messages, lines, label)
+        check_tight(messages, label)
+
+
+def check_tight(messages, label):
+    """Jokaisen viestin jälkeen seuraavan viestin ensimmäinen rivi ei olisi
+    mahtunut edelliseen (ei jatkoksi eikä uuteen embediin). Järjestyksen
+    säilyttävälle pakkaukselle tämä ahneus on myös optimaalinen viestimäärä."""
+
+    for prev, nxt in zip(messages, messages[1:]):
+        used = sum(el.embed_size(e) for e in prev)
+        first = (nxt[0].get("description") or "").split("\n")[0]
+        last_desc = prev[-1].get("description") or ""
+        as_line = len(last_desc) + 1 + len(first) <= el.DESCRIPTION_LIMIT and used + 1 + len(first) <= el.TOTAL_LIMIT
+        as_embed = len(prev) < el.EMBEDS_PER_MESSAGE and used + len(first) <= el.TOTAL_LIMIT
+        check(not (as_line or as_embed), f"{label}: rivi olisi mahtunut edelliseen viestiin")
+
+
+def test_edges():
+    # Yksi liian pitkä rivi katkaistaan, ei pudoteta.
+    msgs = el.pack_messages(["a" * 10000], title="Otsikko")
+    check(len(msgs) == 1 and len(msgs[0][0]["description"]) <= el.DESCRIPTION_LIMIT, "pitkä rivi: kuvaus yli rajan")
+    check(msgs[0][0]["description"].endswith(el.ELLIPSIS), "pitkä rivi: katkaisumerkki puuttuu")
+    # Tasan 4096 merkkiä mahtuu yhteen embediin.
+    lines = ["b" * 99] * 40 + ["c" * (4096 - 40 * 100 - 1)]
+    msgs = el.pack_messages(lines)
+    check(len(msgs) == 1 and len(msgs[0]) == 1, f"tasaraja: {[len(m) for m in msgs]} embediä")
+    # 6000 merkin kokonaisraja: kaksi 4000 merkin riviä eivät mahdu samaan viestiin.
+    msgs = el.pack_messages(["d" * 4000, "e" * 4000], title="X")
+    check(len(msgs) == 2, "kokonaisraja: kahden 4000 merkin rivin pitäisi mennä kahteen viestiin")
+    check(msgs[1][0].get("title") == "X" + el.CONTINUED_SUFFIX, "jatko-otsikko puuttuu")
+    # 10 embedin raja: 11 riviä, jotka eivät mahdu samaan kuvaukseen mutta kokonaisuus mahtuu.
+    msgs = el.pack_messages(["f" * 500] * 11)
+    check(all(len(m) <= el.EMBEDS_PER_MESSAGE for m in msgs), "embedien määräraja ylittyi")
+    # Kentät ja alaosa katkaistaan rajoihin.
+    e = el.fit_embed({"title": "t" * 400, "fields": [{"name": "n" * 300, "value": "v" * 2000}] * 30, "footer": {"text": "f" * 3000}})
+    check(len(e["title"]) <= el.TITLE_LIMIT, "fit_embed: otsikko")
+    check(len(e["fields"]) <= el.FIELDS_PER_EMBED, "fit_embed: kenttien määrä")
+    check(all(len(f["value"]) <= el.FIELD_VALUE_LIMIT and len(f["name"]) <= el.FIELD_NAME_LIMIT for f in e["fields"]), "fit_embed: kenttä")
+    check(el.embed_size(e) <= el.TOTAL_LIMIT, f"fit_embed: koko {el.embed_size(e)}")
+    # batch_embeds: valmiit embedit ryhmitellään 6000/10-rajoihin.
+    batches = el.batch_embeds([{"title": "x", "description": "y" * 700} for _ in range(25)])
+    check(all(sum(el.embed_size(x) for x in b) <= el.TOTAL_LIMIT and len(b) <= 10 for b in batches), "batch_embeds: raja ylittyi")
+    check(sum(len(b) for b in batches) == 25, "batch_embeds: embedejä hävisi")
+    # split_text: 2000 merkin tekstiviestit, sisältö säilyy.
+    text = "\n".join("rivi %d " % i + "w" * (i % 150) for i in range(400)) + "\n" + "q" * 4500
+    parts = el.split_text(text)
+    check(all(len(p) <= el.CONTENT_LIMIT for p in parts), "split_text: osa yli 2000")
+    check("".join(p.replace("\n", "") for p in parts) == text.replace("\n", ""), "split_text: sisältö muuttui")
+
+
+def digest_comparison():
+    rng = random.Random(40)
+    lines = [f"• [Kilpailu {i} " + "n" * rng.randint(10, 40) + f"](https://discgolfmetrix.com/{3500000 + i}) — 12.05.2026 (35/72)" for i in range(40)]
+    new = el.pack_messages(lines, title="Uusia viikkokisoja lisätty (40)")
+    old_embeds = math.ceil(len(lines) / 12)
+    old_calls = math.ceil(old_embeds / 10)
+    print(f"40 kilpailun yhteenveto: {len(new)} viesti(ä), {sum(len(m) for m in new)} embediä "
+          f"(vanha pilkkominen: {old_embeds} embediä / {old_calls} kutsua, ei merkkirajaa)")
+    check(len(new) == 1, "40 kilpailun yhteenvedon pitäisi mahtua yhteen viestiin")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=300, help="satunnaistestien määrä")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    test_edges()
+    test_random(args.n, args.seed)
+    digest_comparison()
+    if FAILURES:
+        for f in FAILURES[:30]:
+            print("VIRHE:", f)
+        print(f"{len(FAILURES)} virhettä")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tarkistaa, että oikeat tallennuspolut mitätöivät vastausvälimuistin.
+
+Jokaiselle komennolle tallennetaan välimuistiin vastaus komentorekisterin
+omalla CachePolicyllä, ajetaan tuotantokoodin tallennusfunktio ja
+tarkistetaan, että vastaus poistui (ja että riippumaton tallennus ei
+poista sitä):
+
+  - !seura     commands_tulokset._save_club_successes ("club_successes.json")
+  - !seura     club_leaderboard._save_leaderboard
+  - !etsi      metrixbot._write_known_file (known_*-JSON-tiedostot)
+  - !viikkarit data_store.save_category("VIIKKOKISA")
+
+Tietokanta, data_storen perushakemisto ja known_*-tiedostot ohjataan
+väliaikaiskansioon, joten data/discordbot.db ja juuren JSON-tiedostot eivät muutu.
+
+Käyttö:
+    python scripts/check_response_cache.py
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+sys.path.insert(0, ROOT)
+
+from komento_koodit import command_registry, data_store, response_cache
+
+FAILURES = []
+
+
+def check(cond, msg):
+    if not cond:
+        FAILURES.append(msg)
+
+
+def _cached(command, args="rating"):
+    key = response_cache.make_key(command, ["!" + command] + args.split())
+    response_cache.put(key, [(("vastaus",), {})], command_registry.lookup(command).cache)
+    return key
+
+
+def expect_invalidated(label, command, save, args="rating"):
+    key = _cached(command, args)
+    check(response_cache.get(key) is not None, f"{label}: vastaus ei tallentunut välimuistiin")
+    data_store.save_category("CHECK_UNRELATED", [])
+    check(response_cache.get(key) is not None, f"{label}: riippumaton tallennus mitätöi vastauksen")
+    save()
+    check(response_cache.get(key) is None, f"{label}: tallennus ei mitätöinyt vastausta")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_store._db_path = lambda: os.path.join(tmp, "check.db")
+        # save_category poistaa samannimisen JSON-tiedoston perushakemistosta.
+        data_store._base_dir = lambda provided=None: provided or tmp
+
+        from komento_koodit import club_leaderboard, commands_tulokset
+        import metrixbot_verifiedWorking as bot
+
+        expect_invalidated("!seura / club_successes", "seura", lambda: commands_tulokset._save_club_successes({}))
+        expect_invalidated("!seura / club_leaderboard", "seura", lambda: club_leaderboard._save_leaderboard({}))
+        for filename in (bot.CACHE_FILE, bot.KNOWN_WEEKLY_FILE, bot.KNOWN_DOUBLES_FILE):
+            expect_invalidated(
+                f"!etsi / {filename}", "etsi", lambda f=filename: bot._write_known_file(tmp, f, []), args="lakeus"
+            )
+        expect_invalidated(
+            "!viikkarit / VIIKKOKISA", "viikkarit", lambda: data_store.save_category("VIIKKOKISA.json", []), args="ep"
+        )
+        check(
+            response_cache.category_key("club_successes.json") == response_cache.category_key("CLUB_SUCCESSES"),
+            "category_key ei normalisoi .json-päätettä tai kirjainkokoa",
+        )
+
+    if FAILURES:
+        for f in FAILURES:
+            print("VIRHE:", f)
+        print(f"{len(FAILURES)} virhettä")
+        return 1
+    print(response_cache.format_stats())
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
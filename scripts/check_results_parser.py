@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Regressio- ja nopeustesti tulossivun parserille (results_parser).
+
+Käy läpi scripts/html_debug/*.html -sivut ja vertaa parse_results-tulosta
+vieressä olevaan <id>.expected.json -tiedostoon. Lisäksi rakennetaan iso
+monisarjainen tulossivu (oletus 12 sarjaa x 80 pelaajaa) kahdessa
+muodossa:
+  - nykyinen Metrix-rakenne (#content_auto, thead per sarja, reikätilastot
+    perässä) eli pikapolku
+  - vanha rakenne ilman theadeja ja #content_autoa (otsikkorivit th:nä,
+    sarjan nimi h3-otsikosta) eli varapolku
+ja verrataan tulosta generoinnissa tiedettyihin arvoihin (nimet, ID:t,
+tulokset, sijat tasatuloksineen, DNS-rivien pudotus).
+
+Jokaisella sivulla tarkistetaan myös, että lxml-polku, BeautifulSoup-varapolku
+(html.parser) ja vanha _parse_results_html (scripts/legacy_results_parser.py)
+antavat saman tuloksen, ja mitataan parse_results-nopeus vanhaan parseriin
+verrattuna.
+
+Käyttö:
+    python scripts/check_results_parser.py            # vertaa + mittaa
+    python scripts/check_results_parser.py --update   # kirjoita expected.json uudelleen
+    python scripts/check_results_parser.py -n 50      # toistojen määrä mittauksessa
+    python scripts/check_results_parser.py --divisions 20 --players 150
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+sys.path.insert(0, ROOT)
+
+from komento_koodit import results_parser
+
+import legacy_results_parser
+
+HTML_DIR = os.path.join(ROOT, "scripts", "html_debug")
+
+
+def _bench(fn, html_text, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(html_text)
+    return (time.perf_counter() - start) / rounds * 1000.0
+
+
+def _compare_paths(html_text, result):
+    """Virheet, jos varapolku tai vanha parseri antaa eri tuloksen kuin parse_results."""
+
+    errors = []
+    # Vanha parseri luki myös reikätilastojen taulukon "sarjaksi"; uusi jättää
+    # sen tarkoituksella pois, joten sarjat verrataan samaan osioon rajattuna.
+    legacy = legacy_results_parser.parse_results_html(results_parser.results_fragment(html_text))
+    legacy["event_name"] = legacy_results_parser.parse_results_html(html_text)["event_name"]
+    others = [("vanha _parse_results_html", legacy)]
+    if results_parser.PARSER != "html.parser":
+        others.append(("html.parser-varapolku", results_parser.parse_results(html_text, parser="html.parser")))
+    for label, other in others:
+        if other != result:
+            errors.append(f"{label} eroaa parse_results-tuloksesta")
+    return errors
+
+
+def _timing(html_text, rounds):
+    t_new = _bench(results_parser.parse_results, html_text, rounds)
+    t_old = _bench(legacy_results_parser.parse_results_html, html_text, rounds)
+    return f"  parse_results {t_new:.2f} ms | vanha parseri {t_old:.2f} ms | x{t_old / t_new:.1f}"
+
+
+def _division_players(divisions, players, seed=3523):
+    """Sarjat ja pelaajat: (sarjan nimi, [(nimi, id, +/-, tulos), ...]) tulosjärjestyksessä.
+
+    Jokaisessa sarjassa on tasatuloksia ja kaksi DNS-pelaajaa (tulos 0) lopussa.
+    """
+
+    rng = random.Random(seed)
+    out = []
+    pid = 100000
+    for d in range(divisions):
+        rows = []
+        for p in range(players):
+            total = 50 + rng.randint(0, 25)
+            rows.append([f"Pelaaja {d + 1}-{p + 1}", str(pid), total])
+            pid += 1
+        rows.sort(key=lambda r: r[2])
+        rows[2][2] = rows[1][2]  # varma tasatulos sijoille 2-3
+        rows.extend([[f"DNS {d + 1}-{k}", str(pid + k), 0] for k in (1, 2)])
+        pid += 2
+        out.append((f"Sarja {chr(65 + d % 26)}{d // 26 or ''} ({len(rows)})",
+                    [(n, i, t - 54 if t else 0, t) for n, i, t in rows]))
+    return out
+
+
+def _expected_rows(players, ties_skip):
+    """Odotetut rivit: DNS pois, sijat kuten results_parser._rank."""
+
+    kept = [r for r in players if r[3] != 0]
+    out = []
+    place, same, last = 0, 0, None
+    for name, mid, to_par, total in kept:
+        if last is None:
+            place, same = 1, 1
+        elif total == last:
+            same += 1
+        else:
+            place = place + same if ties_skip else place + 1
+            same = 1
+        last = total
+        out.append((place, name, mid, str(total)))
+    return out
+
+
+def _fmt_par(v):
+    return f"+{v}" if v > 0 else str(v)
+
+
+def _large_page(divisions, with_thead):
+    """Iso monisarjainen tulossivu; with_thead=False tuottaa varapolun rakenteen."""
+
+    holes = "".join(f'<th class="center">{h}</th>' for h in range(1, 19))
+    cells = '<td class="">3</td>' * 18
+    body = []
+    for name, players in divisions:
+        rows = []
+        for i, (pname, mid, to_par, total) in enumerate(players, start=1):
+            rows.append(
+                f'<tr><td>{i}</td><td class="player-cell" nowrap="nowrap">{pname}'
+                f'<a class="profile-link" href="/player/{mid}"><svg></svg></a></td>'
+                f'<td>{_fmt_par(to_par)}</td><td>F</td>{cells}<td>{_fmt_par(to_par)}</td><td>{total}</td></tr>'
+            )
+        if with_thead:
+            body.append(
+                f'<thead><tr><th> </th><th>{name}</th><th>+/-</th><th>Thr</th>{holes}'
+                f'<th>+/-</th><th>Sum</th></tr></thead>' + "".join(rows)
+            )
+        else:
+            body.append(
+                f'<h3>{name}</h3><table class="results"><tr><th>Sija</th><th>Nimi</th><th>+/-</th>'
+                f'<th>Thr</th>{holes}<th>+/-</th><th>Sum</th></tr>' + "".join(rows) + "</table>"
+            )
+    menu = "<ul>" + "".join(f"<li><a href='/{i}'>Kisa {i}</a></li>" for i in range(300)) + "</ul>"
+    stats = (
+        '<h2>Hole-by-hole statistics</h2><div id="hole-stats-charts-container"><table class="data">'
+        + "".join(f'<tr><td class="player-cell">Avg {i}</td><td>1</td><td>2</td></tr>' for i in range(18))
+        + "</table></div><script>" + "var x = 1;" * 2000 + "</script>"
+    )
+    if with_thead:
+        results = '<div id="content_auto"><table class="score-table">' + "".join(body) + "</table>" + stats + "</div>"
+    else:
+        results = "<div>" + "".join(body) + "</div>"
+    return f"<html><head><title>Iso kisa</title></head><body><h1>Iso kisa</h1>{menu}{results}</body></html>"
+
+
+def _compare_sections(html_text, result):
+    """Erikseen parsitut palat (live-seuranta) antavat samat luokat kuin koko sivu."""
+
+    got = []
+    for index, (heading, section) in enumerate(results_parser.split_class_sections(html_text)):
+        for name, rows in results_parser.iter_result_tables(section, heading=heading, start_index=index):
+            got.append({"class_name": name, "rows": [r._asdict() for r in rows]})
+    if got != result["classes"]:
+        return ["split_class_sections-palojen tulos eroaa koko sivun tuloksesta"]
+    return []
+
+
+def _check_section_keys():
+    """Samannimiset ja nimettömät luokat eivät korvaa toisiaan live-seurannassa."""
+
+    from komento_koodit import live_results
+
+    def table(th_name, pid):
+        return (
+            f'<table><thead><tr><th>Sija</th><th>{th_name}</th><th>+/-</th><th>Tot</th></tr></thead>'
+            f'<tr><td>1</td><td class="player-cell"><a href="/player/{pid}">P{pid}</a></td><td>-1</td><td>53</td></tr>'
+            "</table>"
+        )
+
+    cases = [
+        ("samanniminen luokka eri otsikoilla",
+         f"<h3>Pooli A</h3>{table('Open', 1)}<h3>Pooli B</h3>{table('Open', 2)}",
+         ["Open", "Pooli B: Open"]),
+        ("nimettömät luokat otsikon alla",
+         f"<h3>Pooli A</h3>{table('Nimi', 1)}<h3>Pooli B</h3>{table('Nimi', 2)}",
+         ["Pooli A", "Pooli B"]),
+        ("nimettömät luokat ilman otsikkoa",
+         table("Nimi", 1) + table("Nimi", 2),
+         ["Sarja 1", "Sarja 2"]),
+    ]
+    failures = 0
+    for label, body, want in cases:
+        html_text = f'<html><body><div id="content_auto">{body}</div></body></html>'
+        snapshot = live_results.EventTracker("https://example.invalid")._parse(html_text)
+        full = [c["class_name"] for c in results_parser.parse_results(html_text)["classes"]]
+        if list(snapshot) != want:
+            failures += 1
+            print(f"live-avaimet, {label}: VIRHE {list(snapshot)} != {want} (koko sivu: {full})")
+        else:
+            print(f"live-avaimet, {label}: OK")
+    return failures
+
+
+def _check_large(divisions, players, rounds):
+    """Vertaa ison sivun tulosta generoinnin arvoihin molemmilla poluilla."""
+
+    data = _division_players(divisions, players)
+    failures = 0
+    for label, with_thead in (("pikapolku (thead)", True), ("varapolku (ei theadia)", False)):
+        html_text = _large_page(data, with_thead)
+        result = results_parser.parse_results(html_text)
+        errors = []
+        if result["event_name"] != "Iso kisa":
+            errors.append(f"kisan nimi {result['event_name']!r}")
+        if len(result["classes"]) != len(data):
+            errors.append(f"{len(result['classes'])} sarjaa, odotettu {len(data)}")
+        for (name, plist), cls in zip(data, result["classes"]):
+            if cls["class_name"] != name:
+                errors.append(f"sarjan nimi {cls['class_name']!r} != {name!r}")
+            got = [(r["position"], r["name"], r["metrix_id"], r["total"]) for r in cls["rows"]]
+            want = _expected_rows(plist, ties_skip=with_thead)
+            if got != want:
+                diff = next((g, w) for g, w in zip(got + [None] * len(want), want + [None] * len(got)) if g != w)
+                errors.append(f"{name}: rivit eroavat, ensimmäinen ero {diff}")
+        if with_thead:
+            sections = results_parser.split_class_sections(html_text)
+            if len(sections) != len(data):
+                errors.append(f"split_class_sections: {len(sections)} palaa, odotettu {len(data)}")
+            errors.extend(_compare_sections(html_text, result))
+        errors.extend(_compare_paths(html_text, result))
+
+        rows = sum(len(c["rows"]) for c in result["classes"])
+        if errors:
+            failures += 1
+            print(f"iso sivu, {label}: VIRHE")
+            for e in errors[:5]:
+                print("  " + e)
+        else:
+            print(f"iso sivu, {label}: OK ({len(data)} sarjaa, {rows} riviä, {len(html_text) // 1024} kt)")
+        print(_timing(html_text, rounds))
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--update", action="store_true", help="kirjoita expected.json-tiedostot uudelleen")
+    ap.add_argument("-n", type=int, default=20, help="toistoja nopeusmittauksessa")
+    ap.add_argument("--divisions", type=int, default=12, help="sarjoja isolla testisivulla")
+    ap.add_argument("--players", type=int, default=80, help="pelaajia per sarja isolla testisivulla")
+    args = ap.parse_args()
+
+    pages = sorted(glob.glob(os.path.join(HTML_DIR, "*.html")))
+    if not pages:
+        print("Ei tallennettuja sivuja:", HTML_DIR)
+        return 1
+
+    print("Parseri:", results_parser.PARSER)
+    failures = 0
+    for path in pages:
+        with open(path, "r", encoding="utf-8") as f:
+            html_text = f.read()
+        expected_path = os.path.splitext(path)[0] + ".expected.json"
+        result = results_parser.parse_results(html_text)
+        name = os.path.basename(path)
+
+        if args.update or not os.path.exists(expected_path):
+            with open(expected_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            print(f"{name}: expected päivitetty")
+        else:
+            with open(expected_path, "r", encoding="utf-8") as f:
+                expected = json.load(f)
+            if result == expected:
+                rows = sum(len(c.get("rows") or []) for c in result.get("classes", []))
+                print(f"{name}: OK ({len(result.get('classes', []))} luokkaa, {rows} riviä)")
+            else:
+                failures += 1
+                print(f"{name}: ERO")
+                print("  odotettu:", json.dumps(expected, ensure_ascii=False)[:500])
+                print("  saatu:   ", json.dumps(result, ensure_ascii=False)[:500])
+            path_errors = _compare_paths(html_text, result)
+            if path_errors:
+                failures += 1
+                for e in path_errors:
+                    print(f"{name}: VIRHE: {e}")
+
+        print(_timing(html_text, args.n))
+
+    failures += _check_large(args.divisions, args.players, max(1, args.n // 4))
+    failures += _check_section_keys()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Paikallinen Discord REST -stub ja kuormatesti discord_rest-asiakkaalle.
+
+Stub vastaa POST /channels/<id>/messages -pyyntöihin kuten Discord:
+jokaisella kanavalla on oma bucket (oletus 5 viestiä / 2 s), vastauksissa on
+X-RateLimit-* -otsakkeet, ja rajan ylitys palauttaa 429 + retry_after.
+Lisäksi stub voi palauttaa satunnaisia 502-virheitä ja globaaleja 429-vastauksia
+sekä "kadonneita kuittauksia" (--lost-ack): viesti tallentuu, mutta asiakas saa
+502:n. Kuten Discord, stub ei luo toista viestiä samalla noncella, kun
+enforce_nonce on päällä.
+
+Testi lähettää viestejä usealle kanavalle rinnakkain ja tarkistaa, että
+jokainen viesti perillä täsmälleen kerran ja kanavan sisällä oikeassa
+järjestyksessä.
+
+Käyttö:
+    python scripts/discord_rest_stub.py                    # stub + testi
+    python scripts/discord_rest_stub.py -n 40 -c 3 --flaky 0.1
+    python scripts/discord_rest_stub.py --lost-ack 0.2     # toistot eivät tuplaa viestejä
+    python scripts/discord_rest_stub.py --serve --port 8765
+        (sitten esim. DISCORD_API_BASE=http://127.0.0.1:8765/api/v10)
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+sys.path.insert(0, ROOT)
+
+from komento_koodit import discord_rest
+
+ROUTE = re.compile(r"^/api/v10/channels/(\d+)/messages$")
+
+
+class StubState:
+    def __init__(self, limit, window, flaky, global_rate, lost_ack=0.0):
+        self.limit = limit
+        self.window = window
+        self.flaky = flaky
+        self.global_rate = global_rate
+        self.lost_ack = lost_ack
+        self.lock = threading.Lock()
+        self.buckets = {}  # channel -> (window_start, used)
+        self.received = {}  # channel -> [content]
+        self.nonces = {}  # (channel, nonce) -> message id
+        self.status_counts = {}
+
+    def count(self, status):
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_args):
+            pass
+
+        def _reply(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            m = ROUTE.match(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not m:
+                self._reply(404, {"message": "Unknown route"})
+                return
+            channel = m.group(1)
+            with state.lock:
+                if random.random() < state.flaky:
+                    state.count(502)
+                    self._reply(502, {"message": "Bad Gateway"})
+                    return
+                if random.random() < state.global_rate:
+                    state.count("429-global")
+                    self._reply(429, {"message": "global", "retry_after": 0.3, "global": True}, {"X-RateLimit-Global": "true"})
+                    return
+                now = time.monotonic()
+                start, used = state.buckets.get(channel, (now, 0))
+                if now - start >= state.window:
+                    start, used = now, 0
+                reset_after = max(0.0, state.window - (now - start))
+                headers = {
+                    "X-RateLimit-Limit": str(state.limit),
+                    "X-RateLimit-Bucket": "stub-messages",
+                    "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                }
+                if used >= state.limit:
+                    state.count(429)
+                    headers["X-RateLimit-Remaining"] = "0"
+                    self._reply(429, {"message": "You are being rate limited.", "retry_after": round(reset_after, 3), "global": False}, headers)
+                    return
+                used += 1
+                state.buckets[channel] = (start, used)
+                headers["X-RateLimit-Remaining"] = str(state.limit - used)
+                key = (channel, payload.get("nonce"))
+                if payload.get("enforce_nonce") and key in state.nonces:
+                    state.count("nonce-dedup")
+                    message_id = state.nonces[key]
+                else:
+                    message_id = str(time.time_ns())
+                    if key[1] is not None:
+                        state.nonces[key] = message_id
+                    state.received.setdefault(channel, []).append(payload.get("content"))
+                    if random.random() < state.lost_ack:
+                        state.count("502-lost-ack")
+                        self._reply(502, {"message": "Bad Gateway"})
+                        return
+                state.count(200)
+            self._reply(200, {"id": message_id, "channel_id": channel}, headers)
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=0)
+    ap.add_argument("-n", "--messages", type=int, default=25, help="viestejä kanavaa kohden")
+    ap.add_argument("-c", "--channels", type=int, default=2)
+    ap.add_argument("--limit", type=int, default=5, help="viestejä per ikkuna per kanava")
+    ap.add_argument("--window", type=float, default=2.0, help="ikkunan pituus sekunteina")
+    ap.add_argument("--flaky", type=float, default=0.05, help="502-virheiden osuus")
+    ap.add_argument("--global-rate", type=float, default=0.02, help="globaalien 429-vastausten osuus")
+    ap.add_argument("--lost-ack", type=float, default=0.05, help="tallennettujen viestien osuus, joiden kuittaus on 502")
+    ap.add_argument("--serve", action="store_true", help="käynnistä vain stub")
+    args = ap.parse_args()
+
+    state = StubState(args.limit, args.window, args.flaky, args.global_rate, args.lost_ack)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    base = f"http://127.0.0.1:{server.server_address[1]}/api/v10"
+    if args.serve:
+        print(f"Stub kuuntelee: {base}")
+        server.serve_forever()
+        return 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = discord_rest.RestClient("stub-token", api_base=base)
+    channels = [str(1000 + i) for i in range(args.channels)]
+    start = time.perf_counter()
+    futures = []
+    for i in range(args.messages):
+        for ch in channels:
+            futures.append(client.enqueue(ch, {"content": f"{ch}-{i}"}))
+    statuses = [getattr(f.result(timeout=600), "status_code", None) for f in futures]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    ok = True
+    for ch in channels:
+        expected = [f"{ch}-{i}" for i in range(args.messages)]
+        got = state.received.get(ch, [])
+        if got != expected:
+            ok = False
+            print(f"VIRHE kanava {ch}: {len(got)}/{len(expected)} viestiä, järjestys {'OK' if got == expected[:len(got)] else 'väärä'}")
+    minimum = (args.messages - 1) // args.limit * args.window
+    print(f"Lähetetty {len(futures)} viestiä {len(channels)} kanavalle {elapsed:.1f}s:ssa (rajojen minimi ~{minimum:.1f}s)")
+    print(f"Stubin vastaukset: {state.status_counts}; asiakkaan 429-odotukset: {client.rate_limited}")
+    print(f"Asiakkaan lopputilat: {sorted(set(statuses), key=str)}")
+    print("OK" if ok and set(statuses) == {200} else "EPÄONNISTUI")
+    return 0 if ok and set(statuses) == {200} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""Vanha tulossivun parseri (commands_tulokset._parse_results_html) vertailua varten.
+
+Kopio ennen results_parser-moduulia käytetystä toteutuksesta, josta on
+poistettu vain top3-ratingien haku Metrixistä (verkkokutsu) ja
+DEBUG_TULOKSET-tulosteet. scripts/check_results_parser.py vertaa
+results_parser.parse_results-tulosta tähän ja mittaa nopeuseron.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup as BS
+
+
+def _guess_event_name(soup: BS) -> str:
+    """Yritä päätellä kilpailun nimi sivun otsikoista."""
+
+    try:
+        h1 = soup.find("h1")
+        if h1 and h1.get_text(strip=True):
+            return h1.get_text(strip=True)
+    except Exception:
+        pass
+
+    try:
+        title_tag = soup.find("title")
+        if title_tag and title_tag.get_text(strip=True):
+            return title_tag.get_text(strip=True)
+    except Exception:
+        pass
+
+    return "Metrix-kilpailu"
+
+
+def _guess_class_name_for_table(table, fallback_index: int) -> str:
+    """Yritä löytää sarjan / luokan nimi taulukolle.
+
+    Parempi heuristiikka:
+      - Jos <thead> sisältää <th> jossa on jotain muotoa "Name (N)", käytä sitä.
+      - Muussa tapauksessa etsi ensimmäinen <th>, joka ei ole selvästi sarakkeen otsikko.
+      - Jos ei löydy, käytä captionia tai lähintä h2/h3 -otsikkoa.
+      - Lopuksi fallback "Sarja N".
+    """
+
+    name: Optional[str] = None
+
+    try:
+        thead = table if getattr(table, 'name', None) == 'thead' else table.find("thead")
+        if thead:
+            ths = thead.find_all("th")
+            candidate = None
+            for th in ths:
+                txt = th.get_text(" ", strip=True)
+                if not txt:
+                    continue
+                # Etsi muotoa "Something (3)"
+                if re.search(r"\(\d+\)", txt) and not txt.lower().startswith("sija"):
+                    name = txt
+                    break
+                low = txt.lower()
+                if low in ("sija", "sij", "nimi", "pelaaja", "+/-", "kortti", "tot"):
+                    continue
+                # Prefer multi-word labels (todennäköisemmin luokkien nimiä)
+                if len(txt.split()) >= 2:
+                    name = txt
+                    break
+                if candidate is None:
+                    candidate = txt
+            if not name and candidate:
+                name = candidate
+    except Exception:
+        name = None
+
+    if not name:
+        try:
+            # caption
+            cap = table.find("caption")
+            if cap and cap.get_text(strip=True):
+                name = cap.get_text(strip=True)
+        except Exception:
+            pass
+
+    if not name:
+        try:
+            heading = table.find_previous(["h3", "h4", "h2"])
+            if heading:
+                txt = heading.get_text(" ", strip=True)
+                if txt:
+                    name = txt
+        except Exception:
+            pass
+
+    if not name:
+        name = f"Sarja {fallback_index + 1}"
+
+    if len(name) > 80:
+        name = name[:77] + "..."
+
+    return name
+
+
+
+def parse_results_html(html_text: str) -> Dict[str, Any]:
+    """Parsii Metrix-kilpailun tulossivun HTML:n.
+
+    Palauttaa rakenteen:
+    {
+      "event_name": str,
+      "classes": [
+        {
+          "class_name": str,
+          "rows": [
+            {"position": int, "name": str, "to_par": str, "total": str},
+            ...
+          ],
+        },
+        ...
+      ],
+    }
+    """
+
+    soup = BS(html_text, "html.parser")
+    event_name = _guess_event_name(soup)
+
+    class_results: List[Dict[str, Any]] = []
+
+    tables = soup.find_all("table")
+    idx = 0
+    for table in tables:
+        # Joissakin Metrix-sivuissa yksi <table> voi sisältää useita
+        # <thead>/<tbody>-pareja, jotka vastaavat eri luokkia. Käsitellään
+        # kukin thead/tbody -pariksi erikseen.
+        theads = table.find_all("thead")
+        if theads:
+            for thead in theads:
+                # Etsi mahdollinen rating-index theadin sisältä
+                rating_index = None
+                header_cells = thead.find_all("th")
+                for i, th in enumerate(header_cells):
+                    txt = th.get_text(strip=True).lower()
+                    if "rating" in txt or "rtg" in txt:
+                        rating_index = i
+                        break
+
+                # Etsi vastaava tbody (seuraa theadia). Joissain sivuissa
+                # pelaajarivit ovat suoraan thead:in jälkeen <tr>-elementeinä
+                # (ei erillistä <tbody>). Käsitellään molemmat tapaukset.
+                tbody = thead.find_next_sibling("tbody")
+                rows_iterable = None
+                if tbody:
+                    rows_iterable = tbody.find_all("tr")
+                else:
+                    # Kerää tr-elementit, jotka seuraavat theadia, kunnes
+                    # törmätään uuteen theadiin tai tbody:hin.
+                    rows_tags: List[Any] = []
+                    s = thead.find_next_sibling()
+                    while s:
+                        if getattr(s, 'name', None) == 'tr':
+                            rows_tags.append(s)
+                            s = s.find_next_sibling()
+                            continue
+                        if getattr(s, 'name', None) == 'thead':
+                            break
+                        if getattr(s, 'name', None) == 'tbody':
+                            # jos löytyi tbody myöhemmin, lisää sen tr:t ja lopeta
+                            rows_tags.extend(s.find_all('tr'))
+                            break
+                        s = s.find_next_sibling()
+                    if rows_tags:
+                        rows_iterable = rows_tags
+
+                if not rows_iterable:
+                    # Jos ei löydy rivejä, etsitään seuraava tbody taulukosta
+                    tbodys = table.find_all("tbody")
+                    rows_iterable = tbodys[0].find_all("tr") if tbodys else None
+
+                if not rows_iterable:
+                    continue
+
+                rows_data: List[Dict[str, Any]] = []
+                for tr in rows_iterable:
+                    player_td = tr.find("td", class_="player-cell")
+                    if not player_td:
+                        continue
+                    tds = tr.find_all("td")
+                    if len(tds) < 3:
+                        continue
+
+                    pos_text = tds[0].get_text(strip=True)
+                    try:
+                        m_pos = re.match(r"(\d+)", pos_text)
+                        pos_html = int(m_pos.group(1)) if m_pos else None
+                    except Exception:
+                        pos_html = None
+
+                    name_parts = list(player_td.stripped_strings)
+                    name = name_parts[0] if name_parts else player_td.get_text(strip=True)
+
+                    metrix_id = ""
+                    try:
+                        link = player_td.find("a", href=True)
+                        if link is not None:
+                            href = str(link.get("href") or "")
+                            m_id = re.search(r"/player/(\d+)", href)
+                            if not m_id:
+                                m_id = re.search(r"user_id=(\d+)", href)
+                            if m_id:
+                                metrix_id = m_id.group(1)
+                    except Exception:
+                        metrix_id = ""
+
+                    to_par = tds[2].get_text(strip=True)
+                    total = tds[-1].get_text(strip=True)
+
+                    rating = ""
+                    if rating_index is not None and rating_index < len(tds):
+                        rating = tds[rating_index].get_text(strip=True)
+
+                    rows_data.append({
+                        "position": pos_html,
+                        "name": name,
+                        "to_par": to_par,
+                        "total": total,
+                        "rating": rating,
+                        "metrix_id": metrix_id,
+                    })
+
+                if rows_data:
+                    # Poista rivit, joissa total==0 (DNS / did not start)
+                    filtered_rows: List[Dict[str, Any]] = []
+                    for r in rows_data:
+                        total_txt = str(r.get("total") or "").strip()
+                        m = re.match(r"-?\d+", total_txt)
+                        total_num = int(m.group(0)) if m else None
+                        if total_num == 0:
+                            continue
+                        filtered_rows.append(r)
+                    rows_data = filtered_rows
+                    # Laske sijat kuten aiemmin
+                    def _score_key_inline(r: Dict[str, Any]) -> Any:
+                        total_txt = str(r.get("total") or "").strip()
+                        to_par_txt = str(r.get("to_par") or "").strip()
+
+                        def _parse_int(s: str) -> Optional[int]:
+                            m = re.match(r"-?\d+", s)
+                            if not m:
+                                return None
+                            try:
+                                return int(m.group(0))
+                            except Exception:
+                                return None
+
+                        total_val = _parse_int(total_txt)
+                        to_par_val = _parse_int(to_par_txt)
+
+                        primary = total_val if total_val is not None else 9999
+                        secondary = to_par_val if to_par_val is not None else 0
+                        return (primary, secondary)
+
+                    last_score: Optional[Any] = None
+                    current_place = 0
+                    same_count = 0
+                    for row in rows_data:
+                        score = _score_key_inline(row)
+                        if last_score is None:
+                            # first row
+                            current_place = 1
+                            same_count = 1
+                        elif score == last_score:
+                            # tie: same place as previous
+                            same_count += 1
+                        else:
+                            # new score: advance place by number of tied players
+                            current_place = current_place + same_count
+                            same_count = 1
+                        row["position"] = current_place
+                        last_score = score
+
+                    class_name = _guess_class_name_for_table(thead, idx)
+                    class_results.append({
+                        "class_name": class_name,
+                        "rows": rows_data,
+                    })
+                    idx += 1
+            continue
+        # Fallback: jos ei theadeja, käsittele kuten aiemmin koko table rivinä
+        rows_data: List[Dict[str, Any]] = []
+        rating_index: Optional[int] = None
+        for tr in table.find_all("tr"):
+            header_cells = tr.find_all("th")
+            if header_cells:
+                if rating_index is None:
+                    for i, th in enumerate(header_cells):
+                        txt = th.get_text(strip=True).lower()
+                        if "rating" in txt or "rtg" in txt:
+                            rating_index = i
+                            break
+                continue
+
+            player_td = tr.find("td", class_="player-cell")
+            if not player_td:
+                continue
+
+            tds = tr.find_all("td")
+            if len(tds) < 3:
+                continue
+
+            pos_text = tds[0].get_text(strip=True)
+            try:
+                m_pos = re.match(r"(\d+)", pos_text)
+                pos_html = int(m_pos.group(1)) if m_pos else None
+            except Exception:
+                pos_html = None
+
+            name_parts = list(player_td.stripped_strings)
+            name = name_parts[0] if name_parts else player_td.get_text(strip=True)
+
+            metrix_id = ""
+            try:
+                link = player_td.find("a", href=True)
+                if link is not None:
+                    href = str(link.get("href") or "")
+                    m_id = re.search(r"/player/(\d+)", href)
+                    if not m_id:
+                        m_id = re.search(r"user_id=(\d+)", href)
+                    if m_id:
+                        metrix_id = m_id.group(1)
+            except Exception:
+                metrix_id = ""
+
+            to_par = tds[2].get_text(strip=True)
+            total = tds[-1].get_text(strip=True)
+
+            rating = ""
+            if rating_index is not None and rating_index < len(tds):
+                rating = tds[rating_index].get_text(strip=True)
+
+            rows_data.append({
+                "position": pos_html,
+                "name": name,
+                "to_par": to_par,
+                "total": total,
+                "rating": rating,
+                "metrix_id": metrix_id,
+            })
+
+        if rows_data:
+            # Poista rivit, joissa total==0 (DNS / did not start)
+            filtered_rows: List[Dict[str, Any]] = []
+            for r in rows_data:
+                total_txt = str(r.get("total") or "").strip()
+                m = re.match(r"-?\d+", total_txt)
+                total_num = int(m.group(0)) if m else None
+                if total_num == 0:
+                    continue
+                filtered_rows.append(r)
+            rows_data = filtered_rows
+            # Sama laskenta kuin aiemmin
+            def _score_key_inline(r: Dict[str, Any]) -> Any:
+                total_txt = str(r.get("total") or "").strip()
+                to_par_txt = str(r.get("to_par") or "").strip()
+
+                def _parse_int(s: str) -> Optional[int]:
+                    m = re.match(r"-?\d+", s)
+                    if not m:
+                        return None
+                    try:
+                        return int(m.group(0))
+                    except Exception:
+                        return None
+
+                total_val = _parse_int(total_txt)
+                to_par_val = _parse_int(to_par_txt)
+
+                primary = total_val if total_val is not None else 9999
+                secondary = to_par_val if to_par_val is not None else 0
+                return (primary, secondary)
+
+            last_score: Optional[Any] = None
+            current_place = 0
+            for row in rows_data:
+                score = _score_key_inline(row)
+                if last_score is None:
+                    current_place = 1
+                elif score != last_score:
+                    current_place += 1
+                row["position"] = current_place
+                last_score = score
+
+            class_name = _guess_class_name_for_table(table, idx)
+            class_results.append({
+                "class_name": class_name,
+                "rows": rows_data,
+            })
+            idx += 1
+
+    return {
+        "event_name": event_name,
+        "classes": class_results,
+    }
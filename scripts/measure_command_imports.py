@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Mittaa komentomoduulien latausajat (laiska lataus, command_registry).
+
+Jokainen mittaus ajetaan omassa Python-prosessissa, jotta moduulit ladataan
+kylmiltään. Tulostaa
+  - command_handler-moduulin latausajan (käynnistyksen kriittinen polku)
+  - jokaisen komentomoduulin latausajan yksinään
+  - kaikkien komentomoduulien yhteisen latausajan (vanha, innokas lataus)
+
+Käyttö:
+    python scripts/measure_command_imports.py
+    python scripts/measure_command_imports.py -r 5    # toistoja per mittaus
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) or "", ".."))
+sys.path.insert(0, ROOT)
+
+from komento_koodit import command_registry
+
+SNIPPET = (
+    "import sys, time\n"
+    "sys.path.insert(0, {root!r})\n"
+    "t = time.perf_counter()\n"
+    "{body}\n"
+    "print(time.perf_counter() - t)\n"
+)
+
+
+def measure(body, repeats):
+    times = []
+    for _ in range(repeats):
+        code = SNIPPET.format(root=ROOT, body=body)
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        if out.returncode != 0:
+            return None, (out.stderr.strip().splitlines() or ["?"])[-1]
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times), None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-r", "--repeats", type=int, default=3)
+    args = ap.parse_args()
+
+    rows = [("command_handler", "import komento_koodit.command_handler")]
+    for module in command_registry.PREWARM_ORDER:
+        rows.append((module, f"import komento_koodit.{module}"))
+    rows.append(("kaikki komentomoduulit", "\n".join(f"import komento_koodit.{m}" for m in command_registry.PREWARM_ORDER)))
+
+    failed = 0
+    for label, body in rows:
+        seconds, err = measure(body, args.repeats)
+        if seconds is None:
+            failed += 1
+            print(f"{label:28s} VIRHE: {err}")
+        else:
+            print(f"{label:28s} {seconds * 1000:8.0f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
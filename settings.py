@@ -35,6 +35,8 @@ CHECK_INTERVAL = int(os.environ.get('CHECK_INTERVAL', '600'))
 CHECK_REGISTRATION_INTERVAL = int(os.environ.get('CHECK_REGISTRATION_INTERVAL', '3600'))
 CAPACITY_CHECK_INTERVAL = int(os.environ.get('CAPACITY_CHECK_INTERVAL', '1800'))
 DISCS_CHECK_INTERVAL = int(os.environ.get('DISCS_CHECK_INTERVAL', '86400'))
+CLUB_LEADERBOARD_INTERVAL = int(os.environ.get('CLUB_LEADERBOARD_INTERVAL', '3600'))
+DISC_ASSET_WARM_INTERVAL = int(os.environ.get('DISC_ASSET_WARM_INTERVAL', '21600'))
 
 # Daily digest time (24h)
 DAILY_DIGEST_HOUR = int(os.environ.get('DAILY_DIGEST_HOUR', '4'))
@@ -73,6 +75,48 @@ NO_PDGANEWS_TEXT = "Ei uusia julkaisuja PDGA:lta, tarkistetaan huomenna uudestaa
 PDGA_SHOW_TIER = True
 PDGA_OMIT_TIME = True  # Remove specific time from PDGA listings (show only date)
 
+# Club leaderboard (!seura rating / kierrokset / vire)
+CLUB_NAME = os.environ.get('CLUB_NAME', 'Lakeus Disc Golf')
+CLUB_LEADERBOARD_WORKERS = int(os.environ.get('CLUB_LEADERBOARD_WORKERS', '3'))
+CLUB_LEADERBOARD_MAX_AGE_HOURS = int(os.environ.get('CLUB_LEADERBOARD_MAX_AGE_HOURS', '12'))
+
+# Disc card asset cache (image + flight numbers), TTLs in hours
+DISC_ASSET_TTL_HOURS = int(os.environ.get('DISC_ASSET_TTL_HOURS', str(24 * 14)))
+DISC_ASSET_NEGATIVE_TTL_HOURS = int(os.environ.get('DISC_ASSET_NEGATIVE_TTL_HOURS', '24'))
+# Fetch errors (timeout, 5xx) are cached only briefly, in minutes
+DISC_ASSET_ERROR_TTL_MINUTES = int(os.environ.get('DISC_ASSET_ERROR_TTL_MINUTES', '15'))
+
+# Registration checks: unchanged competitions are re-checked after this many hours
+REGISTRATION_RECHECK_HOURS = float(os.environ.get('REGISTRATION_RECHECK_HOURS', '6'))
+
+# Background job scheduler: max jobs running at the same time
+SCHEDULER_MAX_CONCURRENCY = int(os.environ.get('SCHEDULER_MAX_CONCURRENCY', '2'))
+
+# Command scraping pool: pool size, concurrency caps, queue depth and timeout (seconds)
+SCRAPE_WORKERS = int(os.environ.get('SCRAPE_WORKERS', '6'))
+SCRAPE_MAX_PER_COMMAND = int(os.environ.get('SCRAPE_MAX_PER_COMMAND', '3'))
+SCRAPE_MAX_PER_USER = int(os.environ.get('SCRAPE_MAX_PER_USER', '2'))
+SCRAPE_MAX_QUEUE = int(os.environ.get('SCRAPE_MAX_QUEUE', '24'))
+SCRAPE_TIMEOUT_SECONDS = float(os.environ.get('SCRAPE_TIMEOUT_SECONDS', '60'))
+
+# Identical concurrent Metrix lookups share one fetch; result kept this many seconds
+SINGLE_FLIGHT_TTL_SECONDS = float(os.environ.get('SINGLE_FLIGHT_TTL_SECONDS', '30'))
+
+# Discord REST posting (API base can point to a local stub, see scripts/discord_rest_stub.py)
+DISCORD_API_BASE = os.environ.get('DISCORD_API_BASE', 'https://discord.com/api/v10')
+DISCORD_REST_MAX_RETRIES = int(os.environ.get('DISCORD_REST_MAX_RETRIES', '5'))
+
+# Logging: records go through a queue to a background writer (see komento_koodit/bot_logging.py)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_DIR = os.environ.get('LOG_DIR', 'logs')
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', '5'))
+
+# Per-command metrics (komento_koodit/metrics.py): SQLite snapshot interval, retention and dump file
+METRICS_SNAPSHOT_INTERVAL = int(os.environ.get('METRICS_SNAPSHOT_INTERVAL', '300'))
+METRICS_KEEP_DAYS = int(os.environ.get('METRICS_KEEP_DAYS', '14'))
+METRICS_DUMP_FILE = os.environ.get('METRICS_DUMP_FILE', os.path.join('logs', 'metrics.json'))
+
 # Misc
 DEFAULT_MAX_PDGA_LIST = 40
 DEFAULT_MAX_WEEKLY_LIST = 40
@@ -83,8 +127,14 @@ __all__ = [
     'DISCORD_DISCS_THREAD_ID', 'WEEKLY_JSON', 'CACHE_FILE', 'REG_CHECK_FILE', 'KNOWN_WEEKLY_FILE',
     'KNOWN_DOUBLES_FILE', 'KNOWN_PDGA_DISCS_FILE', 'WEEKLY_LOCATION', 'WEEKLY_RADIUS_KM',
     'WEEKLY_SEARCH_URL', 'METRIX_URL', 'AUTO_LIST_INTERVAL', 'CHECK_INTERVAL', 'CHECK_REGISTRATION_INTERVAL',
-    'CAPACITY_CHECK_INTERVAL', 'DISCS_CHECK_INTERVAL', 'DAILY_DIGEST_HOUR', 'DAILY_DIGEST_MINUTE',
+    'CAPACITY_CHECK_INTERVAL', 'DISCS_CHECK_INTERVAL', 'CLUB_LEADERBOARD_INTERVAL', 'DISC_ASSET_WARM_INTERVAL', 'DAILY_DIGEST_HOUR', 'DAILY_DIGEST_MINUTE',
     'AUTO_RUN_ON_STARTUP', 'RUN_DIGEST_ON_PRESENCE', 'DISCORD_SHOW_DATE', 'DISCORD_DATE_FORMAT',
     'DISCORD_SHOW_ID', 'DISCORD_SHOW_LOCATION', 'DISCORD_LINE_SPACING', 'STARTUP_GREETING', 'STARTUP_PROMPT',
     'STARTUP_ORDER', 'LOW_SPOTS_WARNING', 'NO_PDGANEWS_TEXT', 'PDGA_SHOW_TIER', 'PDGA_OMIT_TIME',
+    'CLUB_NAME', 'CLUB_LEADERBOARD_WORKERS', 'CLUB_LEADERBOARD_MAX_AGE_HOURS',
+    'DISC_ASSET_TTL_HOURS', 'DISC_ASSET_NEGATIVE_TTL_HOURS', 'DISC_ASSET_ERROR_TTL_MINUTES', 'REGISTRATION_RECHECK_HOURS',
+    'SCHEDULER_MAX_CONCURRENCY', 'SCRAPE_WORKERS', 'SCRAPE_MAX_PER_COMMAND', 'SCRAPE_MAX_PER_USER',
+    'SCRAPE_MAX_QUEUE', 'SCRAPE_TIMEOUT_SECONDS', 'SINGLE_FLIGHT_TTL_SECONDS',
+    'DISCORD_API_BASE', 'DISCORD_REST_MAX_RETRIES', 'LOG_LEVEL', 'LOG_DIR', 'LOG_MAX_BYTES', 'LOG_BACKUP_COUNT',
+    'METRICS_SNAPSHOT_INTERVAL', 'METRICS_KEEP_DAYS', 'METRICS_DUMP_FILE',
 ]